@@ -1,10 +1,627 @@
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
 from datetime import datetime
+from functools import lru_cache, wraps
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from itertools import accumulate, compress, islice
+
+
+def reloj_sistema():
+    """Reloj por defecto: segundos enteros desde epoch"""
+    return int(time.time())
+
+
+class HistorialPrestamos:
+    """
+    Almacén columnar del historial de préstamos compartido por los equipos
+    de un sistema. Cada préstamo ocupa una fila en tres arreglos tipados
+    (id de equipo, id de usuario y fecha en segundos desde epoch) y los
+    nombres de usuario se guardan una sola vez.
+    
+    Las filas de cada equipo, de cada usuario y de cada tipo de equipo se
+    mantienen ordenadas por fecha, así que las consultas por rango de
+    fechas se resuelven con búsqueda binaria (ver rango_filas).
+    """
+    
+    def __init__(self, reloj=None):
+        """
+        Constructor del almacén de historial
+        
+        Args:
+            reloj (callable): Función que retorna la fecha actual como entero
+                de segundos desde epoch (por defecto reloj_sistema)
+        """
+        self.reloj = reloj or reloj_sistema
+        self._columna_equipo = array('I')
+        self._columna_usuario = array('I')
+        self._columna_fecha = array('q')
+        self._nombres_usuario = []  # Lista: id usuario -> nombre
+        self._ids_usuario = {}  # Diccionario: nombre -> id usuario
+        self._filas_por_equipo = []  # Lista: id equipo -> array de filas (None si no hay)
+        self._filas_base = None  # (inicio_filas, filas) de un snapshot, si se cargó uno
+        self._nombres_equipo = []  # Lista: id equipo -> nombre (después de los del snapshot)
+        self._tipos_equipo = []  # Lista: id equipo -> tipo (después de los del snapshot)
+        self._equipos_base = None  # (nombres, tipos) por id de los equipos de un snapshot
+        # Índices por usuario y por tipo, construidos en la primera consulta que los usa
+        self._filas_por_usuario = None  # Lista: id usuario -> array de filas (None si no hay)
+        self._filas_por_tipo = None  # Diccionario: tipo equipo -> array de filas
+        # Las fechas suelen llegar en orden; si no (reloj atrasado, historial
+        # adoptado), las consultas globales usan _orden_global
+        self._fechas_desordenadas = False  # None: desconocido (snapshot sin verificar)
+        self._orden_global = None  # Array de todas las filas ordenadas por fecha
+        self._solo_lectura = False
+        self.candado = None  # Lock opcional para escrituras desde varios hilos
+    
+    @classmethod
+    def desde_columnas(cls, columna_equipo, columna_usuario, columna_fecha, nombres_usuario,
+                       inicio_filas, filas, reloj=None, nombres_equipo=(), tipos_equipo=()):
+        """
+        Crea un almacén sobre columnas existentes (por ejemplo, memoryviews de
+        un snapshot mapeado en memoria) sin copiarlas. Las columnas se copian
+        a arreglos propios solo en la primera escritura.
+        
+        Args:
+            columna_equipo, columna_usuario, columna_fecha: Columnas del historial
+            nombres_usuario (Sequence): Nombres de usuario por id
+            inicio_filas (Sequence): Para cada equipo, posición donde empiezan sus
+                filas en `filas` (con un elemento final adicional)
+            filas (Sequence): Filas de todos los equipos agrupadas por equipo
+            reloj (callable): Reloj del almacén
+            nombres_equipo, tipos_equipo (Sequence): Nombre y tipo de cada equipo por id
+            
+        Returns:
+            HistorialPrestamos: Almacén de solo lectura hasta la primera escritura
+        """
+        historial = cls(reloj)
+        historial._columna_equipo = columna_equipo
+        historial._columna_usuario = columna_usuario
+        historial._columna_fecha = columna_fecha
+        historial._nombres_usuario = nombres_usuario
+        historial._ids_usuario = None
+        historial._filas_por_equipo = [None] * (len(inicio_filas) - 1)
+        historial._filas_base = (inicio_filas, filas)
+        historial._equipos_base = (nombres_equipo, tipos_equipo)
+        historial._fechas_desordenadas = None
+        historial._solo_lectura = True
+        return historial
+    
+    def _copiar_columnas(self):
+        """Copia las columnas de solo lectura a arreglos propios para poder escribir"""
+        for atributo, tipo in (("_columna_equipo", 'I'), ("_columna_usuario", 'I'), ("_columna_fecha", 'q')):
+            columna = array(tipo)
+            columna.frombytes(memoryview(getattr(self, atributo)).cast('B'))
+            setattr(self, atributo, columna)
+        self._nombres_usuario = list(self._nombres_usuario)
+        self._ids_usuario = {nombre: id_usuario for id_usuario, nombre in enumerate(self._nombres_usuario)}
+        self._solo_lectura = False
+    
+    def _filas(self, id_equipo):
+        """Retorna el arreglo de filas de un equipo (None si no tiene préstamos)"""
+        filas = self._filas_por_equipo[id_equipo]
+        if filas is None and self._filas_base is not None:
+            inicio_filas, filas_base = self._filas_base
+            if id_equipo < len(inicio_filas) - 1 and inicio_filas[id_equipo] < inicio_filas[id_equipo + 1]:
+                filas = self._filas_por_equipo[id_equipo] = array('I')
+                filas.frombytes(filas_base[inicio_filas[id_equipo]:inicio_filas[id_equipo + 1]].cast('B'))
+        return filas
+    
+    def __len__(self):
+        """Cantidad total de préstamos registrados"""
+        return len(self._columna_fecha)
+    
+    def registrar_equipo(self, nombre=None, tipo_equipo=None):
+        """
+        Reserva un identificador para un nuevo equipo
+        
+        Args:
+            nombre (str): Nombre del equipo
+            tipo_equipo (str): Tipo del equipo, para las consultas por tipo
+        
+        Returns:
+            int: Identificador del equipo dentro del almacén
+        """
+        self._filas_por_equipo.append(None)
+        self._nombres_equipo.append(nombre)
+        self._tipos_equipo.append(tipo_equipo)
+        return len(self._filas_por_equipo) - 1
+    
+    def _dato_equipo(self, id_equipo, propios, posicion):
+        """Retorna el nombre o el tipo de un equipo, del snapshot o de las listas propias"""
+        if self._equipos_base is not None:
+            base = self._equipos_base[posicion]
+            if id_equipo < len(base):
+                return base[id_equipo]
+            id_equipo -= len(base)
+        return propios[id_equipo]
+    
+    def nombre_equipo(self, id_equipo):
+        """Retorna el nombre de un equipo a partir de su id en el almacén"""
+        return self._dato_equipo(id_equipo, self._nombres_equipo, 0)
+    
+    def tipo_equipo(self, id_equipo):
+        """Retorna el tipo de un equipo a partir de su id en el almacén"""
+        return self._dato_equipo(id_equipo, self._tipos_equipo, 1)
+    
+    def _id_usuario(self, usuario):
+        """Retorna el id interno del usuario, creándolo si no existe"""
+        id_usuario = self._ids_usuario.get(usuario)
+        if id_usuario is None:
+            id_usuario = len(self._nombres_usuario)
+            self._nombres_usuario.append(usuario)
+            self._ids_usuario[usuario] = id_usuario
+        return id_usuario
+    
+    def agregar(self, id_equipo, usuario, fecha):
+        """
+        Agrega un préstamo al historial
+        
+        Args:
+            id_equipo (int): Identificador del equipo
+            usuario (str): Nombre del usuario
+            fecha (int): Fecha del préstamo en segundos desde epoch
+        """
+        if self.candado is not None:
+            with self.candado:
+                self._agregar(id_equipo, usuario, fecha)
+        else:
+            self._agregar(id_equipo, usuario, fecha)
+    
+    def _agregar(self, id_equipo, usuario, fecha):
+        """Agrega la fila del préstamo a las columnas (ver agregar)"""
+        if self._solo_lectura:
+            self._copiar_columnas()
+        filas = self._filas(id_equipo)
+        if filas is None:
+            filas = self._filas_por_equipo[id_equipo] = array('I')
+        columna_fecha = self._columna_fecha
+        fila = len(columna_fecha)
+        if fila and fecha < columna_fecha[-1]:
+            self._fechas_desordenadas = True
+        id_usuario = self._id_usuario(usuario)
+        self._columna_equipo.append(id_equipo)
+        self._columna_usuario.append(id_usuario)
+        columna_fecha.append(fecha)
+        self._insertar_fila(filas, fila)
+        if self._orden_global is not None:
+            self._insertar_fila(self._orden_global, fila)
+        if self._filas_por_usuario is not None:
+            self._indexar_fila(fila, id_equipo, id_usuario)
+    
+    def _insertar_fila(self, filas, fila):
+        """Agrega una fila a un índice manteniéndolo ordenado por fecha"""
+        fechas = self._columna_fecha
+        if filas and fechas[fila] < fechas[filas[-1]]:
+            insort(filas, fila, key=fechas.__getitem__)
+        else:
+            filas.append(fila)
+    
+    def _indexar_fila(self, fila, id_equipo, id_usuario):
+        """Agrega una fila nueva a los índices por usuario y por tipo"""
+        por_usuario = self._filas_por_usuario
+        if id_usuario >= len(por_usuario):
+            por_usuario.extend([None] * (id_usuario + 1 - len(por_usuario)))
+        filas = por_usuario[id_usuario]
+        if filas is None:
+            filas = por_usuario[id_usuario] = array('I')
+        self._insertar_fila(filas, fila)
+        tipo_equipo = self.tipo_equipo(id_equipo)
+        filas = self._filas_por_tipo.get(tipo_equipo)
+        if filas is None:
+            filas = self._filas_por_tipo[tipo_equipo] = array('I')
+        self._insertar_fila(filas, fila)
+    
+    def _verificar_orden(self):
+        """Comprueba una sola vez si las fechas de un snapshot están en orden"""
+        if self._fechas_desordenadas is None:
+            fechas = self._columna_fecha
+            self._fechas_desordenadas = any(fechas[i] > fechas[i + 1] for i in range(len(fechas) - 1))
+        return self._fechas_desordenadas
+    
+    def filas_por_fecha(self):
+        """
+        Retorna todas las filas en orden cronológico
+        
+        Returns:
+            Sequence: range de las filas si las fechas llegaron en orden, o un
+                array de filas ordenado por fecha (se construye una sola vez)
+        """
+        if not self._verificar_orden():
+            return range(len(self._columna_fecha))
+        if self._orden_global is None:
+            return self._con_candado(self._ordenar_filas)
+        return self._orden_global
+    
+    def _con_candado(self, funcion):
+        """Ejecuta la función tomando el candado del almacén, si tiene uno"""
+        if self.candado is None:
+            return funcion()
+        with self.candado:
+            return funcion()
+    
+    def _ordenar_filas(self):
+        """Construye _orden_global si todavía no existe y lo retorna"""
+        if self._orden_global is None:
+            fechas = self._columna_fecha
+            self._orden_global = array('I', sorted(range(len(fechas)), key=fechas.__getitem__))
+        return self._orden_global
+    
+    def _construir_indices(self):
+        """Construye los índices por usuario y por tipo recorriendo las columnas una vez"""
+        if self._filas_por_usuario is not None:
+            return
+        por_usuario = [None] * len(self._nombres_usuario)
+        por_tipo = {}
+        tipos = {}  # Caché: id equipo -> array de filas de su tipo
+        columna_equipo = self._columna_equipo
+        columna_usuario = self._columna_usuario
+        # Recorrer en orden cronológico permite agregar siempre al final
+        filas = self._ordenar_filas() if self._verificar_orden() else range(len(self._columna_fecha))
+        for fila in filas:
+            id_equipo = columna_equipo[fila]
+            filas_tipo = tipos.get(id_equipo)
+            if filas_tipo is None:
+                filas_tipo = tipos[id_equipo] = por_tipo.setdefault(self.tipo_equipo(id_equipo), array('I'))
+            filas_tipo.append(fila)
+            filas_usuario = por_usuario[columna_usuario[fila]]
+            if filas_usuario is None:
+                filas_usuario = por_usuario[columna_usuario[fila]] = array('I')
+            filas_usuario.append(fila)
+        self._filas_por_tipo = por_tipo
+        self._filas_por_usuario = por_usuario
+    
+    def filas_usuario(self, id_usuario):
+        """Retorna las filas de un usuario en orden cronológico"""
+        if self._filas_por_usuario is None:
+            self._con_candado(self._construir_indices)
+        por_usuario = self._filas_por_usuario
+        return (por_usuario[id_usuario] if id_usuario < len(por_usuario) else None) or ()
+    
+    def filas_tipo(self, tipo_equipo):
+        """Retorna las filas de los equipos de un tipo en orden cronológico"""
+        if self._filas_por_usuario is None:
+            self._con_candado(self._construir_indices)
+        return self._filas_por_tipo.get(tipo_equipo, ())
+    
+    def fecha_ultimo_prestamo(self, id_equipo):
+        """Retorna la fecha del préstamo más reciente de un equipo, o None si no tiene"""
+        filas = self._filas(id_equipo)
+        return self._columna_fecha[filas[-1]] if filas else None
+    
+    def buscar_usuario(self, usuario):
+        """Retorna el id interno de un usuario, o None si no tiene préstamos"""
+        if self._ids_usuario is None:
+            self._ids_usuario = {nombre: id_usuario for id_usuario, nombre in enumerate(self._nombres_usuario)}
+        return self._ids_usuario.get(usuario)
+    
+    def rango_filas(self, filas, desde=None, hasta=None):
+        """
+        Calcula por búsqueda binaria qué filas de un índice caen en un rango de
+        fechas. Las filas de cada índice están en orden cronológico.
+        
+        Args:
+            filas (Sequence): Filas de un equipo, de un usuario, de un tipo o
+                de todo el historial (ver filas_por_fecha)
+            desde (int): Fecha mínima inclusiva (None para no limitar)
+            hasta (int): Fecha máxima inclusiva (None para no limitar)
+            
+        Returns:
+            tuple: (inicio, fin) de las posiciones dentro de `filas`
+        """
+        fecha = self._columna_fecha.__getitem__
+        inicio = bisect_left(filas, desde, key=fecha) if desde is not None else 0
+        fin = bisect_right(filas, hasta, key=fecha) if hasta is not None else len(filas)
+        return inicio, fin
+    
+    def cantidad(self, id_equipo):
+        """Cantidad de préstamos registrados para un equipo"""
+        filas = self._filas(id_equipo)
+        return len(filas) if filas is not None else 0
+    
+    def prestamos(self, id_equipo):
+        """
+        Genera los préstamos de un equipo en orden cronológico
+        
+        Yields:
+            tuple: (usuario, fecha en segundos desde epoch)
+        """
+        nombres = self._nombres_usuario
+        columna_usuario = self._columna_usuario
+        columna_fecha = self._columna_fecha
+        for fila in self._filas(id_equipo) or ():
+            yield nombres[columna_usuario[fila]], columna_fecha[fila]
+    
+    def cortes_retencion(self, max_prestamos=None, desde=None):
+        """
+        Calcula cuántos de los préstamos más antiguos de cada equipo quedan
+        fuera de la ventana de retención
+        
+        Args:
+            max_prestamos (int): Préstamos a conservar por equipo (None sin límite)
+            desde (int): Fecha mínima a conservar (None sin límite)
+            
+        Returns:
+            list: Pares (id equipo, cantidad de filas a quitar), solo de los
+                equipos que tienen filas fuera de la ventana
+        """
+        fecha = self._columna_fecha.__getitem__
+        cortes = []
+        for id_equipo in range(len(self._filas_por_equipo)):
+            filas = self._filas(id_equipo)
+            if not filas:
+                continue
+            corte = max(0, len(filas) - max_prestamos) if max_prestamos is not None else 0
+            if desde is not None:
+                corte = max(corte, bisect_left(filas, desde, key=fecha))
+            if corte:
+                cortes.append((id_equipo, corte))
+        return cortes
+    
+    def filas_cortadas(self, cortes):
+        """
+        Genera los préstamos que quitará compactar(cortes), por equipo y en
+        orden cronológico
+        
+        Yields:
+            tuple: (id equipo, usuario, fecha en segundos desde epoch)
+        """
+        nombres = self._nombres_usuario
+        columna_usuario = self._columna_usuario
+        columna_fecha = self._columna_fecha
+        for id_equipo, corte in cortes:
+            for fila in self._filas(id_equipo)[:corte]:
+                yield id_equipo, nombres[columna_usuario[fila]], columna_fecha[fila]
+    
+    def compactar(self, cortes):
+        """
+        Quita las filas más antiguas de cada equipo según `cortes` (ver
+        cortes_retencion) y reconstruye las columnas con solo las filas
+        restantes, renumeradas. Los índices por usuario, por tipo y global se
+        descartan y se reconstruyen en la próxima consulta.
+        
+        Args:
+            cortes (list): Pares (id equipo, cantidad de filas a quitar)
+            
+        Returns:
+            int: Cantidad de filas quitadas
+        """
+        if self._solo_lectura:
+            self._copiar_columnas()
+        if self._filas_base is not None:
+            # Las filas de un snapshot se copian antes de renumerarlas
+            for id_equipo in range(len(self._filas_por_equipo)):
+                self._filas(id_equipo)
+            self._filas_base = None
+        
+        conservar = array('b', [1]) * len(self._columna_fecha)
+        quitadas = 0
+        for id_equipo, corte in cortes:
+            filas = self._filas_por_equipo[id_equipo]
+            for fila in filas[:corte]:
+                conservar[fila] = 0
+            self._filas_por_equipo[id_equipo] = filas[corte:] if corte < len(filas) else None
+            quitadas += corte
+        
+        # La nueva posición de cada fila conservada es la cantidad de filas conservadas hasta ella, menos uno
+        posiciones = array('I', accumulate(conservar))
+        for atributo, tipo in (("_columna_equipo", 'I'), ("_columna_usuario", 'I'), ("_columna_fecha", 'q')):
+            setattr(self, atributo, array(tipo, compress(getattr(self, atributo), conservar)))
+        for id_equipo, filas in enumerate(self._filas_por_equipo):
+            if filas:
+                self._filas_por_equipo[id_equipo] = array('I', [posiciones[fila] - 1 for fila in filas])
+        self._filas_por_usuario = None
+        self._filas_por_tipo = None
+        self._orden_global = None
+        if self._fechas_desordenadas:
+            self._fechas_desordenadas = None
+        return quitadas
+    
+    def adoptar(self, otro, id_equipo):
+        """
+        Copia a este almacén los préstamos de un equipo guardados en otro
+        
+        Args:
+            otro (HistorialPrestamos): Almacén de origen
+            id_equipo (int): Identificador del equipo en el almacén de origen
+            
+        Returns:
+            int: Nuevo identificador del equipo en este almacén
+        """
+        nuevo_id = self.registrar_equipo(otro.nombre_equipo(id_equipo), otro.tipo_equipo(id_equipo))
+        for usuario, fecha in otro.prestamos(id_equipo):
+            self.agregar(nuevo_id, usuario, fecha)
+        return nuevo_id
+
+
+@lru_cache(maxsize=1024)
+def formatear_fecha(fecha):
+    """Convierte segundos desde epoch al formato 'YYYY-mm-dd HH:MM:SS' (con caché)"""
+    return datetime.fromtimestamp(fecha).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def escribir_en_bloques(textos, salida=None, tam_bloque=512):
+    """
+    Escribe textos en la salida agrupados en bloques: una sola escritura y un
+    flush por cada `tam_bloque` textos, sin acumular el reporte completo.
+    
+    Args:
+        textos (iterable): Textos a escribir, uno por línea
+        salida: Archivo de texto destino (por defecto sys.stdout)
+        tam_bloque (int): Cantidad de textos por escritura
+    """
+    salida = salida or sys.stdout
+    textos = iter(textos)
+    while True:
+        bloque = list(islice(textos, tam_bloque))
+        if not bloque:
+            break
+        bloque.append("")
+        salida.write("\n".join(bloque))
+        salida.flush()
+
+
+def paginar(filas, limite):
+    """
+    Toma una página de un generador de filas (cursor, valor); el valor suele
+    ser el texto de la fila
+    
+    Args:
+        filas (iterator): Filas con el cursor para continuar después de cada una
+        limite (int): Cantidad máxima de filas de la página
+        
+    Returns:
+        tuple: (lista de valores, cursor de la página siguiente o None si no hay más)
+    """
+    textos = []
+    cursor = None
+    for cursor, texto in islice(filas, limite):
+        textos.append(texto)
+    if next(filas, None) is None:
+        cursor = None
+    return textos, cursor
+
+
+def _a_epoch(fecha):
+    """Convierte un datetime a segundos desde epoch; deja pasar enteros y None"""
+    return int(fecha.timestamp()) if isinstance(fecha, datetime) else fecha
+
+
+def _medido(operacion, lote=False):
+    """
+    Decorador de los métodos públicos de SistemaPrestamos: si las métricas
+    están activas, registra la latencia de cada llamada (y, con lote=True,
+    los códigos de resultado del arreglo retornado). La envoltura cuesta
+    unos cientos de nanosegundos, así que las operaciones individuales más
+    frecuentes comprueban _metricas en línea en lugar de usarlo.
+    
+    Args:
+        operacion (str): Nombre de la operación en las métricas
+        lote (bool): Si el método retorna un arreglo de códigos de resultado
+    """
+    def decorador(metodo):
+        @wraps(metodo)
+        def medido(self, *args, **kwargs):
+            metricas = self._metricas
+            if metricas is None:
+                return metodo(self, *args, **kwargs)
+            inicio = time.perf_counter()
+            resultado = metodo(self, *args, **kwargs)
+            if lote:
+                metricas.registrar_lote(operacion, time.perf_counter() - inicio, resultado)
+            else:
+                metricas.registrar(operacion, time.perf_counter() - inicio)
+            return resultado
+        return medido
+    return decorador
+
+
+class VistaSoloLectura(Sequence):
+    """
+    Vista de solo lectura sobre una colección interna. Permite iterar,
+    usar len(), indexar y comprobar pertenencia sin copiar los datos.
+    """
+    
+    __slots__ = ("_datos",)
+    
+    def __init__(self, datos):
+        """
+        Constructor de la vista
+        
+        Args:
+            datos (list): Colección interna que se expone
+        """
+        self._datos = datos
+    
+    def __len__(self):
+        return len(self._datos)
+    
+    def __getitem__(self, indice):
+        return self._datos[indice]
+    
+    def __iter__(self):
+        return iter(self._datos)
+    
+    def __contains__(self, elemento):
+        return elemento in self._datos
+    
+    def __eq__(self, otro):
+        if isinstance(otro, Sequence) and not isinstance(otro, str):
+            return self.copia() == list(otro)
+        return NotImplemented
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({self.copia()!r})"
+    
+    def copia(self):
+        """Retorna una copia independiente de los datos como lista"""
+        return list(self)
+
+
+class VistaClaves(VistaSoloLectura):
+    """
+    Vista de solo lectura sobre un diccionario usado como conjunto ordenado.
+    La pertenencia es O(1); indexar por posición recorre las claves.
+    """
+    
+    __slots__ = ()
+    
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return list(self._datos)[indice]
+        if indice < 0:
+            indice += len(self._datos)
+        if not 0 <= indice < len(self._datos):
+            raise IndexError("índice fuera de rango")
+        return next(islice(self._datos, indice, None))
+
+
+class VistaHistorial(VistaSoloLectura):
+    """
+    Vista de solo lectura sobre el historial de un equipo. Los préstamos
+    se leen del almacén columnar y se convierten en tuplas
+    (usuario, fecha formateada) solo al acceder a ellos.
+    """
+    
+    __slots__ = ()
+    
+    def _filas(self):
+        """Retorna el arreglo de filas del equipo en el almacén (o una tupla vacía)"""
+        equipo = self._datos
+        if equipo._historial is None:
+            return ()
+        return equipo._historial._filas(equipo._id_historial) or ()
+    
+    def _prestamo(self, fila):
+        """Construye la tupla (usuario, fecha formateada) de una fila"""
+        historial = self._datos._historial
+        return (historial._nombres_usuario[historial._columna_usuario[fila]],
+                formatear_fecha(historial._columna_fecha[fila]))
+    
+    def __len__(self):
+        return len(self._filas())
+    
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self._prestamo(fila) for fila in self._filas()[indice]]
+        return self._prestamo(self._filas()[indice])
+    
+    def __iter__(self):
+        return (self._prestamo(fila) for fila in self._filas())
+    
+    def __contains__(self, elemento):
+        return any(prestamo == elemento for prestamo in self)
 
 
 class Equipo:
     """Clase base que representa un equipo en el sistema de préstamos"""
     
+    # __weakref__ permite que el inventario compacto siga los equipos materializados
+    __slots__ = ("_nombre", "_tipo_equipo", "_disponible", "_historial", "_id_historial", "_observador",
+                 "__weakref__")
+    
     def __init__(self, nombre, tipo_equipo):
         """
         Constructor de la clase Equipo
@@ -16,7 +633,9 @@ class Equipo:
         self._nombre = nombre
         self._tipo_equipo = tipo_equipo
         self._disponible = True
-        self._historial_prestamos = []
+        self._historial = None  # Almacén de historial, se crea o comparte al usarlo
+        self._id_historial = -1
+        self._observador = None  # Sistema que se notifica al cambiar la disponibilidad
     
     @property
     def nombre(self):
@@ -35,15 +654,55 @@ class Equipo:
     
     @property
     def historial_prestamos(self):
-        """Propiedad de solo lectura para el historial de préstamos"""
-        return self._historial_prestamos.copy()  # Retorna copia para proteger datos
+        """
+        Propiedad de solo lectura para el historial de préstamos.
+        Retorna una vista sin copia; usar .copia() para obtener una lista.
+        """
+        return VistaHistorial(self)
+    
+    def prestamos(self):
+        """
+        Genera el historial sin formatear las fechas
+        
+        Yields:
+            tuple: (usuario, fecha en segundos desde epoch)
+        """
+        if self._historial is not None:
+            yield from self._historial.prestamos(self._id_historial)
+    
+    def fecha_ultimo_prestamo(self):
+        """Retorna la fecha (segundos desde epoch) del último préstamo, o None"""
+        if self._historial is None:
+            return None
+        return self._historial.fecha_ultimo_prestamo(self._id_historial)
+    
+    def cantidad_prestamos(self):
+        """Retorna la cantidad de préstamos registrados sin construir el historial"""
+        if self._historial is None:
+            return 0
+        return self._historial.cantidad(self._id_historial)
+    
+    def _usar_historial(self, historial):
+        """
+        Traslada el historial del equipo a un almacén compartido
+        
+        Args:
+            historial (HistorialPrestamos): Almacén del sistema
+        """
+        if self._historial is None:
+            self._id_historial = historial.registrar_equipo(self._nombre, self._tipo_equipo)
+        elif historial is not self._historial:
+            self._id_historial = historial.adoptar(self._historial, self._id_historial)
+        self._historial = historial
     
-    def prestar(self, usuario):
+    def prestar(self, usuario, fecha=None):
         """
         Presta el equipo a un usuario
         
         Args:
             usuario (str): Nombre del usuario
+            fecha (int): Fecha del préstamo en segundos desde epoch (por
+                defecto, la del reloj del historial)
             
         Returns:
             bool: True si el préstamo fue exitoso, False en caso contrario
@@ -51,10 +710,13 @@ class Equipo:
         if not self._disponible:
             return False
         
-        fecha_actual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        prestamo = (usuario, fecha_actual)
-        self._historial_prestamos.append(prestamo)
+        if self._historial is None:
+            self._usar_historial(HistorialPrestamos())
+        if fecha is None:
+            fecha = self._historial.reloj()
+        self._historial.agregar(self._id_historial, usuario, fecha)
         self._disponible = False
+        self._notificar_cambio()
         return True
     
     def devolver(self):
@@ -68,8 +730,18 @@ class Equipo:
             return False
         
         self._disponible = True
+        self._notificar_cambio()
         return True
     
+    def _notificar_cambio(self):
+        """Avisa al sistema registrado que la disponibilidad del equipo cambió"""
+        if self._observador is not None:
+            self._observador._actualizar_disponibilidad(self)
+    
+    def _datos_constructor(self):
+        """Retorna los argumentos con los que se puede reconstruir el equipo"""
+        return (self._nombre, self._tipo_equipo)
+    
     def __str__(self):
         """Representación en cadena del equipo"""
         estado = "Disponible" if self._disponible else "Prestado"
@@ -79,6 +751,8 @@ class Equipo:
 class EquipoComputo(Equipo):
     """Clase específica para equipos de cómputo"""
     
+    __slots__ = ("_sistema_operativo", "_ram")
+    
     def __init__(self, nombre, sistema_operativo="Windows", ram="8GB"):
         """
         Constructor para equipo de cómputo
@@ -102,6 +776,10 @@ class EquipoComputo(Equipo):
         """Propiedad para la RAM"""
         return self._ram
     
+    def _datos_constructor(self):
+        """Retorna los argumentos con los que se puede reconstruir el equipo"""
+        return (self._nombre, self._sistema_operativo, self._ram)
+    
     def __str__(self):
         """Representación específica para equipos de cómputo"""
         estado = "Disponible" if self._disponible else "Prestado"
@@ -111,246 +789,1773 @@ class EquipoComputo(Equipo):
 class Tablet(Equipo):
     """Clase específica para tablets"""
     
-    def __init__(self, nombre, pulgadas="10", bateria="8000mAh"):
+    __slots__ = ("_pulgadas", "_bateria")
+    
+    def __init__(self, nombre, pulgadas="10", bateria="8000mAh"):
+        """
+        Constructor para tablet
+        
+        Args:
+            nombre (str): Nombre de la tablet
+            pulgadas (str): Tamaño de pantalla en pulgadas
+            bateria (str): Capacidad de batería
+        """
+        super().__init__(nombre, "Tablet")
+        self._pulgadas = pulgadas
+        self._bateria = bateria
+    
+    @property
+    def pulgadas(self):
+        """Propiedad para el tamaño de pantalla"""
+        return self._pulgadas
+    
+    @property
+    def bateria(self):
+        """Propiedad para la batería"""
+        return self._bateria
+    
+    def _datos_constructor(self):
+        """Retorna los argumentos con los que se puede reconstruir el equipo"""
+        return (self._nombre, self._pulgadas, self._bateria)
+    
+    def __str__(self):
+        """Representación específica para tablets"""
+        estado = "Disponible" if self._disponible else "Prestado"
+        return f"{self._nombre} (Tablet - {self._pulgadas}\", {self._bateria}) - {estado}"
+
+
+# Clases de equipo por nombre, usadas para reconstruir equipos guardados
+CLASES_EQUIPO = {clase.__name__: clase for clase in (Equipo, EquipoComputo, Tablet)}
+
+
+class Usuario:
+    """Clase que representa un usuario del sistema"""
+    
+    __slots__ = ("_nombre", "_email", "_tipo_usuario", "_equipos_prestados")
+    
+    def __init__(self, nombre, email, tipo_usuario="Estudiante"):
+        """
+        Constructor de la clase Usuario
+        
+        Args:
+            nombre (str): Nombre del usuario
+            email (str): Email del usuario
+            tipo_usuario (str): Tipo de usuario (Estudiante, Profesor, Admin)
+        """
+        self._nombre = nombre
+        self._email = email
+        self._tipo_usuario = tipo_usuario
+        self._equipos_prestados = {}  # Diccionario usado como conjunto ordenado: nombre -> None
+    
+    @property
+    def nombre(self):
+        """Propiedad de solo lectura para el nombre"""
+        return self._nombre
+    
+    @property
+    def email(self):
+        """Propiedad de solo lectura para el email"""
+        return self._email
+    
+    @property
+    def tipo_usuario(self):
+        """Propiedad de solo lectura para el tipo de usuario"""
+        return self._tipo_usuario
+    
+    @property
+    def equipos_prestados(self):
+        """
+        Propiedad de solo lectura para equipos prestados.
+        Retorna una vista sin copia; usar .copia() para obtener una lista.
+        """
+        return VistaClaves(self._equipos_prestados)
+    
+    def agregar_equipo_prestado(self, equipo):
+        """Agrega un equipo a los prestados del usuario en O(1), conservando el orden"""
+        self._equipos_prestados[equipo] = None
+    
+    def remover_equipo_prestado(self, equipo):
+        """Remueve un equipo de los prestados del usuario en O(1)"""
+        self._equipos_prestados.pop(equipo, None)
+    
+    def __str__(self):
+        """Representación en cadena del usuario"""
+        return f"{self._nombre} ({self._tipo_usuario}) - {self._email}"
+
+
+# Códigos de resultado de las operaciones de préstamo y devolución
+RESULTADO_OK = 0
+RESULTADO_EQUIPO_INEXISTENTE = 1
+RESULTADO_EQUIPO_PRESTADO = 2
+RESULTADO_EQUIPO_DISPONIBLE = 3
+RESULTADO_ERROR = 4
+RESULTADO_EN_ESPERA = 5  # Reserva: el equipo está prestado y el usuario quedó en la cola
+
+
+class SistemaPrestamos:
+    """Clase principal que gestiona el sistema de préstamos"""
+    
+    def __init__(self, reloj=None, bitacora=None, snapshot=None, concurrente=False, franjas_candados=1024,
+                 datos_prueba=True, metricas=False, inventario_compacto=False, cache_equipos=10_000):
+        """
+        Constructor del sistema de préstamos
+        
+        Args:
+            reloj (callable): Función que retorna la fecha actual como entero
+                de segundos desde epoch; permite inyectar el tiempo en pruebas
+            bitacora (BitacoraPrestamos): Bitácora donde se guardan las
+                operaciones; si tiene registros, el estado se reconstruye
+                a partir de ella en lugar de usar los datos de prueba
+            snapshot (str): Ruta de un snapshot a cargar en lugar de los datos
+                de prueba; de la bitácora, si se indica, se aplican encima
+                solo los registros posteriores al snapshot
+            concurrente (bool): Si es True, los préstamos y devoluciones se
+                pueden llamar desde varios hilos (ver _candado_equipo)
+            franjas_candados (int): Cantidad de candados por equipo y por
+                usuario en modo concurrente
+            datos_prueba (bool): Si es False, el sistema empieza vacío cuando
+                no hay snapshot ni registros en la bitácora
+            metricas (bool): Si es True, se activan las métricas de las
+                operaciones (ver activar_metricas)
+            inventario_compacto (bool): Si es True, los equipos se guardan en
+                columnas y los objetos Equipo se crean al pedirlos (ver
+                inventario_prestamos); no se combina con `snapshot`
+            cache_equipos (int): Objetos Equipo que se conservan en la caché
+                LRU del inventario compacto
+        """
+        self._equipos = {}  # Diccionario: nombre -> objeto Equipo
+        self._usuarios = {}  # Diccionario: nombre -> objeto Usuario
+        self._prestamos_activos = {}  # Diccionario: nombre equipo -> nombre usuario
+        # Particiones de nombres de equipos (dict usado como conjunto ordenado)
+        self._equipos_disponibles = {}
+        self._equipos_prestados = {}
+        self._equipos_por_tipo = {}  # Diccionario: tipo -> {nombre: None}
+        # Contadores incrementales de estadisticas() (None: se recalculan al consultarlos)
+        self._conteo_por_tipo = {}  # Diccionario: tipo equipo -> [equipos, prestados, préstamos]
+        self._conteo_por_tipo_usuario = {}  # Diccionario: tipo usuario -> [usuarios, préstamos activos, 0]
+        self._historial = HistorialPrestamos(reloj)  # Historial compartido por todos los equipos
+        # Índices de búsqueda de nombres (IndiceBusqueda), construidos en la primera búsqueda
+        self._busqueda_equipos = None
+        self._busqueda_usuarios = None
+        self._bitacora = None  # Se asigna después de reproducir para no registrar dos veces
+        self._snapshot = None  # Archivo mapeado en memoria, si se cargó un snapshot
+        self._metricas = None  # MetricasPrestamos, si están activas
+        self._archivo_historial = None  # ArchivoHistorial de los préstamos fuera de la ventana de retención
+        self._retencion = (None, None)  # (préstamos por equipo, días) que se conservan en memoria
+        # Referencia débil a la CapaCambios de la última instantánea (ver instantanea)
+        self._capa_cambios = None
+        self._reservas = None  # ColaReservas, creada con la primera reserva (ver activar_reservas)
+        self._vencimientos = None  # AgendaVencimientos, si se configuraron (ver configurar_vencimientos)
+        
+        # Candados del modo concurrente. Cada nombre se asigna a una franja por
+        # hash; el orden de adquisición es siempre equipo -> usuario -> altas,
+        # y nunca se toma más de uno de cada tipo, así que no hay interbloqueos.
+        self._candados_equipo = None
+        self._candados_usuario = None
+        self._candado_altas = None
+        self._candado_conteo = None
+        if concurrente:
+            self._candados_equipo = [threading.Lock() for _ in range(franjas_candados)]
+            self._candados_usuario = [threading.Lock() for _ in range(franjas_candados)]
+            self._candado_altas = threading.Lock()
+            self._candado_conteo = threading.Lock()
+            self._historial.candado = threading.Lock()
+        
+        if inventario_compacto:
+            if snapshot is not None:
+                raise ValueError("El inventario compacto no se puede combinar con un snapshot.")
+            from inventario_prestamos import InventarioColumnar
+            self._equipos = InventarioColumnar(self, cache_equipos, concurrente)
+            self._equipos_disponibles = self._equipos.particion(True)
+            self._equipos_prestados = self._equipos.particion(False)
+            self._equipos_por_tipo = self._equipos.por_tipo()
+        
+        posicion_bitacora = 0
+        if snapshot is not None:
+            posicion_bitacora = self._cargar_snapshot(snapshot)
+        reproducidos = self._reproducir_bitacora(bitacora, posicion_bitacora) if bitacora is not None else 0
+        self._bitacora = bitacora
+        if datos_prueba and snapshot is None and not reproducidos:
+            self._inicializar_datos_prueba()
+        if metricas:
+            self.activar_metricas()
+    
+    @property
+    def metricas(self):
+        """Métricas de las operaciones (MetricasPrestamos), o None si no están activas"""
+        return self._metricas
+    
+    def activar_metricas(self):
+        """
+        Activa el registro de llamadas, errores y latencias de las operaciones
+        públicas. Mientras están desactivadas cada operación solo comprueba
+        que _metricas sea None.
+        
+        Returns:
+            MetricasPrestamos: Métricas activas (las existentes si ya lo estaban)
+        """
+        if self._metricas is None:
+            from metricas_prestamos import MetricasPrestamos
+            self._metricas = MetricasPrestamos(concurrente=self._candados_equipo is not None)
+        return self._metricas
+    
+    def desactivar_metricas(self):
+        """Desactiva las métricas y descarta los contadores"""
+        self._metricas = None
+    
+    def _cargar_snapshot(self, ruta):
+        """
+        Carga el estado desde un snapshot mapeado en memoria. Los equipos y
+        usuarios se crean la primera vez que se accede a ellos y las
+        particiones se construyen la primera vez que se usan, así que el
+        tiempo de carga no depende del tamaño del inventario.
+        
+        Args:
+            ruta (str): Ruta del snapshot
+            
+        Returns:
+            int: Posición de la bitácora hasta la cual el snapshot ya incluye los registros
+        """
+        from snapshot_prestamos import (
+            AUSENTE, ArchivoSnapshot, DiccionarioDiferido, IndiceNombres, MapaPerezoso, MapaSuperpuesto)
+        
+        archivo = ArchivoSnapshot(ruta)
+        candado_historial = self._historial.candado
+        tabla_equipos = archivo.tabla("equipos")
+        indice_equipos = IndiceNombres(tabla_equipos, archivo.seccion("equipos_orden"))
+        tabla_usuarios = archivo.tabla("usuarios")
+        indice_usuarios = IndiceNombres(tabla_usuarios, archivo.seccion("usuarios_orden"))
+        disponibles = archivo.seccion("equipos_disponible")
+        self._snapshot = archivo
+        self._historial = HistorialPrestamos.desde_columnas(
+            archivo.seccion("historial_equipo"), archivo.seccion("historial_usuario"),
+            archivo.seccion("historial_fecha"), archivo.nombres_usuario(),
+            archivo.seccion("filas_inicio"), archivo.seccion("filas"), self._historial.reloj,
+            archivo.campo_equipos(0), archivo.campo_equipos(1))
+        self._historial.candado = candado_historial
+        
+        def crear_equipo(indice, campos):
+            nombre, _, _, clase, *argumentos = campos
+            equipo = CLASES_EQUIPO[clase](nombre, *argumentos)
+            equipo._disponible = bool(disponibles[indice])
+            equipo._historial = self._historial
+            equipo._id_historial = indice
+            equipo._observador = self
+            return equipo
+        
+        def crear_usuario(indice, campos):
+            nombre, email, tipo_usuario, *prestados = campos
+            usuario = Usuario(nombre, email, tipo_usuario)
+            for nombre_equipo in prestados:
+                usuario.agregar_equipo_prestado(nombre_equipo)
+            return usuario
+        
+        def particion(disponible):
+            # Las particiones guardan nombres con valor None, como un conjunto ordenado
+            def buscar(nombre):
+                indice = indice_equipos.buscar(nombre)
+                return None if indice >= 0 and disponibles[indice] == disponible else AUSENTE
+            
+            def recorrer():
+                for indice in range(len(tabla_equipos)):
+                    if disponibles[indice] == disponible:
+                        yield tabla_equipos.primer_campo(indice), None
+            cantidad = archivo.cantidad_disponibles if disponible else len(tabla_equipos) - archivo.cantidad_disponibles
+            return MapaSuperpuesto(buscar, recorrer, cantidad)
+        
+        def buscar_prestatario(nombre):
+            indice = indice_equipos.buscar(nombre)
+            prestatario = tabla_equipos.campo(indice, 2) if indice >= 0 else ""
+            return prestatario or AUSENTE
+        
+        def recorrer_prestamos():
+            for indice in range(len(tabla_equipos)):
+                if not disponibles[indice]:
+                    prestatario = tabla_equipos.campo(indice, 2)
+                    if prestatario:
+                        yield tabla_equipos.primer_campo(indice), prestatario
+        
+        def por_tipo():
+            equipos_por_tipo = {}
+            for indice in range(len(tabla_equipos)):
+                equipos_por_tipo.setdefault(tabla_equipos.campo(indice, 1), {})[tabla_equipos.primer_campo(indice)] = None
+            return equipos_por_tipo
+        
+        self._equipos = MapaPerezoso(tabla_equipos, indice_equipos, crear_equipo)
+        self._usuarios = MapaPerezoso(tabla_usuarios, indice_usuarios, crear_usuario)
+        self._equipos_disponibles = particion(True)
+        self._equipos_prestados = particion(False)
+        self._prestamos_activos = MapaSuperpuesto(buscar_prestatario, recorrer_prestamos, archivo.cantidad_prestamos)
+        self._equipos_por_tipo = DiccionarioDiferido(self, "_equipos_por_tipo", por_tipo)
+        self._conteo_por_tipo, self._conteo_por_tipo_usuario = archivo.conteos()
+        return archivo.posicion_bitacora
+    
+    @_medido("guardar_snapshot")
+    def guardar_snapshot(self, ruta):
+        """
+        Guarda el estado actual en un snapshot que se puede cargar con
+        SistemaPrestamos(snapshot=ruta). Si hay bitácora, el snapshot guarda
+        su posición para que al reabrir con la misma bitácora no se
+        reproduzcan los registros que ya contiene. En modo concurrente las
+        escrituras esperan mientras se guarda, así la posición y el estado
+        corresponden al mismo instante.
+        
+        Args:
+            ruta (str): Ruta del archivo
+        """
+        from instantanea_prestamos import _escrituras_detenidas
+        from snapshot_prestamos import escribir_snapshot
+        
+        with _escrituras_detenidas(self):
+            posicion_bitacora = 0
+            if self._bitacora is not None:
+                self._bitacora.sincronizar()
+                posicion_bitacora = self._bitacora.posicion
+            historial = self._historial
+            posiciones = {}  # Diccionario: id en el historial -> posición en el snapshot
+            equipos = []
+            filas_por_equipo = []
+            # Los contadores se arman con lo que se guarda (sin los préstamos
+            # archivados, que el snapshot no incluye)
+            conteo_por_tipo = {}
+            for posicion, equipo in enumerate(self._equipos.values()):
+                posiciones[equipo._id_historial] = posicion
+                nombre, *argumentos = equipo._datos_constructor()
+                prestatario = self._prestamos_activos.get(nombre, "")
+                campos = (nombre, equipo.tipo_equipo, prestatario, type(equipo).__name__, *argumentos)
+                equipos.append((campos, equipo.disponible))
+                filas = historial._filas(equipo._id_historial)
+                filas_por_equipo.append(filas)
+                contadores = conteo_por_tipo.setdefault(equipo.tipo_equipo, [0, 0, 0])
+                contadores[0] += 1
+                contadores[1] += not equipo.disponible
+                contadores[2] += len(filas) if filas is not None else 0
+            usuarios = []
+            conteo_por_tipo_usuario = {}
+            for usuario in self._usuarios.values():
+                usuarios.append((usuario.nombre, usuario.email, usuario.tipo_usuario, *usuario.equipos_prestados))
+                contadores = conteo_por_tipo_usuario.setdefault(usuario.tipo_usuario, [0, 0, 0])
+                contadores[0] += 1
+                contadores[1] += len(usuario.equipos_prestados)
+            columna_equipo = array('I', (posiciones[id_equipo] for id_equipo in historial._columna_equipo))
+            escribir_snapshot(ruta, equipos, usuarios, (
+                columna_equipo, historial._columna_usuario, historial._columna_fecha,
+                historial._nombres_usuario, filas_por_equipo), posicion_bitacora,
+                (conteo_por_tipo, conteo_por_tipo_usuario))
+    
+    def _reproducir_bitacora(self, bitacora, desde=0):
+        """
+        Reconstruye el estado aplicando en orden los registros de la bitácora
+        
+        Args:
+            bitacora (BitacoraPrestamos): Bitácora a reproducir
+            desde (int): Posición del primer registro a aplicar (la que
+                guardó el snapshot cargado)
+            
+        Returns:
+            int: Cantidad de registros aplicados
+        """
+        reloj = self._historial.reloj
+        fecha_registro = [0]
+        self._historial.reloj = lambda: fecha_registro[0]
+        aplicados = 0
+        try:
+            for operacion, campos in bitacora.leer(desde):
+                if operacion == bitacora.OP_PRESTAMO:
+                    fecha_registro[0], nombre_equipo, nombre_usuario = campos
+                    self._prestar(nombre_equipo, nombre_usuario)
+                elif operacion == bitacora.OP_DEVOLUCION:
+                    self._devolver(campos[0])
+                elif operacion == bitacora.OP_AGREGAR_EQUIPO:
+                    self.agregar_equipo(CLASES_EQUIPO[campos[0]](*campos[1:]))
+                elif operacion == bitacora.OP_AGREGAR_USUARIO:
+                    self.agregar_usuario(Usuario(*campos))
+                aplicados += 1
+        finally:
+            self._historial.reloj = reloj
+        return aplicados
+    
+    def _inicializar_datos_prueba(self):
+        """Inicializa el sistema con algunos datos de prueba"""
+        # Agregar equipos de prueba
+        self.agregar_equipo(EquipoComputo("Laptop-001", "Windows 11", "16GB"))
+        self.agregar_equipo(EquipoComputo("Laptop-002", "macOS", "8GB"))
+        self.agregar_equipo(Tablet("iPad-001", "12", "10000mAh"))
+        self.agregar_equipo(Tablet("Samsung-Tab-001", "11", "8000mAh"))
+        
+        # Agregar usuarios de prueba
+        self.agregar_usuario(Usuario("Juan Pérez", "juan@email.com", "Estudiante"))
+        self.agregar_usuario(Usuario("María García", "maria@email.com", "Profesor"))
+    
+    def agregar_equipo(self, equipo):
+        """
+        Agrega un nuevo equipo al sistema
+        
+        Args:
+            equipo (Equipo): Objeto equipo a agregar
+            
+        Returns:
+            bool: True si se agregó exitosamente, False si ya existe
+        """
+        metricas = self._metricas
+        inicio = time.perf_counter() if metricas is not None else 0.0
+        if self._candado_altas is not None:
+            with self._candado_altas:
+                agregado = self._agregar_equipo(equipo)
+        else:
+            agregado = self._agregar_equipo(equipo)
+        if agregado and self._reservas is not None:
+            # Un equipo nuevo puede atender una reserva de su tipo
+            self._atender_reservas(equipo.nombre)
+        if metricas is not None:
+            metricas.registrar("agregar_equipo", time.perf_counter() - inicio)
+        return agregado
+    
+    def _agregar_equipo(self, equipo):
+        """Agrega el equipo a los índices del sistema (ver agregar_equipo)"""
+        nombre = equipo._nombre
+        if nombre in self._equipos:
+            return False
+        
+        if self._bitacora is not None:
+            self._bitacora.registrar_equipo(equipo)
+        tipo_equipo = equipo._tipo_equipo
+        if equipo._historial is None:
+            # Caso común: equipo nuevo sin préstamos (ver Equipo._usar_historial)
+            equipo._historial = self._historial
+            equipo._id_historial = self._historial.registrar_equipo(nombre, tipo_equipo)
+            self._contar(self._conteo_por_tipo, tipo_equipo, 1, not equipo._disponible, 0)
+        else:
+            equipo._usar_historial(self._historial)
+            self._contar(self._conteo_por_tipo, tipo_equipo, 1, not equipo._disponible, equipo.cantidad_prestamos())
+        equipo._observador = self
+        # El inventario compacto guarda el id en el historial, así que el equipo se agrega ya registrado
+        self._equipos[nombre] = equipo
+        por_tipo = self._equipos_por_tipo.get(tipo_equipo)
+        if por_tipo is None:
+            por_tipo = self._equipos_por_tipo.setdefault(tipo_equipo, {})
+        por_tipo[nombre] = None
+        if equipo._disponible:
+            self._equipos_disponibles[nombre] = None
+        else:
+            self._equipos_prestados[nombre] = None
+        if self._busqueda_equipos is not None:
+            self._busqueda_equipos.agregar(nombre)
+        return True
+    
+    @_medido("agregar_equipos_lote")
+    def agregar_equipos_lote(self, equipos):
+        """
+        Agrega varios equipos en una sola pasada
+        
+        Args:
+            equipos (iterable): Objetos Equipo a agregar
+            
+        Returns:
+            array: 1 por cada equipo agregado y 0 por cada uno que ya existía,
+                en el mismo orden de entrada
+        """
+        if self._reservas is not None:
+            equipos = list(equipos)
+        if self._candado_altas is not None:
+            with self._candado_altas:
+                agregados = array('b', map(self._agregar_equipo, equipos))
+        else:
+            agregados = array('b', map(self._agregar_equipo, equipos))
+        if self._reservas is not None:
+            for equipo, agregado in zip(equipos, agregados):
+                if agregado:
+                    self._atender_reservas(equipo.nombre)
+        return agregados
+    
+    def _actualizar_disponibilidad(self, equipo):
+        """
+        Mueve el equipo a la partición que corresponde a su disponibilidad.
+        Lo invocan Equipo.prestar y Equipo.devolver.
+        
+        Args:
+            equipo (Equipo): Equipo cuyo estado cambió
+        """
+        if self._capa_cambios is not None:
+            # Hay una instantánea viva: se guarda el estado anterior del equipo
+            # (_prestamos_activos todavía no se actualizó)
+            capa = self._capa_actual()
+            if capa is not None:
+                capa.registrar_equipo(equipo._nombre, not equipo._disponible,
+                                      self._prestamos_activos.get(equipo._nombre))
+        if equipo.disponible:
+            self._equipos_prestados.pop(equipo.nombre, None)
+            self._equipos_disponibles[equipo.nombre] = None
+            activos, prestamos = -1, 0
+        else:
+            self._equipos_disponibles.pop(equipo.nombre, None)
+            self._equipos_prestados[equipo.nombre] = None
+            activos, prestamos = 1, 1
+        
+        conteo = self._conteo_por_tipo
+        if self._candado_conteo is None:
+            # El tipo ya tiene contadores desde que se agregó el equipo
+            contadores = conteo[equipo._tipo_equipo]
+            contadores[1] += activos
+            contadores[2] += prestamos
+        else:
+            self._contar(conteo, equipo._tipo_equipo, 0, activos, prestamos)
+    
+    def instantanea(self):
+        """
+        Toma una instantánea inmutable del sistema para reportes largos, que
+        comparte el estado con el sistema en lugar de copiarlo (ver
+        instantanea_prestamos). Los préstamos y devoluciones posteriores no
+        la modifican.
+        
+        Returns:
+            InstantaneaSistema: Vista de solo lectura con los mismos reportes
+                que el sistema (ver_historial_completo, mostrar_usuarios,
+                obtener_estadisticas, paginaciones...)
+        """
+        from instantanea_prestamos import InstantaneaSistema
+        return InstantaneaSistema(self)
+    
+    def _capa_actual(self):
+        """Retorna la capa de cambios de la última instantánea, o None si ya no hay instantáneas vivas"""
+        referencia = self._capa_cambios
+        if referencia is None:
+            return None
+        capa = referencia()
+        if capa is None:
+            self._capa_cambios = None
+        return capa
+    
+    def _contar_activo(self, usuario, activos):
+        """Suma `activos` a los préstamos activos del tipo del usuario"""
+        conteo = self._conteo_por_tipo_usuario
+        if self._candado_conteo is None:
+            # El tipo ya tiene contadores desde que se agregó el usuario
+            conteo[usuario._tipo_usuario][1] += activos
+        else:
+            self._contar(conteo, usuario._tipo_usuario, 0, activos, 0)
+    
+    def _contar(self, conteo, clave, cantidad, activos, prestamos):
+        """
+        Suma los cambios a los contadores incrementales de una clave
+        
+        Args:
+            conteo (dict): _conteo_por_tipo o _conteo_por_tipo_usuario
+            clave (str): Tipo de equipo o de usuario
+            cantidad (int): Cambio en la cantidad de equipos o usuarios
+            activos (int): Cambio en los equipos prestados
+            prestamos (int): Cambio en los préstamos registrados
+        """
+        if self._candado_conteo is not None:
+            with self._candado_conteo:
+                contadores = conteo.setdefault(clave, [0, 0, 0])
+                contadores[0] += cantidad
+                contadores[1] += activos
+                contadores[2] += prestamos
+            return
+        contadores = conteo.get(clave)
+        if contadores is None:
+            contadores = conteo[clave] = [0, 0, 0]
+        contadores[0] += cantidad
+        contadores[1] += activos
+        contadores[2] += prestamos
+    
+    def hay_equipos_disponibles(self):
+        """Indica en O(1) si existe al menos un equipo disponible"""
+        return bool(self._equipos_disponibles)
+    
+    def contar_equipos_disponibles(self):
+        """Retorna en O(1) la cantidad de equipos disponibles"""
+        return len(self._equipos_disponibles)
+    
+    def equipos_disponibles(self):
+        """Retorna la lista de equipos disponibles"""
+        # list() copia los nombres sin ceder el GIL, así que no choca con escrituras concurrentes
+        return [self._equipos[nombre] for nombre in list(self._equipos_disponibles)]
+    
+    def equipos_prestados(self):
+        """Retorna la lista de equipos prestados"""
+        return [self._equipos[nombre] for nombre in list(self._equipos_prestados)]
+    
+    def equipos_por_tipo(self, tipo_equipo):
+        """
+        Retorna los equipos de un tipo
+        
+        Args:
+            tipo_equipo (str): Tipo de equipo (Computadora, Tablet)
+        """
+        return [self._equipos[nombre] for nombre in list(self._equipos_por_tipo.get(tipo_equipo, ()))]
+    
+    def agregar_usuario(self, usuario):
+        """
+        Agrega un nuevo usuario al sistema
+        
+        Args:
+            usuario (Usuario): Objeto usuario a agregar
+            
+        Returns:
+            bool: True si se agregó exitosamente, False si ya existe
+        """
+        metricas = self._metricas
+        inicio = time.perf_counter() if metricas is not None else 0.0
+        if self._candado_altas is not None:
+            with self._candado_altas:
+                agregado = self._agregar_usuario(usuario)
+        else:
+            agregado = self._agregar_usuario(usuario)
+        if metricas is not None:
+            metricas.registrar("agregar_usuario", time.perf_counter() - inicio)
+        return agregado
+    
+    def _agregar_usuario(self, usuario):
+        """Agrega el usuario al sistema (ver agregar_usuario)"""
+        if usuario.nombre in self._usuarios:
+            return False
+        
+        if self._bitacora is not None:
+            self._bitacora.registrar_usuario(usuario)
+        self._usuarios[usuario.nombre] = usuario
+        self._contar(self._conteo_por_tipo_usuario, usuario.tipo_usuario, 1, 0, 0)
+        if self._busqueda_usuarios is not None:
+            self._busqueda_usuarios.agregar(usuario.nombre)
+        return True
+    
+    @_medido("agregar_usuarios_lote")
+    def agregar_usuarios_lote(self, usuarios):
+        """
+        Agrega varios usuarios en una sola pasada (ver agregar_equipos_lote)
+        
+        Returns:
+            array: 1 por cada usuario agregado y 0 por cada uno que ya existía
+        """
+        if self._candado_altas is not None:
+            with self._candado_altas:
+                return array('b', map(self._agregar_usuario, usuarios))
+        return array('b', map(self._agregar_usuario, usuarios))
+    
+    @_medido("importar")
+    def importar(self, ruta, formato=None, tam_bloque=10_000, procesos=0, max_errores=1000,
+                 pausar_recolector=False):
+        """
+        Importa equipos y usuarios desde un archivo CSV o JSONL, por bloques
+        y sin detenerse en las filas con errores
+        
+        Args:
+            ruta (str): Ruta del archivo (ver importacion_prestamos para el formato)
+            formato (str): 'csv' o 'jsonl' (por defecto se deduce de la extensión)
+            tam_bloque (int): Filas por bloque
+            procesos (int): Procesos para convertir las filas (0 para no usar pool)
+            max_errores (int): Errores que se guardan con su detalle
+            pausar_recolector (bool): Si es True, se desactiva el recolector
+                de basura de todo el proceso mientras dura la importación
+            
+        Returns:
+            ResultadoImportacion: Registros agregados y errores por línea
+        """
+        from importacion_prestamos import importar
+        
+        clases = dict(CLASES_EQUIPO, Usuario=Usuario)
+        return importar(self, ruta, clases, formato, tam_bloque, procesos, max_errores, pausar_recolector)
+    
+    def _sugerir(self, atributo, nombres, texto, limite):
+        """Busca en el índice de nombres indicado (ver sugerir_equipos)"""
+        if self._candado_altas is not None:
+            with self._candado_altas:
+                return self._buscar_sugerencias(atributo, nombres, texto, limite)
+        return self._buscar_sugerencias(atributo, nombres, texto, limite)
+    
+    def _buscar_sugerencias(self, atributo, nombres, texto, limite):
+        """Construye el índice de nombres si hace falta y busca en él"""
+        from busqueda_nombres import IndiceBusqueda
+        
+        indice = getattr(self, atributo)
+        if indice is None:
+            indice = IndiceBusqueda(nombres)
+            setattr(self, atributo, indice)
+        return indice.sugerir(texto, limite)
+    
+    @_medido("sugerir_equipos")
+    def sugerir_equipos(self, texto, limite=5):
+        """
+        Sugiere nombres de equipos para un texto ingresado
+        
+        Args:
+            texto (str): Texto ingresado (prefijo o nombre con un error)
+            limite (int): Cantidad máxima de sugerencias
+            
+        Returns:
+            list: Nombres que empiezan con el texto, seguidos de los que
+                difieren en una letra
+        """
+        return self._sugerir("_busqueda_equipos", self._equipos, texto, limite)
+    
+    @_medido("sugerir_usuarios")
+    def sugerir_usuarios(self, texto, limite=5):
+        """
+        Sugiere nombres de usuarios para un texto ingresado (ver sugerir_equipos)
+        """
+        return self._sugerir("_busqueda_usuarios", self._usuarios, texto, limite)
+    
+    def _nombres_equipos(self, tipo_equipo=None, disponibles=None):
+        """
+        Retorna un iterable con los nombres de los equipos en orden de alta
+        
+        Args:
+            tipo_equipo (str): Solo equipos de este tipo (None para todos)
+            disponibles (bool): True para solo disponibles, False para solo
+                prestados, None para todos
+        """
+        if disponibles is True:
+            nombres = self._equipos_disponibles
+        elif disponibles is False:
+            nombres = self._equipos_prestados
+        elif tipo_equipo is not None:
+            nombres = self._equipos_por_tipo.get(tipo_equipo, ())
+            tipo_equipo = None
+        else:
+            nombres = self._equipos
+        if self._candados_equipo is not None:
+            # En modo concurrente otros hilos pueden modificar los diccionarios
+            nombres = list(nombres)
+        if tipo_equipo is not None:
+            nombres = (nombre for nombre in nombres if self._equipos[nombre].tipo_equipo == tipo_equipo)
+        return nombres
+    
+    def filas_equipos(self, tipo_equipo=None, disponibles=None, cursor=0):
+        """
+        Genera las líneas del inventario de forma perezosa
+        
+        Args:
+            tipo_equipo (str): Solo equipos de este tipo (None para todos)
+            disponibles (bool): True para solo disponibles, False para solo
+                prestados, None para todos
+            cursor (int): Posición desde donde continuar (ver paginar)
+            
+        Yields:
+            tuple: (cursor de la fila siguiente, texto de la fila)
+        """
+        nombres = islice(self._nombres_equipos(tipo_equipo, disponibles), cursor, None)
+        for posicion, nombre in enumerate(nombres, cursor + 1):
+            yield posicion, f"  • {self._equipos[nombre]}"
+    
+    @_medido("pagina_equipos")
+    def pagina_equipos(self, limite=50, cursor=0, tipo_equipo=None, disponibles=None):
+        """
+        Retorna una página del inventario
+        
+        Returns:
+            tuple: (lista de líneas, cursor de la página siguiente o None)
+        """
+        return paginar(self.filas_equipos(tipo_equipo, disponibles, cursor), limite)
+    
+    @_medido("listar_equipos")
+    def listar_equipos(self, limite=50, cursor=0, tipo_equipo=None, disponibles=None):
+        """
+        Retorna una página de equipos como objetos, para los clientes que
+        arman su propia respuesta (ver servicio_prestamos). Solo se obtienen
+        los equipos de la página, así que en el inventario compacto no se
+        crean los demás.
+        
+        Args:
+            limite (int): Cantidad máxima de equipos
+            cursor (int): Posición desde donde continuar
+            tipo_equipo (str): Solo equipos de este tipo (None para todos)
+            disponibles (bool): True para solo disponibles, False para solo
+                prestados, None para todos
+        
+        Returns:
+            tuple: (lista de equipos, cursor de la página siguiente o None)
+        """
+        nombres = islice(self._nombres_equipos(tipo_equipo, disponibles), cursor, None)
+        nombres, siguiente = paginar(enumerate(nombres, cursor + 1), limite)
+        return [self._equipos[nombre] for nombre in nombres], siguiente
+    
+    @_medido("mostrar_equipos")
+    def mostrar_equipos(self, tipo_equipo=None, salida=None):
+        """
+        Muestra todos los equipos registrados en el sistema
+        
+        Args:
+            tipo_equipo (str): Solo equipos de este tipo (None para todos)
+            salida: Archivo de texto destino (por defecto sys.stdout)
+        """
+        if not self._equipos:
+            print("No hay equipos registrados en el sistema.", file=salida)
+            return
+        
+        print("\n=== INVENTARIO DE EQUIPOS ===", file=salida)
+        escribir_en_bloques((texto for _, texto in self.filas_equipos(tipo_equipo)), salida)
+    
+    @_medido("mostrar_equipos_disponibles")
+    def mostrar_equipos_disponibles(self, salida=None):
+        """Muestra solo los equipos disponibles"""
+        if not self._equipos_disponibles:
+            print("No hay equipos disponibles actualmente.", file=salida)
+            return
+        
+        print("\n=== EQUIPOS DISPONIBLES ===", file=salida)
+        escribir_en_bloques((texto for _, texto in self.filas_equipos(disponibles=True)), salida)
+    
+    def _candado_equipo(self, nombre_equipo):
+        """Retorna el candado de la franja que le corresponde al equipo"""
+        return self._candados_equipo[hash(nombre_equipo) % len(self._candados_equipo)]
+    
+    def _candado_usuario(self, nombre_usuario):
+        """Retorna el candado de la franja que le corresponde al usuario"""
+        return self._candados_usuario[hash(nombre_usuario) % len(self._candados_usuario)]
+    
+    def _prestar(self, nombre_equipo, nombre_usuario):
+        """
+        Valida y aplica un préstamo sin construir mensajes. En modo
+        concurrente la verificación y el préstamo se hacen con los candados
+        del equipo y del usuario tomados.
+        
+        Args:
+            nombre_equipo (str): Nombre del equipo a prestar
+            nombre_usuario (str): Nombre del usuario que hace el préstamo
+            
+        Returns:
+            int: Código de resultado (RESULTADO_OK o un código de error)
+        """
+        if self._candados_equipo is None:
+            return self._aplicar_prestamo(nombre_equipo, nombre_usuario)
+        if nombre_equipo not in self._equipos:
+            return RESULTADO_EQUIPO_INEXISTENTE
+        with self._candado_equipo(nombre_equipo), self._candado_usuario(nombre_usuario):
+            return self._aplicar_prestamo(nombre_equipo, nombre_usuario)
+    
+    def _aplicar_prestamo(self, nombre_equipo, nombre_usuario):
+        """Verifica y registra el préstamo (ver _prestar)"""
+        # Verificar que el equipo existe
+        equipo = self._equipos.get(nombre_equipo)
+        if equipo is None:
+            return RESULTADO_EQUIPO_INEXISTENTE
+        
+        # Verificar que el equipo esté disponible
+        if not equipo.disponible:
+            return RESULTADO_EQUIPO_PRESTADO
+        
+        # Verificar que el usuario existe (si no, crearlo)
+        usuario = self._usuarios.get(nombre_usuario)
+        if usuario is None:
+            self.agregar_usuario(self.crear_usuario_por_defecto(nombre_usuario))
+            usuario = self._usuarios[nombre_usuario]
+        
+        # Realizar el préstamo (primero en la bitácora: si falla, la memoria no cambia)
+        fecha = self._historial.reloj()
+        if self._bitacora is not None:
+            self._bitacora.registrar_prestamo(nombre_equipo, nombre_usuario, fecha)
+        if equipo.prestar(nombre_usuario, fecha):
+            usuario.agregar_equipo_prestado(nombre_equipo)
+            self._prestamos_activos[nombre_equipo] = nombre_usuario
+            self._contar_activo(usuario, 1)
+            if self._vencimientos is not None:
+                self._vencimientos.prestado(nombre_equipo, equipo.tipo_equipo, usuario.tipo_usuario, fecha)
+            return RESULTADO_OK
+        
+        return RESULTADO_ERROR
+    
+    def _devolver(self, nombre_equipo):
+        """
+        Valida y aplica una devolución sin construir mensajes. En modo
+        concurrente se toman los candados del equipo y de quien lo tiene.
+        
+        Args:
+            nombre_equipo (str): Nombre del equipo a devolver
+            
+        Returns:
+            int: Código de resultado (RESULTADO_OK o un código de error)
+        """
+        if self._candados_equipo is None:
+            codigo = self._aplicar_devolucion(nombre_equipo)
+        else:
+            if nombre_equipo not in self._equipos:
+                return RESULTADO_EQUIPO_INEXISTENTE
+            with self._candado_equipo(nombre_equipo):
+                # Quien tiene el equipo no cambia mientras se tenga su candado
+                with self._candado_usuario(self._prestamos_activos.get(nombre_equipo)):
+                    codigo = self._aplicar_devolucion(nombre_equipo)
+        if codigo == RESULTADO_OK and self._reservas is not None:
+            # Fuera de los candados: la entrega es un préstamo con sus propios candados
+            self._atender_reservas(nombre_equipo)
+        return codigo
+    
+    def _aplicar_devolucion(self, nombre_equipo):
+        """Verifica y registra la devolución (ver _devolver)"""
+        # Verificar que el equipo existe
+        equipo = self._equipos.get(nombre_equipo)
+        if equipo is None:
+            return RESULTADO_EQUIPO_INEXISTENTE
+        
+        # Verificar que el equipo esté prestado
+        if equipo.disponible:
+            return RESULTADO_EQUIPO_DISPONIBLE
+        
+        # Buscar el usuario que tiene el equipo en el índice de préstamos activos
+        nombre_usuario = self._prestamos_activos.get(nombre_equipo)
+        usuario_con_equipo = self._usuarios.get(nombre_usuario)
+        
+        # Realizar la devolución (primero en la bitácora: si falla, la memoria no cambia)
+        if self._bitacora is not None:
+            self._bitacora.registrar_devolucion(nombre_equipo)
+        if equipo.devolver():
+            self._prestamos_activos.pop(nombre_equipo, None)
+            if usuario_con_equipo:
+                usuario_con_equipo.remover_equipo_prestado(nombre_equipo)
+                self._contar_activo(usuario_con_equipo, -1)
+            if self._vencimientos is not None:
+                self._vencimientos.devuelto(nombre_equipo)
+            return RESULTADO_OK
+        
+        return RESULTADO_ERROR
+    
+    @staticmethod
+    def crear_usuario_por_defecto(nombre_usuario):
+        """Crea el usuario que se registra al prestarle a un nombre desconocido"""
+        return Usuario(nombre_usuario, f"{nombre_usuario.lower().replace(' ', '')}@email.com")
+    
+    @staticmethod
+    def mensaje_prestamo(codigo, nombre_equipo, nombre_usuario):
+        """
+        Construye el mensaje para el resultado de un préstamo
+        
+        Args:
+            codigo (int): Código retornado por la operación
+            nombre_equipo (str): Nombre del equipo
+            nombre_usuario (str): Nombre del usuario
+            
+        Returns:
+            str: Mensaje para mostrar al usuario
+        """
+        if codigo == RESULTADO_OK:
+            return f"Préstamo registrado exitosamente. {nombre_equipo} prestado a {nombre_usuario}."
+        if codigo == RESULTADO_EQUIPO_INEXISTENTE:
+            return f"El equipo '{nombre_equipo}' no existe en el sistema."
+        if codigo == RESULTADO_EQUIPO_PRESTADO:
+            return f"El equipo '{nombre_equipo}' ya está prestado."
+        return "Error al registrar el préstamo."
+    
+    @staticmethod
+    def mensaje_devolucion(codigo, nombre_equipo):
+        """
+        Construye el mensaje para el resultado de una devolución
+        
+        Args:
+            codigo (int): Código retornado por la operación
+            nombre_equipo (str): Nombre del equipo
+            
+        Returns:
+            str: Mensaje para mostrar al usuario
+        """
+        if codigo == RESULTADO_OK:
+            return f"Equipo '{nombre_equipo}' devuelto exitosamente."
+        if codigo == RESULTADO_EQUIPO_INEXISTENTE:
+            return f"El equipo '{nombre_equipo}' no existe en el sistema."
+        if codigo == RESULTADO_EQUIPO_DISPONIBLE:
+            return f"El equipo '{nombre_equipo}' ya está disponible."
+        return "Error al devolver el equipo."
+    
+    def registrar_prestamo(self, nombre_equipo, nombre_usuario):
+        """
+        Registra un nuevo préstamo
+        
+        Args:
+            nombre_equipo (str): Nombre del equipo a prestar
+            nombre_usuario (str): Nombre del usuario que hace el préstamo
+            
+        Returns:
+            tuple: (bool, str) - (éxito, mensaje)
+        """
+        if self._metricas is not None:
+            inicio = time.perf_counter()
+            codigo = self._prestar(nombre_equipo, nombre_usuario)
+            self._metricas.registrar("registrar_prestamo", time.perf_counter() - inicio, codigo)
+        else:
+            codigo = self._prestar(nombre_equipo, nombre_usuario)
+        mensaje = self.mensaje_prestamo(codigo, nombre_equipo, nombre_usuario)
+        if codigo == RESULTADO_OK and self._vencimientos is not None:
+            vence = self._vencimientos.vencimiento(nombre_equipo)
+            if vence is not None:
+                mensaje += f" Vence el {formatear_fecha(vence)}."
+        return codigo == RESULTADO_OK, mensaje
+    
+    def devolver_equipo(self, nombre_equipo):
+        """
+        Procesa la devolución de un equipo
+        
+        Args:
+            nombre_equipo (str): Nombre del equipo a devolver
+            
+        Returns:
+            tuple: (bool, str) - (éxito, mensaje)
+        """
+        if self._metricas is not None:
+            inicio = time.perf_counter()
+            codigo = self._devolver(nombre_equipo)
+            self._metricas.registrar("devolver_equipo", time.perf_counter() - inicio, codigo)
+        else:
+            codigo = self._devolver(nombre_equipo)
+        mensaje = self.mensaje_devolucion(codigo, nombre_equipo)
+        if codigo == RESULTADO_OK and self._reservas is not None:
+            prestatario = self._prestamos_activos.get(nombre_equipo)
+            if prestatario is not None:
+                mensaje += f" Prestado a {prestatario} por su reserva."
+        return codigo == RESULTADO_OK, mensaje
+    
+    def activar_reservas(self, prioridades=None, al_entregar=None):
+        """
+        Activa las colas de reservas (ver reservas_prestamos). Se activan
+        solas con la primera reserva; llamarlo antes permite elegir las
+        prioridades o recibir un aviso por cada entrega.
+        
+        Args:
+            prioridades (dict): Tipo de usuario -> prioridad, menor se atiende
+                antes (por defecto Profesor antes que Estudiante); solo se
+                usa al crear las colas
+            al_entregar (callable): al_entregar(nombre_equipo, nombre_usuario),
+                se invoca cada vez que un equipo se presta a una reserva
+            
+        Returns:
+            ColaReservas: Colas de reservas del sistema
+        """
+        from reservas_prestamos import ColaReservas
+        if self._reservas is None:
+            reservas = ColaReservas(prioridades, al_entregar, self._candados_equipo is not None)
+            if self._candado_altas is not None:
+                with self._candado_altas:
+                    if self._reservas is None:
+                        self._reservas = reservas
+            else:
+                self._reservas = reservas
+        elif al_entregar is not None:
+            self._reservas.al_entregar = al_entregar
+        return self._reservas
+    
+    def _usuario_o_crear(self, nombre_usuario):
+        """Retorna el usuario, registrándolo con los datos por defecto si no existe"""
+        usuario = self._usuarios.get(nombre_usuario)
+        if usuario is None:
+            self.agregar_usuario(self.crear_usuario_por_defecto(nombre_usuario))
+            usuario = self._usuarios[nombre_usuario]
+        return usuario
+    
+    def _reservar_equipo(self, nombre_equipo, nombre_usuario):
+        """
+        Presta el equipo o pone al usuario en su cola (ver reservar_equipo)
+        
+        Returns:
+            int: RESULTADO_OK si se prestó, RESULTADO_EN_ESPERA si quedó en la
+                cola o un código de error
+        """
+        from reservas_prestamos import clave_equipo
+        equipo = self._equipos.get(nombre_equipo)
+        if equipo is None:
+            return RESULTADO_EQUIPO_INEXISTENTE
+        if self._prestamos_activos.get(nombre_equipo) == nombre_usuario:
+            return RESULTADO_EQUIPO_PRESTADO
+        codigo = self._prestar(nombre_equipo, nombre_usuario)
+        if codigo != RESULTADO_EQUIPO_PRESTADO:
+            return codigo
+        usuario = self._usuario_o_crear(nombre_usuario)
+        self.activar_reservas().agregar(clave_equipo(nombre_equipo), nombre_usuario, usuario.tipo_usuario)
+        if equipo.disponible:
+            # Se devolvió entre el intento de préstamo y la reserva
+            self._atender_reservas(nombre_equipo)
+            if self._prestamos_activos.get(nombre_equipo) == nombre_usuario:
+                return RESULTADO_OK
+        return RESULTADO_EN_ESPERA
+    
+    def _hay_disponible_tipo(self, tipo_equipo):
+        """Indica si puede haber equipos disponibles del tipo (con los contadores, en O(1))"""
+        contadores = self._conteo_por_tipo.get(tipo_equipo)
+        return contadores is not None and contadores[0] > contadores[1]
+    
+    def _disponibles_tipo(self, tipo_equipo):
+        """Genera los nombres de los equipos disponibles de un tipo"""
+        if not self._hay_disponible_tipo(tipo_equipo):
+            return
+        for nombre in list(self._equipos_por_tipo.get(tipo_equipo, ())):
+            if nombre in self._equipos_disponibles:
+                yield nombre
+    
+    def _reservar_tipo(self, tipo_equipo, nombre_usuario):
+        """
+        Presta un equipo disponible del tipo o pone al usuario en la cola del
+        tipo (ver reservar_tipo)
+        
+        Returns:
+            tuple: (código como en _reservar_equipo, nombre del equipo prestado o None)
+        """
+        from reservas_prestamos import clave_tipo
+        if tipo_equipo not in self._equipos_por_tipo:
+            return RESULTADO_EQUIPO_INEXISTENTE, None
+        for nombre_equipo in self._disponibles_tipo(tipo_equipo):
+            if self._prestar(nombre_equipo, nombre_usuario) == RESULTADO_OK:
+                return RESULTADO_OK, nombre_equipo
+        usuario = self._usuario_o_crear(nombre_usuario)
+        clave = clave_tipo(tipo_equipo)
+        reservas = self.activar_reservas()
+        reservas.agregar(clave, nombre_usuario, usuario.tipo_usuario)
+        # Se pudo devolver un equipo del tipo entre la búsqueda y la reserva
+        for nombre_equipo in self._disponibles_tipo(tipo_equipo):
+            if self._atender_reservas(nombre_equipo) == nombre_usuario:
+                return RESULTADO_OK, nombre_equipo
+            if not reservas.esperando(clave, nombre_usuario):
+                break
+        return RESULTADO_EN_ESPERA, None
+    
+    def _atender_reservas(self, nombre_equipo):
+        """
+        Presta un equipo disponible (recién devuelto o agregado) a la primera
+        reserva que le corresponde, si hay alguna
+        
+        Args:
+            nombre_equipo (str): Nombre del equipo
+            
+        Returns:
+            str: Usuario que recibió el equipo, o None
+        """
+        reservas = self._reservas
+        equipo = self._equipos.get(nombre_equipo)
+        while equipo is not None and equipo.disponible:
+            entrada = reservas.siguiente(nombre_equipo, equipo.tipo_equipo)
+            if entrada is None:
+                return None
+            nombre_usuario = entrada[2]
+            codigo = self._prestar(nombre_equipo, nombre_usuario)
+            if codigo == RESULTADO_OK:
+                reservas.entregas += 1
+                if reservas.al_entregar is not None:
+                    reservas.al_entregar(nombre_equipo, nombre_usuario)
+                return nombre_usuario
+            if codigo == RESULTADO_EQUIPO_PRESTADO:
+                # Otro hilo lo prestó antes: la reserva conserva su lugar
+                reservas.reponer(entrada)
+                return None
+        return None
+    
+    @_medido("reservar_equipo")
+    def reservar_equipo(self, nombre_equipo, nombre_usuario):
         """
-        Constructor para tablet
+        Presta el equipo si está disponible; si está prestado, pone al
+        usuario en la cola del equipo y, al devolverse, se le presta
+        directamente según su prioridad y orden de llegada, sin reintentos
         
         Args:
-            nombre (str): Nombre de la tablet
-            pulgadas (str): Tamaño de pantalla en pulgadas
-            bateria (str): Capacidad de batería
+            nombre_equipo (str): Nombre del equipo
+            nombre_usuario (str): Nombre del usuario
+            
+        Returns:
+            tuple: (bool, str) - (prestado o en espera, mensaje)
         """
-        super().__init__(nombre, "Tablet")
-        self._pulgadas = pulgadas
-        self._bateria = bateria
-    
-    @property
-    def pulgadas(self):
-        """Propiedad para el tamaño de pantalla"""
-        return self._pulgadas
+        codigo = self._reservar_equipo(nombre_equipo, nombre_usuario)
+        return (codigo in (RESULTADO_OK, RESULTADO_EN_ESPERA),
+                self.mensaje_reserva(codigo, nombre_equipo, nombre_usuario))
     
-    @property
-    def bateria(self):
-        """Propiedad para la batería"""
-        return self._bateria
+    @_medido("reservar_tipo")
+    def reservar_tipo(self, tipo_equipo, nombre_usuario):
+        """
+        Presta cualquier equipo disponible del tipo; si no hay, pone al
+        usuario en la cola del tipo y recibe el primer equipo del tipo que
+        se devuelva o se agregue (ver reservar_equipo)
+        
+        Args:
+            tipo_equipo (str): Tipo de equipo (Computadora, Tablet)
+            nombre_usuario (str): Nombre del usuario
+            
+        Returns:
+            tuple: (bool, str) - (prestado o en espera, mensaje)
+        """
+        codigo, nombre_equipo = self._reservar_tipo(tipo_equipo, nombre_usuario)
+        return (codigo in (RESULTADO_OK, RESULTADO_EN_ESPERA),
+                self.mensaje_reserva(codigo, nombre_equipo, nombre_usuario, tipo_equipo))
     
-    def __str__(self):
-        """Representación específica para tablets"""
-        estado = "Disponible" if self._disponible else "Prestado"
-        return f"{self._nombre} (Tablet - {self._pulgadas}\", {self._bateria}) - {estado}"
-
-
-class Usuario:
-    """Clase que representa un usuario del sistema"""
+    def cancelar_reserva(self, nombre_usuario, nombre_equipo=None, tipo_equipo=None):
+        """
+        Quita a un usuario de la cola de un equipo o de un tipo
+        
+        Args:
+            nombre_usuario (str): Nombre del usuario
+            nombre_equipo (str): Equipo de la reserva
+            tipo_equipo (str): Tipo de la reserva (si no se indica equipo)
+            
+        Returns:
+            bool: True si el usuario estaba en espera
+        """
+        from reservas_prestamos import clave_equipo, clave_tipo
+        if self._reservas is None:
+            return False
+        clave = clave_equipo(nombre_equipo) if nombre_equipo is not None else clave_tipo(tipo_equipo)
+        return self._reservas.cancelar(clave, nombre_usuario)
     
-    def __init__(self, nombre, email, tipo_usuario="Estudiante"):
+    def reservas_pendientes(self, nombre_equipo=None, tipo_equipo=None):
         """
-        Constructor de la clase Usuario
+        Retorna los usuarios en espera de un equipo o de un tipo, en el orden
+        en que se atenderán
         
         Args:
-            nombre (str): Nombre del usuario
-            email (str): Email del usuario
-            tipo_usuario (str): Tipo de usuario (Estudiante, Profesor, Admin)
+            nombre_equipo (str): Equipo de la cola
+            tipo_equipo (str): Tipo de la cola (si no se indica equipo)
         """
-        self._nombre = nombre
-        self._email = email
-        self._tipo_usuario = tipo_usuario
-        self._equipos_prestados = []
+        from reservas_prestamos import clave_equipo, clave_tipo
+        if self._reservas is None:
+            return []
+        clave = clave_equipo(nombre_equipo) if nombre_equipo is not None else clave_tipo(tipo_equipo)
+        return self._reservas.pendientes(clave)
     
-    @property
-    def nombre(self):
-        """Propiedad de solo lectura para el nombre"""
-        return self._nombre
+    @staticmethod
+    def mensaje_reserva(codigo, nombre_equipo, nombre_usuario, tipo_equipo=None):
+        """
+        Construye el mensaje para el resultado de una reserva
+        
+        Args:
+            codigo (int): Código retornado por la operación
+            nombre_equipo (str): Nombre del equipo (None si se reservó un tipo
+                y no se prestó ninguno)
+            nombre_usuario (str): Nombre del usuario
+            tipo_equipo (str): Tipo reservado, si la reserva fue por tipo
+            
+        Returns:
+            str: Mensaje para mostrar al usuario
+        """
+        if codigo == RESULTADO_EN_ESPERA:
+            if tipo_equipo is not None:
+                return f"No hay equipos de tipo {tipo_equipo} disponibles. {nombre_usuario} quedó en la lista de espera."
+            return f"El equipo '{nombre_equipo}' está prestado. {nombre_usuario} quedó en la lista de espera."
+        if codigo == RESULTADO_EQUIPO_PRESTADO:
+            return f"{nombre_usuario} ya tiene el equipo '{nombre_equipo}'."
+        if codigo == RESULTADO_EQUIPO_INEXISTENTE and tipo_equipo is not None:
+            return f"No hay equipos de tipo {tipo_equipo} en el sistema."
+        return SistemaPrestamos.mensaje_prestamo(codigo, nombre_equipo, nombre_usuario)
     
-    @property
-    def email(self):
-        """Propiedad de solo lectura para el email"""
-        return self._email
+    def configurar_vencimientos(self, plazos=None, dias_defecto=None):
+        """
+        Activa las fechas de vencimiento de los préstamos (ver
+        vencimientos_prestamos). Cada préstamo vence a los días de plazo que
+        le corresponden según su tipo de equipo y tipo de usuario; los
+        préstamos activos reciben su vencimiento en el momento, a partir de
+        la fecha en que se hicieron.
+        
+        Args:
+            plazos (dict): Días de plazo por (tipo de equipo, tipo de
+                usuario), por tipo de usuario o por tipo de equipo; se usa la
+                clave más específica que exista, en ese orden
+            dias_defecto (float): Días de plazo de los préstamos a los que no
+                aplica ninguna clave (None: esos préstamos no vencen)
+        
+        Returns:
+            int: Cantidad de préstamos activos con vencimiento
+        
+        Raises:
+            ValueError: Si no se indican plazos ni días por defecto
+        """
+        if not plazos and dias_defecto is None:
+            raise ValueError("Indique plazos, dias_defecto o ambos.")
+        from instantanea_prestamos import _escrituras_detenidas
+        from vencimientos_prestamos import AgendaVencimientos
+        agenda = AgendaVencimientos(plazos, dias_defecto, self._candados_equipo is not None)
+        with _escrituras_detenidas(self):
+            for nombre_equipo, nombre_usuario in list(self._prestamos_activos.items()):
+                equipo = self._equipos.get(nombre_equipo)
+                usuario = self._usuarios.get(nombre_usuario)
+                fecha = equipo.fecha_ultimo_prestamo() if equipo is not None else None
+                if fecha is not None and usuario is not None:
+                    agenda.prestado(nombre_equipo, equipo.tipo_equipo, usuario.tipo_usuario, fecha)
+            self._vencimientos = agenda
+        return len(agenda)
     
-    @property
-    def tipo_usuario(self):
-        """Propiedad de solo lectura para el tipo de usuario"""
-        return self._tipo_usuario
+    def vencimiento(self, nombre_equipo):
+        """Retorna la fecha de vencimiento (segundos desde epoch) del préstamo de un equipo, o None"""
+        if self._vencimientos is None:
+            return None
+        return self._vencimientos.vencimiento(nombre_equipo)
     
-    @property
-    def equipos_prestados(self):
-        """Propiedad de solo lectura para equipos prestados"""
-        return self._equipos_prestados.copy()
+    def proximo_vencimiento(self):
+        """Retorna la fecha del próximo préstamo por vencer, o None"""
+        if self._vencimientos is None:
+            return None
+        return self._vencimientos.proximo()
     
-    def agregar_equipo_prestado(self, equipo):
-        """Agrega un equipo a la lista de prestados del usuario"""
-        if equipo not in self._equipos_prestados:
-            self._equipos_prestados.append(equipo)
+    def _con_prestatario(self, pares):
+        """Agrega el usuario a los pares (equipo, vencimiento) de la agenda"""
+        buscar_prestatario = self._prestamos_activos.get
+        return [(nombre_equipo, buscar_prestatario(nombre_equipo), vence) for nombre_equipo, vence in pares]
     
-    def remover_equipo_prestado(self, equipo):
-        """Remueve un equipo de la lista de prestados del usuario"""
-        if equipo in self._equipos_prestados:
-            self._equipos_prestados.remove(equipo)
+    @_medido("prestamos_vencidos")
+    def prestamos_vencidos(self, ahora=None):
+        """
+        Retorna los préstamos vencidos que siguen activos. Solo recorre los
+        vencidos, no el inventario.
+        
+        Args:
+            ahora (datetime | int): Fecha de referencia (por defecto, el reloj del sistema)
+        
+        Returns:
+            list: Tuplas (equipo, usuario, vencimiento), del más atrasado al más reciente
+        """
+        if self._vencimientos is None:
+            return []
+        ahora = self._historial.reloj() if ahora is None else _a_epoch(ahora)
+        return self._con_prestatario(self._vencimientos.vencidos(ahora))
     
-    def __str__(self):
-        """Representación en cadena del usuario"""
-        return f"{self._nombre} ({self._tipo_usuario}) - {self._email}"
-
-
-class SistemaPrestamos:
-    """Clase principal que gestiona el sistema de préstamos"""
+    @_medido("prestamos_por_vencer")
+    def prestamos_por_vencer(self, segundos=3600, ahora=None):
+        """
+        Retorna los préstamos que vencen en los próximos `segundos`
+        
+        Args:
+            segundos (float): Tamaño de la ventana (por defecto, una hora)
+            ahora (datetime | int): Inicio de la ventana (por defecto, el reloj del sistema)
+        
+        Returns:
+            list: Tuplas (equipo, usuario, vencimiento) en orden de vencimiento
+        """
+        if self._vencimientos is None:
+            return []
+        ahora = self._historial.reloj() if ahora is None else _a_epoch(ahora)
+        return self._con_prestatario(self._vencimientos.por_vencer(ahora, segundos))
     
-    def __init__(self):
-        """Constructor del sistema de préstamos"""
-        self._equipos = {}  # Diccionario: nombre -> objeto Equipo
-        self._usuarios = {}  # Diccionario: nombre -> objeto Usuario
-        self._inicializar_datos_prueba()
+    @_medido("revisar_vencimientos")
+    def revisar_vencimientos(self, ahora=None):
+        """
+        Retorna los préstamos que vencieron desde la revisión anterior; cada
+        préstamo se informa una sola vez (ver RevisorVencimientos)
+        
+        Args:
+            ahora (datetime | int): Fecha de referencia (por defecto, el reloj del sistema)
+        
+        Returns:
+            list: Tuplas (equipo, usuario, vencimiento) en orden de vencimiento
+        """
+        if self._vencimientos is None:
+            return []
+        ahora = self._historial.reloj() if ahora is None else _a_epoch(ahora)
+        return self._con_prestatario(self._vencimientos.revisar(ahora))
     
-    def _inicializar_datos_prueba(self):
-        """Inicializa el sistema con algunos datos de prueba"""
-        # Agregar equipos de prueba
-        self.agregar_equipo(EquipoComputo("Laptop-001", "Windows 11", "16GB"))
-        self.agregar_equipo(EquipoComputo("Laptop-002", "macOS", "8GB"))
-        self.agregar_equipo(Tablet("iPad-001", "12", "10000mAh"))
-        self.agregar_equipo(Tablet("Samsung-Tab-001", "11", "8000mAh"))
+    def iniciar_revisor(self, intervalo=60.0, al_vencer=None):
+        """
+        Inicia un hilo que revisa los vencimientos cada `intervalo` segundos
+        (o cuando vence el próximo préstamo, si es antes)
         
-        # Agregar usuarios de prueba
-        self.agregar_usuario(Usuario("Juan Pérez", "juan@email.com", "Estudiante"))
-        self.agregar_usuario(Usuario("María García", "maria@email.com", "Profesor"))
+        Args:
+            intervalo (float): Segundos máximos entre revisiones
+            al_vencer (callable): al_vencer(nombre_equipo, nombre_usuario,
+                vencimiento) por cada préstamo que vence; sin él, los eventos
+                quedan en la cola `eventos` del revisor. Si falla, la excepción
+                queda en la cola `errores` y el revisor sigue funcionando
+        
+        Returns:
+            RevisorVencimientos: El revisor; se detiene con detener()
+        
+        Raises:
+            ValueError: Si los vencimientos no están configurados
+        """
+        if self._vencimientos is None:
+            raise ValueError("Configure los vencimientos antes de iniciar el revisor.")
+        from vencimientos_prestamos import RevisorVencimientos
+        return RevisorVencimientos(self, intervalo, al_vencer)
     
-    def agregar_equipo(self, equipo):
+    @_medido("registrar_prestamos_lote", lote=True)
+    def registrar_prestamos_lote(self, prestamos):
         """
-        Agrega un nuevo equipo al sistema
+        Registra varios préstamos en una sola pasada
         
         Args:
-            equipo (Equipo): Objeto equipo a agregar
+            prestamos (iterable): Pares (nombre_equipo, nombre_usuario)
             
         Returns:
-            bool: True si se agregó exitosamente, False si ya existe
+            array: Código de resultado por fila, en el mismo orden de entrada.
+                Los mensajes se obtienen con mensaje_prestamo si se necesitan.
         """
-        if equipo.nombre in self._equipos:
-            return False
+        if self._candados_equipo is not None:
+            return array('b', (self._prestar(nombre_equipo, nombre_usuario)
+                               for nombre_equipo, nombre_usuario in prestamos))
         
-        self._equipos[equipo.nombre] = equipo
-        return True
+        resultados = array('b')
+        agregar_resultado = resultados.append
+        buscar_equipo = self._equipos.get
+        buscar_usuario = self._usuarios.get
+        prestamos_activos = self._prestamos_activos
+        reloj = self._historial.reloj
+        bitacora = self._bitacora
+        conteo_por_tipo_usuario = self._conteo_por_tipo_usuario
+        vencimientos = self._vencimientos
+        for nombre_equipo, nombre_usuario in prestamos:
+            equipo = buscar_equipo(nombre_equipo)
+            if equipo is None:
+                agregar_resultado(RESULTADO_EQUIPO_INEXISTENTE)
+                continue
+            if not equipo._disponible:
+                agregar_resultado(RESULTADO_EQUIPO_PRESTADO)
+                continue
+            usuario = buscar_usuario(nombre_usuario)
+            if usuario is None:
+                usuario = self.crear_usuario_por_defecto(nombre_usuario)
+                self._agregar_usuario(usuario)
+            fecha = reloj()
+            if bitacora is not None:
+                bitacora.registrar_prestamo(nombre_equipo, nombre_usuario, fecha)
+            equipo.prestar(nombre_usuario, fecha)
+            usuario.agregar_equipo_prestado(nombre_equipo)
+            prestamos_activos[nombre_equipo] = nombre_usuario
+            conteo_por_tipo_usuario[usuario._tipo_usuario][1] += 1
+            if vencimientos is not None:
+                vencimientos.prestado(nombre_equipo, equipo._tipo_equipo, usuario._tipo_usuario, fecha)
+            agregar_resultado(RESULTADO_OK)
+        return resultados
     
-    def agregar_usuario(self, usuario):
+    @_medido("devolver_lote", lote=True)
+    def devolver_lote(self, nombres_equipos):
         """
-        Agrega un nuevo usuario al sistema
+        Procesa varias devoluciones en una sola pasada
         
         Args:
-            usuario (Usuario): Objeto usuario a agregar
+            nombres_equipos (iterable): Nombres de los equipos a devolver
             
         Returns:
-            bool: True si se agregó exitosamente, False si ya existe
+            array: Código de resultado por fila, en el mismo orden de entrada.
+                Los mensajes se obtienen con mensaje_devolucion si se necesitan.
         """
-        if usuario.nombre in self._usuarios:
-            return False
+        if self._candados_equipo is not None:
+            return array('b', (self._devolver(nombre_equipo) for nombre_equipo in nombres_equipos))
         
-        self._usuarios[usuario.nombre] = usuario
-        return True
+        resultados = array('b')
+        agregar_resultado = resultados.append
+        buscar_equipo = self._equipos.get
+        buscar_usuario = self._usuarios.get
+        quitar_prestamo = self._prestamos_activos.pop
+        bitacora = self._bitacora
+        conteo_por_tipo_usuario = self._conteo_por_tipo_usuario
+        reservas = self._reservas
+        vencimientos = self._vencimientos
+        for nombre_equipo in nombres_equipos:
+            equipo = buscar_equipo(nombre_equipo)
+            if equipo is None:
+                agregar_resultado(RESULTADO_EQUIPO_INEXISTENTE)
+                continue
+            if equipo._disponible:
+                agregar_resultado(RESULTADO_EQUIPO_DISPONIBLE)
+                continue
+            if bitacora is not None:
+                bitacora.registrar_devolucion(nombre_equipo)
+            equipo.devolver()
+            usuario = buscar_usuario(quitar_prestamo(nombre_equipo, None))
+            if usuario is not None:
+                usuario.remover_equipo_prestado(nombre_equipo)
+                conteo_por_tipo_usuario[usuario._tipo_usuario][1] -= 1
+            if vencimientos is not None:
+                vencimientos.devuelto(nombre_equipo)
+            if reservas is not None:
+                self._atender_reservas(nombre_equipo)
+            agregar_resultado(RESULTADO_OK)
+        return resultados
     
-    def mostrar_equipos(self):
-        """Muestra todos los equipos registrados en el sistema"""
-        if not self._equipos:
-            print("No hay equipos registrados en el sistema.")
+    def filas_historial(self, tipo_equipo=None, usuario=None, desde=None, hasta=None, cursor=(0, 0)):
+        """
+        Genera el historial de préstamos agrupado por equipo, de forma perezosa.
+        Cada fila es un préstamo (precedido por el encabezado de su equipo si es
+        el primero) o un equipo sin préstamos cuando no se filtra por usuario
+        ni por fechas.
+        
+        Args:
+            tipo_equipo (str): Solo equipos de este tipo
+            usuario (str): Solo préstamos de este usuario
+            desde (int | datetime): Solo préstamos desde esta fecha (inclusive)
+            hasta (int | datetime): Solo préstamos hasta esta fecha (inclusive)
+            cursor (tuple): (posición del equipo, posición del préstamo) desde
+                donde continuar (ver paginar)
+            
+        Yields:
+            tuple: (cursor de la fila siguiente, texto de la fila)
+        """
+        historial = self._historial
+        desde, hasta = _a_epoch(desde), _a_epoch(hasta)
+        sin_filtros = usuario is None and desde is None and hasta is None
+        id_usuario = historial.buscar_usuario(usuario) if usuario is not None else None
+        if usuario is not None and id_usuario is None:
             return
+        nombres_usuario = historial._nombres_usuario
+        columna_usuario = historial._columna_usuario
+        columna_fecha = historial._columna_fecha
         
-        print("\n=== INVENTARIO DE EQUIPOS ===")
-        for equipo in self._equipos.values():
-            print(f"  • {equipo}")
+        posicion_equipo, posicion_prestamo = cursor
+        nombres = islice(self._nombres_equipos(tipo_equipo), posicion_equipo, None)
+        for posicion_equipo, nombre in enumerate(nombres, posicion_equipo):
+            equipo = self._equipos[nombre]
+            filas = historial._filas(equipo._id_historial) or ()
+            if not filas:
+                if sin_filtros and not posicion_prestamo:
+                    yield (posicion_equipo + 1, 0), f"\n📱 {equipo}\n   Sin préstamos registrados."
+                continue
+            
+            inicio, fin = historial.rango_filas(filas, desde, hasta)
+            # La numeración sigue a la de los préstamos archivados, como en ver_historial_equipo
+            archivados = self._archivados(nombre) + 1
+            encabezado = f"\n📱 {equipo}\n   Historial de préstamos:\n"
+            for posicion in range(max(inicio, posicion_prestamo), fin):
+                fila = filas[posicion]
+                if id_usuario is not None and columna_usuario[fila] != id_usuario:
+                    continue
+                texto = f"   {posicion + archivados}. {nombres_usuario[columna_usuario[fila]]} - {formatear_fecha(columna_fecha[fila])}"
+                yield (posicion_equipo, posicion + 1), encabezado + texto
+                encabezado = ""
+            posicion_prestamo = 0
     
-    def mostrar_equipos_disponibles(self):
-        """Muestra solo los equipos disponibles"""
-        equipos_disponibles = [equipo for equipo in self._equipos.values() if equipo.disponible]
-        
-        if not equipos_disponibles:
-            print("No hay equipos disponibles actualmente.")
-            return
+    @_medido("pagina_historial")
+    def pagina_historial(self, limite=50, cursor=(0, 0), **filtros):
+        """
+        Retorna una página del historial (ver filas_historial para los filtros)
         
-        print("\n=== EQUIPOS DISPONIBLES ===")
-        for equipo in equipos_disponibles:
-            print(f"  • {equipo}")
+        Returns:
+            tuple: (lista de filas, cursor de la página siguiente o None)
+        """
+        return paginar(self.filas_historial(cursor=cursor, **filtros), limite)
     
-    def registrar_prestamo(self, nombre_equipo, nombre_usuario):
+    @_medido("pagina_prestamos_equipo")
+    def pagina_prestamos_equipo(self, nombre_equipo, limite=50, cursor=0):
         """
-        Registra un nuevo préstamo
+        Retorna una página del historial de un equipo
         
         Args:
-            nombre_equipo (str): Nombre del equipo a prestar
-            nombre_usuario (str): Nombre del usuario que hace el préstamo
-            
+            nombre_equipo (str): Nombre del equipo
+            limite (int): Cantidad máxima de préstamos
+            cursor (int): Posición del préstamo desde donde continuar
+        
         Returns:
-            tuple: (bool, str) - (éxito, mensaje)
+            tuple: (lista de (usuario, fecha formateada), cursor de la página
+                siguiente o None), o None si el equipo no existe
         """
-        # Verificar que el equipo existe
-        if nombre_equipo not in self._equipos:
-            return False, f"El equipo '{nombre_equipo}' no existe en el sistema."
+        equipo = self._equipos.get(nombre_equipo)
+        if equipo is None:
+            return None
+        historial = equipo.historial_prestamos
+        fin = cursor + limite
+        return historial[cursor:fin], fin if fin < len(historial) else None
+    
+    @_medido("ver_historial_completo")
+    def ver_historial_completo(self, salida=None, **filtros):
+        """
+        Muestra el historial completo de préstamos
         
-        equipo = self._equipos[nombre_equipo]
+        Args:
+            salida: Archivo de texto destino (por defecto sys.stdout)
+            **filtros: tipo_equipo, usuario, desde y hasta (ver filas_historial)
+        """
+        print("\n=== HISTORIAL DE PRÉSTAMOS ===", file=salida)
+        escribir_en_bloques((texto for _, texto in self.filas_historial(**filtros)), salida)
+    
+    def _indice_consulta(self, desde, hasta, usuario, tipo_equipo, equipo):
+        """
+        Elige, entre los índices que corresponden a los filtros, el que tiene
+        menos filas en el rango de fechas
         
-        # Verificar que el equipo esté disponible
-        if not equipo.disponible:
-            return False, f"El equipo '{nombre_equipo}' ya está prestado."
+        Returns:
+            tuple: (filas, inicio, fin, filtros pendientes) donde los filtros
+                pendientes son (id equipo, id usuario, tipo) o None para los
+                que ya resuelve el índice elegido; None si no hay resultados
+        """
+        historial = self._historial
+        indices = []
+        id_equipo = id_usuario = None
+        if equipo is not None:
+            objeto = self._equipos.get(equipo)
+            if objeto is None or objeto._historial is not historial:
+                return None
+            id_equipo = objeto._id_historial
+            indices.append((historial._filas(id_equipo) or (), 0))
+        if usuario is not None:
+            id_usuario = historial.buscar_usuario(usuario)
+            if id_usuario is None:
+                return None
+            indices.append((historial.filas_usuario(id_usuario), 1))
+        if tipo_equipo is not None:
+            indices.append((historial.filas_tipo(tipo_equipo), 2))
+        if not indices:
+            indices.append((historial.filas_por_fecha(), None))
         
-        # Verificar que el usuario existe (si no, crearlo)
-        if nombre_usuario not in self._usuarios:
-            nuevo_usuario = Usuario(nombre_usuario, f"{nombre_usuario.lower().replace(' ', '')}@email.com")
-            self.agregar_usuario(nuevo_usuario)
+        mejor = None
+        for filas, filtro in indices:
+            inicio, fin = historial.rango_filas(filas, desde, hasta)
+            if mejor is None or fin - inicio < mejor[2] - mejor[1]:
+                mejor = (filas, inicio, fin, filtro)
+        filas, inicio, fin, resuelto = mejor
+        pendientes = [id_equipo, id_usuario, tipo_equipo]
+        if resuelto is not None:
+            pendientes[resuelto] = None
+        return filas, inicio, fin, pendientes
+    
+    def consultar_prestamos(self, desde=None, hasta=None, usuario=None, tipo_equipo=None, equipo=None):
+        """
+        Genera los préstamos de un rango de fechas en orden cronológico. Cada
+        equipo, usuario y tipo de equipo tiene sus filas ordenadas por fecha,
+        así que el costo es O(log n + k) sobre el índice más selectivo.
         
-        usuario = self._usuarios[nombre_usuario]
+        Args:
+            desde (int | datetime): Fecha mínima inclusiva (None para no limitar)
+            hasta (int | datetime): Fecha máxima inclusiva (None para no limitar)
+            usuario (str): Solo préstamos de este usuario
+            tipo_equipo (str): Solo préstamos de equipos de este tipo
+            equipo (str): Solo préstamos de este equipo
+            
+        Yields:
+            tuple: (nombre del equipo, usuario, fecha en segundos desde epoch)
+        """
+        historial = self._historial
+        indice = self._indice_consulta(_a_epoch(desde), _a_epoch(hasta), usuario, tipo_equipo, equipo)
+        if indice is None:
+            return
+        filas, inicio, fin, (id_equipo, id_usuario, tipo) = indice
+        columna_equipo = historial._columna_equipo
+        columna_usuario = historial._columna_usuario
+        columna_fecha = historial._columna_fecha
+        nombres_usuario = historial._nombres_usuario
+        nombres_equipo = {}  # Caché: id equipo -> nombre, o None si no es del tipo pedido
+        for posicion in range(inicio, fin):
+            fila = filas[posicion]
+            if id_equipo is not None and columna_equipo[fila] != id_equipo:
+                continue
+            if id_usuario is not None and columna_usuario[fila] != id_usuario:
+                continue
+            id_fila = columna_equipo[fila]
+            if id_fila not in nombres_equipo:
+                coincide = tipo is None or historial.tipo_equipo(id_fila) == tipo
+                nombres_equipo[id_fila] = historial.nombre_equipo(id_fila) if coincide else None
+            nombre = nombres_equipo[id_fila]
+            if nombre is not None:
+                yield nombre, nombres_usuario[columna_usuario[fila]], columna_fecha[fila]
+    
+    @_medido("contar_prestamos")
+    def contar_prestamos(self, desde=None, hasta=None, usuario=None, tipo_equipo=None, equipo=None):
+        """
+        Cuenta los préstamos de un rango de fechas (ver consultar_prestamos).
+        Con un solo filtro (o ninguno) el costo es O(log n).
         
-        # Realizar el préstamo
-        if equipo.prestar(nombre_usuario):
-            usuario.agregar_equipo_prestado(equipo.nombre)
-            return True, f"Préstamo registrado exitosamente. {equipo.nombre} prestado a {nombre_usuario}."
+        Returns:
+            int: Cantidad de préstamos
+        """
+        desde, hasta = _a_epoch(desde), _a_epoch(hasta)
+        indice = self._indice_consulta(desde, hasta, usuario, tipo_equipo, equipo)
+        if indice is None:
+            return 0
+        filas, inicio, fin, pendientes = indice
+        if pendientes == [None, None, None]:
+            return fin - inicio
+        return sum(1 for _ in self.consultar_prestamos(desde, hasta, usuario, tipo_equipo, equipo))
+    
+    def prestamos_recientes(self, dias, **filtros):
+        """
+        Genera los préstamos de los últimos `dias` días (ver consultar_prestamos)
         
-        return False, "Error al registrar el préstamo."
+        Args:
+            dias (float): Cantidad de días hacia atrás desde la fecha actual
+            **filtros: usuario, tipo_equipo y equipo
+        """
+        return self.consultar_prestamos(desde=self._historial.reloj() - int(dias * 86400), **filtros)
     
-    def devolver_equipo(self, nombre_equipo):
+    def configurar_retencion(self, max_prestamos=None, dias=None, archivo="historial_archivado.csv.gz",
+                             periodo="mes"):
         """
-        Procesa la devolución de un equipo
+        Configura la política de retención del historial: en memoria se
+        conservan, por equipo, los últimos `max_prestamos` préstamos y/o los
+        de los últimos `dias` días; el resto se mueve a un archivo
+        comprimido con totales por período (ver archivo_historial). La
+        política se aplica en el momento y después con aplicar_retencion().
         
         Args:
-            nombre_equipo (str): Nombre del equipo a devolver
+            max_prestamos (int): Préstamos a conservar por equipo
+            dias (float): Antigüedad máxima de los préstamos en memoria
+            archivo (str): Ruta del archivo comprimido
+            periodo (str): Agrupación de los totales ('dia', 'semana', 'mes' o 'anio')
             
         Returns:
-            tuple: (bool, str) - (éxito, mensaje)
+            int: Cantidad de préstamos archivados al aplicar la política
+            
+        Raises:
+            ValueError: Si no se indica ningún límite o el período es inválido
         """
-        # Verificar que el equipo existe
-        if nombre_equipo not in self._equipos:
-            return False, f"El equipo '{nombre_equipo}' no existe en el sistema."
+        if max_prestamos is None and dias is None:
+            raise ValueError("Indique max_prestamos, dias o ambos.")
+        from archivo_historial import ArchivoHistorial
+        self._archivo_historial = ArchivoHistorial(archivo, periodo)
+        self._retencion = (max_prestamos, dias)
+        return self.aplicar_retencion()
+    
+    @_medido("aplicar_retencion")
+    def aplicar_retencion(self):
+        """
+        Archiva y quita de memoria los préstamos fuera de la ventana de
+        retención. Las columnas del historial se reconstruyen con las filas
+        restantes, así que su tamaño depende de la ventana y no de la
+        antigüedad de los equipos. Pensado para llamarse periódicamente.
         
-        equipo = self._equipos[nombre_equipo]
+        Returns:
+            int: Cantidad de préstamos archivados
+        """
+        if self._archivo_historial is None:
+            return 0
+        max_prestamos, dias = self._retencion
+        historial = self._historial
+        desde = historial.reloj() - int(dias * 86400) if dias is not None else None
         
-        # Verificar que el equipo esté prestado
-        if equipo.disponible:
-            return False, f"El equipo '{nombre_equipo}' ya está disponible."
+        def nombrar(filas):
+            # Las filas llegan agrupadas por equipo: el nombre se busca una vez por equipo
+            id_anterior = nombre = None
+            for id_equipo, usuario, fecha in filas:
+                if id_equipo != id_anterior:
+                    id_anterior, nombre = id_equipo, historial.nombre_equipo(id_equipo)
+                yield nombre, usuario, fecha
         
-        # Buscar el usuario que tiene el equipo
-        usuario_con_equipo = None
-        for usuario in self._usuarios.values():
-            if nombre_equipo in usuario.equipos_prestados:
-                usuario_con_equipo = usuario
-                break
+        def retener():
+            cortes = historial.cortes_retencion(max_prestamos, desde)
+            if not cortes:
+                return 0
+            capa = self._capa_actual()
+            if capa is not None:
+                capa.registrar_retencion(historial, self._archivo_historial)
+            self._archivo_historial.archivar(nombrar(historial.filas_cortadas(cortes)))
+            return historial.compactar(cortes)
         
-        # Realizar la devolución
-        if equipo.devolver():
-            if usuario_con_equipo:
-                usuario_con_equipo.remover_equipo_prestado(nombre_equipo)
-            return True, f"Equipo '{nombre_equipo}' devuelto exitosamente."
+        return historial._con_candado(retener)
+    
+    def consultar_archivo(self, desde=None, hasta=None, usuario=None, equipo=None):
+        """
+        Genera los préstamos archivados por la retención que cumplen los
+        filtros, leyendo el archivo comprimido
         
-        return False, "Error al devolver el equipo."
+        Args:
+            desde, hasta (datetime | int): Rango de fechas [desde, hasta], ambas
+                inclusivas como en consultar_prestamos
+            usuario (str): Nombre del usuario
+            equipo (str): Nombre del equipo
+            
+        Yields:
+            tuple: (nombre equipo, usuario, fecha en segundos desde epoch)
+        """
+        if self._archivo_historial is None:
+            return iter(())
+        return self._archivo_historial.consultar(equipo, usuario, _a_epoch(desde), _a_epoch(hasta))
     
-    def ver_historial_completo(self):
-        """Muestra el historial completo de préstamos"""
-        print("\n=== HISTORIAL DE PRÉSTAMOS ===")
+    def resumen_historial(self, nombre_equipo=None):
+        """
+        Retorna los totales por período de los préstamos archivados
         
-        for nombre_equipo, equipo in self._equipos.items():
-            print(f"\n📱 {equipo}")
+        Args:
+            nombre_equipo (str): Equipo (None para todos)
             
-            if not equipo.historial_prestamos:
-                print("   Sin préstamos registrados.")
-            else:
-                print("   Historial de préstamos:")
-                for i, (usuario, fecha) in enumerate(equipo.historial_prestamos, 1):
-                    print(f"   {i}. {usuario} - {fecha}")
+        Returns:
+            dict: período -> {"prestamos", "prestatarios"}
+        """
+        if self._archivo_historial is None:
+            return {}
+        return self._archivo_historial.resumen(nombre_equipo)
     
+    def _archivados(self, nombre_equipo):
+        """Cantidad de préstamos archivados de un equipo"""
+        if self._archivo_historial is None:
+            return 0
+        return self._archivo_historial.cantidad(nombre_equipo)
+    
+    @_medido("ver_historial_equipo")
     def ver_historial_equipo(self, nombre_equipo):
         """
         Muestra el historial de un equipo específico
@@ -365,12 +2570,16 @@ class SistemaPrestamos:
         equipo = self._equipos[nombre_equipo]
         print(f"\n=== HISTORIAL DE {nombre_equipo.upper()} ===")
         
-        if not equipo.historial_prestamos:
+        archivados = self._archivados(nombre_equipo)
+        if archivados:
+            print(f"({archivados} préstamos anteriores en el archivo histórico)")
+        if not equipo.cantidad_prestamos():
             print("Sin préstamos registrados.")
         else:
-            for i, (usuario, fecha) in enumerate(equipo.historial_prestamos, 1):
-                print(f"{i}. {usuario} - {fecha}")
+            for i, (usuario, fecha) in enumerate(equipo.prestamos(), archivados + 1):
+                print(f"{i}. {usuario} - {formatear_fecha(fecha)}")
     
+    @_medido("mostrar_usuarios")
     def mostrar_usuarios(self):
         """Muestra todos los usuarios registrados"""
         if not self._usuarios:
@@ -378,35 +2587,111 @@ class SistemaPrestamos:
             return
         
         print("\n=== USUARIOS REGISTRADOS ===")
-        for usuario in self._usuarios.values():
+        for usuario in list(self._usuarios.values()):
             print(f"  • {usuario}")
             if usuario.equipos_prestados:
                 print(f"    Equipos prestados: {', '.join(usuario.equipos_prestados)}")
     
+    @_medido("estadisticas")
+    def estadisticas(self):
+        """
+        Retorna las estadísticas del sistema a partir de contadores que se
+        actualizan en cada operación, sin recorrer equipos ni historiales
+        
+        Returns:
+            dict: Totales de equipos, disponibles, prestados, usuarios y
+                préstamos, y los desgloses por tipo de equipo y de usuario
+        """
+        return self._armar_estadisticas(self._conteo_por_tipo, self._conteo_por_tipo_usuario)
+    
+    def _armar_estadisticas(self, conteo_por_tipo, conteo_por_tipo_usuario):
+        """Construye el diccionario de estadisticas() a partir de los contadores"""
+        return {
+            "total_equipos": len(self._equipos),
+            "equipos_disponibles": len(self._equipos_disponibles),
+            "equipos_prestados": len(self._equipos_prestados),
+            "total_usuarios": len(self._usuarios),
+            "total_prestamos": len(self._historial) + (self._archivo_historial.total
+                                                        if self._archivo_historial is not None else 0),
+            "por_tipo_equipo": {
+                tipo: {"total": total, "disponibles": total - prestados, "prestados": prestados, "prestamos": prestamos}
+                for tipo, (total, prestados, prestamos) in list(conteo_por_tipo.items())
+            },
+            "por_tipo_usuario": {
+                tipo: {"usuarios": usuarios, "prestamos_activos": activos}
+                for tipo, (usuarios, activos, _) in list(conteo_por_tipo_usuario.items())
+            },
+        }
+    
+    def _recontar(self):
+        """
+        Calcula los contadores de estadisticas() recorriendo todo el estado
+        
+        Returns:
+            tuple: (conteo por tipo de equipo, conteo por tipo de usuario)
+        """
+        conteo_por_tipo = {}
+        for equipo in self._equipos.values():
+            contadores = conteo_por_tipo.setdefault(equipo.tipo_equipo, [0, 0, 0])
+            contadores[0] += 1
+            contadores[1] += not equipo.disponible
+            contadores[2] += equipo.cantidad_prestamos() + self._archivados(equipo.nombre)
+        conteo_por_tipo_usuario = {}
+        for usuario in self._usuarios.values():
+            conteo_por_tipo_usuario.setdefault(usuario.tipo_usuario, [0, 0, 0])[0] += 1
+        for nombre_usuario in self._prestamos_activos.values():
+            usuario = self._usuarios.get(nombre_usuario)
+            if usuario is not None:
+                conteo_por_tipo_usuario[usuario.tipo_usuario][1] += 1
+        return conteo_por_tipo, conteo_por_tipo_usuario
+    
+    def verificar_estadisticas(self):
+        """
+        Compara los contadores incrementales contra un recuento completo.
+        Pensado para pruebas: recorre todos los equipos y usuarios.
+        
+        Returns:
+            dict: Diferencias {clave: (incremental, recuento)}; vacío si coinciden
+        """
+        incrementales = self.estadisticas()
+        recuento = self._armar_estadisticas(*self._recontar())
+        recuento["equipos_disponibles"] = sum(1 for equipo in self._equipos.values() if equipo.disponible)
+        recuento["equipos_prestados"] = recuento["total_equipos"] - recuento["equipos_disponibles"]
+        recuento["total_prestamos"] = sum(equipo.cantidad_prestamos() + self._archivados(equipo.nombre)
+                                          for equipo in self._equipos.values())
+        return {clave: (valor, recuento[clave])
+                for clave, valor in incrementales.items() if valor != recuento[clave]}
+    
+    @_medido("obtener_estadisticas")
     def obtener_estadisticas(self):
         """Muestra estadísticas del sistema"""
-        total_equipos = len(self._equipos)
-        equipos_disponibles = sum(1 for equipo in self._equipos.values() if equipo.disponible)
-        equipos_prestados = total_equipos - equipos_disponibles
-        total_usuarios = len(self._usuarios)
+        estadisticas = self.estadisticas()
         
         print(f"\n=== ESTADÍSTICAS DEL SISTEMA ===")
-        print(f"Total de equipos: {total_equipos}")
-        print(f"Equipos disponibles: {equipos_disponibles}")
-        print(f"Equipos prestados: {equipos_prestados}")
-        print(f"Total de usuarios: {total_usuarios}")
+        print(f"Total de equipos: {estadisticas['total_equipos']}")
+        print(f"Equipos disponibles: {estadisticas['equipos_disponibles']}")
+        print(f"Equipos prestados: {estadisticas['equipos_prestados']}")
+        print(f"Total de usuarios: {estadisticas['total_usuarios']}")
+        print(f"Total de préstamos realizados: {estadisticas['total_prestamos']}")
         
-        # Contar préstamos totales
-        total_prestamos = sum(len(equipo.historial_prestamos) for equipo in self._equipos.values())
-        print(f"Total de préstamos realizados: {total_prestamos}")
+        for tipo, conteo in estadisticas["por_tipo_equipo"].items():
+            print(f"  • {tipo}: {conteo['total']} equipos, {conteo['disponibles']} disponibles, "
+                  f"{conteo['prestados']} prestados, {conteo['prestamos']} préstamos")
+        for tipo, conteo in estadisticas["por_tipo_usuario"].items():
+            print(f"  • {tipo}: {conteo['usuarios']} usuarios, {conteo['prestamos_activos']} equipos prestados")
 
 
 class MenuSistema:
     """Clase que maneja la interfaz de usuario del sistema"""
     
-    def __init__(self):
-        """Constructor del menú"""
-        self.sistema = SistemaPrestamos()
+    def __init__(self, sistema=None):
+        """
+        Constructor del menú
+        
+        Args:
+            sistema (SistemaPrestamos): Sistema a operar (por defecto uno nuevo)
+        """
+        self.sistema = sistema if sistema is not None else SistemaPrestamos()
     
     def mostrar_menu_principal(self):
         """Muestra el menú principal del sistema"""
@@ -434,6 +2719,29 @@ class MenuSistema:
             print("❌ Por favor, ingrese un número válido.")
             return -1
     
+    def _confirmar_nombre(self, nombre, sugerencias, descripcion):
+        """
+        Ofrece nombres parecidos cuando el ingresado no existe
+        
+        Args:
+            nombre (str): Nombre ingresado
+            sugerencias (list): Nombres existentes parecidos
+            descripcion (str): Qué se está buscando, por ejemplo "el equipo"
+            
+        Returns:
+            str: Nombre elegido, o el ingresado si no se elige una sugerencia
+        """
+        if not sugerencias or nombre in sugerencias:
+            return nombre
+        
+        print(f"⚠️  No existe {descripcion} '{nombre}'. ¿Quiso decir?")
+        for i, sugerencia in enumerate(sugerencias, 1):
+            print(f"  {i}. {sugerencia}")
+        opcion = input("Seleccione un número (Enter para mantener lo ingresado): ").strip()
+        if opcion.isdigit() and 1 <= int(opcion) <= len(sugerencias):
+            return sugerencias[int(opcion) - 1]
+        return nombre
+    
     def registrar_prestamo_interactivo(self):
         """Interfaz interactiva para registrar un préstamo"""
         print("\n=== REGISTRAR PRÉSTAMO ===")
@@ -441,16 +2749,18 @@ class MenuSistema:
         # Mostrar equipos disponibles
         self.sistema.mostrar_equipos_disponibles()
         
-        if not any(equipo.disponible for equipo in self.sistema._equipos.values()):
+        if not self.sistema.hay_equipos_disponibles():
             return
         
-        nombre_equipo = input("\nIngrese el nombre exacto del equipo: ").strip()
+        nombre_equipo = input("\nIngrese el nombre del equipo: ").strip()
         nombre_usuario = input("Ingrese el nombre del usuario: ").strip()
         
         if not nombre_equipo or not nombre_usuario:
             print("❌ Debe ingresar tanto el nombre del equipo como del usuario.")
             return
         
+        nombre_equipo = self._confirmar_nombre(nombre_equipo, self.sistema.sugerir_equipos(nombre_equipo), "el equipo")
+        nombre_usuario = self._confirmar_nombre(nombre_usuario, self.sistema.sugerir_usuarios(nombre_usuario), "el usuario")
         exito, mensaje = self.sistema.registrar_prestamo(nombre_equipo, nombre_usuario)
         
         if exito:
@@ -463,7 +2773,7 @@ class MenuSistema:
         print("\n=== DEVOLVER EQUIPO ===")
         
         # Mostrar equipos prestados
-        equipos_prestados = [equipo for equipo in self.sistema._equipos.values() if not equipo.disponible]
+        equipos_prestados = self.sistema.equipos_prestados()
         
         if not equipos_prestados:
             print("No hay equipos prestados actualmente.")
@@ -473,12 +2783,13 @@ class MenuSistema:
         for equipo in equipos_prestados:
             print(f"  • {equipo}")
         
-        nombre_equipo = input("\nIngrese el nombre exacto del equipo a devolver: ").strip()
+        nombre_equipo = input("\nIngrese el nombre del equipo a devolver: ").strip()
         
         if not nombre_equipo:
             print("❌ Debe ingresar el nombre del equipo.")
             return
         
+        nombre_equipo = self._confirmar_nombre(nombre_equipo, self.sistema.sugerir_equipos(nombre_equipo), "el equipo")
         exito, mensaje = self.sistema.devolver_equipo(nombre_equipo)
         
         if exito:
@@ -529,6 +2840,7 @@ class MenuSistema:
         
         nombre_equipo = input("\nIngrese el nombre del equipo: ").strip()
         if nombre_equipo:
+            nombre_equipo = self._confirmar_nombre(nombre_equipo, self.sistema.sugerir_equipos(nombre_equipo), "el equipo")
             self.sistema.ver_historial_equipo(nombre_equipo)
     
     def ejecutar(self):
@@ -567,10 +2879,29 @@ class MenuSistema:
 
 
 # Función principal para ejecutar el programa
-def main():
-    """Función principal que inicia el sistema"""
-    menu = MenuSistema()
-    menu.ejecutar()
+def main(argumentos=None):
+    """
+    Función principal que inicia el sistema. Por defecto el sistema vive
+    solo en memoria; con --bitacora RUTA (o la variable de entorno
+    PRESTAMOS_BITACORA) las operaciones se guardan en esa bitácora y el
+    estado se reconstruye desde ella al volver a ejecutar el programa.
+    """
+    import argparse
+    import os
+    
+    parser = argparse.ArgumentParser(description="Sistema de préstamos de equipos")
+    parser.add_argument("--bitacora", default=os.environ.get("PRESTAMOS_BITACORA"),
+                        help="bitácora donde se guardan las operaciones (por defecto, ninguna)")
+    args = parser.parse_args(argumentos)
+    
+    if not args.bitacora:
+        MenuSistema().ejecutar()
+        return
+    
+    from bitacora_prestamos import BitacoraPrestamos
+    with BitacoraPrestamos(args.bitacora) as bitacora:
+        menu = MenuSistema(SistemaPrestamos(bitacora=bitacora))
+        menu.ejecutar()
 
 
 if __name__ == "__main__":
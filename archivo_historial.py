@@ -0,0 +1,367 @@
+"""
+Archivo comprimido del historial de préstamos antiguo
+
+Cuando SistemaPrestamos aplica su política de retención (ver
+configurar_retencion), los préstamos que quedan fuera de la ventana se
+quitan del historial en memoria y se agregan a este archivo:
+
+- `ruta`: CSV comprimido con gzip (equipo, usuario, fecha). Cada
+  archivado agrega un miembro gzip al final, así que nunca se reescribe lo
+  ya archivado; se lee por streaming al consultarlo.
+- `ruta` + ".resumen.jsonl": totales por equipo y período (cantidad de
+  préstamos y prestatarios distintos), la fecha del último préstamo
+  archivado de cada equipo con la cantidad archivada en esa misma fecha y,
+  por período, un contador aproximado de prestatarios de todos los equipos.
+  Cada archivado agrega una línea por equipo y por período modificados; el
+  archivo se reescribe completo solo cuando las líneas repetidas superan a
+  las vigentes.
+
+En memoria, los períodos cerrados de cada equipo guardan solo sus dos
+totales; únicamente el período abierto (el del último préstamo archivado)
+conserva el conjunto de prestatarios para seguir contándolos sin repetir.
+
+Uso:
+    archivo = ArchivoHistorial("historial.csv.gz", periodo="mes")
+    archivo.archivar([("Laptop1", "Ana", 1700000000)])
+    archivo.resumen("Laptop1")   # {"2023-11": {"prestamos": 1, "prestatarios": 1}}
+    list(archivo.consultar(usuario="Ana"))
+"""
+import base64
+import csv
+import gzip
+import hashlib
+import io
+import json
+import math
+import os
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+
+
+# Formato de la clave de cada período (strftime sobre la fecha local)
+FORMATOS_PERIODO = {
+    "dia": "%Y-%m-%d",
+    "semana": "%G-S%V",
+    "mes": "%Y-%m",
+    "anio": "%Y",
+}
+
+
+class ContadorDistintos:
+    """
+    Contador aproximado de textos distintos (HyperLogLog con 2**10
+    registros de un byte, error típico del 3%). Dos contadores se combinan
+    sin perder precisión, así que sirve para sumar prestatarios de equipos
+    distintos sin guardar sus nombres.
+    """
+
+    BITS = 10
+
+    def __init__(self, registros=None):
+        """
+        Constructor del contador
+
+        Args:
+            registros (bytes): Registros de un contador guardado (ver registros)
+        """
+        self._registros = bytearray(registros if registros is not None else 1 << self.BITS)
+
+    @property
+    def registros(self):
+        """Propiedad de solo lectura con los registros, para guardarlos"""
+        return bytes(self._registros)
+
+    def agregar(self, texto):
+        """Cuenta un texto"""
+        valor = int.from_bytes(hashlib.blake2b(texto.encode("utf-8", "surrogatepass"), digest_size=8).digest(),
+                               "little")
+        indice = valor & ((1 << self.BITS) - 1)
+        # Posición del primer bit en 1 de los bits restantes, contando desde 1
+        rango = 64 - self.BITS + 1 - (valor >> self.BITS).bit_length()
+        if rango > self._registros[indice]:
+            self._registros[indice] = rango
+
+    def combinar(self, otro):
+        """Agrega al contador los textos contados por otro"""
+        self._registros = bytearray(map(max, self._registros, otro._registros))
+
+    def __len__(self):
+        """Estimación de la cantidad de textos distintos"""
+        registros = self._registros
+        m = len(registros)
+        estimacion = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in registros)
+        vacios = registros.count(0)
+        if estimacion <= 2.5 * m and vacios:
+            # Corrección para cantidades pequeñas (linear counting)
+            estimacion = m * math.log(m / vacios)
+        return round(estimacion)
+
+
+class ArchivoHistorial:
+    """Archivo de préstamos antiguos con totales por equipo y período"""
+
+    def __init__(self, ruta, periodo="mes"):
+        """
+        Constructor del archivo; si ya existe, se cargan sus totales
+
+        Args:
+            ruta (str): Ruta del CSV comprimido
+            periodo (str): 'dia', 'semana', 'mes' o 'anio'
+
+        Raises:
+            ValueError: Si el período no es válido o no coincide con el de
+                un archivo existente
+        """
+        if periodo not in FORMATOS_PERIODO:
+            raise ValueError(f"Período inválido: {periodo!r}.")
+        self.ruta = ruta
+        self.periodo = periodo
+        self._ruta_resumen = ruta + ".resumen.jsonl"
+        self._resumenes = {}  # Diccionario: equipo -> {período: [préstamos, prestatarios distintos]}
+        self._abiertos = {}  # Diccionario: equipo -> (período abierto, {usuarios de ese período})
+        self._prestatarios = {}  # Diccionario: período -> ContadorDistintos de todos los equipos
+        self._cantidades = {}  # Diccionario: equipo -> préstamos archivados
+        # Diccionario: equipo -> [fecha del último préstamo archivado, préstamos archivados en esa fecha]
+        self._ultima_fecha = {}
+        self._lineas_resumen = 0  # Líneas de datos del resumen en disco, incluidas las reemplazadas
+        self.total = 0
+        if os.path.exists(self._ruta_resumen):
+            self._cargar_resumen()
+
+    # ------------------------------------------------------------- resumen
+
+    def _linea_equipo(self, equipo, periodos):
+        """Línea del resumen con la marca, los períodos indicados y el período abierto de un equipo"""
+        resumenes = self._resumenes[equipo]
+        abierto, usuarios = self._abiertos[equipo]
+        return {"equipo": equipo, "marca": self._ultima_fecha[equipo],
+                "periodos": {periodo: resumenes[periodo] for periodo in periodos},
+                "abierto": [abierto, sorted(usuarios)]}
+
+    def _linea_periodo(self, periodo):
+        """Línea del resumen con el contador de prestatarios de un período"""
+        registros = self._prestatarios[periodo].registros
+        return {"resumen": periodo, "prestatarios": base64.b64encode(registros).decode("ascii")}
+
+    def _cargar_resumen(self):
+        """Lee los totales guardados junto al archivo; las líneas posteriores reemplazan a las anteriores"""
+        with open(self._ruta_resumen, "rb") as archivo:
+            contenido = archivo.read()
+        # Una línea final incompleta (escritura interrumpida) se descarta
+        final_valido = contenido.rfind(b"\n") + 1
+        lineas = contenido[:final_valido].splitlines()
+        if not lineas:
+            return
+        cabecera = json.loads(lineas[0])
+        if cabecera["periodo"] != self.periodo:
+            raise ValueError(f"El archivo '{self.ruta}' agrupa por {cabecera['periodo']}, no por {self.periodo}.")
+        for linea in lineas[1:]:
+            datos = json.loads(linea)
+            if "equipo" in datos:
+                equipo = datos["equipo"]
+                self._ultima_fecha[equipo] = datos["marca"]
+                self._resumenes.setdefault(equipo, {}).update(datos["periodos"])
+                abierto, usuarios = datos["abierto"]
+                self._abiertos[equipo] = (abierto, set(usuarios))
+            else:
+                self._prestatarios[datos["resumen"]] = ContadorDistintos(base64.b64decode(datos["prestatarios"]))
+        self._lineas_resumen = len(lineas) - 1
+        for equipo, periodos in self._resumenes.items():
+            self._cantidades[equipo] = sum(cantidad for cantidad, _ in periodos.values())
+        self.total = sum(self._cantidades.values())
+        if final_valido < len(contenido):
+            with open(self._ruta_resumen, "r+b") as archivo:
+                archivo.truncate(final_valido)
+
+    @staticmethod
+    def _escribir_lineas(ruta, lineas, modo):
+        """Escribe líneas JSON y las sincroniza a disco"""
+        with open(ruta, modo, encoding="utf-8") as archivo:
+            # json.dumps usa el codificador en C; json.dump codifica por partes en Python
+            archivo.write("".join(json.dumps(linea, ensure_ascii=False, separators=(",", ":")) + "\n"
+                                  for linea in lineas))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+
+    def _guardar_resumen(self, cambios, periodos_modificados):
+        """
+        Agrega al resumen las líneas de lo modificado en un archivado, o lo
+        reescribe completo (de forma atómica) si las líneas reemplazadas ya
+        superan a las vigentes
+
+        Args:
+            cambios (dict): equipo -> períodos del equipo modificados
+            periodos_modificados (set): Períodos cuyo contador de prestatarios cambió
+        """
+        vigentes = len(self._resumenes) + len(self._prestatarios)
+        if not self._lineas_resumen or self._lineas_resumen + len(cambios) > 2 * vigentes:
+            lineas = [self._linea_equipo(equipo, periodos) for equipo, periodos in self._resumenes.items()]
+            lineas += map(self._linea_periodo, sorted(self._prestatarios))
+            temporal = self._ruta_resumen + ".tmp"
+            self._escribir_lineas(temporal, [{"periodo": self.periodo}] + lineas, "w")
+            os.replace(temporal, self._ruta_resumen)
+            self._lineas_resumen = len(lineas)
+            return
+        lineas = [self._linea_equipo(equipo, periodos) for equipo, periodos in cambios.items()]
+        lineas += map(self._linea_periodo, sorted(periodos_modificados))
+        self._escribir_lineas(self._ruta_resumen, lineas, "a")
+        self._lineas_resumen += len(lineas)
+
+    # ------------------------------------------------------------ archivado
+
+    def archivar(self, prestamos):
+        """
+        Agrega préstamos al archivo y a los totales. Los préstamos anteriores
+        al último archivado del mismo equipo, y los de esa misma fecha hasta
+        la cantidad ya archivada en ella, se omiten; así volver a archivar
+        las mismas filas (por ejemplo, al aplicar la retención sobre un
+        snapshot o una bitácora anteriores a ella) no las duplica.
+
+        Args:
+            prestamos (iterable): Tuplas (equipo, usuario, fecha en segundos
+                desde epoch), en orden cronológico por equipo
+
+        Returns:
+            int: Cantidad de préstamos archivados
+        """
+        # Caché: cuarto de hora -> clave del período (ningún huso horario
+        # cambia de día dentro de un cuarto de hora)
+        periodos = {}
+        cambios = {}  # Diccionario: equipo -> {períodos modificados}
+        periodos_modificados = set()
+        archivados = 0
+        with open(self.ruta, "ab") as crudo:
+            with gzip.GzipFile(fileobj=crudo, mode="ab", compresslevel=6) as comprimido:
+                # El CSV se arma en memoria y se comprime por bloques: escribir
+                # fila por fila en el GzipFile cuesta más que el CSV mismo
+                texto = io.StringIO()
+                escritor = csv.writer(texto)
+                # Las filas de cada equipo suelen llegar juntas; se procesan por tramos
+                for equipo, filas in groupby(prestamos, key=itemgetter(0)):
+                    pendientes = self._archivar_equipo(equipo, filas, periodos, cambios, periodos_modificados)
+                    escritor.writerows(pendientes)
+                    archivados += len(pendientes)
+                    if texto.tell() >= 1 << 20:
+                        comprimido.write(texto.getvalue().encode("utf-8"))
+                        texto.seek(0)
+                        texto.truncate()
+                comprimido.write(texto.getvalue().encode("utf-8"))
+            crudo.flush()
+            os.fsync(crudo.fileno())
+        self.total += archivados
+        if archivados:
+            self._guardar_resumen(cambios, periodos_modificados)
+        return archivados
+
+    def _archivar_equipo(self, equipo, filas, periodos, cambios, periodos_modificados):
+        """
+        Actualiza los totales con un tramo de filas de un equipo (ver archivar)
+
+        Returns:
+            list: Filas que hay que escribir en el archivo
+        """
+        formato = FORMATOS_PERIODO[self.periodo]
+        marca = self._ultima_fecha.get(equipo)
+        if marca is None:
+            marca = self._ultima_fecha[equipo] = [0, 0]
+        resumenes = self._resumenes.setdefault(equipo, {})
+        abierto, usuarios = self._abiertos.get(equipo, (None, set()))
+        modificados = None
+        vistas = 0  # Filas con la fecha de la marca vistas en este tramo
+        pendientes = []
+        for fila in filas:
+            fecha = fila[2]
+            if fecha < marca[0]:
+                continue
+            if fecha == marca[0]:
+                vistas += 1
+                if vistas <= marca[1]:
+                    # Fila ya archivada en una llamada anterior
+                    continue
+                marca[1] = vistas
+            else:
+                marca[0] = fecha
+                marca[1] = vistas = 1
+            pendientes.append(fila)
+            cuarto = fecha // 900
+            periodo = periodos.get(cuarto)
+            if periodo is None:
+                periodo = periodos[cuarto] = datetime.fromtimestamp(fecha).strftime(formato)
+            if periodo != abierto:
+                # Las filas llegan en orden: el período anterior queda cerrado
+                # y de él solo se conservan los totales
+                abierto, usuarios = periodo, set()
+                resumenes.setdefault(periodo, [0, 0])
+            if modificados is None:
+                modificados = cambios.setdefault(equipo, set())
+            modificados.add(periodo)
+            totales = resumenes[periodo]
+            totales[0] += 1
+            usuario = fila[1]
+            if usuario not in usuarios:
+                usuarios.add(usuario)
+                totales[1] += 1
+                contador = self._prestatarios.get(periodo)
+                if contador is None:
+                    contador = self._prestatarios[periodo] = ContadorDistintos()
+                contador.agregar(usuario)
+                periodos_modificados.add(periodo)
+        self._abiertos[equipo] = (abierto, usuarios)
+        self._cantidades[equipo] = self._cantidades.get(equipo, 0) + len(pendientes)
+        return pendientes
+
+    def cantidad(self, equipo):
+        """Retorna la cantidad de préstamos archivados de un equipo"""
+        return self._cantidades.get(equipo, 0)
+
+    def resumen(self, equipo=None):
+        """
+        Retorna los totales por período de un equipo, o de todos los equipos
+
+        Args:
+            equipo (str): Nombre del equipo (None para sumar todos)
+
+        Returns:
+            dict: período -> {"prestamos": cantidad, "prestatarios": usuarios
+                distintos}, en orden cronológico. Para un equipo los
+                prestatarios son exactos; para todos los equipos son una
+                estimación (ver ContadorDistintos)
+        """
+        if equipo is not None:
+            return {periodo: {"prestamos": cantidad, "prestatarios": distintos}
+                    for periodo, (cantidad, distintos) in sorted(self._resumenes.get(equipo, {}).items())}
+        prestamos = {}
+        for periodos in self._resumenes.values():
+            for periodo, (cantidad, _) in periodos.items():
+                prestamos[periodo] = prestamos.get(periodo, 0) + cantidad
+        return {periodo: {"prestamos": cantidad, "prestatarios": len(self._prestatarios[periodo])}
+                for periodo, cantidad in sorted(prestamos.items())}
+
+    def consultar(self, equipo=None, usuario=None, desde=None, hasta=None):
+        """
+        Genera los préstamos archivados que cumplen los filtros, leyendo el
+        archivo por streaming
+
+        Args:
+            equipo (str): Nombre del equipo
+            usuario (str): Nombre del usuario
+            desde (int): Fecha mínima incluida, en segundos desde epoch
+            hasta (int): Fecha máxima incluida, en segundos desde epoch (el
+                mismo criterio que SistemaPrestamos.consultar_prestamos)
+
+        Yields:
+            tuple: (equipo, usuario, fecha en segundos desde epoch)
+        """
+        if not os.path.exists(self.ruta) or (equipo is not None and equipo not in self._cantidades):
+            return
+        with gzip.open(self.ruta, "rt", encoding="utf-8", newline="") as archivo:
+            for nombre_equipo, nombre_usuario, fecha in csv.reader(archivo):
+                if equipo is not None and nombre_equipo != equipo:
+                    continue
+                if usuario is not None and nombre_usuario != usuario:
+                    continue
+                fecha = int(fecha)
+                if (desde is not None and fecha < desde) or (hasta is not None and fecha > hasta):
+                    continue
+                yield nombre_equipo, nombre_usuario, fecha
@@ -0,0 +1,1490 @@
+"""
+Benchmarks del sistema de préstamos (ProyectoIntegrador.py)
+
+Uso:
+    python benchmark_prestamos.py memoria_historial [--eventos 10000000]
+    python benchmark_prestamos.py lote [--equipos 100000]
+    python benchmark_prestamos.py memoria_objetos [--max-objetos 1000000]
+    python benchmark_prestamos.py bitacora [--registros 10000000]
+    python benchmark_prestamos.py snapshot [--max-equipos 1000000]
+    python benchmark_prestamos.py concurrencia [--operaciones 200000] [--max-hilos 16]
+    python benchmark_prestamos.py reportes [--equipos 200000] [--prestamos-por-equipo 5]
+    python benchmark_prestamos.py busqueda [--nombres 1000000]
+    python benchmark_prestamos.py usuario_pesado [--equipos 50000]
+    python benchmark_prestamos.py importacion [--filas 1000000] [--procesos 4]
+    python benchmark_prestamos.py consultas [--equipos 100000] [--prestamos-por-equipo 10]
+    python benchmark_prestamos.py fragmentos [--equipos 200000] [--max-fragmentos 16]
+    python benchmark_prestamos.py metricas [--operaciones 200000]
+    python benchmark_prestamos.py retencion [--equipos 1000] [--max-anios 4] [--dias 30]
+    python benchmark_prestamos.py inventario [--max-equipos 1000000] [--cache 10000]
+    python benchmark_prestamos.py instantaneas [--max-equipos 1000000] [--operaciones 200000]
+    python benchmark_prestamos.py reservas [--usuarios 5000] [--equipos 100]
+    python benchmark_prestamos.py vencimientos [--max-prestamos 1000000] [--operaciones 200000]
+    python benchmark_prestamos.py suite [--escalas 1000,10000,100000,1000000] [--salida resultados.json]
+    python benchmark_prestamos.py comparar base.json nuevo.json [--umbral 0.25]
+"""
+import argparse
+import contextlib
+import csv
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+import tracemalloc
+from datetime import datetime
+
+from bitacora_prestamos import BitacoraPrestamos
+from busqueda_nombres import IndiceBusqueda
+from fragmentos_prestamos import EnrutadorPrestamos
+from ProyectoIntegrador import RESULTADO_OK, EquipoComputo, HistorialPrestamos, SistemaPrestamos, Tablet, Usuario
+from tests.verificaciones import verificar_consistencia_prestamos
+
+
+def _medir_memoria(construir):
+    """
+    Mide la memoria retenida por la estructura que construye la función
+
+    Args:
+        construir (callable): Función sin argumentos que retorna la estructura
+
+    Returns:
+        tuple: (estructura, bytes retenidos)
+    """
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    estructura = construir()
+    gc.collect()
+    despues = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return estructura, despues - antes
+
+
+def memoria_historial(eventos, equipos=10000, usuarios=20000):
+    """
+    Compara la memoria del historial como listas de tuplas por equipo
+    (formato anterior) contra el almacén columnar HistorialPrestamos
+
+    Args:
+        eventos (int): Cantidad de préstamos a registrar
+        equipos (int): Cantidad de equipos distintos
+        usuarios (int): Cantidad de usuarios distintos
+    """
+    nombres = [f"Usuario {i}" for i in range(usuarios)]
+    inicio = int(time.time()) - eventos
+
+    def historial_tuplas():
+        historiales = [[] for _ in range(equipos)]
+        for i in range(eventos):
+            # Cada préstamo recibía un nombre nuevo (leído con input) y su fecha formateada
+            usuario = "".join(nombres[i % usuarios])
+            fecha = datetime.fromtimestamp(inicio + i).strftime("%Y-%m-%d %H:%M:%S")
+            historiales[i % equipos].append((usuario, fecha))
+        return historiales
+
+    def historial_columnar():
+        historial = HistorialPrestamos()
+        ids = [historial.registrar_equipo() for _ in range(equipos)]
+        for i in range(eventos):
+            historial.agregar(ids[i % equipos], nombres[i % usuarios], inicio + i)
+        return historial
+
+    print(f"\n=== MEMORIA DEL HISTORIAL ({eventos:,} préstamos) ===")
+    resultados = {}
+    for nombre, construir in (("tuplas", historial_tuplas), ("columnar", historial_columnar)):
+        estructura, memoria = _medir_memoria(construir)
+        resultados[nombre] = memoria
+        print(f"{nombre:>10}: {memoria / 2**20:10.1f} MiB ({memoria / eventos:6.1f} bytes/préstamo)")
+        del estructura
+    print(f"Reducción: {resultados['tuplas'] / resultados['columnar']:.1f}x")
+    return resultados
+
+
+def _crear_sistema(equipos, usuarios, reloj=None):
+    """
+    Crea un sistema con un inventario y usuarios sintéticos
+
+    Args:
+        equipos (int): Cantidad de equipos de cómputo
+        usuarios (int): Cantidad de usuarios
+        reloj (callable): Reloj a inyectar en el sistema
+
+    Returns:
+        tuple: (sistema, nombres de equipos, nombres de usuarios)
+    """
+    sistema = SistemaPrestamos(reloj=reloj)
+    nombres_equipos = [f"Laptop-{i:07d}" for i in range(equipos)]
+    nombres_usuarios = [f"Usuario {i}" for i in range(usuarios)]
+    for nombre in nombres_equipos:
+        sistema.agregar_equipo(EquipoComputo(nombre))
+    for nombre in nombres_usuarios:
+        sistema.agregar_usuario(Usuario(nombre, f"{nombre}@email.com"))
+    return sistema, nombres_equipos, nombres_usuarios
+
+
+def lote(equipos, usuarios=1000):
+    """
+    Compara préstamos y devoluciones en lote contra un ciclo de llamadas individuales
+
+    Args:
+        equipos (int): Cantidad de equipos a prestar y devolver
+        usuarios (int): Cantidad de usuarios
+    """
+    print(f"\n=== PRÉSTAMOS EN LOTE ({equipos:,} equipos) ===")
+    for modo in ("individual", "lote"):
+        sistema, nombres_equipos, nombres_usuarios = _crear_sistema(equipos, usuarios)
+        pares = [(nombre, nombres_usuarios[i % usuarios]) for i, nombre in enumerate(nombres_equipos)]
+        gc.collect()
+
+        inicio = time.perf_counter()
+        if modo == "individual":
+            for nombre_equipo, nombre_usuario in pares:
+                sistema.registrar_prestamo(nombre_equipo, nombre_usuario)
+        else:
+            sistema.registrar_prestamos_lote(pares)
+        tiempo_prestamo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        if modo == "individual":
+            for nombre_equipo in nombres_equipos:
+                sistema.devolver_equipo(nombre_equipo)
+        else:
+            sistema.devolver_lote(nombres_equipos)
+        tiempo_devolucion = time.perf_counter() - inicio
+
+        print(f"{modo:>10}: préstamos {equipos / tiempo_prestamo:12,.0f} ops/s | "
+              f"devoluciones {equipos / tiempo_devolucion:12,.0f} ops/s")
+
+
+def memoria_objetos(max_objetos):
+    """
+    Mide los bytes por instancia de EquipoComputo, Tablet y Usuario
+    a 10^4, 10^5 y 10^6 objetos (sin contar los textos, que se crean antes)
+
+    Args:
+        max_objetos (int): Cantidad máxima de objetos a crear
+    """
+    clases = {
+        "EquipoComputo": (EquipoComputo, lambda i: (f"Laptop-{i:07d}", "Windows 11", "16GB")),
+        "Tablet": (Tablet, lambda i: (f"Tablet-{i:07d}", "11", "8000mAh")),
+        "Usuario": (Usuario, lambda i: (f"Usuario {i}", f"usuario{i}@email.com")),
+    }
+    cantidades = [n for n in (10**4, 10**5, 10**6) if n <= max_objetos]
+    print("\n=== MEMORIA POR OBJETO (bytes) ===")
+    print(f"{'clase':>14}" + "".join(f"{n:>12,}" for n in cantidades))
+    resultados = {}
+    for nombre, (clase, argumentos) in clases.items():
+        fila = []
+        for cantidad in cantidades:
+            filas = [argumentos(i) for i in range(cantidad)]
+            objetos = [None] * cantidad  # La lista contenedora no se mide
+
+            def construir():
+                for i, fila_argumentos in enumerate(filas):
+                    objetos[i] = clase(*fila_argumentos)
+
+            _, memoria = _medir_memoria(construir)
+            fila.append(memoria / cantidad)
+            del objetos, filas
+        resultados[nombre] = fila
+        print(f"{nombre:>14}" + "".join(f"{bytes_objeto:>12.1f}" for bytes_objeto in fila))
+    return resultados
+
+
+def bitacora(registros, equipos=100_000, usuarios=10_000):
+    """
+    Mide la escritura en la bitácora a través del sistema y el tiempo de
+    reconstrucción del estado al reproducirla
+
+    Args:
+        registros (int): Cantidad aproximada de registros a generar
+        equipos (int): Cantidad máxima de equipos del inventario (se reduce
+            para que al menos la mitad de los registros sean operaciones)
+        usuarios (int): Cantidad máxima de usuarios (idem)
+    """
+    equipos = max(min(equipos, registros // 4), 1)
+    usuarios = max(min(usuarios, registros // 4), 1)
+    print(f"\n=== BITÁCORA ({registros:,} registros) ===")
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "prestamos.bitacora")
+        with BitacoraPrestamos(ruta) as bitacora_escritura:
+            sistema = SistemaPrestamos(bitacora=bitacora_escritura, datos_prueba=False)
+            for i in range(equipos):
+                sistema.agregar_equipo(EquipoComputo(f"Laptop-{i:07d}"))
+            for i in range(usuarios):
+                sistema.agregar_usuario(Usuario(f"Usuario {i}", f"usuario{i}@email.com"))
+            nombres_equipos = list(sistema._equipos)
+
+            operaciones = max(registros - equipos - usuarios, 2) // 2
+            inicio = time.perf_counter()
+            for i in range(operaciones):
+                nombre_equipo = nombres_equipos[i % len(nombres_equipos)]
+                sistema.registrar_prestamo(nombre_equipo, f"Usuario {i % usuarios}")
+                sistema.devolver_equipo(nombre_equipo)
+            bitacora_escritura.sincronizar()
+            tiempo_escritura = time.perf_counter() - inicio
+        del sistema
+        gc.collect()
+
+        # Registros escritos: un alta por equipo y por usuario, y un préstamo y una devolución por operación
+        escritos = equipos + usuarios + 2 * operaciones
+        tamano = os.path.getsize(ruta)
+        print(f"Escritura: {2 * operaciones / tiempo_escritura:12,.0f} operaciones/s (con fsync agrupado)")
+        print(f"Tamaño:    {tamano / 2**20:12,.1f} MiB ({escritos:,} registros, {tamano / escritos:.1f} bytes/registro)")
+
+        with BitacoraPrestamos(ruta) as bitacora_lectura:
+            inicio = time.perf_counter()
+            sistema = SistemaPrestamos(bitacora=bitacora_lectura, datos_prueba=False)
+            tiempo_reproduccion = time.perf_counter() - inicio
+        print(f"Reproducción: {tiempo_reproduccion:9.2f} s ({escritos / tiempo_reproduccion:,.0f} registros/s)")
+        print(f"Estado reconstruido: {len(sistema._equipos):,} equipos, {len(sistema._historial):,} préstamos")
+
+
+def snapshot(max_equipos, prestamos_por_equipo=3):
+    """
+    Mide el tiempo de carga de un snapshot para inventarios de distinto tamaño
+
+    Args:
+        max_equipos (int): Tamaño máximo del inventario
+        prestamos_por_equipo (int): Préstamos en el historial de cada equipo
+    """
+    print("\n=== CARGA DE SNAPSHOT ===")
+    print(f"{'equipos':>10} {'guardar':>10} {'cargar':>10} {'1er acceso':>11} {'1er préstamo':>13}")
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "prestamos.snapshot")
+        for equipos in (n for n in (10**4, 10**5, 10**6) if n <= max_equipos):
+            sistema, nombres_equipos, nombres_usuarios = _crear_sistema(equipos, 1000)
+            for ronda in range(prestamos_por_equipo):
+                sistema.registrar_prestamos_lote(
+                    (nombre, nombres_usuarios[(i + ronda) % 1000]) for i, nombre in enumerate(nombres_equipos))
+                if ronda < prestamos_por_equipo - 1:
+                    sistema.devolver_lote(nombres_equipos)
+            inicio = time.perf_counter()
+            sistema.guardar_snapshot(ruta)
+            tiempo_guardar = time.perf_counter() - inicio
+            del sistema
+            gc.collect()
+
+            inicio = time.perf_counter()
+            cargado = SistemaPrestamos(snapshot=ruta)
+            tiempo_cargar = time.perf_counter() - inicio
+
+            nombre = nombres_equipos[equipos // 2]
+            inicio = time.perf_counter()
+            cargado._equipos[nombre].historial_prestamos[0]
+            tiempo_acceso = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            cargado.devolver_equipo(nombre)
+            cargado.registrar_prestamo(nombre, nombres_usuarios[0])
+            tiempo_prestamo = time.perf_counter() - inicio
+
+            print(f"{equipos:>10,} {tiempo_guardar:>9.2f}s {tiempo_cargar * 1000:>8.2f}ms "
+                  f"{tiempo_acceso * 1000:>9.3f}ms {tiempo_prestamo * 1000:>11.1f}ms")
+            del cargado
+            gc.collect()
+
+
+def concurrencia(operaciones, max_hilos, equipos=64, usuarios=256):
+    """
+    Prueba de estrés del modo concurrente: varios hilos prestan y devuelven
+    un conjunto pequeño de equipos y al final se verifica el estado
+
+    Args:
+        operaciones (int): Operaciones totales repartidas entre los hilos
+        max_hilos (int): Cantidad máxima de hilos
+        equipos (int): Equipos en disputa
+        usuarios (int): Usuarios que los piden
+    """
+    print(f"\n=== CONCURRENCIA ({operaciones:,} operaciones sobre {equipos} equipos) ===")
+    hilos = 1
+    while hilos <= max_hilos:
+        sistema = SistemaPrestamos(concurrente=True)
+        nombres_equipos = [f"Laptop-{i:07d}" for i in range(equipos)]
+        for nombre in nombres_equipos:
+            sistema.agregar_equipo(EquipoComputo(nombre))
+        prestamos_ok = Counter()
+        devoluciones_ok = Counter()
+        candado_conteo = threading.Lock()
+        barrera = threading.Barrier(hilos + 1)
+
+        def trabajar(semilla):
+            generador = random.Random(semilla)
+            locales_prestamo = Counter()
+            locales_devolucion = Counter()
+            barrera.wait()
+            for _ in range(operaciones // hilos):
+                nombre_equipo = generador.choice(nombres_equipos)
+                if generador.random() < 0.5:
+                    usuario = f"Usuario {generador.randrange(usuarios)}"
+                    if sistema._prestar(nombre_equipo, usuario) == RESULTADO_OK:
+                        locales_prestamo[nombre_equipo] += 1
+                elif sistema._devolver(nombre_equipo) == RESULTADO_OK:
+                    locales_devolucion[nombre_equipo] += 1
+            with candado_conteo:
+                prestamos_ok.update(locales_prestamo)
+                devoluciones_ok.update(locales_devolucion)
+
+        trabajadores = [threading.Thread(target=trabajar, args=(i,)) for i in range(hilos)]
+        for trabajador in trabajadores:
+            trabajador.start()
+        barrera.wait()
+        inicio = time.perf_counter()
+        for trabajador in trabajadores:
+            trabajador.join()
+        tiempo = time.perf_counter() - inicio
+
+        verificar_consistencia_prestamos(sistema, prestamos_ok, devoluciones_ok)
+        print(f"{hilos:>3} hilos: {operaciones // hilos * hilos / tiempo:12,.0f} ops/s | "
+              f"{sum(prestamos_ok.values()):,} préstamos, {sum(devoluciones_ok.values()):,} devoluciones | consistente")
+        hilos *= 2
+
+
+def reportes(equipos, prestamos_por_equipo):
+    """
+    Mide el tiempo hasta la primera página del historial, el tiempo total del
+    reporte escrito a un archivo y la memoria máxima usada mientras se genera
+
+    Args:
+        equipos (int): Cantidad de equipos
+        prestamos_por_equipo (int): Préstamos registrados por equipo
+    """
+    fecha = [int(time.time()) - equipos * prestamos_por_equipo]
+
+    def reloj():
+        fecha[0] += 1
+        return fecha[0]
+
+    sistema, nombres_equipos, nombres_usuarios = _crear_sistema(equipos, 1000, reloj)
+    for ronda in range(prestamos_por_equipo):
+        sistema.registrar_prestamos_lote(
+            (nombre, nombres_usuarios[(i + ronda) % 1000]) for i, nombre in enumerate(nombres_equipos))
+        sistema.devolver_lote(nombres_equipos)
+
+    print(f"\n=== REPORTES ({equipos:,} equipos, {len(sistema._historial):,} préstamos) ===")
+    inicio = time.perf_counter()
+    pagina, cursor = sistema.pagina_historial(50)
+    print(f"primera página del historial: {(time.perf_counter() - inicio) * 1000:8.3f} ms")
+    inicio = time.perf_counter()
+    sistema.pagina_historial(50, cursor=(equipos // 2, 0))
+    print(f"página desde la mitad:        {(time.perf_counter() - inicio) * 1000:8.3f} ms")
+    inicio = time.perf_counter()
+    sistema.pagina_historial(50, usuario=nombres_usuarios[7])
+    print(f"primera página por usuario:   {(time.perf_counter() - inicio) * 1000:8.3f} ms")
+
+    for nombre, reporte in (("historial", sistema.ver_historial_completo), ("inventario", sistema.mostrar_equipos)):
+        with open(os.devnull, "w") as salida:
+            gc.collect()
+            inicio = time.perf_counter()
+            reporte(salida=salida)
+            tiempo = time.perf_counter() - inicio
+            # Segunda pasada solo para medir memoria: tracemalloc hace lento el reporte
+            tracemalloc.start()
+            reporte(salida=salida)
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print(f"{nombre:>10} completo: {tiempo:7.2f} s | memoria máxima {pico / 2**20:8.2f} MiB")
+
+
+def busqueda(nombres, consultas=2000):
+    """
+    Mide el tiempo de construcción del índice de nombres y el tiempo por
+    consulta al completar prefijos y al sugerir nombres con un error
+
+    Args:
+        nombres (int): Cantidad de nombres en el índice
+        consultas (int): Consultas por tipo de búsqueda
+    """
+    generador = random.Random(7)
+    existentes = {f"{generador.choice(('Laptop', 'Tablet', 'iPad', 'Surface'))}-{i:07d}": None
+                  for i in range(nombres)}
+    lista = list(existentes)
+    print(f"\n=== BÚSQUEDA DE NOMBRES ({nombres:,} nombres) ===")
+    inicio = time.perf_counter()
+    indice = IndiceBusqueda(existentes)
+    print(f"construcción del índice: {time.perf_counter() - inicio:8.2f} s")
+
+    muestra = [generador.choice(lista) for _ in range(consultas)]
+    prefijos = [nombre[:generador.randrange(3, len(nombre))].lower() for nombre in muestra]
+    errores = []
+    for nombre in muestra:
+        posicion = generador.randrange(len(nombre))
+        errores.append(nombre[:posicion] + nombre[posicion + 1:])
+
+    for descripcion, buscar, textos in (
+            ("completar prefijo", indice.completar, prefijos),
+            ("sugerir con error", indice.sugerir, errores)):
+        inicio = time.perf_counter()
+        encontrados = sum(1 for texto in textos if buscar(texto, 5))
+        tiempo = (time.perf_counter() - inicio) / consultas
+        print(f"{descripcion:>18}: {tiempo * 1e6:8.1f} µs/consulta | {encontrados}/{consultas} con resultados")
+
+
+class _UsuarioLista(Usuario):
+    """Usuario con el registro de equipos prestados en una lista (formato anterior)"""
+
+    __slots__ = ()
+
+    def __init__(self, nombre, email, tipo_usuario="Estudiante"):
+        super().__init__(nombre, email, tipo_usuario)
+        self._equipos_prestados = []
+
+    def agregar_equipo_prestado(self, equipo):
+        if equipo not in self._equipos_prestados:
+            self._equipos_prestados.append(equipo)
+
+    def remover_equipo_prestado(self, equipo):
+        if equipo in self._equipos_prestados:
+            self._equipos_prestados.remove(equipo)
+
+
+def usuario_pesado(equipos):
+    """
+    Un solo usuario pide prestados todos los equipos y luego los devuelve en
+    orden aleatorio; compara la lista anterior contra el diccionario ordenado
+
+    Args:
+        equipos (int): Cantidad de equipos que tiene el usuario
+    """
+    print(f"\n=== USUARIO CON {equipos:,} EQUIPOS ===")
+    for descripcion, clase in (("lista", _UsuarioLista), ("diccionario", Usuario)):
+        sistema, nombres_equipos, _ = _crear_sistema(equipos, 0)
+        sistema.agregar_usuario(clase("Laboratorio", "lab@email.com", "Admin"))
+        devoluciones = nombres_equipos[:]
+        random.Random(3).shuffle(devoluciones)
+        gc.collect()
+
+        inicio = time.perf_counter()
+        for nombre in nombres_equipos:
+            sistema.registrar_prestamo(nombre, "Laboratorio")
+        tiempo_prestamo = time.perf_counter() - inicio
+        assert list(sistema._usuarios["Laboratorio"].equipos_prestados) == nombres_equipos
+
+        inicio = time.perf_counter()
+        for nombre in devoluciones:
+            sistema.devolver_equipo(nombre)
+        tiempo_devolucion = time.perf_counter() - inicio
+        assert not sistema._usuarios["Laboratorio"].equipos_prestados
+
+        print(f"{descripcion:>12}: préstamos {equipos / tiempo_prestamo:10,.0f} ops/s | "
+              f"devoluciones {equipos / tiempo_devolucion:10,.0f} ops/s")
+
+
+def _escribir_archivo_importacion(ruta, formato, filas):
+    """Escribe un archivo de importación sintético con un 1% de filas con errores"""
+    columnas = ("clase", "nombre", "sistema_operativo", "ram", "pulgadas", "bateria", "email", "tipo_usuario")
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo)
+        if formato == "csv":
+            escritor.writerow(columnas)
+        for i in range(filas):
+            if i % 100 == 99:
+                registro = ("Proyector", f"Proyector-{i:07d}", "", "", "", "", "", "")
+            elif i % 10 == 0:
+                registro = ("Usuario", f"Usuario {i}", "", "", "", "", f"usuario{i}@email.com", "Profesor")
+            elif i % 2:
+                registro = ("EquipoComputo", f"Laptop-{i:07d}", "Linux", "16GB", "", "", "", "")
+            else:
+                registro = ("Tablet", f"Tablet-{i:07d}", "", "", "11", "9000mAh", "", "")
+            if formato == "csv":
+                escritor.writerow(registro)
+            else:
+                archivo.write(json.dumps({columna: valor for columna, valor in zip(columnas, registro) if valor}))
+                archivo.write("\n")
+
+
+def importacion(filas, procesos):
+    """
+    Mide la importación masiva desde CSV y JSONL, con y sin pool de procesos,
+    y la memoria adicional que usa la importación además de los objetos creados
+
+    Args:
+        filas (int): Filas del archivo
+        procesos (int): Procesos del pool
+    """
+    print(f"\n=== IMPORTACIÓN ({filas:,} filas) ===")
+    with tempfile.TemporaryDirectory() as directorio:
+        for formato in ("csv", "jsonl"):
+            ruta = os.path.join(directorio, f"inventario.{formato}")
+            _escribir_archivo_importacion(ruta, formato, filas)
+            for cantidad in (0, procesos):
+                sistema = SistemaPrestamos()
+                gc.collect()
+                inicio = time.perf_counter()
+                resultado = sistema.importar(ruta, procesos=cantidad)
+                tiempo = time.perf_counter() - inicio
+                print(f"{formato:>6} {cantidad:>2} procesos: {tiempo:6.2f} s ({filas / tiempo:9,.0f} filas/s) | {resultado}")
+
+        # Memoria: pico durante la importación menos lo que queda retenido al final
+        filas_memoria = min(filas, 100_000)
+        ruta = os.path.join(directorio, "memoria.csv")
+        _escribir_archivo_importacion(ruta, "csv", filas_memoria)
+        for tam_bloque in (1_000, 10_000):
+            sistema = SistemaPrestamos()
+            gc.collect()
+            tracemalloc.start()
+            sistema.importar(ruta, tam_bloque=tam_bloque)
+            actual, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"bloques de {tam_bloque:>6,} filas: {(pico - actual) / 2**20:6.2f} MiB por encima de lo retenido "
+                  f"({filas_memoria:,} filas)")
+
+
+def consultas(equipos, prestamos_por_equipo, repeticiones=20):
+    """
+    Compara las consultas por rango de fechas con índices ordenados contra
+    un recorrido de los historiales de todos los equipos
+
+    Args:
+        equipos (int): Cantidad de equipos (la mitad tablets)
+        prestamos_por_equipo (int): Préstamos registrados por equipo
+        repeticiones (int): Veces que se repite cada consulta indexada
+    """
+    total = equipos * prestamos_por_equipo
+    # Un préstamo por minuto, terminando ahora
+    fecha = [int(time.time()) - total * 60]
+
+    def reloj():
+        fecha[0] += 60
+        return fecha[0]
+
+    sistema = SistemaPrestamos(reloj=reloj)
+    nombres_equipos = [f"Equipo-{i:07d}" for i in range(equipos)]
+    for i, nombre in enumerate(nombres_equipos):
+        sistema.agregar_equipo(Tablet(nombre) if i % 2 else EquipoComputo(nombre))
+    nombres_usuarios = [f"Usuario {i}" for i in range(1000)]
+    for ronda in range(prestamos_por_equipo):
+        sistema.registrar_prestamos_lote(
+            (nombre, nombres_usuarios[(i * 7 + ronda) % 1000]) for i, nombre in enumerate(nombres_equipos))
+        sistema.devolver_lote(nombres_equipos)
+    ahora = fecha[0]
+    tipos = {nombre: sistema._equipos[nombre].tipo_equipo for nombre in nombres_equipos}
+
+    def recorrido(desde, hasta, usuario=None, tipo_equipo=None):
+        return [(nombre, usuario_prestamo, fecha_prestamo)
+                for nombre in nombres_equipos if tipo_equipo is None or tipos[nombre] == tipo_equipo
+                for usuario_prestamo, fecha_prestamo in sistema._equipos[nombre].prestamos()
+                if desde <= fecha_prestamo <= hasta and (usuario is None or usuario_prestamo == usuario)]
+
+    print(f"\n=== CONSULTAS POR FECHA ({equipos:,} equipos, {len(sistema._historial):,} préstamos) ===")
+    inicio = time.perf_counter()
+    sistema.contar_prestamos(usuario=nombres_usuarios[0])
+    print(f"construcción de índices por usuario y tipo: {(time.perf_counter() - inicio) * 1000:9.1f} ms")
+    casos = (
+        ("entre t1 y t2 (1 hora)", {"desde": ahora - total * 30, "hasta": ahora - total * 30 + 3600}),
+        ("usuario, últimos 30 días", {"desde": ahora - 30 * 86400, "hasta": ahora, "usuario": nombres_usuarios[7]}),
+        ("Tablet, esta semana", {"desde": ahora - 7 * 86400, "hasta": ahora, "tipo_equipo": "Tablet"}),
+    )
+    print(f"{'consulta':>26} {'resultados':>11} {'índice (ms)':>12} {'recorrido (ms)':>15}")
+    for descripcion, filtros in casos:
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            encontrados = list(sistema.consultar_prestamos(**filtros))
+        tiempo_indice = (time.perf_counter() - inicio) / repeticiones
+        inicio = time.perf_counter()
+        esperados = recorrido(**filtros)
+        tiempo_recorrido = time.perf_counter() - inicio
+        assert sorted(encontrados) == sorted(esperados), descripcion
+        print(f"{descripcion:>26} {len(encontrados):>11,} {tiempo_indice * 1000:>12.3f} {tiempo_recorrido * 1000:>15.1f}")
+
+
+def fragmentos(equipos, max_fragmentos, rondas=3, tam_lote=20_000):
+    """
+    Mide el rendimiento de préstamos y devoluciones en lote con el sistema
+    repartido en 1, 2, 4, ... procesos fragmento, frente a un solo proceso
+
+    Args:
+        equipos (int): Cantidad de equipos
+        max_fragmentos (int): Cantidad máxima de fragmentos a probar
+        rondas (int): Rondas de préstamo y devolución de todos los equipos
+        tam_lote (int): Operaciones por llamada en lote
+    """
+    nombres_equipos = [f"Laptop-{i:07d}" for i in range(equipos)]
+    nombres_usuarios = [f"Usuario {i}" for i in range(1000)]
+
+    def medir(sistema):
+        sistema.agregar_equipos_lote(EquipoComputo(nombre) for nombre in nombres_equipos)
+        sistema.agregar_usuarios_lote(Usuario(nombre, f"{nombre}@email.com") for nombre in nombres_usuarios)
+        operaciones = 0
+        inicio = time.perf_counter()
+        for ronda in range(rondas):
+            for desde in range(0, equipos, tam_lote):
+                lote_equipos = nombres_equipos[desde:desde + tam_lote]
+                resultados = sistema.registrar_prestamos_lote(
+                    (nombre, nombres_usuarios[(desde + i + ronda) % 1000]) for i, nombre in enumerate(lote_equipos))
+                assert not any(resultados)
+                assert not any(sistema.devolver_lote(lote_equipos))
+                operaciones += 2 * len(lote_equipos)
+        return operaciones / (time.perf_counter() - inicio)
+
+    print(f"\n=== FRAGMENTOS ({equipos:,} equipos, lotes de {tam_lote:,}, {os.cpu_count()} núcleos) ===")
+    base = medir(SistemaPrestamos(datos_prueba=False))
+    print(f"{'un proceso':>12}: {base:>12,.0f} ops/s")
+    cantidad = 1
+    while cantidad <= max_fragmentos:
+        with EnrutadorPrestamos(cantidad, datos_prueba=False) as enrutador:
+            rendimiento = medir(enrutador)
+        print(f"{cantidad:>2} fragmentos: {rendimiento:>12,.0f} ops/s | {rendimiento / base:5.2f}x")
+        cantidad *= 2
+
+
+def metricas(operaciones, repeticiones=5):
+    """
+    Mide el costo de las métricas en préstamos y devoluciones individuales:
+    desactivadas (el caso por defecto) y activas
+
+    Args:
+        operaciones (int): Ciclos de préstamo y devolución por medición
+        repeticiones (int): Mediciones; se toma la más rápida
+    """
+    sistema, nombres_equipos, nombres_usuarios = _crear_sistema(1000, 100)
+    pares = [(nombres_equipos[i % 1000], nombres_usuarios[i % 100]) for i in range(operaciones)]
+
+    def ciclo():
+        registrar_prestamo = sistema.registrar_prestamo
+        devolver_equipo = sistema.devolver_equipo
+        inicio = time.perf_counter()
+        for nombre_equipo, nombre_usuario in pares:
+            registrar_prestamo(nombre_equipo, nombre_usuario)
+            devolver_equipo(nombre_equipo)
+        return (time.perf_counter() - inicio) / operaciones
+
+    print(f"\n=== MÉTRICAS ({operaciones:,} préstamos y devoluciones) ===")
+    desactivadas = min(ciclo() for _ in range(repeticiones))
+    sistema.activar_metricas()
+    activas = min(ciclo() for _ in range(repeticiones))
+    print(f"desactivadas: {desactivadas * 1e6:6.2f} µs por ciclo")
+    print(f"      activas: {activas * 1e6:6.2f} µs por ciclo (+{(activas - desactivadas) * 1e9:,.0f} ns)")
+    for operacion in ("registrar_prestamo", "devolver_equipo"):
+        print(f"{operacion}: p50 <= {sistema.metricas.percentil(operacion, 50) * 1e6:g} µs, "
+              f"p99 <= {sistema.metricas.percentil(operacion, 99) * 1e6:g} µs")
+
+
+def _bytes_historial(historial):
+    """Bytes ocupados por las columnas y los arreglos de filas de un historial"""
+    total = sum(sys.getsizeof(columna) for columna in
+                (historial._columna_equipo, historial._columna_usuario, historial._columna_fecha))
+    return total + sum(sys.getsizeof(filas) for filas in historial._filas_por_equipo if filas is not None)
+
+
+def retencion(equipos, max_anios, dias):
+    """
+    Muestra que, con una política de retención, la memoria del historial
+    depende de la ventana y no del tiempo que llevan los equipos en servicio
+
+    Args:
+        equipos (int): Cantidad de equipos; cada uno se presta una vez por día
+        max_anios (int): Años de servicio máximos (se prueban 1, 2, 4, ...)
+        dias (int): Días de historial que se conservan en memoria
+    """
+    print(f"\n=== RETENCIÓN ({equipos:,} equipos, un préstamo por equipo y día, ventana de {dias} días) ===")
+    print(f"{'años':>5} {'préstamos':>11} {'memoria antes':>14} {'memoria después':>16} "
+          f"{'archivo':>10} {'aplicar (s)':>12} {'consulta archivo (ms)':>22}")
+    anios = 1
+    while anios <= max_anios:
+        fecha = [_FECHA_INICIAL_SUITE]
+        sistema = SistemaPrestamos(reloj=lambda: fecha[0], datos_prueba=False)
+        nombres_equipos = [f"Laptop-{i:07d}" for i in range(equipos)]
+        sistema.agregar_equipos_lote(EquipoComputo(nombre) for nombre in nombres_equipos)
+        nombres_usuarios = [f"Usuario {i}" for i in range(500)]
+        for dia in range(anios * 365):
+            fecha[0] += 86400
+            sistema.registrar_prestamos_lote(
+                (nombre, nombres_usuarios[(i + dia) % 500]) for i, nombre in enumerate(nombres_equipos))
+            sistema.devolver_lote(nombres_equipos)
+        total = len(sistema._historial)
+        antes = _bytes_historial(sistema._historial)
+
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "historial.csv.gz")
+            inicio = time.perf_counter()
+            archivados = sistema.configurar_retencion(dias=dias, archivo=ruta)
+            tiempo = time.perf_counter() - inicio
+            despues = _bytes_historial(sistema._historial)
+            tamano_archivo = os.path.getsize(ruta)
+            inicio = time.perf_counter()
+            encontrados = sum(1 for _ in sistema.consultar_archivo(equipo=nombres_equipos[0]))
+            tiempo_consulta = time.perf_counter() - inicio
+        assert archivados + len(sistema._historial) == total
+        assert encontrados == sistema._archivados(nombres_equipos[0])
+        assert sistema.estadisticas()["total_prestamos"] == total
+        print(f"{anios:>5} {total:>11,} {antes / 2**20:>11.1f} MB {despues / 2**20:>13.1f} MB "
+              f"{tamano_archivo / 2**20:>7.1f} MB {tiempo:>12.2f} {tiempo_consulta * 1000:>22.1f}")
+        anios *= 2
+
+
+def inventario(max_equipos, cache, operaciones=200_000):
+    """
+    Compara la memoria de un inventario de equipos sin usar y el costo de
+    préstamos y devoluciones entre el diccionario de objetos Equipo y el
+    inventario compacto (columnas con caché LRU de objetos)
+
+    Args:
+        max_equipos (int): Cantidad máxima de equipos (se prueban 10^4, 10^5, ...)
+        cache (int): Capacidad de la caché LRU del inventario compacto
+        operaciones (int): Ciclos de préstamo y devolución por medición
+    """
+    print(f"\n=== INVENTARIO COMPACTO (caché de {cache:,} equipos) ===")
+    print(f"{'equipos':>10} {'objetos (B/eq)':>15} {'compacto (B/eq)':>16} {'ahorro':>7} "
+          f"{'objetos (µs/op)':>16} {'compacto (µs/op)':>17} {'caliente (µs/op)':>17}")
+    cantidad = 10**4
+    while cantidad <= max_equipos:
+        nombres = [f"Laptop-{i:07d}" for i in range(cantidad)]
+
+        def construir(compacto):
+            sistema = SistemaPrestamos(datos_prueba=False, inventario_compacto=compacto, cache_equipos=cache)
+            sistema.agregar_equipos_lote(
+                EquipoComputo(nombre, "Windows 11" if i % 3 else "Linux", "16GB" if i % 2 else "8GB")
+                if i % 4 else Tablet(nombre, "11", "8000mAh") for i, nombre in enumerate(nombres))
+            return sistema
+
+        resultados = []
+        for compacto in (False, True):
+            sistema, memoria = _medir_memoria(lambda: construir(compacto))
+            aleatorio = random.Random(7)
+            pares = [(nombres[aleatorio.randrange(cantidad)], f"Usuario {i % 100}") for i in range(operaciones)]
+            # Préstamos a equipos al azar (en el modo compacto casi siempre fuera de la caché)
+            inicio = time.perf_counter()
+            for nombre_equipo, nombre_usuario in pares:
+                sistema.registrar_prestamo(nombre_equipo, nombre_usuario)
+                sistema.devolver_equipo(nombre_equipo)
+            tiempo = (time.perf_counter() - inicio) / (2 * operaciones)
+            # Préstamos a un conjunto de equipos que entra en la caché
+            calientes = [(nombres[i % min(cache, cantidad)], nombre_usuario) for i, (_, nombre_usuario) in enumerate(pares)]
+            inicio = time.perf_counter()
+            for nombre_equipo, nombre_usuario in calientes:
+                sistema.registrar_prestamo(nombre_equipo, nombre_usuario)
+                sistema.devolver_equipo(nombre_equipo)
+            tiempo_caliente = (time.perf_counter() - inicio) / (2 * operaciones)
+            assert not sistema.verificar_estadisticas()
+            resultados.append((memoria / cantidad, tiempo, tiempo_caliente))
+            del sistema
+        (memoria_objetos, tiempo_objetos, _), (memoria_compacta, tiempo_compacto, tiempo_caliente) = resultados
+        print(f"{cantidad:>10,} {memoria_objetos:>15.0f} {memoria_compacta:>16.0f} "
+              f"{1 - memoria_compacta / memoria_objetos:>6.0%} {tiempo_objetos * 1e6:>16.2f} "
+              f"{tiempo_compacto * 1e6:>17.2f} {tiempo_caliente * 1e6:>17.2f}")
+        cantidad *= 10
+
+
+# Fecha inicial fija del reloj de la suite, para que las corridas sean reproducibles
+_FECHA_INICIAL_SUITE = 1_700_000_000
+
+
+def instantaneas(max_equipos, operaciones, repeticiones=5):
+    """
+    Mide el costo de tomar una instantánea según el tamaño del sistema, el
+    costo que agrega a préstamos y devoluciones mientras hay una viva, y
+    verifica que un reporte sobre la instantánea no cambia mientras otro
+    hilo sigue prestando y devolviendo
+
+    Args:
+        max_equipos (int): Tamaño máximo del inventario (escalas de 10 en 10 desde 1.000)
+        operaciones (int): Ciclos de préstamo y devolución por medición
+        repeticiones (int): Mediciones; se toma la más rápida
+    """
+    print(f"\n=== INSTANTÁNEAS (hasta {max_equipos:,} equipos) ===")
+    escala = 1000
+    while escala <= max_equipos:
+        sistema, nombres_equipos, nombres_usuarios = _crear_sistema(escala, 1000)
+        sistema.registrar_prestamos_lote((nombre, nombres_usuarios[i % 1000])
+                                         for i, nombre in enumerate(nombres_equipos[::2]))
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            instantanea = sistema.instantanea()
+            tiempos.append(time.perf_counter() - inicio)
+            del instantanea
+        print(f"{escala:>10,} equipos: tomar una instantánea {min(tiempos) * 1e6:8.2f} µs")
+        escala *= 10
+
+    equipos = min(max_equipos, 100_000)
+    sistema, nombres_equipos, nombres_usuarios = _crear_sistema(equipos, 1000)
+    pares = [(nombres_equipos[i * 7919 % equipos], nombres_usuarios[i % 1000]) for i in range(operaciones)]
+
+    def ciclo():
+        registrar_prestamo = sistema.registrar_prestamo
+        devolver_equipo = sistema.devolver_equipo
+        inicio = time.perf_counter()
+        for nombre_equipo, nombre_usuario in pares:
+            registrar_prestamo(nombre_equipo, nombre_usuario)
+            devolver_equipo(nombre_equipo)
+        return (time.perf_counter() - inicio) / operaciones
+
+    sin_instantanea = min(ciclo() for _ in range(repeticiones))
+    instantanea = sistema.instantanea()
+    con_instantanea = min(ciclo() for _ in range(repeticiones))
+    cambios = len(instantanea._capa.equipos)
+    del instantanea
+    liberada = sistema._capa_actual() is None
+    print(f"préstamo + devolución sin instantánea: {sin_instantanea * 1e6:6.2f} µs por ciclo")
+    print(f"préstamo + devolución con instantánea: {con_instantanea * 1e6:6.2f} µs por ciclo "
+          f"({cambios:,} equipos en la capa de cambios)")
+    print(f"capa liberada al soltar la instantánea: {'sí' if liberada else 'NO'}")
+
+    sistema = SistemaPrestamos(concurrente=True, datos_prueba=False)
+    for nombre in nombres_equipos:
+        sistema.agregar_equipo(EquipoComputo(nombre))
+    sistema.registrar_prestamos_lote((nombre, nombres_usuarios[i % 1000])
+                                     for i, nombre in enumerate(nombres_equipos[::3]))
+    instantanea = sistema.instantanea()
+    with open(os.devnull, "w") as salida:
+        inicio = time.perf_counter()
+        instantanea.ver_historial_completo(salida=salida)
+        reporte_quieto = time.perf_counter() - inicio
+    primera = instantanea.pagina_historial(limite=equipos)[0]
+    detener = threading.Event()
+    ciclos = [0]
+
+    def escritor():
+        generador = random.Random(1)
+        while not detener.is_set():
+            nombre_equipo = nombres_equipos[generador.randrange(equipos)]
+            sistema.registrar_prestamo(nombre_equipo, nombres_usuarios[generador.randrange(1000)])
+            sistema.devolver_equipo(nombres_equipos[generador.randrange(equipos)])
+            ciclos[0] += 1
+
+    hilo = threading.Thread(target=escritor)
+    hilo.start()
+    inicio = time.perf_counter()
+    segunda = instantanea.pagina_historial(limite=equipos)[0]
+    reporte_escrituras = time.perf_counter() - inicio
+    detener.set()
+    hilo.join()
+    print(f"reporte del historial sobre la instantánea: {reporte_quieto:6.2f} s sin escrituras, "
+          f"{reporte_escrituras:6.2f} s con {ciclos[0]:,} ciclos concurrentes | "
+          f"{'consistente' if primera == segunda else 'INCONSISTENTE'}")
+
+
+def _simular_hora_pico(usuarios, equipos, con_reservas, semilla):
+    """
+    Simula por turnos usuarios que llegan a pedir equipos que ya están
+    prestados: cada uno quiere un equipo concreto (los primeros son los más
+    pedidos) o cualquier tablet, y lo devuelve entre 5 y 30 turnos después
+
+    Args:
+        usuarios (int): Usuarios que llegan durante los primeros 200 turnos
+        equipos (int): Tablets del sistema, todas prestadas al empezar
+        con_reservas (bool): True para usar reservar_equipo/reservar_tipo;
+            False para reintentar registrar_prestamo en cada turno
+        semilla (int): Semilla de la simulación
+
+    Returns:
+        dict: llamadas, segundos, turnos y esperas (turnos) por tipo de usuario
+    """
+    generador = random.Random(semilla)
+    sistema = SistemaPrestamos(datos_prueba=False)
+    nombres_equipos = [f"Tablet-{i:04d}" for i in range(equipos)]
+    devoluciones = {}  # Diccionario: turno -> equipos que se devuelven
+    for nombre in nombres_equipos:
+        sistema.agregar_equipo(Tablet(nombre))
+        sistema.registrar_prestamo(nombre, "Usuario inicial")
+        devoluciones.setdefault(generador.randint(1, 30), []).append(nombre)
+    llegadas = {}  # Diccionario: turno -> [(usuario, equipo pedido o None para cualquiera)]
+    tipos = {}
+    for i in range(usuarios):
+        nombre = f"Usuario {i}"
+        tipos[nombre] = "Profesor" if generador.random() < 0.2 else "Estudiante"
+        sistema.agregar_usuario(Usuario(nombre, f"u{i}@email.com", tipos[nombre]))
+        pedido = None
+        if generador.random() < 0.7:
+            pedido = nombres_equipos[int(equipos * generador.random() ** 2)]
+        llegadas.setdefault(generador.randrange(200), []).append((nombre, pedido))
+    duracion = random.Random(semilla + 1)  # Aparte, para que los reintentos no cambien las duraciones
+    llegada_usuario = {}
+    esperas = {"Profesor": [], "Estudiante": []}
+    turno = [0]
+    llamadas = 0
+
+    def prestado(nombre_equipo, nombre_usuario):
+        esperas[tipos[nombre_usuario]].append(turno[0] - llegada_usuario[nombre_usuario])
+        devoluciones.setdefault(turno[0] + duracion.randint(5, 30), []).append(nombre_equipo)
+
+    if con_reservas:
+        sistema.activar_reservas(al_entregar=prestado)
+    esperando = []
+    inicio = time.perf_counter()
+    atendidos = 0
+    while atendidos < usuarios:
+        for nombre_equipo in devoluciones.pop(turno[0], ()):
+            sistema.devolver_equipo(nombre_equipo)
+            llamadas += 1
+        for nombre_usuario, pedido in llegadas.pop(turno[0], ()):
+            llegada_usuario[nombre_usuario] = turno[0]
+            esperando.append((nombre_usuario, pedido))
+        pendientes = []
+        for nombre_usuario, pedido in esperando:
+            llamadas += 1
+            if con_reservas:
+                if pedido is None:
+                    codigo, nombre_equipo = sistema._reservar_tipo("Tablet", nombre_usuario)
+                else:
+                    codigo, nombre_equipo = sistema._reservar_equipo(pedido, nombre_usuario), pedido
+                if codigo == RESULTADO_OK:
+                    prestado(nombre_equipo, nombre_usuario)
+                # En espera o prestado, el usuario ya no vuelve a llamar
+                continue
+            nombre_equipo = pedido if pedido is not None else generador.choice(nombres_equipos)
+            if sistema._prestar(nombre_equipo, nombre_usuario) == RESULTADO_OK:
+                prestado(nombre_equipo, nombre_usuario)
+            else:
+                pendientes.append((nombre_usuario, pedido))
+        esperando = pendientes
+        atendidos = sum(len(lista) for lista in esperas.values())
+        turno[0] += 1
+    return {
+        "llamadas": llamadas,
+        "segundos": time.perf_counter() - inicio,
+        "turnos": turno[0],
+        "esperas": esperas,
+        "sistema": sistema,
+    }
+
+
+def reservas(usuarios, equipos, semilla=42, operaciones=100_000):
+    """
+    Compara reintentar registrar_prestamo en cada turno contra las colas de
+    reservas en una simulación de hora pico, y mide el costo de una
+    devolución que entrega el equipo a la siguiente reserva
+
+    Args:
+        usuarios (int): Usuarios que esperan equipos
+        equipos (int): Tablets del sistema
+        semilla (int): Semilla de la simulación
+        operaciones (int): Devoluciones por medición del costo de entrega
+    """
+    print(f"\n=== RESERVAS ({usuarios:,} usuarios, {equipos:,} equipos) ===")
+    for titulo, con_reservas in (("reintentos", False), ("reservas", True)):
+        resultado = _simular_hora_pico(usuarios, equipos, con_reservas, semilla)
+        print(f"{titulo:>10}: {resultado['llamadas']:>10,} llamadas | {resultado['segundos']:6.2f} s | "
+              f"{resultado['turnos']:,} turnos")
+        for tipo_usuario, esperas in resultado["esperas"].items():
+            esperas = sorted(esperas)
+            print(f"{'':>12}{tipo_usuario:<10} espera media {statistics.mean(esperas):7.1f} turnos, "
+                  f"p95 {esperas[int(len(esperas) * 0.95)]:5d}")
+        if not resultado["sistema"].verificar_estadisticas():
+            print(f"{'':>12}estadísticas consistentes")
+
+    # Costo de la entrega: cada devolución presta el equipo al siguiente de una cola larga
+    sistema = SistemaPrestamos(datos_prueba=False)
+    sistema.agregar_equipo(Tablet("Tablet-0000"))
+    sistema.registrar_prestamo("Tablet-0000", "Usuario inicial")
+    for i in range(operaciones):
+        sistema.agregar_usuario(Usuario(f"Usuario {i}", f"u{i}@email.com",
+                                        "Profesor" if i % 5 == 0 else "Estudiante"))
+        sistema._reservar_equipo("Tablet-0000", f"Usuario {i}")
+    devolver = sistema._devolver
+    inicio = time.perf_counter()
+    for _ in range(operaciones):
+        devolver("Tablet-0000")
+    con_cola = (time.perf_counter() - inicio) / operaciones
+    sistema, nombres_equipos, nombres_usuarios = _crear_sistema(1, 1)
+    sistema.activar_reservas()
+    prestar = sistema._prestar
+    devolver = sistema._devolver
+    inicio = time.perf_counter()
+    for _ in range(operaciones):
+        prestar(nombres_equipos[0], nombres_usuarios[0])
+        devolver(nombres_equipos[0])
+    sin_cola = (time.perf_counter() - inicio) / operaciones
+    print(f"devolución + entrega a la siguiente reserva ({operaciones:,} en cola): {con_cola * 1e6:6.2f} µs")
+    print(f"préstamo + devolución sin reservas en espera:          {sin_cola * 1e6:6.2f} µs")
+
+
+def vencimientos(max_prestamos, operaciones, repeticiones=5):
+    """
+    Compara las consultas de préstamos vencidos y por vencer sobre la agenda
+    de vencimientos contra recorrer todos los préstamos activos, mide el
+    costo que agrega la agenda a préstamos y devoluciones, y verifica que el
+    revisor en segundo plano emite cada vencimiento una sola vez
+
+    Args:
+        max_prestamos (int): Préstamos activos máximos (escalas de 10 en 10 desde 1.000)
+        operaciones (int): Ciclos de préstamo y devolución por medición
+        repeticiones (int): Mediciones; se toma la más rápida
+    """
+    print(f"\n=== VENCIMIENTOS (hasta {max_prestamos:,} préstamos activos) ===")
+    ahora = [1_700_000_000]
+    plazo = 7 * 86400
+    escala = 1000
+    while escala <= max_prestamos:
+        ahora[0] = 1_700_000_000
+        sistema, nombres_equipos, nombres_usuarios = _crear_sistema(escala, 1000, reloj=lambda: ahora[0])
+        # Préstamos repartidos en 30 días: cada consulta encuentra unos pocos vencidos
+        paso = 30 * 86400 // escala
+        for i, nombre in enumerate(nombres_equipos):
+            ahora[0] += paso
+            sistema._prestar(nombre, nombres_usuarios[i % 1000])
+        sistema.configurar_vencimientos(dias_defecto=plazo / 86400)
+        momento = 1_700_000_000 + plazo + 100 * paso  # Unos 100 préstamos vencidos
+
+        def recorrido():
+            # Sin agenda: se calcula el vencimiento de cada préstamo activo
+            return sorted((fecha + plazo, nombre_equipo) for nombre_equipo, fecha in
+                          ((nombre_equipo, sistema._equipos[nombre_equipo].fecha_ultimo_prestamo())
+                           for nombre_equipo in sistema._prestamos_activos)
+                          if fecha is not None and fecha + plazo <= momento)
+
+        tiempos = {"recorrido": [], "vencidos": [], "por_vencer": []}
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            esperado = recorrido()
+            tiempos["recorrido"].append(time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            vencidos = sistema.prestamos_vencidos(momento)
+            tiempos["vencidos"].append(time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            por_vencer = sistema.prestamos_por_vencer(3600, momento)
+            tiempos["por_vencer"].append(time.perf_counter() - inicio)
+        coinciden = [nombre for _, nombre in esperado] == [nombre for nombre, _, _ in vencidos]
+        print(f"{escala:>10,} préstamos: recorrido {min(tiempos['recorrido']) * 1e3:8.2f} ms | "
+              f"vencidos ({len(vencidos):,}) {min(tiempos['vencidos']) * 1e3:6.3f} ms | "
+              f"por vencer en 1 h ({len(por_vencer):,}) {min(tiempos['por_vencer']) * 1e3:6.3f} ms | "
+              f"{'coinciden' if coinciden else 'NO COINCIDEN'}")
+        escala *= 10
+
+    sistema, nombres_equipos, nombres_usuarios = _crear_sistema(100_000, 1000)
+    pares = [(nombres_equipos[i * 7919 % 100_000], nombres_usuarios[i % 1000]) for i in range(operaciones)]
+
+    def ciclo():
+        prestar = sistema._prestar
+        devolver = sistema._devolver
+        inicio = time.perf_counter()
+        for nombre_equipo, nombre_usuario in pares:
+            prestar(nombre_equipo, nombre_usuario)
+            devolver(nombre_equipo)
+        return (time.perf_counter() - inicio) / operaciones
+
+    sin_agenda = min(ciclo() for _ in range(repeticiones))
+    sistema.configurar_vencimientos({"Profesor": 14}, dias_defecto=7)
+    con_agenda = min(ciclo() for _ in range(repeticiones))
+    print(f"préstamo + devolución sin vencimientos: {sin_agenda * 1e6:6.2f} µs por ciclo")
+    print(f"préstamo + devolución con vencimientos: {con_agenda * 1e6:6.2f} µs por ciclo")
+
+    # Revisor: el reloj avanza un día por vuelta y cada préstamo vence una sola vez
+    ahora[0] = 1_700_000_000
+    sistema, nombres_equipos, nombres_usuarios = _crear_sistema(10_000, 1000, reloj=lambda: ahora[0])
+    sistema.configurar_vencimientos(dias_defecto=3)
+    for i, nombre in enumerate(nombres_equipos):
+        if i % 1000 == 0:
+            ahora[0] += 86400
+        sistema._prestar(nombre, nombres_usuarios[i % 1000])
+    eventos = Counter()
+    with sistema.iniciar_revisor(intervalo=0.01, al_vencer=lambda nombre_equipo, *_: eventos.update((nombre_equipo,))):
+        for _ in range(15):
+            ahora[0] += 86400
+            time.sleep(0.02)
+        time.sleep(0.05)
+    duplicados = sum(1 for cantidad in eventos.values() if cantidad > 1)
+    print(f"revisor: {len(eventos):,} de {len(nombres_equipos):,} préstamos vencidos notificados, "
+          f"{duplicados} duplicados")
+
+
+def _construir_escala(escala, prestamos_por_equipo, semilla):
+    """
+    Construye un sistema sintético reproducible: `escala` equipos (60 %
+    computadoras, 40 % tablets), `escala` usuarios (10 % profesores) y
+    `prestamos_por_equipo` préstamos por equipo, con un préstamo por minuto
+    de reloj simulado. Al terminar, el 10 % de los equipos queda prestado.
+
+    Returns:
+        tuple: (sistema, nombres de equipos, nombres de usuarios)
+    """
+    aleatorio = random.Random(semilla)
+    fecha = [_FECHA_INICIAL_SUITE]
+
+    def reloj():
+        fecha[0] += 60
+        return fecha[0]
+
+    sistema = SistemaPrestamos(reloj=reloj, datos_prueba=False)
+    nombres_equipos = [f"Equipo-{i:07d}" for i in range(escala)]
+    nombres_usuarios = [f"Usuario {i:07d}" for i in range(escala)]
+    sistema.agregar_equipos_lote(Tablet(nombre) if i % 5 < 2 else EquipoComputo(nombre)
+                                 for i, nombre in enumerate(nombres_equipos))
+    sistema.agregar_usuarios_lote(
+        Usuario(nombre, f"usuario{i}@email.com", "Profesor" if i % 10 == 0 else "Estudiante")
+        for i, nombre in enumerate(nombres_usuarios))
+    for _ in range(prestamos_por_equipo):
+        sistema.registrar_prestamos_lote((nombre, aleatorio.choice(nombres_usuarios)) for nombre in nombres_equipos)
+        sistema.devolver_lote(nombres_equipos)
+    sistema.registrar_prestamos_lote(
+        (nombre, aleatorio.choice(nombres_usuarios)) for nombre in nombres_equipos[::10])
+    return sistema, nombres_equipos, nombres_usuarios
+
+
+def _casos_suite(sistema, nombres_equipos, nombres_usuarios, semilla, salida):
+    """
+    Define las operaciones públicas que mide la suite (los reportes se
+    escriben en `salida`)
+
+    Returns:
+        list: (nombre, preparar, ejecutar, deshacer); `ejecutar` retorna la
+            cantidad de operaciones hechas y es lo único que se cronometra.
+            `preparar` y `deshacer` (o None) dejan el estado igual entre
+            corridas; `deshacer` es False si la operación cambia el estado y
+            no se puede deshacer. Las altas agrandan el sistema, así que van al final.
+    """
+    aleatorio = random.Random(semilla)
+    escala = len(nombres_equipos)
+    cantidad = min(1000, escala // 10)
+    # Equipos disponibles: los prestados al construir son uno de cada diez
+    disponibles = [nombre for i, nombre in enumerate(nombres_equipos) if i % 10][:cantidad]
+    usuarios = [aleatorio.choice(nombres_usuarios) for _ in range(cantidad)]
+    prestamos = list(zip(disponibles, usuarios))
+    muestra = [aleatorio.choice(nombres_equipos) for _ in range(100)]
+    muestra_usuarios = [aleatorio.choice(nombres_usuarios) for _ in range(100)]
+    nuevos = [0]
+    ahora = _FECHA_INICIAL_SUITE + 60 * len(sistema._historial)
+
+    def en_silencio(funcion):
+        # Las operaciones que solo imprimen en stdout se redirigen a devnull
+        def ejecutar():
+            with contextlib.redirect_stdout(salida):
+                return funcion()
+        return ejecutar
+
+    def agregar_equipos():
+        inicio = nuevos[0]
+        nuevos[0] += cantidad
+        for i in range(inicio, nuevos[0]):
+            sistema.agregar_equipo(EquipoComputo(f"Nuevo-{i:07d}"))
+        return cantidad
+
+    def agregar_usuarios():
+        inicio = nuevos[0]
+        nuevos[0] += cantidad
+        for i in range(inicio, nuevos[0]):
+            sistema.agregar_usuario(Usuario(f"Nuevo {i:07d}", f"nuevo{i}@email.com"))
+        return cantidad
+
+    def prestar():
+        for nombre_equipo, nombre_usuario in prestamos:
+            sistema.registrar_prestamo(nombre_equipo, nombre_usuario)
+        return cantidad
+
+    def devolver():
+        for nombre_equipo in disponibles:
+            sistema.devolver_equipo(nombre_equipo)
+        return cantidad
+
+    def una_vez(funcion):
+        def ejecutar():
+            funcion()
+            return 1
+        return ejecutar
+
+    def muestreo(funcion, nombres=muestra):
+        def ejecutar():
+            for nombre in nombres:
+                funcion(nombre)
+            return len(nombres)
+        return ejecutar
+
+    def prestar_lote():
+        sistema.registrar_prestamos_lote(prestamos)
+
+    def devolver_lote():
+        sistema.devolver_lote(disponibles)
+
+    return [
+        ("registrar_prestamo", None, prestar, devolver_lote),
+        ("devolver_equipo", prestar_lote, devolver, None),
+        ("registrar_prestamos_lote", None, lambda: prestar_lote() or cantidad, devolver_lote),
+        ("devolver_lote", prestar_lote, lambda: devolver_lote() or cantidad, None),
+        ("estadisticas", None, una_vez(sistema.estadisticas), None),
+        ("obtener_estadisticas", None, en_silencio(una_vez(sistema.obtener_estadisticas)), None),
+        ("equipos_disponibles", None, una_vez(sistema.equipos_disponibles), None),
+        ("equipos_prestados", None, una_vez(sistema.equipos_prestados), None),
+        ("equipos_por_tipo", None, una_vez(lambda: sistema.equipos_por_tipo("Tablet")), None),
+        ("pagina_equipos", None, una_vez(sistema.pagina_equipos), None),
+        ("pagina_historial", None, una_vez(sistema.pagina_historial), None),
+        ("consultar_prestamos_1_dia", None,
+         una_vez(lambda: list(sistema.consultar_prestamos(ahora - 86400, ahora))), None),
+        ("contar_prestamos_usuario", None,
+         muestreo(lambda nombre: sistema.contar_prestamos(usuario=nombre), muestra_usuarios), None),
+        ("sugerir_equipos", None, muestreo(lambda nombre: sistema.sugerir_equipos(nombre[:-1] + "x")), None),
+        ("sugerir_usuarios", None, muestreo(lambda nombre: sistema.sugerir_usuarios(nombre[:-2]), muestra_usuarios),
+         None),
+        ("ver_historial_equipo", None, en_silencio(muestreo(sistema.ver_historial_equipo)), None),
+        ("mostrar_equipos", None, una_vez(lambda: sistema.mostrar_equipos(salida=salida)), None),
+        ("mostrar_equipos_disponibles", None, una_vez(lambda: sistema.mostrar_equipos_disponibles(salida=salida)), None),
+        ("mostrar_usuarios", None, en_silencio(una_vez(sistema.mostrar_usuarios)), None),
+        ("ver_historial_completo", None, una_vez(lambda: sistema.ver_historial_completo(salida=salida)), None),
+        ("agregar_equipo", None, agregar_equipos, False),
+        ("agregar_usuario", None, agregar_usuarios, False),
+    ]
+
+
+def suite(escalas, prestamos_por_equipo, repeticiones, semilla, ruta_salida, operaciones=None, tiempo_minimo=0.05):
+    """
+    Mide cada operación pública de SistemaPrestamos en sistemas sintéticos
+    de varias escalas y guarda los resultados en JSON. El tiempo es el de
+    la más rápida de `repeticiones` corridas (también se guarda la mediana);
+    la memoria máxima (por encima de la
+    ya retenida) se mide en una corrida aparte con tracemalloc, que hace
+    más lentas las operaciones.
+
+    Args:
+        escalas (list): Cantidades de equipos (y de usuarios) a probar
+        prestamos_por_equipo (int): Préstamos en el historial por equipo
+        repeticiones (int): Corridas cronometradas por operación
+        semilla (int): Semilla de los datos sintéticos
+        ruta_salida (str): Archivo JSON de resultados (None para no guardar)
+        operaciones (list): Solo estas operaciones (None para todas)
+        tiempo_minimo (float): Segundos mínimos de cada corrida cronometrada
+
+    Returns:
+        dict: Resultados en el formato del archivo JSON
+    """
+    resultados = {
+        "metadatos": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "nucleos": os.cpu_count(),
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "semilla": semilla,
+            "pythonhashseed": os.environ.get("PYTHONHASHSEED"),
+            "prestamos_por_equipo": prestamos_por_equipo,
+            "repeticiones": repeticiones,
+        },
+        "escalas": {},
+    }
+    for escala in escalas:
+        gc.collect()
+        inicio = time.perf_counter()
+        sistema, nombres_equipos, nombres_usuarios = _construir_escala(escala, prestamos_por_equipo, semilla)
+        construccion = time.perf_counter() - inicio
+        print(f"\n=== SUITE: {escala:,} equipos y usuarios, {len(sistema._historial):,} préstamos "
+              f"(construcción {construccion:.2f} s) ===")
+        print(f"{'operación':>28} {'µs/op':>12} {'ops/s':>12} {'memoria máx.':>13}")
+        medidas = {}
+        salida = open(os.devnull, "w")
+        casos = _casos_suite(sistema, nombres_equipos, nombres_usuarios, semilla, salida)
+        for nombre, preparar, ejecutar, deshacer in casos:
+            if operaciones is not None and nombre not in operaciones:
+                continue
+            tiempos = []
+            for corrida in range(repeticiones + 1):
+                if preparar is not None:
+                    preparar()
+                gc.collect()
+                if corrida < repeticiones:
+                    # Las operaciones que se pueden repetir sin preparar el estado se
+                    # repiten hasta cubrir un tiempo mínimo, para reducir el ruido
+                    inicio = time.perf_counter()
+                    cantidad = ejecutar()
+                    while preparar is None and deshacer is None and time.perf_counter() - inicio < tiempo_minimo:
+                        cantidad += ejecutar()
+                    tiempos.append((time.perf_counter() - inicio) / cantidad)
+                else:
+                    tracemalloc.start()
+                    base = tracemalloc.get_traced_memory()[0]
+                    ejecutar()
+                    pico = tracemalloc.get_traced_memory()[1] - base
+                    tracemalloc.stop()
+                if deshacer:
+                    deshacer()
+            # La corrida más rápida es la menos afectada por otros procesos
+            segundos = min(tiempos)
+            medidas[nombre] = {"segundos_por_op": segundos, "mediana_segundos_por_op": statistics.median(tiempos),
+                               "ops_por_segundo": 1 / segundos, "memoria_pico_bytes": pico}
+            print(f"{nombre:>28} {segundos * 1e6:>12,.2f} {1 / segundos:>12,.0f} {pico / 2**20:>9.2f} MiB")
+        salida.close()
+        resultados["escalas"][str(escala)] = {
+            "prestamos": len(sistema._historial),
+            "construccion_segundos": construccion,
+            "operaciones": medidas,
+        }
+        del sistema
+
+    if ruta_salida:
+        with open(ruta_salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {ruta_salida}")
+    return resultados
+
+
+def comparar(ruta_base, ruta_nueva, umbral=0.25, umbral_memoria=0.25, memoria_minima=64 * 1024):
+    """
+    Compara dos archivos de resultados de la suite y marca las regresiones:
+    operaciones más lentas que la base en más de `umbral`, o que usan más
+    memoria en más de `umbral_memoria` (y al menos `memoria_minima` bytes)
+
+    Args:
+        ruta_base (str): Resultados de referencia
+        ruta_nueva (str): Resultados a comparar (de la misma máquina; entre
+            corridas idénticas en una VM compartida se ven diferencias de tiempo
+            de hasta 20 %, de ahí el umbral por defecto)
+
+    Returns:
+        list: Regresiones encontradas como (escala, operación, descripción)
+    """
+    with open(ruta_base, encoding="utf-8") as archivo:
+        base = json.load(archivo)
+    with open(ruta_nueva, encoding="utf-8") as archivo:
+        nueva = json.load(archivo)
+
+    regresiones = []
+    print(f"\n=== COMPARACIÓN: {ruta_nueva} contra {ruta_base} ===")
+    print(f"{'escala':>9} {'operación':>28} {'tiempo':>8} {'memoria':>8}")
+    for escala, datos in nueva["escalas"].items():
+        operaciones_base = base["escalas"].get(escala, {}).get("operaciones", {})
+        for nombre, medida in datos["operaciones"].items():
+            anterior = operaciones_base.get(nombre)
+            if anterior is None:
+                continue
+            tiempo = medida["segundos_por_op"] / anterior["segundos_por_op"]
+            memoria = (medida["memoria_pico_bytes"] + 1) / (anterior["memoria_pico_bytes"] + 1)
+            marcas = []
+            if tiempo > 1 + umbral:
+                marcas.append(f"tiempo x{tiempo:.2f}")
+            if (memoria > 1 + umbral_memoria
+                    and medida["memoria_pico_bytes"] - anterior["memoria_pico_bytes"] >= memoria_minima):
+                marcas.append(f"memoria x{memoria:.2f}")
+            for marca in marcas:
+                regresiones.append((int(escala), nombre, marca))
+            print(f"{int(escala):>9,} {nombre:>28} {tiempo:>7.2f}x {memoria:>7.2f}x"
+                  f"{'  <-- REGRESIÓN' if marcas else ''}")
+    print(f"\n{len(regresiones)} regresiones (umbral de tiempo {umbral:.0%}, de memoria {umbral_memoria:.0%})")
+    return regresiones
+
+
+def main():
+    """Función principal que ejecuta el benchmark solicitado"""
+    parser = argparse.ArgumentParser(description="Benchmarks del sistema de préstamos")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    parser_historial = subparsers.add_parser("memoria_historial")
+    parser_historial.add_argument("--eventos", type=int, default=10_000_000)
+
+    parser_lote = subparsers.add_parser("lote")
+    parser_lote.add_argument("--equipos", type=int, default=100_000)
+
+    parser_objetos = subparsers.add_parser("memoria_objetos")
+    parser_objetos.add_argument("--max-objetos", type=int, default=1_000_000)
+
+    parser_bitacora = subparsers.add_parser("bitacora")
+    parser_bitacora.add_argument("--registros", type=int, default=10_000_000)
+
+    parser_snapshot = subparsers.add_parser("snapshot")
+    parser_snapshot.add_argument("--max-equipos", type=int, default=1_000_000)
+
+    parser_concurrencia = subparsers.add_parser("concurrencia")
+    parser_concurrencia.add_argument("--operaciones", type=int, default=200_000)
+    parser_concurrencia.add_argument("--max-hilos", type=int, default=16)
+
+    parser_reportes = subparsers.add_parser("reportes")
+    parser_reportes.add_argument("--equipos", type=int, default=200_000)
+    parser_reportes.add_argument("--prestamos-por-equipo", type=int, default=5)
+
+    parser_busqueda = subparsers.add_parser("busqueda")
+    parser_busqueda.add_argument("--nombres", type=int, default=1_000_000)
+
+    parser_usuario = subparsers.add_parser("usuario_pesado")
+    parser_usuario.add_argument("--equipos", type=int, default=50_000)
+
+    parser_importacion = subparsers.add_parser("importacion")
+    parser_importacion.add_argument("--filas", type=int, default=1_000_000)
+    parser_importacion.add_argument("--procesos", type=int, default=4)
+
+    parser_consultas = subparsers.add_parser("consultas")
+    parser_consultas.add_argument("--equipos", type=int, default=100_000)
+    parser_consultas.add_argument("--prestamos-por-equipo", type=int, default=10)
+
+    parser_fragmentos = subparsers.add_parser("fragmentos")
+    parser_fragmentos.add_argument("--equipos", type=int, default=200_000)
+    parser_fragmentos.add_argument("--max-fragmentos", type=int, default=16)
+
+    parser_metricas = subparsers.add_parser("metricas")
+    parser_metricas.add_argument("--operaciones", type=int, default=200_000)
+
+    parser_retencion = subparsers.add_parser("retencion")
+    parser_retencion.add_argument("--equipos", type=int, default=1000)
+    parser_retencion.add_argument("--max-anios", type=int, default=4)
+    parser_retencion.add_argument("--dias", type=int, default=30)
+
+    parser_inventario = subparsers.add_parser("inventario")
+    parser_inventario.add_argument("--max-equipos", type=int, default=1_000_000)
+    parser_inventario.add_argument("--cache", type=int, default=10_000)
+
+    parser_instantaneas = subparsers.add_parser("instantaneas")
+    parser_instantaneas.add_argument("--max-equipos", type=int, default=1_000_000)
+    parser_instantaneas.add_argument("--operaciones", type=int, default=200_000)
+
+    parser_reservas = subparsers.add_parser("reservas")
+    parser_reservas.add_argument("--usuarios", type=int, default=5000)
+    parser_reservas.add_argument("--equipos", type=int, default=100)
+
+    parser_vencimientos = subparsers.add_parser("vencimientos")
+    parser_vencimientos.add_argument("--max-prestamos", type=int, default=1_000_000)
+    parser_vencimientos.add_argument("--operaciones", type=int, default=200_000)
+
+    parser_suite = subparsers.add_parser("suite")
+    parser_suite.add_argument("--escalas", default="1000,10000,100000")
+    parser_suite.add_argument("--prestamos-por-equipo", type=int, default=3)
+    parser_suite.add_argument("--repeticiones", type=int, default=5)
+    parser_suite.add_argument("--semilla", type=int, default=42)
+    parser_suite.add_argument("--salida", default="resultados_suite.json")
+    parser_suite.add_argument("--operaciones", help="lista separada por comas (por defecto todas)")
+
+    parser_comparar = subparsers.add_parser("comparar")
+    parser_comparar.add_argument("base")
+    parser_comparar.add_argument("nuevo")
+    parser_comparar.add_argument("--umbral", type=float, default=0.25)
+    parser_comparar.add_argument("--umbral-memoria", type=float, default=0.25)
+
+    args = parser.parse_args()
+    if args.benchmark == "memoria_historial":
+        memoria_historial(args.eventos)
+    elif args.benchmark == "lote":
+        lote(args.equipos)
+    elif args.benchmark == "memoria_objetos":
+        memoria_objetos(args.max_objetos)
+    elif args.benchmark == "bitacora":
+        bitacora(args.registros)
+    elif args.benchmark == "snapshot":
+        snapshot(args.max_equipos)
+    elif args.benchmark == "concurrencia":
+        concurrencia(args.operaciones, args.max_hilos)
+    elif args.benchmark == "reportes":
+        reportes(args.equipos, args.prestamos_por_equipo)
+    elif args.benchmark == "busqueda":
+        busqueda(args.nombres)
+    elif args.benchmark == "usuario_pesado":
+        usuario_pesado(args.equipos)
+    elif args.benchmark == "importacion":
+        importacion(args.filas, args.procesos)
+    elif args.benchmark == "consultas":
+        consultas(args.equipos, args.prestamos_por_equipo)
+    elif args.benchmark == "fragmentos":
+        fragmentos(args.equipos, args.max_fragmentos)
+    elif args.benchmark == "metricas":
+        metricas(args.operaciones)
+    elif args.benchmark == "retencion":
+        retencion(args.equipos, args.max_anios, args.dias)
+    elif args.benchmark == "inventario":
+        inventario(args.max_equipos, args.cache)
+    elif args.benchmark == "instantaneas":
+        instantaneas(args.max_equipos, args.operaciones)
+    elif args.benchmark == "reservas":
+        reservas(args.usuarios, args.equipos)
+    elif args.benchmark == "vencimientos":
+        vencimientos(args.max_prestamos, args.operaciones)
+    elif args.benchmark == "suite":
+        escalas = [int(valor) for valor in args.escalas.split(",")]
+        operaciones = args.operaciones.split(",") if args.operaciones else None
+        suite(escalas, args.prestamos_por_equipo, args.repeticiones, args.semilla, args.salida, operaciones)
+    elif args.benchmark == "comparar":
+        # Código de salida 1 si hay regresiones, para usarlo en integración continua
+        sys.exit(1 if comparar(args.base, args.nuevo, args.umbral, args.umbral_memoria) else 0)
+
+
+if __name__ == "__main__":
+    main()
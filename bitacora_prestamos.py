@@ -0,0 +1,303 @@
+"""
+Bitácora de solo escritura (append-only) para el sistema de préstamos
+
+Cada operación que modifica el estado de SistemaPrestamos se guarda como un
+registro binario con el formato:
+
+    longitud (uint32) | crc32 (uint32) | operación (uint8) | datos
+
+Los datos son textos UTF-8 precedidos por su longitud (uint16) y, en los
+préstamos, la fecha como entero de 64 bits. Las escrituras se acumulan en
+un búfer que un hilo vacía con un único fsync por grupo (group commit),
+como máximo cada `latencia_maxima` segundos.
+"""
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+
+_CABECERA = struct.Struct("<IIB")
+_LONGITUD_TEXTO = struct.Struct("<H")
+_FECHA = struct.Struct("<q")
+
+
+def _checksum(operacion, datos):
+    """Calcula el crc32 del código de operación seguido de los datos"""
+    return zlib.crc32(datos, zlib.crc32(bytes((operacion,))))
+
+
+class BitacoraCorruptaError(Exception):
+    """Se lanza cuando un registro de la bitácora no se puede interpretar"""
+
+
+class BitacoraFallidaError(OSError):
+    """Se lanza cuando el hilo de commit no pudo escribir o sincronizar a disco"""
+
+
+class BitacoraPrestamos:
+    """Bitácora binaria con checksums y commit agrupado"""
+
+    # Códigos de operación
+    OP_AGREGAR_EQUIPO = 1
+    OP_AGREGAR_USUARIO = 2
+    OP_PRESTAMO = 3
+    OP_DEVOLUCION = 4
+
+    def __init__(self, ruta, latencia_maxima=0.005, tam_grupo=1 << 20, esperar_durabilidad=False):
+        """
+        Constructor de la bitácora
+
+        Args:
+            ruta (str): Ruta del archivo de la bitácora
+            latencia_maxima (float): Segundos máximos que un registro espera
+                en el búfer antes de sincronizarse a disco
+            tam_grupo (int): Bytes en el búfer que fuerzan una sincronización
+            esperar_durabilidad (bool): Si es True, cada escritura espera a
+                que su registro esté sincronizado en disco
+        """
+        self._ruta = ruta
+        self._latencia_maxima = latencia_maxima
+        self._tam_grupo = tam_grupo
+        self._esperar_durabilidad = esperar_durabilidad
+
+        self._truncar_registro_incompleto()
+        self._archivo = open(ruta, "ab")
+        self._posicion_durable = self._archivo.tell()
+        self._buffer = bytearray()
+        self._condicion = threading.Condition()
+        self._secuencia_escrita = 0
+        self._secuencia_durable = 0
+        self._cerrada = False
+        self._error = None  # Error de E/S del hilo de commit; la bitácora queda inutilizable
+        self._hilo = threading.Thread(target=self._ciclo_commit, name="bitacora-commit", daemon=True)
+        self._hilo.start()
+
+    @property
+    def ruta(self):
+        """Propiedad de solo lectura para la ruta del archivo"""
+        return self._ruta
+
+    @property
+    def posicion(self):
+        """Bytes del archivo ya sincronizados en disco (final del último registro durable)"""
+        with self._condicion:
+            return self._posicion_durable
+
+    # ----------------------------------------------------------- escritura
+
+    def _agregar(self, operacion, datos):
+        """
+        Agrega un registro al búfer de escritura
+
+        Args:
+            operacion (int): Código de operación
+            datos (bytes): Datos ya codificados del registro
+        """
+        cabecera = _CABECERA.pack(len(datos), _checksum(operacion, datos), operacion)
+        with self._condicion:
+            self._verificar_error()
+            if self._cerrada:
+                raise ValueError("La bitácora está cerrada.")
+            estaba_vacio = not self._buffer
+            self._buffer += cabecera
+            self._buffer += datos
+            self._secuencia_escrita += 1
+            secuencia = self._secuencia_escrita
+            if estaba_vacio or len(self._buffer) >= self._tam_grupo:
+                self._condicion.notify_all()
+            if self._esperar_durabilidad:
+                self._esperar_secuencia(secuencia)
+
+    def _verificar_error(self):
+        """Relanza el error del hilo de commit (se llama con el candado tomado)"""
+        if self._error is not None:
+            raise BitacoraFallidaError(f"La bitácora {self._ruta} falló al escribir a disco: "
+                                       f"{self._error}") from self._error
+
+    def _esperar_secuencia(self, secuencia):
+        """Espera (con el candado tomado) a que `secuencia` sea durable o falle el commit"""
+        while self._secuencia_durable < secuencia:
+            self._verificar_error()
+            self._condicion.wait()
+
+    @staticmethod
+    def _codificar_textos(*textos):
+        """Codifica textos UTF-8 precedidos por su longitud"""
+        partes = []
+        for texto in textos:
+            codificado = texto.encode("utf-8")
+            partes.append(_LONGITUD_TEXTO.pack(len(codificado)))
+            partes.append(codificado)
+        return b"".join(partes)
+
+    def registrar_equipo(self, equipo):
+        """Registra el alta de un equipo con los datos de su constructor"""
+        self._agregar(self.OP_AGREGAR_EQUIPO,
+                      self._codificar_textos(type(equipo).__name__, *equipo._datos_constructor()))
+
+    def registrar_usuario(self, usuario):
+        """Registra el alta de un usuario"""
+        self._agregar(self.OP_AGREGAR_USUARIO,
+                      self._codificar_textos(usuario.nombre, usuario.email, usuario.tipo_usuario))
+
+    def registrar_prestamo(self, nombre_equipo, nombre_usuario, fecha):
+        """Registra un préstamo con su fecha en segundos desde epoch"""
+        self._agregar(self.OP_PRESTAMO,
+                      _FECHA.pack(fecha) + self._codificar_textos(nombre_equipo, nombre_usuario))
+
+    def registrar_devolucion(self, nombre_equipo):
+        """Registra la devolución de un equipo"""
+        self._agregar(self.OP_DEVOLUCION, self._codificar_textos(nombre_equipo))
+
+    # ------------------------------------------------------- commit agrupado
+
+    def _ciclo_commit(self):
+        """Hilo que sincroniza el búfer a disco en grupos"""
+        while True:
+            with self._condicion:
+                while not self._buffer and not self._cerrada:
+                    self._condicion.wait()
+                if self._buffer and len(self._buffer) < self._tam_grupo and not self._cerrada:
+                    # Esperar a que se acumulen más registros dentro del presupuesto de latencia
+                    self._condicion.wait(self._latencia_maxima)
+                if not self._buffer and self._cerrada:
+                    return
+                grupo = self._buffer
+                secuencia = self._secuencia_escrita
+                self._buffer = bytearray()
+            try:
+                self._escribir_grupo(grupo, secuencia)
+            except Exception as error:  # ENOSPC, EIO, ...
+                # Sin este aviso, sincronizar() y los escritores durables esperarían para siempre
+                with self._condicion:
+                    self._error = error
+                    self._buffer = bytearray()
+                    self._condicion.notify_all()
+                return
+
+    def _escribir_grupo(self, grupo, secuencia):
+        """Escribe un grupo de registros y lo sincroniza con un solo fsync"""
+        if grupo:
+            self._archivo.write(grupo)
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+        with self._condicion:
+            self._posicion_durable += len(grupo)
+            self._secuencia_durable = max(self._secuencia_durable, secuencia)
+            self._condicion.notify_all()
+
+    def sincronizar(self):
+        """Bloquea hasta que todos los registros escritos estén en disco"""
+        with self._condicion:
+            secuencia = self._secuencia_escrita
+            self._condicion.notify_all()
+            self._esperar_secuencia(secuencia)
+
+    def cerrar(self):
+        """
+        Sincroniza los registros pendientes y cierra el archivo
+
+        Raises:
+            BitacoraFallidaError: Si los registros pendientes no llegaron a disco
+        """
+        with self._condicion:
+            if self._cerrada:
+                return
+            self._cerrada = True
+            self._condicion.notify_all()
+        self._hilo.join()
+        try:
+            self._archivo.close()
+        except OSError:
+            if self._error is None:
+                raise
+        with self._condicion:
+            self._verificar_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    # ------------------------------------------------------------- lectura
+
+    def _truncar_registro_incompleto(self):
+        """Elimina un registro final incompleto o dañado (escritura interrumpida)"""
+        if not os.path.exists(self._ruta):
+            return
+        final_valido = 0
+        try:
+            for final_valido, _ in self._leer_con_posicion(decodificar=False):
+                pass
+        except BitacoraCorruptaError:
+            pass
+        if final_valido < os.path.getsize(self._ruta):
+            with open(self._ruta, "r+b") as archivo:
+                archivo.truncate(final_valido)
+
+    def _leer_con_posicion(self, decodificar=True, desde=0):
+        """
+        Genera los registros válidos junto con la posición donde terminan
+
+        Args:
+            decodificar (bool): Si es False solo se validan los registros
+            desde (int): Posición donde empieza el primer registro a leer
+
+        Raises:
+            BitacoraCorruptaError: Si un registro está truncado o su checksum no coincide
+        """
+        if not os.path.exists(self._ruta) or os.path.getsize(self._ruta) == 0:
+            return
+        with open(self._ruta, "rb") as archivo, \
+                mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as contenido:
+            yield from self._recorrer(contenido, decodificar, desde)
+
+    def _recorrer(self, contenido, decodificar, desde=0):
+        """Recorre los registros de un contenido ya mapeado en memoria"""
+        posicion = desde
+        total = len(contenido)
+        while posicion < total:
+            if posicion + _CABECERA.size > total:
+                raise BitacoraCorruptaError(f"Cabecera incompleta en la posición {posicion}.")
+            longitud, crc, operacion = _CABECERA.unpack_from(contenido, posicion)
+            inicio = posicion + _CABECERA.size
+            final = inicio + longitud
+            if final > total:
+                raise BitacoraCorruptaError(f"Registro incompleto en la posición {posicion}.")
+            datos = contenido[inicio:final]
+            if _checksum(operacion, datos) != crc:
+                raise BitacoraCorruptaError(f"Checksum inválido en la posición {posicion}.")
+            posicion = final
+            yield posicion, (operacion, self._decodificar(operacion, datos) if decodificar else None)
+
+    @staticmethod
+    def _decodificar(operacion, datos):
+        """Decodifica los datos de un registro a una tupla de campos"""
+        campos = []
+        posicion = 0
+        if operacion == BitacoraPrestamos.OP_PRESTAMO:
+            campos.append(_FECHA.unpack_from(datos, 0)[0])
+            posicion = _FECHA.size
+        while posicion < len(datos):
+            (longitud,) = _LONGITUD_TEXTO.unpack_from(datos, posicion)
+            posicion += _LONGITUD_TEXTO.size
+            campos.append(datos[posicion:posicion + longitud].decode("utf-8"))
+            posicion += longitud
+        return tuple(campos)
+
+    def leer(self, desde=0):
+        """
+        Genera los registros sincronizados en disco, en orden
+
+        Args:
+            desde (int): Posición (ver `posicion`) a partir de la cual leer;
+                permite saltar los registros que ya contiene un snapshot
+
+        Yields:
+            tuple: (operación, campos)
+        """
+        for _, registro in self._leer_con_posicion(desde=desde):
+            yield registro
@@ -0,0 +1,163 @@
+"""
+Índice de búsqueda de nombres para el sistema de préstamos
+
+Permite completar nombres por prefijo (sin distinguir mayúsculas) sobre un
+arreglo ordenado y sugerir nombres a distancia de edición 1 (una letra de
+más, de menos, cambiada o dos letras contiguas intercambiadas), tampoco
+sin distinguir mayúsculas. Las sugerencias aproximadas se generan a partir
+del texto buscado y se validan contra los nombres existentes, así que su
+costo depende del largo del texto y no de la cantidad de nombres.
+"""
+from bisect import bisect_left, insort
+
+
+class IndiceBusqueda:
+    """Índice de nombres para completar por prefijo y sugerir nombres parecidos"""
+
+    # Con pocos nombres pendientes conviene insertarlos uno a uno; con más,
+    # agregarlos al final y reordenar (Timsort aprovecha la parte ya ordenada)
+    _MAX_INSERCIONES = 16
+
+    def __init__(self, nombres=()):
+        """
+        Constructor del índice
+
+        Args:
+            nombres (iterable): Nombres iniciales
+        """
+        self._ordenados = list(nombres)
+        self._ordenados.sort(key=str.casefold)
+        self._pendientes = []
+        # Diccionario: nombre en minúsculas (casefold) -> nombre original, o
+        # tupla de nombres si hay varios que solo difieren en mayúsculas
+        self._grafias = {}
+        for nombre in self._ordenados:
+            self._registrar_grafia(nombre)
+        caracteres = set()
+        for clave in self._grafias:
+            caracteres.update(clave)
+        self._caracteres = caracteres
+        self._alfabeto = "".join(sorted(caracteres))
+
+    def __len__(self):
+        return len(self._ordenados) + len(self._pendientes)
+
+    def agregar(self, nombre):
+        """
+        Agrega un nombre al índice
+
+        Args:
+            nombre (str): Nombre a agregar
+        """
+        self._pendientes.append(nombre)
+        clave = self._registrar_grafia(nombre)
+        if not self._caracteres.issuperset(clave):
+            self._caracteres.update(clave)
+            self._alfabeto = "".join(sorted(self._caracteres))
+
+    def _registrar_grafia(self, nombre):
+        """Asocia el nombre a su versión en minúsculas y retorna esa versión"""
+        clave = nombre.casefold()
+        if clave == nombre:
+            clave = nombre  # Reutiliza el mismo objeto str
+        grafias = self._grafias.get(clave)
+        if grafias is None:
+            self._grafias[clave] = nombre
+        elif isinstance(grafias, str):
+            if grafias != nombre:
+                self._grafias[clave] = (grafias, nombre)
+        elif nombre not in grafias:
+            self._grafias[clave] = grafias + (nombre,)
+        return clave
+
+    def _ordenar(self):
+        """Incorpora los nombres pendientes al arreglo ordenado"""
+        pendientes = self._pendientes
+        if len(pendientes) <= self._MAX_INSERCIONES:
+            for nombre in pendientes:
+                insort(self._ordenados, nombre, key=str.casefold)
+        else:
+            self._ordenados.extend(pendientes)
+            self._ordenados.sort(key=str.casefold)
+        self._pendientes = []
+
+    def completar(self, prefijo, limite=10):
+        """
+        Retorna los nombres que empiezan con el prefijo, en orden alfabético
+
+        Args:
+            prefijo (str): Inicio del nombre (sin distinguir mayúsculas)
+            limite (int): Cantidad máxima de resultados
+
+        Returns:
+            list: Nombres encontrados
+        """
+        if self._pendientes:
+            self._ordenar()
+        clave = prefijo.casefold()
+        inicio = bisect_left(self._ordenados, clave, key=str.casefold)
+        resultados = []
+        for nombre in self._ordenados[inicio:inicio + limite]:
+            if not nombre.casefold().startswith(clave):
+                break
+            resultados.append(nombre)
+        return resultados
+
+    def aproximados(self, texto, limite=5):
+        """
+        Retorna nombres existentes a distancia de edición 1 del texto, sin
+        distinguir mayúsculas
+
+        Args:
+            texto (str): Texto ingresado
+            limite (int): Cantidad máxima de resultados
+
+        Returns:
+            list: Nombres encontrados con su grafía original, sin incluir
+                los que solo difieren del texto en mayúsculas
+        """
+        grafias = self._grafias
+        alfabeto = self._alfabeto
+        clave = texto.casefold()
+        encontrados = {}
+        for i in range(len(clave) + 1):
+            inicio, final = clave[:i], clave[i:]
+            # Letra de más en el nombre (inserción en el texto)
+            candidatos = [inicio + caracter + final for caracter in alfabeto]
+            if final:
+                siguiente = clave[i + 1:]
+                # Letra de más en el texto, letra cambiada e intercambio con la siguiente
+                candidatos.append(inicio + siguiente)
+                candidatos += [inicio + caracter + siguiente for caracter in alfabeto]
+                if siguiente:
+                    candidatos.append(inicio + siguiente[0] + final[0] + siguiente[1:])
+            for candidato in candidatos:
+                nombres = grafias.get(candidato)
+                if nombres is None or candidato == clave:
+                    continue
+                for nombre in (nombres,) if isinstance(nombres, str) else nombres:
+                    encontrados[nombre] = None
+            if len(encontrados) >= limite:
+                break
+        return list(encontrados)[:limite]
+
+    def sugerir(self, texto, limite=5):
+        """
+        Sugiere nombres para un texto: primero los que lo completan y luego
+        los que difieren en una letra
+
+        Args:
+            texto (str): Texto ingresado
+            limite (int): Cantidad máxima de sugerencias
+
+        Returns:
+            list: Nombres sugeridos
+        """
+        sugerencias = self.completar(texto, limite)
+        if len(sugerencias) < limite:
+            for nombre in self.aproximados(texto, limite):
+                if nombre not in sugerencias:
+                    sugerencias.append(nombre)
+                    if len(sugerencias) >= limite:
+                        break
+        return sugerencias
@@ -0,0 +1,405 @@
+"""
+Sistema de préstamos repartido en varios procesos
+
+Los equipos se reparten entre N procesos trabajadores (fragmentos) según un
+hash estable de su nombre, y cada fragmento tiene su propio SistemaPrestamos
+y su propio GIL. EnrutadorPrestamos ofrece la interfaz de SistemaPrestamos:
+las operaciones sobre un equipo se envían a su fragmento, las operaciones en
+lote se dividen entre los fragmentos y se ejecutan en paralelo, y los
+reportes y las estadísticas reúnen los resultados de todos.
+
+Los usuarios se replican en todos los fragmentos, porque un usuario puede
+tener préstamos en cualquiera de ellos.
+
+Si el proceso de un fragmento termina, las operaciones que lo necesitan
+lanzan FragmentoCaidoError; los demás fragmentos siguen funcionando.
+"""
+import heapq
+import multiprocessing
+import threading
+import zlib
+from array import array
+from itertools import chain
+
+from ProyectoIntegrador import SistemaPrestamos, _a_epoch, escribir_en_bloques, formatear_fecha
+
+
+def _lineas_equipos(sistema, tipo_equipo, disponibles):
+    """Textos del inventario de un fragmento (ver SistemaPrestamos.filas_equipos)"""
+    return [texto for _, texto in sistema.filas_equipos(tipo_equipo, disponibles)]
+
+
+def _historial_equipo(sistema, nombre_equipo):
+    """Préstamos de un equipo como lista de (usuario, fecha), o None si no existe"""
+    equipo = sistema._equipos.get(nombre_equipo)
+    return None if equipo is None else list(equipo.prestamos())
+
+
+def _consultar_prestamos(sistema, *filtros):
+    """Préstamos de un fragmento en orden cronológico (ver SistemaPrestamos.consultar_prestamos)"""
+    return list(sistema.consultar_prestamos(*filtros))
+
+
+class FragmentoCaidoError(RuntimeError):
+    """Se lanza cuando el proceso de un fragmento terminó o su conexión se cerró"""
+
+
+# Operaciones que el enrutador puede pedirle a un fragmento
+_OPERACIONES = {
+    "agregar_equipo": SistemaPrestamos.agregar_equipo,
+    "agregar_equipos_lote": SistemaPrestamos.agregar_equipos_lote,
+    "agregar_usuario": SistemaPrestamos.agregar_usuario,
+    "agregar_usuarios_lote": SistemaPrestamos.agregar_usuarios_lote,
+    "registrar_prestamo": SistemaPrestamos.registrar_prestamo,
+    "devolver_equipo": SistemaPrestamos.devolver_equipo,
+    "registrar_prestamos_lote": SistemaPrestamos.registrar_prestamos_lote,
+    "devolver_lote": SistemaPrestamos.devolver_lote,
+    "contar_prestamos": SistemaPrestamos.contar_prestamos,
+    "estadisticas": SistemaPrestamos.estadisticas,
+    "lineas_equipos": _lineas_equipos,
+    "historial_equipo": _historial_equipo,
+    "consultar_prestamos": _consultar_prestamos,
+}
+
+
+def _trabajador(conexion):
+    """
+    Ciclo de un proceso fragmento: recibe (operación, argumentos), la ejecuta
+    sobre su sistema y responde (True, resultado) o (False, excepción).
+    Termina al recibir None.
+
+    Args:
+        conexion (Connection): Extremo del pipe hacia el enrutador
+    """
+    sistema = SistemaPrestamos(datos_prueba=False)
+    while True:
+        mensaje = conexion.recv()
+        if mensaje is None:
+            break
+        operacion, argumentos = mensaje
+        try:
+            respuesta = (True, _OPERACIONES[operacion](sistema, *argumentos))
+        except Exception as error:
+            respuesta = (False, error)
+        conexion.send(respuesta)
+    conexion.close()
+
+
+class EnrutadorPrestamos:
+    """Reparte las operaciones de SistemaPrestamos entre procesos fragmento"""
+
+    def __init__(self, fragmentos=4, datos_prueba=True):
+        """
+        Constructor del enrutador: inicia un proceso por fragmento
+
+        Args:
+            fragmentos (int): Cantidad de procesos fragmento
+            datos_prueba (bool): Si es True, agrega los datos de prueba de
+                SistemaPrestamos repartidos entre los fragmentos
+        """
+        contexto = multiprocessing.get_context()
+        self._conexiones = []
+        self._procesos = []
+        # Un candado por fragmento: cada solicitud y su respuesta no se mezclan
+        # con las de otros hilos. Se toman siempre en orden de índice.
+        self._candados = []
+        for _ in range(fragmentos):
+            local, remota = contexto.Pipe()
+            proceso = contexto.Process(target=_trabajador, args=(remota,), daemon=True)
+            proceso.start()
+            remota.close()
+            self._conexiones.append(local)
+            self._procesos.append(proceso)
+            self._candados.append(threading.Lock())
+        self._caidos = set()  # Índices de los fragmentos cuyo proceso terminó
+        self._usuarios = set()  # Nombres de usuario ya replicados en todos los fragmentos
+        if datos_prueba:
+            SistemaPrestamos._inicializar_datos_prueba(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def cerrar(self):
+        """Detiene los procesos fragmento; tolera fragmentos caídos y llamadas repetidas"""
+        for candado, conexion in zip(self._candados, self._conexiones):
+            with candado:
+                try:
+                    conexion.send(None)
+                except OSError:
+                    # El fragmento ya terminó o la conexión ya estaba cerrada
+                    pass
+                conexion.close()
+        for proceso in self._procesos:
+            proceso.join()
+
+    def fragmento(self, nombre_equipo):
+        """
+        Retorna el índice del fragmento de un equipo. El hash (CRC-32) no
+        depende del proceso, a diferencia de hash() sobre cadenas.
+        """
+        return zlib.crc32(nombre_equipo.encode("utf-8")) % len(self._conexiones)
+
+    def _caido(self, indice):
+        """Marca un fragmento como caído y retorna la excepción que lo informa"""
+        self._caidos.add(indice)
+        proceso = self._procesos[indice]
+        return FragmentoCaidoError(f"El fragmento {indice} (proceso {proceso.pid}, código de salida "
+                                   f"{proceso.exitcode}) no está disponible.")
+
+    def _enviar(self, indice, mensaje):
+        """Envía un mensaje a un fragmento (con su candado tomado)"""
+        if indice in self._caidos:
+            raise self._caido(indice)
+        try:
+            self._conexiones[indice].send(mensaje)
+        except OSError as error:
+            raise self._caido(indice) from error
+
+    def _recibir(self, indice):
+        """Recibe la respuesta de un fragmento (con su candado tomado)"""
+        try:
+            return self._conexiones[indice].recv()
+        except (EOFError, OSError) as error:
+            raise self._caido(indice) from error
+
+    def _llamar(self, indice, operacion, *argumentos):
+        """Ejecuta una operación en un fragmento y retorna su resultado"""
+        with self._candados[indice]:
+            self._enviar(indice, (operacion, argumentos))
+            exito, resultado = self._recibir(indice)
+        if not exito:
+            raise resultado
+        return resultado
+
+    def _difundir(self, operacion, argumentos_por_fragmento):
+        """
+        Envía una operación a varios fragmentos antes de esperar respuestas,
+        así se ejecutan en paralelo
+
+        Args:
+            operacion (str): Nombre de la operación
+            argumentos_por_fragmento (dict): índice de fragmento -> tupla de argumentos
+
+        Returns:
+            dict: índice de fragmento -> resultado
+
+        Raises:
+            FragmentoCaidoError: Si alguno de los fragmentos terminó; las
+                respuestas de los demás se reciben igual, para que sus
+                conexiones queden listas para la próxima operación
+        """
+        indices = sorted(argumentos_por_fragmento)
+        for indice in indices:
+            self._candados[indice].acquire()
+        respuestas = {}
+        caida = None
+        try:
+            enviados = []
+            for indice in indices:
+                try:
+                    self._enviar(indice, (operacion, argumentos_por_fragmento[indice]))
+                    enviados.append(indice)
+                except FragmentoCaidoError as error:
+                    caida = caida or error
+            for indice in enviados:
+                try:
+                    respuestas[indice] = self._recibir(indice)
+                except FragmentoCaidoError as error:
+                    caida = caida or error
+        finally:
+            for indice in indices:
+                self._candados[indice].release()
+        if caida is not None:
+            raise caida
+        for exito, resultado in respuestas.values():
+            if not exito:
+                raise resultado
+        return {indice: resultado for indice, (_, resultado) in respuestas.items()}
+
+    def _a_todos(self, operacion, *argumentos):
+        """Ejecuta la misma operación en todos los fragmentos y retorna la lista de resultados"""
+        resultados = self._difundir(operacion, {indice: argumentos for indice in range(len(self._conexiones))})
+        return [resultados[indice] for indice in range(len(self._conexiones))]
+
+    def _repartir_lote(self, operacion, elementos, nombre_equipo):
+        """
+        Divide un lote entre los fragmentos, lo ejecuta en paralelo y junta los
+        códigos de resultado en el orden de entrada
+
+        Args:
+            operacion (str): Operación en lote de SistemaPrestamos
+            elementos (list): Elementos del lote
+            nombre_equipo (callable): Obtiene el nombre del equipo de un elemento
+        """
+        partes = {}
+        posiciones = {}
+        fragmento = self.fragmento
+        for posicion, elemento in enumerate(elementos):
+            indice = fragmento(nombre_equipo(elemento))
+            parte = partes.get(indice)
+            if parte is None:
+                parte = partes[indice] = []
+                posiciones[indice] = []
+            parte.append(elemento)
+            posiciones[indice].append(posicion)
+        resultados = array('b', bytes(len(elementos)))
+        for indice, codigos in self._difundir(operacion, {indice: (parte,) for indice, parte in partes.items()}).items():
+            for posicion, codigo in zip(posiciones[indice], codigos):
+                resultados[posicion] = codigo
+        return resultados
+
+    def _replicar_usuarios(self, nombres_usuario):
+        """Crea en todos los fragmentos los usuarios por defecto que todavía no existen"""
+        nuevos = [nombre for nombre in dict.fromkeys(nombres_usuario) if nombre not in self._usuarios]
+        if nuevos:
+            self.agregar_usuarios_lote([SistemaPrestamos.crear_usuario_por_defecto(nombre) for nombre in nuevos])
+
+    def agregar_equipo(self, equipo):
+        """Agrega un equipo en su fragmento (ver SistemaPrestamos.agregar_equipo)"""
+        return self._llamar(self.fragmento(equipo.nombre), "agregar_equipo", equipo)
+
+    def agregar_equipos_lote(self, equipos):
+        """Agrega varios equipos repartidos entre los fragmentos (ver SistemaPrestamos.agregar_equipos_lote)"""
+        return self._repartir_lote("agregar_equipos_lote", list(equipos), lambda equipo: equipo.nombre)
+
+    def agregar_usuario(self, usuario):
+        """Agrega un usuario en todos los fragmentos (ver SistemaPrestamos.agregar_usuario)"""
+        agregado = self._a_todos("agregar_usuario", usuario)[0]
+        self._usuarios.add(usuario.nombre)
+        return agregado
+
+    def agregar_usuarios_lote(self, usuarios):
+        """Agrega varios usuarios en todos los fragmentos (ver SistemaPrestamos.agregar_usuarios_lote)"""
+        usuarios = list(usuarios)
+        agregados = self._a_todos("agregar_usuarios_lote", usuarios)[0]
+        self._usuarios.update(usuario.nombre for usuario in usuarios)
+        return agregados
+
+    def registrar_prestamo(self, nombre_equipo, nombre_usuario):
+        """Registra un préstamo en el fragmento del equipo (ver SistemaPrestamos.registrar_prestamo)"""
+        if nombre_usuario not in self._usuarios:
+            self._replicar_usuarios((nombre_usuario,))
+        return self._llamar(self.fragmento(nombre_equipo), "registrar_prestamo", nombre_equipo, nombre_usuario)
+
+    def devolver_equipo(self, nombre_equipo):
+        """Registra una devolución en el fragmento del equipo (ver SistemaPrestamos.devolver_equipo)"""
+        return self._llamar(self.fragmento(nombre_equipo), "devolver_equipo", nombre_equipo)
+
+    def registrar_prestamos_lote(self, prestamos):
+        """
+        Registra varios préstamos en paralelo en sus fragmentos
+
+        Args:
+            prestamos (iterable): Pares (nombre_equipo, nombre_usuario)
+
+        Returns:
+            array: Código de resultado por fila, en el mismo orden de entrada
+        """
+        prestamos = list(prestamos)
+        self._replicar_usuarios(nombre_usuario for _, nombre_usuario in prestamos)
+        return self._repartir_lote("registrar_prestamos_lote", prestamos, lambda prestamo: prestamo[0])
+
+    def devolver_lote(self, nombres_equipos):
+        """
+        Registra varias devoluciones en paralelo en sus fragmentos
+
+        Returns:
+            array: Código de resultado por equipo, en el mismo orden de entrada
+        """
+        return self._repartir_lote("devolver_lote", list(nombres_equipos), lambda nombre: nombre)
+
+    def historial_equipo(self, nombre_equipo):
+        """Retorna los préstamos de un equipo como lista de (usuario, fecha), o None si no existe"""
+        return self._llamar(self.fragmento(nombre_equipo), "historial_equipo", nombre_equipo)
+
+    def ver_historial_equipo(self, nombre_equipo):
+        """Muestra el historial de un equipo (ver SistemaPrestamos.ver_historial_equipo)"""
+        prestamos = self.historial_equipo(nombre_equipo)
+        if prestamos is None:
+            print(f"El equipo '{nombre_equipo}' no existe en el sistema.")
+            return
+
+        print(f"\n=== HISTORIAL DE {nombre_equipo.upper()} ===")
+        if not prestamos:
+            print("Sin préstamos registrados.")
+        for i, (usuario, fecha) in enumerate(prestamos, 1):
+            print(f"{i}. {usuario} - {formatear_fecha(fecha)}")
+
+    def consultar_prestamos(self, desde=None, hasta=None, usuario=None, tipo_equipo=None, equipo=None):
+        """
+        Genera los préstamos de un rango de fechas en orden cronológico,
+        mezclando los resultados de los fragmentos (ver SistemaPrestamos.consultar_prestamos)
+
+        Yields:
+            tuple: (nombre del equipo, usuario, fecha en segundos desde epoch)
+        """
+        filtros = (_a_epoch(desde), _a_epoch(hasta), usuario, tipo_equipo, equipo)
+        if equipo is not None:
+            yield from self._llamar(self.fragmento(equipo), "consultar_prestamos", *filtros)
+            return
+        yield from heapq.merge(*self._a_todos("consultar_prestamos", *filtros), key=lambda prestamo: prestamo[2])
+
+    def contar_prestamos(self, desde=None, hasta=None, usuario=None, tipo_equipo=None, equipo=None):
+        """Cuenta los préstamos de un rango de fechas en todos los fragmentos"""
+        filtros = (_a_epoch(desde), _a_epoch(hasta), usuario, tipo_equipo, equipo)
+        if equipo is not None:
+            return self._llamar(self.fragmento(equipo), "contar_prestamos", *filtros)
+        return sum(self._a_todos("contar_prestamos", *filtros))
+
+    def mostrar_equipos(self, tipo_equipo=None, salida=None, disponibles=None):
+        """
+        Muestra el inventario de todos los fragmentos, uno después del otro
+
+        Args:
+            tipo_equipo (str): Solo equipos de este tipo (None para todos)
+            salida: Archivo de texto destino (por defecto sys.stdout)
+            disponibles (bool): Solo equipos disponibles (True) o prestados (False)
+        """
+        lineas = self._a_todos("lineas_equipos", tipo_equipo, disponibles)
+        if not any(lineas):
+            mensaje = "No hay equipos disponibles actualmente." if disponibles else "No hay equipos registrados en el sistema."
+            print(mensaje, file=salida)
+            return
+
+        titulo = "EQUIPOS DISPONIBLES" if disponibles else "INVENTARIO DE EQUIPOS"
+        print(f"\n=== {titulo} ===", file=salida)
+        escribir_en_bloques(chain.from_iterable(lineas), salida)
+
+    def mostrar_equipos_disponibles(self, salida=None):
+        """Muestra solo los equipos disponibles de todos los fragmentos"""
+        self.mostrar_equipos(salida=salida, disponibles=True)
+
+    def estadisticas(self):
+        """
+        Suma las estadísticas de los fragmentos. Los usuarios están replicados,
+        así que se cuentan una sola vez.
+
+        Returns:
+            dict: Mismo formato que SistemaPrestamos.estadisticas
+        """
+        partes = self._a_todos("estadisticas")
+        estadisticas = {clave: sum(parte[clave] for parte in partes)
+                        for clave in ("total_equipos", "equipos_disponibles", "equipos_prestados",
+                                      "total_usuarios", "total_prestamos")}
+        estadisticas["total_usuarios"] = partes[0]["total_usuarios"]
+        por_tipo_equipo = {}
+        for parte in partes:
+            for tipo, conteo in parte["por_tipo_equipo"].items():
+                acumulado = por_tipo_equipo.setdefault(tipo, dict.fromkeys(conteo, 0))
+                for clave, valor in conteo.items():
+                    acumulado[clave] += valor
+        por_tipo_usuario = {tipo: {"usuarios": conteo["usuarios"], "prestamos_activos": 0}
+                            for tipo, conteo in partes[0]["por_tipo_usuario"].items()}
+        for parte in partes:
+            for tipo, conteo in parte["por_tipo_usuario"].items():
+                por_tipo_usuario[tipo]["prestamos_activos"] += conteo["prestamos_activos"]
+        estadisticas["por_tipo_equipo"] = por_tipo_equipo
+        estadisticas["por_tipo_usuario"] = por_tipo_usuario
+        return estadisticas
+
+    # Solo usa estadisticas(), así que sirve tal cual para el enrutador (sin
+    # la envoltura de métricas, que lee atributos de SistemaPrestamos)
+    obtener_estadisticas = SistemaPrestamos.obtener_estadisticas.__wrapped__
@@ -0,0 +1,338 @@
+"""
+Importación masiva de equipos y usuarios desde CSV o JSONL
+
+Cada fila describe un registro; la columna (o clave) `clase` indica qué se
+crea y el resto de los campos son los argumentos de su constructor:
+
+    clase          campos obligatorios     campos opcionales
+    EquipoComputo  nombre                  sistema_operativo, ram
+    Tablet         nombre                  pulgadas, bateria
+    Equipo         nombre, tipo_equipo
+    Usuario        nombre, email           tipo_usuario
+
+El archivo se lee por bloques de filas, así que la memoria usada no depende
+de su tamaño. Las filas inválidas o duplicadas (incluidas las que tienen
+bytes que no son UTF-8) se reportan con su número de línea y la importación
+continúa. Opcionalmente, la conversión de los bloques se reparte en un pool
+de procesos.
+
+Uso:
+    python importacion_prestamos.py archivo.csv [--procesos 4] [--bitacora prestamos.bitacora] [--pausar-gc]
+"""
+import argparse
+import csv
+import gc
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+
+# Campos de cada clase: (nombre del campo, obligatorio)
+CAMPOS_POR_CLASE = {
+    "EquipoComputo": (("nombre", True), ("sistema_operativo", False), ("ram", False)),
+    "Tablet": (("nombre", True), ("pulgadas", False), ("bateria", False)),
+    "Equipo": (("nombre", True), ("tipo_equipo", True)),
+    "Usuario": (("nombre", True), ("email", True), ("tipo_usuario", False)),
+}
+
+
+class ResultadoImportacion:
+    """Resumen de una importación: registros agregados y errores por fila"""
+
+    def __init__(self, max_errores=1000):
+        """
+        Constructor del resultado
+
+        Args:
+            max_errores (int): Cantidad máxima de errores que se guardan con
+                su detalle; el resto solo se cuenta
+        """
+        self.filas = 0
+        self.equipos = 0
+        self.usuarios = 0
+        self.total_errores = 0
+        self.errores = []  # Lista de (número de línea, mensaje)
+        self._max_errores = max_errores
+
+    def registrar_error(self, linea, mensaje):
+        """Cuenta un error y guarda su detalle si no se llegó al máximo"""
+        self.total_errores += 1
+        if len(self.errores) < self._max_errores:
+            self.errores.append((linea, mensaje))
+
+    def __str__(self):
+        """Representación en cadena del resultado"""
+        return (f"{self.filas:,} filas: {self.equipos:,} equipos y {self.usuarios:,} usuarios agregados, "
+                f"{self.total_errores:,} errores")
+
+
+_MENSAJE_UTF8 = "La fila contiene bytes que no son UTF-8 válido."
+
+
+def _utf8_invalido(texto):
+    """Indica si el texto tiene bytes inválidos (leídos con errors='surrogateescape')"""
+    if texto.isascii():
+        return False
+    try:
+        texto.encode("utf-8")
+    except UnicodeEncodeError:
+        return True
+    return False
+
+
+def _detectar_formato(ruta):
+    """Deduce el formato ('csv' o 'jsonl') a partir de la extensión"""
+    return "jsonl" if os.path.splitext(ruta)[1].lower() in (".jsonl", ".ndjson", ".json") else "csv"
+
+
+def _bloques(ruta, formato, tam_bloque):
+    """
+    Lee el archivo por bloques
+
+    Yields:
+        tuple: (columnas del CSV o None, lista de (número de línea, fila))
+    """
+    # Un byte inválido no debe detener la importación: se conserva como
+    # surrogate y la fila se reporta como error al convertirla
+    with open(ruta, newline="", encoding="utf-8", errors="surrogateescape") as archivo:
+        if formato == "csv":
+            lector = csv.reader(archivo)
+            columnas = [columna.strip() for columna in next(lector, [])]
+            filas = ((lector.line_num, fila) for fila in lector)
+        else:
+            columnas = None
+            filas = enumerate(archivo, 1)
+        while True:
+            bloque = list(islice(filas, tam_bloque))
+            if not bloque:
+                return
+            yield columnas, bloque
+
+
+def _convertir_fila(registro):
+    """
+    Valida un registro y lo convierte en (clase, argumentos)
+
+    Args:
+        registro (dict): Campos de la fila
+
+    Returns:
+        tuple: (clase, diccionario de argumentos) o (None, mensaje de error)
+    """
+    clase = (registro.get("clase") or "").strip()
+    campos = CAMPOS_POR_CLASE.get(clase)
+    if campos is None:
+        return None, f"Clase desconocida: {clase!r}."
+    argumentos = {}
+    for campo, obligatorio in campos:
+        valor = registro.get(campo)
+        valor = str(valor).strip() if valor is not None else ""
+        if valor:
+            argumentos[campo] = valor
+        elif obligatorio:
+            return None, f"Falta el campo '{campo}' para {clase}."
+    return clase, argumentos
+
+
+def _convertir_bloque(formato, columnas, bloque):
+    """
+    Convierte un bloque de filas; se ejecuta en el proceso principal o en
+    un proceso del pool
+
+    Returns:
+        list: (número de línea, clase o None, argumentos o mensaje de error)
+    """
+    if formato == "csv":
+        return _convertir_bloque_csv(columnas, bloque)
+    convertidas = []
+    for linea, fila in bloque:
+        if not fila.strip():
+            continue
+        if _utf8_invalido(fila):
+            convertidas.append((linea, None, _MENSAJE_UTF8))
+            continue
+        try:
+            registro = json.loads(fila)
+        except ValueError as error:
+            convertidas.append((linea, None, f"JSON inválido: {error}."))
+            continue
+        if not isinstance(registro, dict):
+            convertidas.append((linea, None, "Se esperaba un objeto JSON."))
+            continue
+        clase, argumentos = _convertir_fila(registro)
+        convertidas.append((linea, clase, argumentos))
+    return convertidas
+
+
+def _convertir_bloque_csv(columnas, bloque):
+    """
+    Convierte un bloque de filas CSV leyendo cada campo por su posición en
+    el encabezado, sin armar un diccionario por fila (ver _convertir_fila)
+    """
+    posicion_clase = columnas.index("clase") if "clase" in columnas else None
+    # Para cada clase: (campo, posición en la fila o None, obligatorio)
+    posiciones = {
+        clase: tuple((campo, columnas.index(campo) if campo in columnas else None, obligatorio)
+                     for campo, obligatorio in campos)
+        for clase, campos in CAMPOS_POR_CLASE.items()
+    }
+    total_columnas = len(columnas)
+    convertidas = []
+    agregar = convertidas.append
+    for linea, fila in bloque:
+        if not any(fila):
+            continue
+        if len(fila) > total_columnas:
+            agregar((linea, None, f"La fila tiene {len(fila)} campos y el encabezado {total_columnas}."))
+            continue
+        if any(map(_utf8_invalido, fila)):
+            agregar((linea, None, _MENSAJE_UTF8))
+            continue
+        clase = fila[posicion_clase].strip() if posicion_clase is not None and posicion_clase < len(fila) else ""
+        campos = posiciones.get(clase)
+        if campos is None:
+            agregar((linea, None, f"Clase desconocida: {clase!r}."))
+            continue
+        argumentos = {}
+        for campo, posicion, obligatorio in campos:
+            valor = fila[posicion].strip() if posicion is not None and posicion < len(fila) else ""
+            if valor:
+                argumentos[campo] = valor
+            elif obligatorio:
+                argumentos = f"Falta el campo '{campo}' para {clase}."
+                clase = None
+                break
+        agregar((linea, clase, argumentos))
+    return convertidas
+
+
+def _aplicar_bloque(sistema, clases, convertidas, resultado):
+    """Crea los objetos de un bloque convertido y los agrega en lote al sistema"""
+    equipos, lineas_equipos = [], []
+    usuarios, lineas_usuarios = [], []
+    errores = []
+    for linea, clase, argumentos in convertidas:
+        resultado.filas += 1
+        if clase is None:
+            errores.append((linea, argumentos))
+            continue
+        try:
+            objeto = clases[clase](**argumentos)
+        except (TypeError, ValueError) as error:
+            errores.append((linea, f"No se pudo crear {clase}: {error}"))
+            continue
+        if clase == "Usuario":
+            usuarios.append(objeto)
+            lineas_usuarios.append(linea)
+        else:
+            equipos.append(objeto)
+            lineas_equipos.append(linea)
+
+    # Los duplicados (contra el sistema o dentro del archivo) se detectan en el lote
+    agregados_equipos = sistema.agregar_equipos_lote(equipos)
+    agregados_usuarios = sistema.agregar_usuarios_lote(usuarios)
+    resultado.equipos += sum(agregados_equipos)
+    resultado.usuarios += sum(agregados_usuarios)
+    for agregados, objetos, lineas, descripcion in (
+            (agregados_equipos, equipos, lineas_equipos, "El equipo"),
+            (agregados_usuarios, usuarios, lineas_usuarios, "El usuario")):
+        if len(agregados) - sum(agregados):
+            for agregado, objeto, linea in zip(agregados, objetos, lineas):
+                if not agregado:
+                    errores.append((linea, f"{descripcion} '{objeto.nombre}' ya existe."))
+    for linea, mensaje in sorted(errores):
+        resultado.registrar_error(linea, mensaje)
+
+
+def importar(sistema, ruta, clases, formato=None, tam_bloque=10_000, procesos=0, max_errores=1000,
+             pausar_recolector=False):
+    """
+    Importa equipos y usuarios desde un archivo CSV o JSONL
+
+    Args:
+        sistema (SistemaPrestamos): Sistema donde se agregan los registros
+        ruta (str): Ruta del archivo
+        clases (dict): Clase a crear por cada valor de la columna `clase`
+        formato (str): 'csv' o 'jsonl' (por defecto se deduce de la extensión)
+        tam_bloque (int): Filas por bloque
+        procesos (int): Procesos para convertir los bloques (0 para no usar pool)
+        max_errores (int): Errores que se guardan con su detalle
+        pausar_recolector (bool): Si es True, el recolector de basura se
+            desactiva durante la importación. Los objetos importados no forman
+            ciclos y así se evitan pasadas que recorren todo lo creado, pero
+            afecta a todo el proceso (también a otros hilos), por eso es opcional
+
+    Returns:
+        ResultadoImportacion: Resumen de la importación
+    """
+    formato = formato or _detectar_formato(ruta)
+    resultado = ResultadoImportacion(max_errores)
+    recolector_activo = gc.isenabled()
+    if pausar_recolector:
+        gc.disable()
+    try:
+        _importar_bloques(sistema, clases, _bloques(ruta, formato, tam_bloque), formato, procesos, resultado)
+    finally:
+        if pausar_recolector and recolector_activo:
+            gc.enable()
+    return resultado
+
+
+def _importar_bloques(sistema, clases, bloques, formato, procesos, resultado):
+    """Convierte y aplica los bloques, en este proceso o con un pool (ver importar)"""
+    if not procesos:
+        for columnas, bloque in bloques:
+            _aplicar_bloque(sistema, clases, _convertir_bloque(formato, columnas, bloque), resultado)
+        return
+
+    with ProcessPoolExecutor(procesos) as pool:
+        # Se limita la cantidad de bloques en vuelo para que la memoria no crezca
+        pendientes = deque()
+        for columnas, bloque in bloques:
+            pendientes.append(pool.submit(_convertir_bloque, formato, columnas, bloque))
+            if len(pendientes) >= 2 * procesos:
+                _aplicar_bloque(sistema, clases, pendientes.popleft().result(), resultado)
+        while pendientes:
+            _aplicar_bloque(sistema, clases, pendientes.popleft().result(), resultado)
+
+
+def main():
+    """Importa un archivo en un sistema nuevo (o en el de una bitácora) y muestra el resumen"""
+    from ProyectoIntegrador import SistemaPrestamos
+
+    parser = argparse.ArgumentParser(description="Importación masiva de equipos y usuarios")
+    parser.add_argument("ruta")
+    parser.add_argument("--formato", choices=("csv", "jsonl"))
+    parser.add_argument("--procesos", type=int, default=0)
+    parser.add_argument("--tam-bloque", type=int, default=10_000)
+    parser.add_argument("--bitacora", help="bitácora donde se guardan los registros importados")
+    parser.add_argument("--pausar-gc", action="store_true",
+                        help="desactiva el recolector de basura durante la importación")
+    args = parser.parse_args()
+
+    bitacora = None
+    if args.bitacora:
+        from bitacora_prestamos import BitacoraPrestamos
+        bitacora = BitacoraPrestamos(args.bitacora)
+    try:
+        sistema = SistemaPrestamos(bitacora=bitacora)
+        inicio = time.perf_counter()
+        resultado = sistema.importar(args.ruta, formato=args.formato, tam_bloque=args.tam_bloque,
+                                     procesos=args.procesos, pausar_recolector=args.pausar_gc)
+        tiempo = time.perf_counter() - inicio
+    finally:
+        if bitacora is not None:
+            bitacora.cerrar()
+
+    print(f"{resultado} en {tiempo:.2f} s")
+    for linea, mensaje in resultado.errores[:20]:
+        print(f"  línea {linea}: {mensaje}")
+    if resultado.total_errores > 20:
+        print(f"  ... y {resultado.total_errores - 20:,} errores más")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+"""
+Instantáneas de solo lectura del sistema de préstamos para reportes
+
+sistema.instantanea() retorna una InstantaneaSistema: una vista inmutable
+del estado en el momento en que se tomó, sobre la que los reportes largos
+(ver_historial_completo, mostrar_usuarios, obtener_estadisticas,
+exportaciones por páginas) recorren un estado consistente mientras
+registrar_prestamo y devolver_equipo siguen trabajando sobre el sistema.
+
+La instantánea no copia el estado: lo comparte con el sistema y solo guarda
+lo que cambia después (copia en escritura por capas):
+
+- Equipos y usuarios: solo se agregan, así que la instantánea ve los
+  primeros N de cada diccionario.
+- Historial: las filas solo se agregan al final de las columnas, así que la
+  instantánea ve las filas anteriores a la cantidad que había. Si la
+  retención compacta el historial, las columnas viejas se conservan y las
+  filas de cada equipo se guardan en la capa antes de renumerarlas.
+- Disponibilidad y préstamos activos: la primera vez que un equipo cambia
+  después de la instantánea, el sistema guarda en la capa de cambios su
+  estado anterior (ver SistemaPrestamos._actualizar_disponibilidad).
+
+Cada instantánea nueva abre una capa y la encadena detrás de la anterior;
+el sistema solo tiene una referencia débil a la última. Cuando no quedan
+instantáneas vivas, sus capas se liberan y el sistema deja de registrar
+cambios. Tomar una instantánea cuesta O(tipos de equipo y de usuario), por
+las estadísticas que se copian; en modo concurrente, además, se detienen un
+momento las escrituras (se toman los candados de todas las franjas) para
+que todo quede en el mismo instante.
+
+Uso:
+    instantanea = sistema.instantanea()
+    sistema.registrar_prestamo("Laptop1", "Ana")   # no cambia la instantánea
+    instantanea.ver_historial_completo(salida=archivo)
+    instantanea.obtener_estadisticas()
+"""
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+from copy import copy, deepcopy
+from itertools import islice
+from weakref import ref
+
+from ProyectoIntegrador import HistorialPrestamos, SistemaPrestamos
+
+
+class CapaCambios:
+    """Estado anterior de lo que cambió en el sistema después de una instantánea"""
+
+    __slots__ = ("equipos", "historial", "archivados", "siguiente", "__weakref__")
+
+    def __init__(self):
+        self.equipos = {}  # Diccionario: nombre equipo -> (disponible, prestatario) antes de cambiar
+        self.historial = None  # (filas por equipo, filas base) antes de la primera compactación
+        self.archivados = {}  # Diccionario: ArchivoHistorial -> {equipo: préstamos archivados}
+        self.siguiente = None  # Capa de la instantánea siguiente, si se tomó otra
+
+    def registrar_equipo(self, nombre, disponible, prestatario):
+        """
+        Guarda el estado de un equipo antes de su primer cambio en esta capa
+
+        Args:
+            nombre (str): Nombre del equipo
+            disponible (bool): Disponibilidad anterior al cambio
+            prestatario (str): Quien lo tenía antes del cambio (None si nadie)
+        """
+        if nombre not in self.equipos:
+            self.equipos[nombre] = (disponible, prestatario)
+
+    def registrar_retencion(self, historial, archivo):
+        """
+        Guarda las filas de cada equipo y los totales archivados antes de que
+        la retención compacte el historial y agregue préstamos al archivo
+
+        Args:
+            historial (HistorialPrestamos): Historial que se va a compactar
+            archivo (ArchivoHistorial): Archivo que va a recibir los préstamos
+        """
+        if self.historial is None:
+            # compactar() reemplaza los arreglos de filas en lugar de modificarlos
+            self.historial = (list(historial._filas_por_equipo), historial._filas_base)
+        if archivo not in self.archivados:
+            self.archivados[archivo] = dict(archivo._cantidades)
+
+
+@contextmanager
+def _escrituras_detenidas(sistema):
+    """
+    En modo concurrente, detiene los préstamos, devoluciones, altas y la
+    retención mientras dura el bloque; en modo simple no hace nada
+    """
+    if sistema._candados_equipo is None:
+        yield
+        return
+    # Mismo orden que las escrituras: equipo -> altas -> historial
+    candados = sistema._candados_equipo + [sistema._candado_altas, sistema._historial.candado]
+    tomados = 0
+    try:
+        for candado in candados:
+            candado.acquire()
+            tomados += 1
+        yield
+    finally:
+        for candado in candados[:tomados]:
+            candado.release()
+
+
+class _HistorialCongelado:
+    """Historial visto desde una instantánea: solo las filas que ya existían"""
+
+    cantidad = HistorialPrestamos.cantidad
+    prestamos = HistorialPrestamos.prestamos
+    fecha_ultimo_prestamo = HistorialPrestamos.fecha_ultimo_prestamo
+    rango_filas = HistorialPrestamos.rango_filas
+
+    def __init__(self, historial, capa):
+        """
+        Constructor del historial congelado
+
+        Args:
+            historial (HistorialPrestamos): Historial del sistema
+            capa (CapaCambios): Capa de la instantánea
+        """
+        self._vivo = historial
+        self._capa = capa
+        self.reloj = historial.reloj
+        # Las columnas solo crecen; la compactación y la primera escritura
+        # sobre un snapshot las reemplazan sin modificar las anteriores
+        self._columna_equipo = historial._columna_equipo
+        self._columna_usuario = historial._columna_usuario
+        self._columna_fecha = historial._columna_fecha
+        self._nombres_usuario = historial._nombres_usuario
+        self._cantidad_filas = len(historial)
+        self._cantidad_equipos = len(historial._filas_por_equipo)
+        self._filas_equipo = {}  # Diccionario: id equipo -> filas de la instantánea (se calculan una vez)
+
+    def __len__(self):
+        """Cantidad de préstamos que había al tomar la instantánea"""
+        return self._cantidad_filas
+
+    def buscar_usuario(self, usuario):
+        """Retorna el id interno de un usuario (los ids no cambian), o None"""
+        return self._vivo.buscar_usuario(usuario)
+
+    def _filas(self, id_equipo):
+        """Retorna las filas del equipo al tomar la instantánea (None si no tenía)"""
+        if id_equipo >= self._cantidad_equipos:
+            return None
+        filas = self._filas_equipo.get(id_equipo)
+        if filas is None:
+            filas = self._filas_equipo[id_equipo] = self._vivo._con_candado(lambda: self._recortar_filas(id_equipo))
+        return filas or None
+
+    def _recortar_filas(self, id_equipo):
+        """Calcula las filas del equipo anteriores a la instantánea (ver _filas)"""
+        capa = self._capa
+        while capa is not None and capa.historial is None:
+            capa = capa.siguiente
+        if capa is None:
+            filas = self._vivo._filas(id_equipo)
+        else:
+            filas_por_equipo, filas_base = capa.historial
+            filas = filas_por_equipo[id_equipo]
+            if filas is None and filas_base is not None:
+                inicio_filas, filas_base = filas_base
+                if id_equipo < len(inicio_filas) - 1:
+                    filas = filas_base[inicio_filas[id_equipo]:inicio_filas[id_equipo + 1]]
+        if not filas:
+            return ()
+        limite = self._cantidad_filas
+        if self._vivo._fechas_desordenadas is False and self._vivo.candado is None:
+            # Filas en orden de llegada: las de la instantánea son un prefijo
+            return _PrefijoFilas(filas, limite, self._vivo)
+        return array('I', [fila for fila in filas if fila < limite])
+
+
+class _PrefijoFilas(Sequence):
+    """
+    Filas de un equipo anteriores a una instantánea, leídas del arreglo vivo
+    sin copiarlo: mientras las fechas lleguen en orden, las filas nuevas se
+    agregan al final y las de la instantánea son las primeras `fin`
+    """
+
+    __slots__ = ("_filas", "_fin", "_limite", "_vivo")
+
+    def __init__(self, filas, limite, vivo):
+        """
+        Constructor del prefijo
+
+        Args:
+            filas (array): Filas del equipo en el historial vivo
+            limite (int): Cantidad de filas del historial al tomar la instantánea
+            vivo (HistorialPrestamos): Historial del sistema
+        """
+        self._filas = filas
+        self._fin = bisect_left(filas, limite)
+        self._limite = limite
+        self._vivo = vivo
+
+    def _vigentes(self):
+        """Retorna (arreglo, cantidad de filas de la instantánea)"""
+        if self._vivo is not None and self._vivo._fechas_desordenadas is not False:
+            # Una fila fuera de orden pudo insertarse entre las anteriores: se
+            # filtran por número de fila una sola vez
+            self._filas = array('I', [fila for fila in self._filas if fila < self._limite])
+            self._fin = len(self._filas)
+            self._vivo = None
+        return self._filas, self._fin
+
+    def __len__(self):
+        return self._vigentes()[1]
+
+    def __getitem__(self, indice):
+        filas, fin = self._vigentes()
+        if isinstance(indice, slice):
+            return filas[slice(*indice.indices(fin))]
+        if indice < 0:
+            indice += fin
+        if not 0 <= indice < fin:
+            raise IndexError("Índice de fila fuera de rango.")
+        return filas[indice]
+
+    def __iter__(self):
+        filas, fin = self._vigentes()
+        return islice(filas, fin)
+
+class _EquiposCongelados(Mapping):
+    """Diccionario nombre -> Equipo congelado de una instantánea"""
+
+    __slots__ = ("_instantanea",)
+
+    def __init__(self, instantanea):
+        self._instantanea = instantanea
+
+    def __getitem__(self, nombre):
+        return self._instantanea._equipo(nombre)
+
+    def __contains__(self, nombre):
+        return self._instantanea._leer_equipo(nombre) is not None
+
+    def __iter__(self):
+        return iter(self._instantanea._lista_equipos())
+
+    def __len__(self):
+        return self._instantanea._cantidad_equipos
+
+
+class _UsuariosCongelados(Mapping):
+    """Diccionario nombre -> Usuario congelado de una instantánea"""
+
+    __slots__ = ("_instantanea",)
+
+    def __init__(self, instantanea):
+        self._instantanea = instantanea
+
+    def __getitem__(self, nombre):
+        return self._instantanea._usuario(nombre)
+
+    def __contains__(self, nombre):
+        return nombre in self._instantanea._conjunto_usuarios()
+
+    def __iter__(self):
+        return iter(self._instantanea._lista_usuarios())
+
+    def __len__(self):
+        return self._instantanea._cantidad_usuarios
+
+
+class _ParticionCongelada:
+    """Nombres de los equipos disponibles o prestados al tomar la instantánea"""
+
+    __slots__ = ("_instantanea", "_disponible", "_cantidad")
+
+    def __init__(self, instantanea, disponible, cantidad):
+        self._instantanea = instantanea
+        self._disponible = disponible
+        self._cantidad = cantidad
+
+    def __contains__(self, nombre):
+        leido = self._instantanea._leer_equipo(nombre)
+        return leido is not None and leido[1] == self._disponible
+
+    def __len__(self):
+        return self._cantidad
+
+    def __bool__(self):
+        return self._cantidad > 0
+
+    def __iter__(self):
+        leer = self._instantanea._leer_equipo
+        return (nombre for nombre in self._instantanea._lista_equipos() if leer(nombre)[1] == self._disponible)
+
+
+class InstantaneaSistema:
+    """
+    Vista inmutable del sistema de préstamos en un instante. Ofrece los
+    mismos reportes y paginaciones que SistemaPrestamos (los métodos se
+    comparten) sin las operaciones que modifican el estado.
+    """
+
+    _metricas = None  # Los reportes de la instantánea no se registran en las métricas del sistema
+
+    def __init__(self, sistema):
+        """
+        Constructor de la instantánea; usar SistemaPrestamos.instantanea()
+
+        Args:
+            sistema (SistemaPrestamos): Sistema a congelar
+        """
+        self._sistema = sistema
+        capa = CapaCambios()
+        with _escrituras_detenidas(sistema):
+            anterior = sistema._capa_actual()
+            if anterior is not None:
+                anterior.siguiente = capa
+            sistema._capa_cambios = ref(capa)
+            self._capa = capa
+            self.fecha = sistema._historial.reloj()
+            self._cantidad_equipos = len(sistema._equipos)
+            self._cantidad_usuarios = len(sistema._usuarios)
+            self._historial = _HistorialCongelado(sistema._historial, capa)
+            self._archivo_historial = sistema._archivo_historial
+            # Solo se copian los contadores (O(tipos)); estadisticas() registraría una llamada en las métricas
+            self._estadisticas = sistema._armar_estadisticas(sistema._conteo_por_tipo, sistema._conteo_por_tipo_usuario)
+        # Se calculan en la primera consulta que los usa
+        self._nombres_equipo = None
+        self._nombres_usuario = None
+        self._nombres_usuario_conjunto = None
+        self._activos = None
+        self._prestados = None
+
+    # Las vistas se crean al pedirlas: guardarlas formaría ciclos de
+    # referencias y la instantánea (con su capa) no se liberaría al soltarla
+    @property
+    def _equipos(self):
+        return _EquiposCongelados(self)
+
+    @property
+    def _usuarios(self):
+        return _UsuariosCongelados(self)
+
+    @property
+    def _equipos_disponibles(self):
+        return _ParticionCongelada(self, True, self._estadisticas["equipos_disponibles"])
+
+    @property
+    def _equipos_prestados(self):
+        return _ParticionCongelada(self, False, self._estadisticas["equipos_prestados"])
+
+    def _lista_equipos(self):
+        """Nombres de los equipos que había al tomar la instantánea, en orden de alta"""
+        if self._nombres_equipo is None:
+            self._nombres_equipo = list(islice(self._sistema._equipos, self._cantidad_equipos))
+        return self._nombres_equipo
+
+    def _lista_usuarios(self):
+        """Nombres de los usuarios que había al tomar la instantánea, en orden de alta"""
+        if self._nombres_usuario is None:
+            self._nombres_usuario = list(islice(self._sistema._usuarios, self._cantidad_usuarios))
+        return self._nombres_usuario
+
+    def _conjunto_usuarios(self):
+        """Conjunto de los nombres de _lista_usuarios, para comprobar pertenencia"""
+        if self._nombres_usuario_conjunto is None:
+            self._nombres_usuario_conjunto = set(self._lista_usuarios())
+        return self._nombres_usuario_conjunto
+
+    def _estado(self, nombre):
+        """(disponible, prestatario) del equipo al tomar la instantánea si cambió después, o None"""
+        capa = self._capa
+        while capa is not None:
+            estado = capa.equipos.get(nombre)
+            if estado is not None:
+                return estado
+            capa = capa.siguiente
+        return None
+
+    def _leer_equipo(self, nombre):
+        """
+        Retorna (equipo del sistema, disponibilidad al tomar la instantánea),
+        o None si el equipo no existía entonces
+        """
+        sistema = self._sistema
+        equipo = sistema._equipos.get(nombre)
+        if equipo is None or equipo._id_historial >= self._historial._cantidad_equipos:
+            return None
+        # El estado actual se lee antes que las capas: un cambio posterior a
+        # la instantánea guarda el estado anterior en la capa antes de aplicarse
+        if sistema._candados_equipo is None:
+            disponible = equipo._disponible
+            estado = self._estado(nombre)
+        else:
+            with sistema._candado_equipo(nombre):
+                disponible = equipo._disponible
+                estado = self._estado(nombre)
+        return equipo, disponible if estado is None else estado[0]
+
+    def _equipo(self, nombre):
+        """Retorna una copia del equipo con su estado al tomar la instantánea"""
+        leido = self._leer_equipo(nombre)
+        if leido is None:
+            raise KeyError(nombre)
+        equipo, disponible = leido
+        congelado = copy(equipo)
+        congelado._disponible = disponible
+        congelado._historial = self._historial
+        congelado._observador = None
+        return congelado
+
+    def _usuario(self, nombre):
+        """Retorna una copia del usuario con los equipos que tenía al tomar la instantánea"""
+        if nombre not in self._conjunto_usuarios():
+            raise KeyError(nombre)
+        congelado = copy(self._sistema._usuarios[nombre])
+        prestados = self._prestados_por_usuario().get(nombre, ())
+        if len(prestados) > 1:
+            # El orden de préstamo es el de la última fila de cada equipo en el historial
+            prestados = sorted(prestados, key=self._ultima_fila)
+        congelado._equipos_prestados = dict.fromkeys(prestados)
+        return congelado
+
+    def _ultima_fila(self, nombre_equipo):
+        """Fila del último préstamo de un equipo al tomar la instantánea (-1 si no tenía)"""
+        filas = self._historial._filas(self._sistema._equipos[nombre_equipo]._id_historial)
+        return filas[-1] if filas else -1
+
+    @property
+    def _prestamos_activos(self):
+        """Diccionario nombre equipo -> nombre usuario al tomar la instantánea"""
+        if self._activos is None:
+            # Primero el estado actual y después las capas (ver _leer_equipo)
+            activos = dict(self._sistema._prestamos_activos)
+            vistos = set()
+            capa = self._capa
+            while capa is not None:
+                for nombre, (_, prestatario) in list(capa.equipos.items()):
+                    if nombre in vistos:
+                        continue
+                    vistos.add(nombre)
+                    if prestatario is None:
+                        activos.pop(nombre, None)
+                    else:
+                        activos[nombre] = prestatario
+                capa = capa.siguiente
+            self._activos = activos
+        return self._activos
+
+    def _prestados_por_usuario(self):
+        """Diccionario nombre usuario -> nombres de los equipos que tenía"""
+        if self._prestados is None:
+            prestados = {}
+            for nombre_equipo, nombre_usuario in self._prestamos_activos.items():
+                prestados.setdefault(nombre_usuario, []).append(nombre_equipo)
+            self._prestados = prestados
+        return self._prestados
+
+    def prestamos_activos(self):
+        """Retorna una copia de los préstamos activos: nombre equipo -> nombre usuario"""
+        return dict(self._prestamos_activos)
+
+    def _nombres_equipos(self, tipo_equipo=None, disponibles=None):
+        """Nombres de los equipos de la instantánea en orden de alta (ver SistemaPrestamos)"""
+        if disponibles is not None:
+            nombres = self._equipos_disponibles if disponibles else self._equipos_prestados
+        else:
+            nombres = self._lista_equipos()
+        if tipo_equipo is not None:
+            equipos = self._sistema._equipos
+            nombres = (nombre for nombre in nombres if equipos[nombre]._tipo_equipo == tipo_equipo)
+        return nombres
+
+    def _archivados(self, nombre_equipo):
+        """Cantidad de préstamos archivados de un equipo al tomar la instantánea"""
+        archivo = self._archivo_historial
+        if archivo is None:
+            return 0
+        capa = self._capa
+        while capa is not None:
+            cantidades = capa.archivados.get(archivo)
+            if cantidades is not None:
+                return cantidades.get(nombre_equipo, 0)
+            capa = capa.siguiente
+        return archivo.cantidad(nombre_equipo)
+
+    def estadisticas(self):
+        """Retorna una copia de las estadísticas del sistema al tomar la instantánea"""
+        return deepcopy(self._estadisticas)
+
+    # Reportes y consultas compartidos con SistemaPrestamos: solo leen los
+    # atributos que la instantánea reemplaza por sus versiones congeladas
+    hay_equipos_disponibles = SistemaPrestamos.hay_equipos_disponibles
+    contar_equipos_disponibles = SistemaPrestamos.contar_equipos_disponibles
+    equipos_disponibles = SistemaPrestamos.equipos_disponibles
+    equipos_prestados = SistemaPrestamos.equipos_prestados
+    filas_equipos = SistemaPrestamos.filas_equipos
+    pagina_equipos = SistemaPrestamos.pagina_equipos
+    listar_equipos = SistemaPrestamos.listar_equipos
+    mostrar_equipos = SistemaPrestamos.mostrar_equipos
+    mostrar_equipos_disponibles = SistemaPrestamos.mostrar_equipos_disponibles
+    filas_historial = SistemaPrestamos.filas_historial
+    pagina_historial = SistemaPrestamos.pagina_historial
+    pagina_prestamos_equipo = SistemaPrestamos.pagina_prestamos_equipo
+    ver_historial_completo = SistemaPrestamos.ver_historial_completo
+    ver_historial_equipo = SistemaPrestamos.ver_historial_equipo
+    mostrar_usuarios = SistemaPrestamos.mostrar_usuarios
+    obtener_estadisticas = SistemaPrestamos.obtener_estadisticas
@@ -0,0 +1,339 @@
+"""
+Inventario compacto de equipos para el sistema de préstamos
+
+Con SistemaPrestamos(inventario_compacto=True) el diccionario de equipos se
+reemplaza por un InventarioColumnar: cada equipo ocupa una fila en columnas
+tipadas (clase, tipo, los argumentos de su constructor, disponibilidad e
+id en el historial) y los textos repetidos (tipos, sistemas operativos,
+RAM, pulgadas, baterías) se guardan una sola vez en una tabla de valores.
+
+Los objetos Equipo se crean solo cuando se pide un equipo concreto y se
+conservan en una caché LRU acotada. Mientras alguien tenga una referencia
+a un equipo, el inventario devuelve ese mismo objeto (se siguen con
+referencias débiles), así que nunca hay dos objetos para un mismo equipo.
+La disponibilidad se escribe en su columna cada vez que cambia (a través
+de las particiones, ver SistemaPrestamos._actualizar_disponibilidad). Las
+particiones y los equipos por tipo guardan las filas de sus equipos
+(diccionarios usados como conjuntos ordenados), así que recorrerlos cuesta
+lo que su resultado y no lo que el inventario.
+"""
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from weakref import ref
+
+from ProyectoIntegrador import CLASES_EQUIPO
+
+
+# Clases que se pueden reconstruir desde las columnas, por código
+_CLASES = tuple(CLASES_EQUIPO.values())
+_CODIGOS_CLASE = {clase: codigo for codigo, clase in enumerate(_CLASES)}
+_SIN_VALOR = 0  # Código del argumento ausente (el valor 0 de la tabla es None)
+
+
+class InventarioColumnar(MutableMapping):
+    """Diccionario nombre -> Equipo respaldado por columnas tipadas"""
+
+    def __init__(self, sistema, capacidad=10_000, concurrente=False):
+        """
+        Constructor del inventario
+
+        Args:
+            sistema (SistemaPrestamos): Sistema dueño de los equipos (su
+                historial y observador de los objetos creados)
+            capacidad (int): Cantidad máxima de equipos en la caché LRU
+            concurrente (bool): Si es True, la caché se usa con un candado
+        """
+        self._sistema = sistema
+        self._capacidad = capacidad
+        self._filas = {}  # Diccionario: nombre -> fila (en orden de alta)
+        self._nombres = []  # Lista: fila -> nombre
+        self._clase = array('B')
+        self._tipo = array('I')
+        self._argumento1 = array('I')
+        self._argumento2 = array('I')
+        self._disponible = array('B')
+        self._id_historial = array('I')
+        self._valores = [None]  # Tabla de valores: código -> valor
+        self._codigos = {None: 0}  # Diccionario: valor -> código
+        # Filas de cada partición (índice 0: prestados, 1: disponibles) y de cada tipo
+        self._filas_particion = ({}, {})
+        self._filas_por_tipo = {}  # Diccionario: código de tipo -> {fila: None}
+        self._cache = OrderedDict()  # Fila -> Equipo, del menos al más usado
+        # Fila -> referencia débil a los equipos desalojados de la caché, por si
+        # alguien todavía los tiene (las referencias muertas se purgan por tandas)
+        self._desalojados = {}
+        self._limite_desalojados = 2 * capacidad + 1024  # Tamaño que dispara la próxima purga
+        self._fijos = {}  # Fila -> Equipo de clases que no se pueden reconstruir
+        self._candado = threading.Lock() if concurrente else None
+
+    def _codigo(self, valor):
+        """Retorna el código de un valor en la tabla, agregándolo si no existe"""
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = self._codigos[valor] = len(self._valores)
+            self._valores.append(valor)
+        return codigo
+
+    def _agregar(self, nombre, equipo):
+        """Agrega la fila de un equipo nuevo"""
+        fila = len(self._clase)
+        _, *argumentos = equipo._datos_constructor()
+        codigo_clase = _CODIGOS_CLASE.get(type(equipo))
+        if codigo_clase is None or len(argumentos) > 2:
+            # Subclase desconocida: se guarda el objeto tal cual
+            self._fijos[fila] = equipo
+            codigo_clase = 0
+            argumentos = ()
+        argumentos = list(argumentos) + [None] * (2 - len(argumentos))
+        codigo_tipo = self._codigo(equipo._tipo_equipo)
+        self._filas[nombre] = fila
+        self._nombres.append(nombre)
+        self._clase.append(codigo_clase)
+        self._tipo.append(codigo_tipo)
+        self._argumento1.append(self._codigo(argumentos[0]))
+        self._argumento2.append(self._codigo(argumentos[1]))
+        self._disponible.append(equipo._disponible)
+        self._id_historial.append(equipo._id_historial)
+        self._filas_particion[int(equipo._disponible)][fila] = None
+        self._filas_por_tipo.setdefault(codigo_tipo, {})[fila] = None
+        # El objeto recibido no ocupa la caché (un alta masiva la llenaría),
+        # pero se reutiliza si quien lo creó lo sigue usando
+        self._desalojar(fila, equipo)
+
+    def _guardar(self, fila, equipo):
+        """Pone el equipo en la caché como el más reciente, desalojando el menos usado"""
+        cache = self._cache
+        cache[fila] = equipo
+        if len(cache) > self._capacidad:
+            self._desalojar(*cache.popitem(last=False))
+
+    def _desalojar(self, fila, equipo):
+        """Guarda una referencia débil a un equipo que sale de la caché"""
+        desalojados = self._desalojados
+        desalojados[fila] = ref(equipo)
+        if len(desalojados) > self._limite_desalojados:
+            # Casi todos los desalojados ya no tienen referencias: se purgan, y
+            # el límite se ajusta a los que siguen vivos para que la purga
+            # cueste O(1) amortizado por desalojo
+            desalojados = self._desalojados = {fila: referencia for fila, referencia in desalojados.items()
+                                               if referencia() is not None}
+            self._limite_desalojados = 2 * (len(desalojados) + self._capacidad) + 1024
+
+    def _crear(self, fila, nombre):
+        """Crea el objeto Equipo de una fila a partir de las columnas"""
+        fijo = self._fijos.get(fila)
+        if fijo is not None:
+            return fijo
+        valores = self._valores
+        argumentos = [valores[codigo] for codigo in (self._argumento1[fila], self._argumento2[fila])
+                      if codigo != _SIN_VALOR]
+        equipo = _CLASES[self._clase[fila]](nombre, *argumentos)
+        equipo._disponible = bool(self._disponible[fila])
+        equipo._historial = self._sistema._historial
+        equipo._id_historial = self._id_historial[fila]
+        equipo._observador = self._sistema
+        return equipo
+
+    def _buscar(self, nombre):
+        """Retorna el equipo de un nombre (creándolo si hace falta) o None"""
+        fila = self._filas.get(nombre)
+        if fila is None:
+            return None
+        cache = self._cache
+        equipo = cache.get(fila)
+        if equipo is not None:
+            cache.move_to_end(fila)
+            return equipo
+        referencia = self._desalojados.pop(fila, None)
+        equipo = referencia() if referencia is not None else None
+        if equipo is None:
+            equipo = self._crear(fila, nombre)
+        self._guardar(fila, equipo)
+        return equipo
+
+    def get(self, nombre, defecto=None):
+        if self._candado is None:
+            equipo = self._buscar(nombre)
+        else:
+            with self._candado:
+                equipo = self._buscar(nombre)
+        return defecto if equipo is None else equipo
+
+    def __getitem__(self, nombre):
+        equipo = self.get(nombre)
+        if equipo is None:
+            raise KeyError(nombre)
+        return equipo
+
+    def __setitem__(self, nombre, equipo):
+        if nombre in self._filas:
+            raise KeyError(f"El equipo '{nombre}' ya está en el inventario.")
+        if self._candado is None:
+            self._agregar(nombre, equipo)
+        else:
+            with self._candado:
+                self._agregar(nombre, equipo)
+
+    def __delitem__(self, nombre):
+        raise TypeError("No se pueden eliminar equipos del inventario.")
+
+    def __contains__(self, nombre):
+        return nombre in self._filas
+
+    def __iter__(self):
+        return iter(self._filas)
+
+    def __len__(self):
+        return len(self._filas)
+
+    def values(self):
+        """Genera los equipos en orden de alta, creándolos a medida que se recorren"""
+        for _, equipo in self.items():
+            yield equipo
+
+    def items(self):
+        """Genera los pares (nombre, equipo) en orden de alta"""
+        for nombre in list(self._filas):
+            yield nombre, self[nombre]
+
+    def en_cache(self):
+        """Cantidad de equipos materializados en la caché LRU"""
+        return len(self._cache)
+
+    def _marcar(self, nombre, disponible):
+        """Escribe la disponibilidad de un equipo en su columna"""
+        if self._candado is None:
+            self._marcar_fila(self._filas[nombre], disponible)
+        else:
+            with self._candado:
+                self._marcar_fila(self._filas[nombre], disponible)
+
+    def _marcar_fila(self, fila, disponible):
+        """Actualiza la columna de disponibilidad y mueve la fila de partición (ver _marcar)"""
+        if self._disponible[fila] != disponible:
+            self._disponible[fila] = disponible
+            del self._filas_particion[1 - disponible][fila]
+            self._filas_particion[disponible][fila] = None
+
+    def _nombres_filas(self, filas):
+        """Genera los nombres de un índice de filas (se copia para tolerar cambios)"""
+        nombres = self._nombres
+        for fila in list(filas):
+            yield nombres[fila]
+
+    def particion(self, disponible):
+        """
+        Retorna una vista de los nombres de equipos disponibles o prestados,
+        con la interfaz de diccionario que usa el sistema para sus particiones
+
+        Args:
+            disponible (bool): True para los disponibles, False para los prestados
+        """
+        return _Particion(self, disponible)
+
+    def por_tipo(self):
+        """Retorna una vista tipo -> nombres de equipos de ese tipo"""
+        return _Tipos(self)
+
+
+class _Particion:
+    """Nombres de los equipos con una disponibilidad, leídos de la columna"""
+
+    __slots__ = ("_inventario", "_valor")
+
+    def __init__(self, inventario, disponible):
+        self._inventario = inventario
+        self._valor = int(disponible)
+
+    def __contains__(self, nombre):
+        fila = self._inventario._filas.get(nombre)
+        return fila is not None and self._inventario._disponible[fila] == self._valor
+
+    def __len__(self):
+        return len(self._inventario._filas_particion[self._valor])
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        inventario = self._inventario
+        return inventario._nombres_filas(inventario._filas_particion[self._valor])
+
+    def __setitem__(self, nombre, _):
+        self._inventario._marcar(nombre, self._valor)
+
+    def pop(self, nombre, defecto=None):
+        """Quita el equipo de la partición (pasa a la otra)"""
+        inventario = self._inventario
+        fila = inventario._filas.get(nombre)
+        if fila is None or inventario._disponible[fila] != self._valor:
+            return defecto
+        inventario._marcar(nombre, 1 - self._valor)
+        return None
+
+
+class _Tipos:
+    """Vista tipo de equipo -> nombres de los equipos de ese tipo"""
+
+    __slots__ = ("_inventario",)
+
+    def __init__(self, inventario):
+        self._inventario = inventario
+
+    def get(self, tipo_equipo, defecto=None):
+        """Retorna los nombres de los equipos del tipo, o `defecto` si no hay"""
+        codigo = self._inventario._codigos.get(tipo_equipo)
+        if codigo is None or codigo not in self._inventario._filas_por_tipo:
+            return defecto
+        return _EquiposTipo(self._inventario, codigo)
+
+    def setdefault(self, tipo_equipo, defecto=None):
+        """Retorna los nombres del tipo; los equipos nuevos se agregan al inventario"""
+        return _EquiposTipo(self._inventario, self._inventario._codigo(tipo_equipo))
+
+    def __getitem__(self, tipo_equipo):
+        nombres = self.get(tipo_equipo)
+        if nombres is None:
+            raise KeyError(tipo_equipo)
+        return nombres
+
+    def __contains__(self, tipo_equipo):
+        return self.get(tipo_equipo) is not None
+
+    def __iter__(self):
+        valores = self._inventario._valores
+        return (valores[codigo] for codigo in list(self._inventario._filas_por_tipo))
+
+    def __len__(self):
+        return len(self._inventario._filas_por_tipo)
+
+    def items(self):
+        """Genera los pares (tipo, nombres de los equipos del tipo)"""
+        return ((tipo_equipo, self[tipo_equipo]) for tipo_equipo in self)
+
+
+class _EquiposTipo:
+    """Nombres de los equipos de un tipo, leídos de la columna de tipos"""
+
+    __slots__ = ("_inventario", "_codigo")
+
+    def __init__(self, inventario, codigo):
+        self._inventario = inventario
+        self._codigo = codigo
+
+    def __contains__(self, nombre):
+        fila = self._inventario._filas.get(nombre)
+        return fila is not None and self._inventario._tipo[fila] == self._codigo
+
+    def __len__(self):
+        return len(self._inventario._filas_por_tipo.get(self._codigo, ()))
+
+    def __iter__(self):
+        inventario = self._inventario
+        return inventario._nombres_filas(inventario._filas_por_tipo.get(self._codigo, ()))
+
+    def __setitem__(self, nombre, _):
+        # La fila del equipo ya tiene su tipo desde que se agregó al inventario
+        pass
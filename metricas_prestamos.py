@@ -0,0 +1,217 @@
+"""
+Métricas del sistema de préstamos: llamadas, errores y latencias
+
+Cada operación instrumentada de SistemaPrestamos registra su latencia en un
+histograma de cubetas fijas (una búsqueda binaria y un incremento por
+llamada) y, si falló, el motivo según su código de resultado. Las métricas
+se leen bajo demanda con instantanea() o en formato de texto con
+exposicion(), compatible con el formato de exposición de Prometheus.
+
+Las métricas se activan con SistemaPrestamos(metricas=True) o con
+sistema.activar_metricas(); desactivadas, cada operación solo comprueba
+que el atributo _metricas sea None.
+"""
+import threading
+from bisect import bisect_left
+
+from ProyectoIntegrador import (
+    RESULTADO_EQUIPO_DISPONIBLE, RESULTADO_EQUIPO_INEXISTENTE, RESULTADO_EQUIPO_PRESTADO, RESULTADO_ERROR)
+
+
+# Límites superiores de las cubetas de latencia, en segundos (la última cubeta es +Inf)
+LIMITES_LATENCIA = (
+    0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Motivo de error por código de resultado
+MOTIVOS_ERROR = {
+    RESULTADO_EQUIPO_INEXISTENTE: "equipo_inexistente",
+    RESULTADO_EQUIPO_PRESTADO: "equipo_prestado",
+    RESULTADO_EQUIPO_DISPONIBLE: "equipo_disponible",
+    RESULTADO_ERROR: "error",
+}
+
+
+class _Serie:
+    """Contadores de una operación"""
+
+    __slots__ = ("cubetas", "suma", "elementos", "errores")
+
+    def __init__(self):
+        self.cubetas = [0] * (len(LIMITES_LATENCIA) + 1)
+        self.suma = 0.0
+        self.elementos = 0  # Filas procesadas por las operaciones en lote
+        self.errores = {}  # Diccionario: código de resultado -> cantidad
+
+
+class MetricasPrestamos:
+    """Contadores de llamadas y errores e histogramas de latencia por operación"""
+
+    def __init__(self, concurrente=False):
+        """
+        Constructor de las métricas
+
+        Args:
+            concurrente (bool): Si es True, los registros se hacen con un
+                candado para que no se pierdan incrementos entre hilos
+        """
+        self._series = {}  # Diccionario: operación -> _Serie
+        self._candado = threading.Lock() if concurrente else None
+
+    def _serie(self, operacion):
+        """Retorna la serie de una operación, creándola si no existe"""
+        serie = self._series.get(operacion)
+        if serie is None:
+            serie = self._series.setdefault(operacion, _Serie())
+        return serie
+
+    def registrar(self, operacion, segundos, codigo=0):
+        """
+        Registra una llamada
+
+        Args:
+            operacion (str): Nombre de la operación
+            segundos (float): Latencia de la llamada
+            codigo (int): Código de resultado (RESULTADO_OK si no hubo error)
+        """
+        if self._candado is not None:
+            with self._candado:
+                self._registrar(operacion, segundos, codigo)
+        else:
+            self._registrar(operacion, segundos, codigo)
+
+    def _registrar(self, operacion, segundos, codigo):
+        """Actualiza los contadores de la llamada (ver registrar)"""
+        serie = self._serie(operacion)
+        serie.cubetas[bisect_left(LIMITES_LATENCIA, segundos)] += 1
+        serie.suma += segundos
+        if codigo:
+            serie.errores[codigo] = serie.errores.get(codigo, 0) + 1
+
+    def registrar_lote(self, operacion, segundos, resultados):
+        """
+        Registra una llamada en lote y los errores de cada una de sus filas
+
+        Args:
+            operacion (str): Nombre de la operación
+            segundos (float): Latencia de toda la llamada
+            resultados (array): Código de resultado por fila
+        """
+        errores = {codigo: resultados.count(codigo) for codigo in MOTIVOS_ERROR}
+        if self._candado is not None:
+            with self._candado:
+                self._registrar_lote(operacion, segundos, len(resultados), errores)
+        else:
+            self._registrar_lote(operacion, segundos, len(resultados), errores)
+
+    def _registrar_lote(self, operacion, segundos, elementos, errores):
+        """Actualiza los contadores de la llamada en lote (ver registrar_lote)"""
+        self._registrar(operacion, segundos, 0)
+        serie = self._series[operacion]
+        serie.elementos += elementos
+        for codigo, cantidad in errores.items():
+            if cantidad:
+                serie.errores[codigo] = serie.errores.get(codigo, 0) + cantidad
+
+    def reiniciar(self):
+        """Pone todos los contadores en cero"""
+        self._series = {}
+
+    def instantanea(self):
+        """
+        Retorna una copia de las métricas actuales
+
+        Returns:
+            dict: Para cada operación, {"llamadas", "segundos_total",
+                "elementos", "errores": {motivo: cantidad},
+                "cubetas": [(límite en segundos, llamadas acumuladas)]}; el
+                último límite es float("inf")
+        """
+        if self._candado is not None:
+            with self._candado:
+                series = {operacion: (list(serie.cubetas), serie.suma, serie.elementos, dict(serie.errores))
+                          for operacion, serie in self._series.items()}
+        else:
+            series = {operacion: (list(serie.cubetas), serie.suma, serie.elementos, dict(serie.errores))
+                      for operacion, serie in list(self._series.items())}
+
+        instantanea = {}
+        for operacion, (cubetas, suma, elementos, errores) in sorted(series.items()):
+            acumuladas = []
+            total = 0
+            for limite, cantidad in zip(LIMITES_LATENCIA + (float("inf"),), cubetas):
+                total += cantidad
+                acumuladas.append((limite, total))
+            instantanea[operacion] = {
+                "llamadas": total,
+                "segundos_total": suma,
+                "elementos": elementos,
+                "errores": {MOTIVOS_ERROR.get(codigo, str(codigo)): cantidad
+                            for codigo, cantidad in sorted(errores.items())},
+                "cubetas": acumuladas,
+            }
+        return instantanea
+
+    def percentil(self, operacion, percentil):
+        """
+        Estima un percentil de latencia a partir del histograma
+
+        Args:
+            operacion (str): Nombre de la operación
+            percentil (float): Percentil entre 0 y 100
+
+        Returns:
+            float: Límite superior de la cubeta que contiene el percentil, o
+                None si la operación no tiene llamadas
+        """
+        datos = self.instantanea().get(operacion)
+        if not datos or not datos["llamadas"]:
+            return None
+        objetivo = datos["llamadas"] * percentil / 100
+        for limite, acumuladas in datos["cubetas"]:
+            if acumuladas >= objetivo:
+                return limite
+        return float("inf")
+
+    def exposicion(self, prefijo="prestamos"):
+        """
+        Retorna las métricas en el formato de texto de exposición de Prometheus
+
+        Args:
+            prefijo (str): Prefijo de los nombres de las métricas
+
+        Returns:
+            str: Texto con una muestra por línea
+        """
+        instantanea = self.instantanea()
+        lineas = [
+            f"# HELP {prefijo}_llamadas_total Llamadas por operación.",
+            f"# TYPE {prefijo}_llamadas_total counter",
+        ]
+        lineas += [f'{prefijo}_llamadas_total{{operacion="{operacion}"}} {datos["llamadas"]}'
+                   for operacion, datos in instantanea.items()]
+        lineas += [
+            f"# HELP {prefijo}_elementos_total Filas procesadas por las operaciones en lote.",
+            f"# TYPE {prefijo}_elementos_total counter",
+        ]
+        lineas += [f'{prefijo}_elementos_total{{operacion="{operacion}"}} {datos["elementos"]}'
+                   for operacion, datos in instantanea.items() if datos["elementos"]]
+        lineas += [
+            f"# HELP {prefijo}_errores_total Operaciones fallidas por motivo.",
+            f"# TYPE {prefijo}_errores_total counter",
+        ]
+        lineas += [f'{prefijo}_errores_total{{operacion="{operacion}",motivo="{motivo}"}} {cantidad}'
+                   for operacion, datos in instantanea.items() for motivo, cantidad in datos["errores"].items()]
+        lineas += [
+            f"# HELP {prefijo}_latencia_segundos Latencia por operación.",
+            f"# TYPE {prefijo}_latencia_segundos histogram",
+        ]
+        for operacion, datos in instantanea.items():
+            for limite, acumuladas in datos["cubetas"]:
+                etiqueta = "+Inf" if limite == float("inf") else repr(limite)
+                lineas.append(f'{prefijo}_latencia_segundos_bucket{{operacion="{operacion}",le="{etiqueta}"}} '
+                              f'{acumuladas}')
+            lineas.append(f'{prefijo}_latencia_segundos_sum{{operacion="{operacion}"}} {datos["segundos_total"]!r}')
+            lineas.append(f'{prefijo}_latencia_segundos_count{{operacion="{operacion}"}} {datos["llamadas"]}')
+        return "\n".join(lineas) + "\n"
@@ -0,0 +1,196 @@
+"""
+Colas de reservas de equipos prestados
+
+Cuando un equipo está prestado, en lugar de reintentar el préstamo hasta
+que se libere, el usuario se pone en espera con
+SistemaPrestamos.reservar_equipo (un equipo concreto) o reservar_tipo
+(cualquier equipo de un tipo). Al devolverse un equipo, el sistema se lo
+presta directamente a la primera reserva que le corresponde: la de mayor
+prioridad entre la cola del equipo y la de su tipo, y a igual prioridad la
+más antigua.
+
+Cada cola es un montículo de entradas [prioridad, secuencia, usuario,
+clave]; la secuencia es global, así que el orden de llegada se respeta
+también entre la cola de un equipo y la de su tipo. Las reservas canceladas
+se marcan y se descartan cuando llegan al frente, así que reservar,
+cancelar y atender cuestan O(log n).
+"""
+import threading
+from heapq import heappop, heappush
+from itertools import count
+
+
+# Prioridad de cada tipo de usuario (menor se atiende antes); los tipos que
+# no están en la tabla se atienden después de todos estos
+PRIORIDAD_TIPO_USUARIO = {
+    "Profesor": 0,
+    "Estudiante": 1,
+}
+
+
+def clave_equipo(nombre_equipo):
+    """Clave de la cola de reservas de un equipo concreto"""
+    return ("equipo", nombre_equipo)
+
+
+def clave_tipo(tipo_equipo):
+    """Clave de la cola de reservas de cualquier equipo de un tipo"""
+    return ("tipo", tipo_equipo)
+
+
+class ColaReservas:
+    """Colas de espera por equipo y por tipo de equipo, ordenadas por prioridad y llegada"""
+
+    def __init__(self, prioridades=None, al_entregar=None, concurrente=False):
+        """
+        Constructor de las colas
+
+        Args:
+            prioridades (dict): Tipo de usuario -> prioridad (por defecto
+                PRIORIDAD_TIPO_USUARIO)
+            al_entregar (callable): al_entregar(nombre_equipo, nombre_usuario),
+                se invoca cada vez que un equipo se presta a una reserva
+            concurrente (bool): Si es True, las colas se modifican con un candado
+        """
+        self._prioridades = dict(PRIORIDAD_TIPO_USUARIO if prioridades is None else prioridades)
+        self.al_entregar = al_entregar
+        self._colas = {}  # Diccionario: clave -> montículo de entradas
+        self._entradas = {}  # Diccionario: (clave, usuario) -> entrada en espera
+        self._secuencia = count()
+        self._candado = threading.Lock() if concurrente else None
+        self.entregas = 0  # Equipos prestados a reservas
+
+    def prioridad(self, tipo_usuario):
+        """Retorna la prioridad de un tipo de usuario (menor se atiende antes)"""
+        return self._prioridades.get(tipo_usuario, len(self._prioridades))
+
+    def _con_candado(self, funcion, *args):
+        """Ejecuta la función tomando el candado de las colas, si tienen uno"""
+        if self._candado is None:
+            return funcion(*args)
+        with self._candado:
+            return funcion(*args)
+
+    def agregar(self, clave, nombre_usuario, tipo_usuario):
+        """
+        Pone a un usuario en espera en una cola
+
+        Args:
+            clave (tuple): clave_equipo(nombre) o clave_tipo(tipo)
+            nombre_usuario (str): Usuario que espera
+            tipo_usuario (str): Tipo del usuario, que define su prioridad
+
+        Returns:
+            bool: True si se agregó, False si el usuario ya esperaba en esa cola
+        """
+        return self._con_candado(self._agregar, clave, nombre_usuario, tipo_usuario)
+
+    def _agregar(self, clave, nombre_usuario, tipo_usuario):
+        """Agrega la entrada a la cola (ver agregar)"""
+        if (clave, nombre_usuario) in self._entradas:
+            return False
+        entrada = [self.prioridad(tipo_usuario), next(self._secuencia), nombre_usuario, clave]
+        self._entradas[clave, nombre_usuario] = entrada
+        cola = self._colas.get(clave)
+        if cola is None:
+            cola = self._colas[clave] = []
+        heappush(cola, entrada)
+        return True
+
+    def cancelar(self, clave, nombre_usuario):
+        """
+        Quita a un usuario de una cola
+
+        Returns:
+            bool: True si el usuario estaba esperando en esa cola
+        """
+        return self._con_candado(self._cancelar, clave, nombre_usuario)
+
+    def _cancelar(self, clave, nombre_usuario):
+        """Marca la entrada como cancelada (ver cancelar)"""
+        entrada = self._entradas.pop((clave, nombre_usuario), None)
+        if entrada is None:
+            return False
+        # Se descarta cuando llegue al frente del montículo
+        entrada[2] = None
+        return True
+
+    def _frente(self, clave):
+        """Retorna la primera entrada vigente de una cola, descartando las canceladas"""
+        cola = self._colas.get(clave)
+        while cola and cola[0][2] is None:
+            heappop(cola)
+        if not cola:
+            self._colas.pop(clave, None)
+            return None
+        return cola[0]
+
+    def siguiente(self, nombre_equipo, tipo_equipo):
+        """
+        Saca la reserva que debe recibir un equipo que quedó disponible: la
+        primera entre la cola del equipo y la de su tipo
+
+        Args:
+            nombre_equipo (str): Equipo disponible
+            tipo_equipo (str): Tipo del equipo
+
+        Returns:
+            list: Entrada [prioridad, secuencia, usuario, clave], o None si
+                nadie espera ese equipo
+        """
+        return self._con_candado(self._siguiente, nombre_equipo, tipo_equipo)
+
+    def _siguiente(self, nombre_equipo, tipo_equipo):
+        """Saca la entrada de la cola que corresponda (ver siguiente)"""
+        if not self._colas:
+            return None
+        del_equipo = self._frente(clave_equipo(nombre_equipo))
+        del_tipo = self._frente(clave_tipo(tipo_equipo))
+        if del_equipo is None and del_tipo is None:
+            return None
+        if del_tipo is None or (del_equipo is not None and del_equipo[:2] < del_tipo[:2]):
+            entrada = del_equipo
+        else:
+            entrada = del_tipo
+        clave = entrada[3]
+        cola = self._colas[clave]
+        heappop(cola)
+        if not cola:
+            del self._colas[clave]
+        del self._entradas[clave, entrada[2]]
+        return entrada
+
+    def reponer(self, entrada):
+        """
+        Devuelve a su cola una entrada sacada con siguiente() que no se pudo
+        atender, con su misma prioridad y secuencia
+        """
+        self._con_candado(self._reponer, entrada)
+
+    def _reponer(self, entrada):
+        """Vuelve a poner la entrada en su cola (ver reponer)"""
+        clave, nombre_usuario = entrada[3], entrada[2]
+        if (clave, nombre_usuario) in self._entradas:
+            # El usuario volvió a reservar mientras tanto: se queda con la más antigua
+            self._entradas[clave, nombre_usuario][2] = None
+        self._entradas[clave, nombre_usuario] = entrada
+        cola = self._colas.get(clave)
+        if cola is None:
+            cola = self._colas[clave] = []
+        heappush(cola, entrada)
+
+    def esperando(self, clave, nombre_usuario):
+        """Indica si un usuario está esperando en una cola"""
+        return (clave, nombre_usuario) in self._entradas
+
+    def pendientes(self, clave):
+        """
+        Retorna los usuarios que esperan en una cola, en el orden en que se
+        atenderán (ordena una copia de la cola: O(k log k))
+        """
+        cola = self._con_candado(lambda: list(self._colas.get(clave, ())))
+        return [entrada[2] for entrada in sorted(cola) if entrada[2] is not None]
+
+    def __len__(self):
+        """Cantidad total de reservas en espera"""
+        return len(self._entradas)
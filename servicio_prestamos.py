@@ -0,0 +1,320 @@
+"""
+Servicio de red asyncio para el sistema de préstamos
+
+Protocolo: una solicitud JSON por línea y una respuesta JSON por línea, en
+el mismo orden. La conexión se mantiene abierta (keep-alive) y el cliente
+puede enviar varias solicitudes sin esperar las respuestas (pipelining).
+
+Solicitudes:
+    {"op": "listar", "filtro": "todos" | "disponibles" | "prestados", "tipo": ..., "limite": 100, "cursor": 0}
+    {"op": "prestar", "equipo": "...", "usuario": "..."}
+    {"op": "devolver", "equipo": "..."}
+    {"op": "historial", "equipo": "...", "limite": 100, "cursor": 0}
+    {"op": "estadisticas"}
+    {"op": "metricas"}  (texto de exposición; requiere iniciar el servidor con --metricas)
+
+Respuestas:
+    {"ok": true | false, "mensaje": "...", "datos": ...}
+    listar e historial responden por páginas y agregan "cursor": el valor a
+    enviar en la solicitud siguiente, o null si no hay más
+
+Uso:
+    python servicio_prestamos.py servidor [--host 127.0.0.1] [--puerto 8765] [--metricas]
+    python servicio_prestamos.py carga [--conexiones 1,8,64] [--iniciar-servidor]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+
+from ProyectoIntegrador import EquipoComputo, SistemaPrestamos, Tablet
+
+
+class ServicioPrestamos:
+    """Expone las operaciones de SistemaPrestamos por TCP"""
+
+    # Respuestas que se escriben como máximo entre dos drain() de una conexión
+    RESPUESTAS_POR_DRAIN = 64
+    # Longitud máxima de una línea de solicitud
+    LIMITE_LINEA = 1 << 20
+
+    def __init__(self, sistema):
+        """
+        Constructor del servicio
+
+        Args:
+            sistema (SistemaPrestamos): Sistema que atiende las solicitudes
+        """
+        self._sistema = sistema
+        self._operaciones = {
+            "listar": self._listar,
+            "prestar": self._prestar,
+            "devolver": self._devolver,
+            "historial": self._historial,
+            "estadisticas": self._estadisticas,
+            "metricas": self._metricas,
+        }
+
+    @staticmethod
+    def _pagina(solicitud):
+        """Retorna (limite, cursor) de una solicitud por páginas"""
+        return max(int(solicitud.get("limite", 100)), 1), max(int(solicitud.get("cursor") or 0), 0)
+
+    def _listar(self, solicitud):
+        """Lista una página de equipos según el filtro y el tipo indicados"""
+        disponibles = {"disponibles": True, "prestados": False}.get(solicitud.get("filtro", "todos"))
+        limite, cursor = self._pagina(solicitud)
+        equipos, siguiente = self._sistema.listar_equipos(limite, cursor, solicitud.get("tipo"), disponibles)
+        datos = [{"nombre": equipo.nombre, "tipo": equipo.tipo_equipo, "disponible": equipo.disponible}
+                 for equipo in equipos]
+        return True, f"{len(datos)} equipos.", datos, siguiente
+
+    def _prestar(self, solicitud):
+        """Registra un préstamo"""
+        exito, mensaje = self._sistema.registrar_prestamo(solicitud["equipo"], solicitud["usuario"])
+        return exito, mensaje, None
+
+    def _devolver(self, solicitud):
+        """Registra una devolución"""
+        exito, mensaje = self._sistema.devolver_equipo(solicitud["equipo"])
+        return exito, mensaje, None
+
+    def _historial(self, solicitud):
+        """Retorna una página del historial de un equipo"""
+        limite, cursor = self._pagina(solicitud)
+        pagina = self._sistema.pagina_prestamos_equipo(solicitud["equipo"], limite, cursor)
+        if pagina is None:
+            return False, f"El equipo '{solicitud['equipo']}' no existe en el sistema.", None
+        prestamos, siguiente = pagina
+        return True, f"{len(prestamos)} préstamos.", [list(prestamo) for prestamo in prestamos], siguiente
+
+    def _estadisticas(self, solicitud):
+        """Retorna las estadísticas del sistema"""
+        return True, "Estadísticas del sistema.", self._sistema.estadisticas()
+
+    def _metricas(self, solicitud):
+        """Retorna las métricas del sistema en formato de exposición de texto"""
+        metricas = self._sistema.metricas
+        if metricas is None:
+            return False, "Las métricas no están activas.", None
+        return True, "Métricas del sistema.", metricas.exposicion()
+
+    def atender(self, linea):
+        """
+        Procesa una línea de solicitud y retorna la línea de respuesta
+
+        Args:
+            linea (bytes): Solicitud JSON
+
+        Returns:
+            bytes: Respuesta JSON terminada en salto de línea
+        """
+        try:
+            solicitud = json.loads(linea)
+            operacion = self._operaciones.get(solicitud.get("op"))
+            if operacion is None:
+                respuesta = {"ok": False, "mensaje": f"Operación desconocida: {solicitud.get('op')!r}."}
+            else:
+                # Las operaciones por páginas retornan además el cursor siguiente
+                exito, mensaje, datos, *cursor = operacion(solicitud)
+                respuesta = {"ok": exito, "mensaje": mensaje, "datos": datos}
+                if cursor:
+                    respuesta["cursor"] = cursor[0]
+        except (ValueError, KeyError, AttributeError, TypeError) as error:
+            respuesta = {"ok": False, "mensaje": f"Solicitud inválida: {error}"}
+        return json.dumps(respuesta, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    async def _conexion(self, lector, escritor):
+        """Atiende una conexión hasta que el cliente la cierre"""
+        transporte = escritor.transport
+        sin_drain = 0  # Respuestas escritas desde el último drain
+        try:
+            while True:
+                try:
+                    linea = await lector.readline()
+                except ValueError:
+                    # Línea más larga que LIMITE_LINEA: el resto del flujo ya no
+                    # se puede separar en solicitudes, así que se cierra
+                    escritor.write(json.dumps({"ok": False, "mensaje": "Solicitud demasiado larga."},
+                                              ensure_ascii=False).encode("utf-8") + b"\n")
+                    await escritor.drain()
+                    break
+                if not linea:
+                    break
+                escritor.write(self.atender(linea))
+                sin_drain += 1
+                # Las solicitudes en pipeline comparten un drain, pero un cliente
+                # que nunca deja de enviar igual recibe contrapresión
+                if (sin_drain >= self.RESPUESTAS_POR_DRAIN
+                        or transporte.get_write_buffer_size() > transporte.get_write_buffer_limits()[1]):
+                    await escritor.drain()
+                    sin_drain = 0
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self, host="127.0.0.1", puerto=8765):
+        """
+        Inicia el servidor TCP
+
+        Returns:
+            asyncio.Server: Servidor en ejecución
+        """
+        return await asyncio.start_server(self._conexion, host, puerto, limit=self.LIMITE_LINEA)
+
+
+def _crear_sistema_demo(equipos, metricas=False):
+    """Crea un sistema con un inventario sintético para las pruebas de carga"""
+    sistema = SistemaPrestamos(metricas=metricas)
+    for i in range(equipos):
+        if i % 2:
+            sistema.agregar_equipo(Tablet(f"Tablet-{i:07d}"))
+        else:
+            sistema.agregar_equipo(EquipoComputo(f"Laptop-{i:07d}"))
+    return sistema
+
+
+def ejecutar_servidor(host, puerto, equipos=0, metricas=False):
+    """
+    Ejecuta el servidor hasta que se interrumpa
+
+    Args:
+        host (str): Dirección donde escuchar
+        puerto (int): Puerto donde escuchar
+        equipos (int): Equipos sintéticos a agregar (0 para solo los de prueba)
+        metricas (bool): Si es True, activa las métricas del sistema
+    """
+    async def principal():
+        servidor = await ServicioPrestamos(_crear_sistema_demo(equipos, metricas)).iniciar(host, puerto)
+        async with servidor:
+            await servidor.serve_forever()
+
+    try:
+        asyncio.run(principal())
+    except KeyboardInterrupt:
+        pass
+
+
+async def _cliente(host, puerto, solicitudes, profundidad, latencias, indice):
+    """
+    Cliente de carga: mantiene `profundidad` solicitudes en vuelo por conexión
+
+    Args:
+        solicitudes (int): Solicitudes a enviar
+        profundidad (int): Solicitudes enviadas sin esperar respuesta
+        latencias (list): Lista donde se agregan las latencias en segundos
+        indice (int): Número de cliente, para variar los equipos
+    """
+    lector, escritor = await asyncio.open_connection(host, puerto, limit=1 << 20)
+    envios = []
+    enviadas = recibidas = 0
+    while recibidas < solicitudes:
+        while enviadas < solicitudes and enviadas - recibidas < profundidad:
+            numero = indice * solicitudes + enviadas
+            equipo = f"Laptop-{(numero * 2) % 1000:07d}"
+            if numero % 4 == 0:
+                solicitud = {"op": "prestar", "equipo": equipo, "usuario": f"Usuario {indice}"}
+            elif numero % 4 == 1:
+                solicitud = {"op": "devolver", "equipo": equipo}
+            elif numero % 4 == 2:
+                solicitud = {"op": "estadisticas"}
+            else:
+                solicitud = {"op": "listar", "filtro": "disponibles", "limite": 10}
+            escritor.write(json.dumps(solicitud).encode("utf-8") + b"\n")
+            envios.append(time.perf_counter())
+            enviadas += 1
+        await escritor.drain()
+        await lector.readline()
+        latencias.append(time.perf_counter() - envios[recibidas])
+        recibidas += 1
+    escritor.close()
+    await escritor.wait_closed()
+
+
+def _percentil(valores_ordenados, percentil):
+    """Retorna el percentil indicado de una lista ya ordenada"""
+    posicion = min(len(valores_ordenados) - 1, int(len(valores_ordenados) * percentil / 100))
+    return valores_ordenados[posicion]
+
+
+def prueba_carga(host, puerto, conexiones, solicitudes, profundidad):
+    """
+    Ejecuta la prueba de carga para cada cantidad de conexiones
+
+    Args:
+        conexiones (list): Cantidades de conexiones concurrentes a probar
+        solicitudes (int): Solicitudes totales por prueba
+        profundidad (int): Solicitudes en vuelo por conexión
+
+    Returns:
+        list: Un diccionario de resultados por cantidad de conexiones
+    """
+    print(f"\n=== PRUEBA DE CARGA ({solicitudes:,} solicitudes, pipeline {profundidad}) ===")
+    print(f"{'conexiones':>10} {'sol/s':>12} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    resultados = []
+    for cantidad in conexiones:
+        latencias = []
+
+        async def principal():
+            await asyncio.gather(*(
+                _cliente(host, puerto, solicitudes // cantidad, profundidad, latencias, i)
+                for i in range(cantidad)))
+
+        inicio = time.perf_counter()
+        asyncio.run(principal())
+        tiempo = time.perf_counter() - inicio
+        latencias.sort()
+        resultado = {
+            "conexiones": cantidad,
+            "solicitudes_por_segundo": len(latencias) / tiempo,
+            "p50_ms": _percentil(latencias, 50) * 1000,
+            "p99_ms": _percentil(latencias, 99) * 1000,
+        }
+        resultados.append(resultado)
+        print(f"{cantidad:>10} {resultado['solicitudes_por_segundo']:>12,.0f} "
+              f"{resultado['p50_ms']:>10.2f} {resultado['p99_ms']:>10.2f}")
+    return resultados
+
+
+def main():
+    """Función principal: inicia el servidor o la prueba de carga"""
+    parser = argparse.ArgumentParser(description="Servicio de red del sistema de préstamos")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    parser_servidor = subparsers.add_parser("servidor")
+    parser_servidor.add_argument("--host", default="127.0.0.1")
+    parser_servidor.add_argument("--puerto", type=int, default=8765)
+    parser_servidor.add_argument("--equipos", type=int, default=0)
+    parser_servidor.add_argument("--metricas", action="store_true")
+
+    parser_carga = subparsers.add_parser("carga")
+    parser_carga.add_argument("--host", default="127.0.0.1")
+    parser_carga.add_argument("--puerto", type=int, default=8765)
+    parser_carga.add_argument("--conexiones", default="1,8,64,256")
+    parser_carga.add_argument("--solicitudes", type=int, default=100_000)
+    parser_carga.add_argument("--profundidad", type=int, default=8)
+    parser_carga.add_argument("--iniciar-servidor", action="store_true",
+                              help="inicia un servidor con 1000 equipos en otro proceso")
+
+    args = parser.parse_args()
+    if args.comando == "servidor":
+        ejecutar_servidor(args.host, args.puerto, args.equipos, args.metricas)
+        return
+
+    servidor = None
+    if args.iniciar_servidor:
+        servidor = multiprocessing.Process(target=ejecutar_servidor, args=(args.host, args.puerto, 1000), daemon=True)
+        servidor.start()
+        time.sleep(1.0)
+    try:
+        conexiones = [int(valor) for valor in args.conexiones.split(",")]
+        prueba_carga(args.host, args.puerto, conexiones, args.solicitudes, args.profundidad)
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+
+
+if __name__ == "__main__":
+    main()
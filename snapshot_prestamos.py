@@ -0,0 +1,527 @@
+"""
+Snapshot binario del sistema de préstamos, pensado para abrirse con mmap
+
+El archivo empieza con una cabecera (firma, versión, posición de la bitácora
+incluida en el snapshot, cantidades de equipos disponibles y de préstamos
+activos, y posición/longitud de cada sección) seguida de secciones
+alineadas a 8 bytes:
+
+    equipos_inicio / equipos_datos    Registros de equipos (ver TablaRegistros)
+    equipos_orden                     Índices de equipos ordenados por nombre
+    equipos_disponible                Un byte de disponibilidad por equipo
+    usuarios_inicio / usuarios_datos  Registros de usuarios
+    usuarios_orden                    Índices de usuarios ordenados por nombre
+    historial_equipo / _usuario / _fecha  Columnas del historial
+    nombres_inicio / nombres_datos    Nombres de usuario del historial por id
+    filas_inicio / filas              Filas del historial agrupadas por equipo
+    conteos_inicio / conteos_datos    (categoría, tipo) de cada contador de estadísticas
+    conteos_valores                   Tres valores por contador (ver escribir_snapshot)
+
+Al cargarlo no se decodifica nada: los registros se leen directamente del
+mapeo en memoria cuando se accede a ellos.
+"""
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping, Sequence
+
+
+MAGIA = b"SNPR"
+VERSION = 3
+
+# Nombre y tipo (formato de array/memoryview) de cada sección, en orden
+_SECCIONES = (
+    ("equipos_inicio", 'Q'), ("equipos_datos", 'B'), ("equipos_orden", 'I'), ("equipos_disponible", 'B'),
+    ("usuarios_inicio", 'Q'), ("usuarios_datos", 'B'), ("usuarios_orden", 'I'),
+    ("historial_equipo", 'I'), ("historial_usuario", 'I'), ("historial_fecha", 'q'),
+    ("nombres_inicio", 'Q'), ("nombres_datos", 'B'),
+    ("filas_inicio", 'I'), ("filas", 'I'),
+    ("conteos_inicio", 'Q'), ("conteos_datos", 'B'), ("conteos_valores", 'q'),
+)
+_CABECERA = struct.Struct("<4sIQQQ" + "QQ" * len(_SECCIONES))
+_LONGITUD_TEXTO = struct.Struct("<H")
+
+
+class SnapshotInvalidoError(Exception):
+    """Se lanza cuando el archivo no es un snapshot válido"""
+
+
+def _codificar_registro(campos):
+    """Codifica una tupla de textos, cada uno precedido por su longitud"""
+    partes = []
+    for campo in campos:
+        codificado = campo.encode("utf-8")
+        partes.append(_LONGITUD_TEXTO.pack(len(codificado)))
+        partes.append(codificado)
+    return b"".join(partes)
+
+
+def _tabla(registros):
+    """
+    Construye las secciones de una tabla de registros
+
+    Args:
+        registros (iterable): Tuplas de textos
+
+    Returns:
+        tuple: (array de inicios, bytes de datos)
+    """
+    inicio = array('Q', [0])
+    datos = bytearray()
+    for campos in registros:
+        datos += _codificar_registro(campos)
+        inicio.append(len(datos))
+    return inicio, datos
+
+
+def escribir_snapshot(ruta, equipos, usuarios, historial, posicion_bitacora=0, conteos=({}, {})):
+    """
+    Escribe un snapshot de forma atómica (archivo temporal + os.replace)
+
+    Args:
+        ruta (str): Ruta del archivo
+        equipos (list): Pares (campos, disponible) en el orden del inventario;
+            campos[0] debe ser el nombre y campos[2] el prestatario ("" si no hay)
+        usuarios (list): Campos de cada usuario; campos[0] debe ser el nombre
+        historial (tuple): (columna_equipo, columna_usuario, columna_fecha,
+            nombres_usuario, filas_por_equipo) con las filas en el orden de `equipos`
+        posicion_bitacora (int): Posición de la bitácora hasta la cual sus
+            registros ya están incluidos en el snapshot
+        conteos (tuple): (tipo de equipo -> [equipos, prestados, préstamos],
+            tipo de usuario -> [usuarios, préstamos activos, 0]), los
+            contadores de las estadísticas, para no recontarlos al cargar
+    """
+    columna_equipo, columna_usuario, columna_fecha, nombres_usuario, filas_por_equipo = historial
+    nombres_equipos = [campos[0] for campos, _ in equipos]
+    nombres_usuarios = [campos[0] for campos in usuarios]
+
+    filas_inicio = array('I', [0])
+    filas = array('I')
+    for filas_equipo in filas_por_equipo:
+        if filas_equipo is not None:
+            filas.extend(filas_equipo)
+        filas_inicio.append(len(filas))
+
+    equipos_inicio, equipos_datos = _tabla(campos for campos, _ in equipos)
+    usuarios_inicio, usuarios_datos = _tabla(usuarios)
+    nombres_inicio, nombres_datos = _tabla((nombre,) for nombre in nombres_usuario)
+    claves_conteo = [(categoria, tipo) for categoria, conteo in zip(("equipo", "usuario"), conteos)
+                     for tipo in conteo]
+    conteos_inicio, conteos_datos = _tabla(claves_conteo)
+    conteos_valores = array('q')
+    for conteo in conteos:
+        for valores in conteo.values():
+            conteos_valores.extend(valores)
+    contenido = {
+        "equipos_inicio": equipos_inicio,
+        "equipos_datos": equipos_datos,
+        "equipos_orden": array('I', sorted(range(len(equipos)), key=nombres_equipos.__getitem__)),
+        "equipos_disponible": bytes(disponible for _, disponible in equipos),
+        "usuarios_inicio": usuarios_inicio,
+        "usuarios_datos": usuarios_datos,
+        "usuarios_orden": array('I', sorted(range(len(usuarios)), key=nombres_usuarios.__getitem__)),
+        "historial_equipo": array('I', columna_equipo),
+        "historial_usuario": array('I', columna_usuario),
+        "historial_fecha": array('q', columna_fecha),
+        "nombres_inicio": nombres_inicio,
+        "nombres_datos": nombres_datos,
+        "filas_inicio": filas_inicio,
+        "filas": filas,
+        "conteos_inicio": conteos_inicio,
+        "conteos_datos": conteos_datos,
+        "conteos_valores": conteos_valores,
+    }
+
+    ruta_temporal = f"{ruta}.tmp"
+    with open(ruta_temporal, "wb") as archivo:
+        posicion = _CABECERA.size
+        ubicaciones = []
+        archivo.seek(posicion)
+        for nombre, _ in _SECCIONES:
+            relleno = -posicion % 8
+            archivo.write(b"\0" * relleno)
+            posicion += relleno
+            datos = memoryview(contenido[nombre]).cast('B')
+            archivo.write(datos)
+            ubicaciones += (posicion, len(datos))
+            posicion += len(datos)
+        archivo.seek(0)
+        cantidad_disponibles = sum(1 for _, disponible in equipos if disponible)
+        cantidad_prestamos = sum(1 for campos, disponible in equipos if not disponible and campos[2])
+        archivo.write(_CABECERA.pack(MAGIA, VERSION, posicion_bitacora, cantidad_disponibles,
+                                     cantidad_prestamos, *ubicaciones))
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(ruta_temporal, ruta)
+
+
+class TablaRegistros(Sequence):
+    """Tabla de registros de texto leída directamente del mapeo en memoria"""
+
+    def __init__(self, inicio, datos):
+        """
+        Constructor de la tabla
+
+        Args:
+            inicio (memoryview): Posiciones de inicio de cada registro (n + 1)
+            datos (memoryview): Bytes de todos los registros
+        """
+        self._inicio = inicio
+        self._datos = datos
+
+    def __len__(self):
+        return len(self._inicio) - 1
+
+    def _validar(self, indice):
+        """Normaliza un índice negativo y verifica que esté en rango"""
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("Índice de registro fuera de rango.")
+        return indice
+
+    def __getitem__(self, indice):
+        """Decodifica todos los campos del registro"""
+        indice = self._validar(indice)
+        datos = self._datos
+        posicion = self._inicio[indice]
+        final = self._inicio[indice + 1]
+        campos = []
+        while posicion < final:
+            (longitud,) = _LONGITUD_TEXTO.unpack_from(datos, posicion)
+            posicion += _LONGITUD_TEXTO.size
+            campos.append(str(datos[posicion:posicion + longitud], "utf-8"))
+            posicion += longitud
+        return tuple(campos)
+
+    def campo(self, indice, numero):
+        """Decodifica solo el campo indicado del registro"""
+        datos = self._datos
+        posicion = self._inicio[self._validar(indice)]
+        for _ in range(numero):
+            posicion += _LONGITUD_TEXTO.size + _LONGITUD_TEXTO.unpack_from(datos, posicion)[0]
+        (longitud,) = _LONGITUD_TEXTO.unpack_from(datos, posicion)
+        posicion += _LONGITUD_TEXTO.size
+        return str(datos[posicion:posicion + longitud], "utf-8")
+
+    def primer_campo(self, indice):
+        """Decodifica solo el primer campo del registro (el nombre)"""
+        return self.campo(indice, 0)
+
+
+class _NombresTabla(Sequence):
+    """Vista de un campo de cada registro de una tabla como secuencia de textos"""
+
+    def __init__(self, tabla, numero=0):
+        self._tabla = tabla
+        self._numero = numero
+
+    def __len__(self):
+        return len(self._tabla)
+
+    def __getitem__(self, indice):
+        return self._tabla.campo(indice, self._numero)
+
+
+class IndiceNombres(Sequence):
+    """
+    Índice por nombre de una tabla: los nombres en el orden de la sección
+    `*_orden`, de modo que se pueden buscar con bisect sin construir un dict
+    """
+
+    def __init__(self, tabla, orden):
+        """
+        Constructor del índice
+
+        Args:
+            tabla (TablaRegistros): Registros cuyo primer campo es el nombre
+            orden (memoryview): Índices de la tabla ordenados por nombre
+        """
+        self._tabla = tabla
+        self._orden = orden
+
+    def __len__(self):
+        return len(self._orden)
+
+    def __getitem__(self, posicion):
+        return self._tabla.primer_campo(self._orden[posicion])
+
+    def buscar(self, nombre):
+        """Retorna el índice del registro con ese nombre, o -1 si no existe"""
+        if not isinstance(nombre, str):
+            return -1
+        posicion = bisect_left(self, nombre)
+        if posicion < len(self._orden) and self[posicion] == nombre:
+            return self._orden[posicion]
+        return -1
+
+
+class ArchivoSnapshot:
+    """Snapshot abierto con mmap; las secciones se exponen como memoryviews"""
+
+    def __init__(self, ruta):
+        """
+        Abre y valida el snapshot
+
+        Args:
+            ruta (str): Ruta del archivo
+
+        Raises:
+            SnapshotInvalidoError: Si la firma o la versión no coinciden
+        """
+        with open(ruta, "rb") as archivo:
+            self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mapa) < _CABECERA.size:
+            raise SnapshotInvalidoError(f"'{ruta}' es demasiado corto para ser un snapshot.")
+        (magia, version, self.posicion_bitacora, self.cantidad_disponibles,
+         self.cantidad_prestamos, *ubicaciones) = _CABECERA.unpack_from(self._mapa, 0)
+        if magia != MAGIA or version != VERSION:
+            raise SnapshotInvalidoError(f"'{ruta}' no es un snapshot compatible.")
+        vista = memoryview(self._mapa)
+        self._secciones = {}
+        for i, (nombre, tipo) in enumerate(_SECCIONES):
+            posicion, longitud = ubicaciones[2 * i], ubicaciones[2 * i + 1]
+            self._secciones[nombre] = vista[posicion:posicion + longitud].cast(tipo)
+
+    def seccion(self, nombre):
+        """Retorna la sección como memoryview con su tipo"""
+        return self._secciones[nombre]
+
+    def tabla(self, prefijo):
+        """Retorna la tabla de registros con el prefijo dado (equipos, usuarios, nombres)"""
+        return TablaRegistros(self._secciones[f"{prefijo}_inicio"], self._secciones[f"{prefijo}_datos"])
+
+    def nombres_usuario(self):
+        """Retorna los nombres de usuario del historial como secuencia perezosa"""
+        return _NombresTabla(self.tabla("nombres"))
+
+    def campo_equipos(self, numero):
+        """Retorna un campo de la tabla de equipos (0 nombre, 1 tipo) como secuencia perezosa"""
+        return _NombresTabla(self.tabla("equipos"), numero)
+
+    def conteos(self):
+        """
+        Retorna los contadores de estadísticas guardados en el snapshot
+
+        Returns:
+            tuple: (conteo por tipo de equipo, conteo por tipo de usuario)
+        """
+        conteos = {"equipo": {}, "usuario": {}}
+        valores = self._secciones["conteos_valores"]
+        for indice, (categoria, tipo) in enumerate(self.tabla("conteos")):
+            conteos[categoria][tipo] = list(valores[3 * indice:3 * indice + 3])
+        return conteos["equipo"], conteos["usuario"]
+
+
+class MapaPerezoso(MutableMapping):
+    """
+    Diccionario nombre -> objeto respaldado por una tabla del snapshot.
+    Los objetos se crean la primera vez que se accede a ellos y se conservan;
+    los que se agregan después de cargar se guardan aparte.
+    """
+
+    def __init__(self, tabla, indice, fabrica):
+        """
+        Constructor del mapa
+
+        Args:
+            tabla (TablaRegistros): Registros del snapshot
+            indice (IndiceNombres): Índice por nombre de la tabla
+            fabrica (callable): fabrica(indice, campos) -> objeto
+        """
+        self._tabla = tabla
+        self._indice = indice.buscar
+        self._fabrica = fabrica
+        self._cargados = {}
+        self._nuevos = {}
+
+    def _cargar(self, indice, nombre):
+        """Crea el objeto del registro indicado y lo guarda en caché"""
+        objeto = self._cargados.get(nombre)
+        if objeto is None:
+            objeto = self._cargados[nombre] = self._fabrica(indice, self._tabla[indice])
+        return objeto
+
+    def __getitem__(self, nombre):
+        objeto = self._cargados.get(nombre)
+        if objeto is None:
+            objeto = self._nuevos.get(nombre)
+        if objeto is None:
+            indice = self._indice(nombre)
+            if indice < 0:
+                raise KeyError(nombre)
+            objeto = self._cargar(indice, nombre)
+        return objeto
+
+    def __contains__(self, nombre):
+        return nombre in self._cargados or nombre in self._nuevos or self._indice(nombre) >= 0
+
+    def __setitem__(self, nombre, objeto):
+        if nombre not in self._nuevos and self._indice(nombre) >= 0:
+            self._cargados[nombre] = objeto
+        else:
+            self._nuevos[nombre] = objeto
+
+    def __delitem__(self, nombre):
+        raise TypeError("No se pueden eliminar registros de un snapshot.")
+
+    def __iter__(self):
+        tabla = self._tabla
+        for indice in range(len(tabla)):
+            yield tabla.primer_campo(indice)
+        yield from list(self._nuevos)
+
+    def __len__(self):
+        return len(self._tabla) + len(self._nuevos)
+
+    def values(self):
+        """Genera los objetos en orden, creándolos a medida que se recorren"""
+        for _, objeto in self.items():
+            yield objeto
+
+    def items(self):
+        """Genera los pares (nombre, objeto) en orden"""
+        tabla = self._tabla
+        for indice in range(len(tabla)):
+            nombre = tabla.primer_campo(indice)
+            yield nombre, self._cargar(indice, nombre)
+        yield from list(self._nuevos.items())
+
+
+AUSENTE = object()
+_ELIMINADO = object()
+
+
+class MapaSuperpuesto(MutableMapping):
+    """
+    Diccionario formado por los valores de solo lectura del snapshot más una
+    capa con los cambios hechos después de cargarlo. Las consultas de una
+    clave no recorren el snapshot; solo iter() lo hace (y len() si no se
+    conoce la cantidad de claves del snapshot).
+    """
+
+    def __init__(self, buscar, recorrer, cantidad=None):
+        """
+        Constructor del mapa
+
+        Args:
+            buscar (callable): buscar(clave) -> valor del snapshot o AUSENTE
+            recorrer (callable): Función que genera los pares (clave, valor)
+                del snapshot en orden
+            cantidad (int): Cantidad de claves del snapshot, si se conoce
+        """
+        self._buscar = buscar
+        self._recorrer = recorrer
+        self._cambios = {}  # Diccionario: clave -> valor o _ELIMINADO
+        self._cantidad = cantidad
+
+    def _valor(self, clave):
+        """Retorna el valor vigente de la clave o AUSENTE"""
+        valor = self._cambios.get(clave, AUSENTE)
+        if valor is AUSENTE:
+            return self._buscar(clave)
+        return AUSENTE if valor is _ELIMINADO else valor
+
+    def __getitem__(self, clave):
+        valor = self._valor(clave)
+        if valor is AUSENTE:
+            raise KeyError(clave)
+        return valor
+
+    def __contains__(self, clave):
+        return self._valor(clave) is not AUSENTE
+
+    def __setitem__(self, clave, valor):
+        if self._cantidad is not None and clave not in self:
+            self._cantidad += 1
+        self._cambios[clave] = valor
+
+    def __delitem__(self, clave):
+        if clave not in self:
+            raise KeyError(clave)
+        if self._cantidad is not None:
+            self._cantidad -= 1
+        self._cambios[clave] = _ELIMINADO
+
+    def __iter__(self):
+        cambios = self._cambios
+        for clave, _ in self._recorrer():
+            if cambios.get(clave) is not _ELIMINADO:
+                yield clave
+        for clave, valor in list(cambios.items()):
+            if valor is not _ELIMINADO and self._buscar(clave) is AUSENTE:
+                yield clave
+
+    def __len__(self):
+        if self._cantidad is None:
+            self._cantidad = sum(1 for _ in self)
+        return self._cantidad
+
+    def __bool__(self):
+        if self._cantidad is not None:
+            return self._cantidad > 0
+        return next(iter(self), AUSENTE) is not AUSENTE
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class DiccionarioDiferido(MutableMapping):
+    """
+    Diccionario que se construye la primera vez que se usa. Al construirse
+    reemplaza el atributo del dueño por el diccionario real, así que solo
+    el primer acceso pasa por esta clase.
+    """
+
+    def __init__(self, dueno, atributo, construir):
+        """
+        Constructor del diccionario diferido
+
+        Args:
+            dueno (object): Objeto que guarda el diccionario como atributo
+            atributo (str): Nombre del atributo
+            construir (callable): Función sin argumentos que retorna el dict
+        """
+        self._dueno = dueno
+        self._atributo = atributo
+        self._construir = construir
+        self._real = None
+
+    def _diccionario(self):
+        """Construye el diccionario real si todavía no existe"""
+        if self._real is None:
+            self._real = self._construir()
+            setattr(self._dueno, self._atributo, self._real)
+        return self._real
+
+    def __getitem__(self, clave):
+        return self._diccionario()[clave]
+
+    def __setitem__(self, clave, valor):
+        self._diccionario()[clave] = valor
+
+    def __delitem__(self, clave):
+        del self._diccionario()[clave]
+
+    def __iter__(self):
+        return iter(self._diccionario())
+
+    def __len__(self):
+        return len(self._diccionario())
+
+    def __contains__(self, clave):
+        return clave in self._diccionario()
+
+    def get(self, clave, defecto=None):
+        return self._diccionario().get(clave, defecto)
+
+    def pop(self, clave, *defecto):
+        return self._diccionario().pop(clave, *defecto)
+
+    def setdefault(self, clave, defecto=None):
+        return self._diccionario().setdefault(clave, defecto)
+
+    def __repr__(self):
+        return repr(self._diccionario())
@@ -0,0 +1,29 @@
+"""Configuración común de las pruebas: los módulos del proyecto están en la raíz"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bitacora_prestamos import BitacoraPrestamos  # noqa: E402
+
+
+@pytest.fixture
+def ruta_bitacora(tmp_path):
+    """Ruta de una bitácora nueva dentro del directorio temporal de la prueba"""
+    return str(tmp_path / "prestamos.bitacora")
+
+
+@pytest.fixture
+def abrir_bitacora(ruta_bitacora):
+    """Abre la bitácora de la prueba con durabilidad inmediata y la cierra al final"""
+    abiertas = []
+
+    def abrir():
+        bitacora = BitacoraPrestamos(ruta_bitacora, esperar_durabilidad=True)
+        abiertas.append(bitacora)
+        return bitacora
+    yield abrir
+    for bitacora in abiertas:
+        bitacora.cerrar()
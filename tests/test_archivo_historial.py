@@ -0,0 +1,68 @@
+"""Pruebas de la retención del historial y del archivo comprimido"""
+from archivo_historial import ArchivoHistorial, ContadorDistintos
+from ProyectoIntegrador import SistemaPrestamos
+
+DIA = 86400
+
+
+def _sistema_con_historial(inicio, prestamos):
+    """Sistema con reloj controlado y `prestamos` préstamos de Laptop-001, uno por día"""
+    ahora = [inicio]
+    sistema = SistemaPrestamos(reloj=lambda: ahora[0])
+    for i in range(prestamos):
+        ahora[0] = inicio + i * DIA
+        sistema.registrar_prestamo("Laptop-001", f"Usuario {i % 3}")
+        sistema.devolver_equipo("Laptop-001")
+    return sistema, ahora
+
+
+def test_consultas_combinan_memoria_y_archivo_con_limites_inclusivos(tmp_path):
+    inicio = 1_700_000_000
+    sistema, _ = _sistema_con_historial(inicio, 10)
+    archivados = sistema.configurar_retencion(max_prestamos=4, archivo=str(tmp_path / "h.csv.gz"))
+    assert archivados == 6
+
+    # El límite cae justo en el último préstamo archivado y en el primero en memoria
+    desde, hasta = inicio + 5 * DIA, inicio + 6 * DIA
+    en_archivo = list(sistema.consultar_archivo(desde=desde, hasta=hasta))
+    en_memoria = list(sistema.consultar_prestamos(desde=desde, hasta=hasta))
+    assert [fecha for *_, fecha in en_archivo] == [desde]
+    assert [fecha for *_, fecha in en_memoria] == [hasta]
+    assert sistema.estadisticas()["total_prestamos"] == 10
+
+
+def test_numeracion_del_historial_sigue_a_los_archivados(tmp_path, capsys):
+    sistema, _ = _sistema_con_historial(1_700_000_000, 5)
+    sistema.configurar_retencion(max_prestamos=2, archivo=str(tmp_path / "h.csv.gz"))
+
+    filas = [texto for _, texto in sistema.filas_historial() if "Usuario" in texto]
+    sistema.ver_historial_equipo("Laptop-001")
+    salida = capsys.readouterr().out
+
+    assert [fila.split("\n")[-1].strip()[:2] for fila in filas] == ["4.", "5."]
+    assert "4. Usuario 0" in salida and "5. Usuario 1" in salida
+
+
+def test_resumen_se_conserva_al_reabrir_y_cerrar_periodos(tmp_path):
+    ruta = str(tmp_path / "h.csv.gz")
+    archivo = ArchivoHistorial(ruta, periodo="dia")
+    archivo.archivar([("A", "Ana", 0), ("A", "Luis", 10), ("A", "Ana", 20)])
+    archivo.archivar([("A", "Ana", 30), ("A", "Eva", DIA * 3), ("B", "Ana", 40)])
+
+    reabierto = ArchivoHistorial(ruta, periodo="dia")
+    assert reabierto.resumen("A") == archivo.resumen("A")
+    assert [(v["prestamos"], v["prestatarios"]) for v in reabierto.resumen("A").values()] == [(4, 2), (1, 1)]
+    assert [(v["prestamos"], v["prestatarios"]) for v in reabierto.resumen().values()] == [(5, 2), (1, 1)]
+    # Solo el período abierto de cada equipo guarda los nombres de sus prestatarios
+    assert {equipo: len(usuarios) for equipo, (_, usuarios) in reabierto._abiertos.items()} == {"A": 1, "B": 1}
+    assert reabierto.total == 6
+    assert reabierto.archivar([("A", "Eva", DIA * 3)]) == 0
+
+
+def test_contador_distintos_aproxima_y_combina():
+    pares, impares = ContadorDistintos(), ContadorDistintos()
+    for i in range(0, 20_000, 2):
+        pares.agregar(f"usuario-{i}")
+        impares.agregar(f"usuario-{i + 1}")
+    pares.combinar(impares)
+    assert abs(len(pares) - 20_000) < 20_000 * 0.1
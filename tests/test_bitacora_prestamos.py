@@ -0,0 +1,91 @@
+"""Pruebas de la bitácora de préstamos: reproducción, cola truncada y errores de disco"""
+import os
+
+import pytest
+
+from bitacora_prestamos import BitacoraFallidaError
+from ProyectoIntegrador import SistemaPrestamos, Tablet
+
+
+def test_reproducir_bitacora_reconstruye_el_estado(abrir_bitacora):
+    ahora = [1_700_000_000]
+    bitacora = abrir_bitacora()
+    sistema = SistemaPrestamos(reloj=lambda: ahora[0], bitacora=bitacora)
+    sistema.agregar_equipo(Tablet("Tab-1", "8", "5000mAh"))
+    sistema.registrar_prestamo("Tab-1", "Ana Garcia")
+    ahora[0] += 60
+    sistema.registrar_prestamo("Laptop-001", "Usuario Nuevo")
+    sistema.devolver_equipo("Tab-1")
+    bitacora.cerrar()
+
+    reabierto = SistemaPrestamos(bitacora=abrir_bitacora())
+
+    assert reabierto.estadisticas() == sistema.estadisticas()
+    assert reabierto.verificar_estadisticas() == {}
+    assert list(reabierto._equipos["Tab-1"].prestamos()) == [("Ana Garcia", 1_700_000_000)]
+    assert reabierto._equipos["Tab-1"].pulgadas == "8"
+    assert not reabierto._equipos["Laptop-001"].disponible
+    assert "Usuario Nuevo" in reabierto._usuarios
+
+
+def test_registro_incompleto_al_final_se_descarta(ruta_bitacora, abrir_bitacora):
+    bitacora = abrir_bitacora()
+    SistemaPrestamos(bitacora=bitacora).registrar_prestamo("Laptop-001", "Ana Garcia")
+    bitacora.cerrar()
+    tamano = os.path.getsize(ruta_bitacora)
+    with open(ruta_bitacora, "ab") as archivo:
+        archivo.write(b"\x20\x00\x00\x00basura")
+
+    reabierto = SistemaPrestamos(bitacora=abrir_bitacora())
+
+    assert os.path.getsize(ruta_bitacora) == tamano
+    assert reabierto.estadisticas()["total_prestamos"] == 1
+
+
+def test_error_de_disco_no_bloquea_a_quien_espera_la_bitacora(abrir_bitacora, monkeypatch):
+    bitacora = abrir_bitacora()
+    sistema = SistemaPrestamos(bitacora=bitacora)
+
+    def fsync_fallido(descriptor):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(os, "fsync", fsync_fallido)
+
+    with pytest.raises(BitacoraFallidaError):
+        sistema.registrar_prestamo("Laptop-001", "Ana Garcia")
+    with pytest.raises(BitacoraFallidaError):
+        bitacora.sincronizar()
+    # Las escrituras siguientes fallan de inmediato aunque el disco se recupere
+    monkeypatch.undo()
+    with pytest.raises(BitacoraFallidaError):
+        sistema.agregar_equipo(Tablet("Tab-9"))
+    with pytest.raises(BitacoraFallidaError):
+        bitacora.cerrar()
+
+
+def test_si_la_bitacora_falla_la_memoria_no_cambia(abrir_bitacora, monkeypatch):
+    bitacora = abrir_bitacora()
+    sistema = SistemaPrestamos(bitacora=bitacora)
+    sistema.registrar_prestamo("Laptop-002", "Juan Pérez")
+    estadisticas = sistema.estadisticas()
+
+    def fsync_fallido(descriptor):
+        raise OSError(5, "Input/output error")
+    monkeypatch.setattr(os, "fsync", fsync_fallido)
+
+    with pytest.raises(BitacoraFallidaError):
+        sistema.registrar_prestamo("Laptop-001", "Juan Pérez")
+    for operacion in (lambda: sistema.devolver_equipo("Laptop-002"),
+                      lambda: sistema.registrar_prestamos_lote([("iPad-001", "Juan Pérez")]),
+                      lambda: sistema.devolver_lote(["Laptop-002"])):
+        with pytest.raises(BitacoraFallidaError):
+            operacion()
+
+    assert sistema._equipos["Laptop-001"].disponible
+    assert sistema._equipos["iPad-001"].disponible
+    assert sistema._prestamos_activos == {"Laptop-002": "Juan Pérez"}
+    assert list(sistema._usuarios["Juan Pérez"].equipos_prestados) == ["Laptop-002"]
+    assert sistema.estadisticas() == estadisticas
+    assert sistema.verificar_estadisticas() == {}
+    monkeypatch.undo()
+    with pytest.raises(BitacoraFallidaError):
+        bitacora.cerrar()
@@ -0,0 +1,46 @@
+"""Pruebas del índice de búsqueda de nombres"""
+import pytest
+
+from busqueda_nombres import IndiceBusqueda
+from ProyectoIntegrador import SistemaPrestamos, Tablet
+
+NOMBRES = ["Laptop-001", "Laptop-002", "Tablet-10", "iPad-001", "Surface-7"]
+
+
+def test_completar_por_prefijo_sin_distinguir_mayusculas():
+    indice = IndiceBusqueda(NOMBRES)
+    indice.agregar("laptop-003")
+
+    assert indice.completar("LAP") == ["Laptop-001", "Laptop-002", "laptop-003"]
+    assert indice.completar("ipad") == ["iPad-001"]
+    assert indice.completar("Laptop-00", limite=2) == ["Laptop-001", "Laptop-002"]
+    assert indice.completar("Proyector") == []
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("Tablet-1", "Tablet-10"),     # Falta una letra
+    ("Surfacee-7", "Surface-7"),   # Sobra una letra
+    ("iPad-002", "iPad-001"),      # Letra cambiada
+    ("Sufrace-7", "Surface-7"),    # Letras contiguas intercambiadas
+    ("tablet-1", "Tablet-10"),     # Mayúsculas distintas y falta una letra
+    ("IPAD-00l", "iPad-001"),      # Mayúsculas distintas y letra cambiada
+    ("surfcae-7", "Surface-7"),    # Mayúsculas distintas e intercambio
+])
+def test_aproximados_a_distancia_uno(texto, esperado):
+    assert esperado in IndiceBusqueda(NOMBRES).aproximados(texto)
+
+
+def test_aproximados_conservan_las_grafias_originales():
+    indice = IndiceBusqueda(["Tab-1", "TAB-1"])
+    indice.agregar("tab-12")
+
+    assert sorted(indice.aproximados("tab-9")) == ["TAB-1", "Tab-1"]
+    assert "tab-12" not in indice.aproximados("TAB-12")  # Solo difiere en mayúsculas: no es un error
+    assert indice.aproximados("Tab-123") == ["tab-12"]
+
+
+def test_sugerir_equipos_del_sistema():
+    sistema = SistemaPrestamos()
+    assert sistema.sugerir_equipos("laptop-00") == ["Laptop-001", "Laptop-002"]
+    sistema.agregar_equipo(Tablet("Tab-Azul"))
+    assert sistema.sugerir_equipos("tab-azl") == ["Tab-Azul"]
@@ -0,0 +1,72 @@
+"""Pruebas de las consultas de préstamos por rango de fechas"""
+from datetime import datetime, timezone
+
+import pytest
+
+from ProyectoIntegrador import SistemaPrestamos, Tablet
+
+INICIO = 1_700_000_000
+HORA = 3600
+
+
+@pytest.fixture
+def sistema():
+    """Sistema con un préstamo por hora: Tab-i a Usuario i%2 en INICIO + i horas"""
+    ahora = [INICIO]
+    sistema = SistemaPrestamos(reloj=lambda: ahora[0], datos_prueba=False)
+    sistema.agregar_equipos_lote(Tablet(f"Tab-{i}") for i in range(4))
+    for i in range(8):
+        ahora[0] = INICIO + i * HORA
+        sistema.registrar_prestamo(f"Tab-{i % 4}", f"Usuario {i % 2}")
+        sistema.devolver_equipo(f"Tab-{i % 4}")
+    return sistema
+
+
+def _fechas(prestamos):
+    return [(fecha - INICIO) // HORA for _, _, fecha in prestamos]
+
+
+def test_limites_inclusivos(sistema):
+    assert _fechas(sistema.consultar_prestamos(INICIO + 2 * HORA, INICIO + 5 * HORA)) == [2, 3, 4, 5]
+    assert _fechas(sistema.consultar_prestamos(INICIO + 2 * HORA - 1, INICIO + 5 * HORA + 1)) == [2, 3, 4, 5]
+    assert _fechas(sistema.consultar_prestamos(INICIO + 2 * HORA + 1, INICIO + 5 * HORA - 1)) == [3, 4]
+    assert _fechas(sistema.consultar_prestamos(INICIO + 3 * HORA, INICIO + 3 * HORA)) == [3]
+
+
+def test_rangos_abiertos_y_vacios(sistema):
+    assert _fechas(sistema.consultar_prestamos(hasta=INICIO + HORA)) == [0, 1]
+    assert _fechas(sistema.consultar_prestamos(desde=INICIO + 6 * HORA)) == [6, 7]
+    assert _fechas(sistema.consultar_prestamos()) == list(range(8))
+    assert list(sistema.consultar_prestamos(INICIO + 8 * HORA)) == []
+    assert list(sistema.consultar_prestamos(hasta=INICIO - 1)) == []
+    assert list(sistema.consultar_prestamos(INICIO + 5 * HORA, INICIO + 2 * HORA)) == []
+
+
+def test_filtros_por_indice(sistema):
+    desde, hasta = INICIO + HORA, INICIO + 6 * HORA
+    assert _fechas(sistema.consultar_prestamos(desde, hasta, usuario="Usuario 1")) == [1, 3, 5]
+    assert _fechas(sistema.consultar_prestamos(desde, hasta, equipo="Tab-1")) == [1, 5]
+    assert _fechas(sistema.consultar_prestamos(desde, hasta, tipo_equipo="Tablet")) == [1, 2, 3, 4, 5, 6]
+    assert _fechas(sistema.consultar_prestamos(desde, hasta, usuario="Usuario 0", equipo="Tab-2")) == [2, 6]
+    assert list(sistema.consultar_prestamos(tipo_equipo="Computadora")) == []
+    assert list(sistema.consultar_prestamos(usuario="Nadie")) == []
+    assert list(sistema.consultar_prestamos(equipo="No-existe")) == []
+    assert sistema.contar_prestamos(desde, hasta) == 6
+    assert sistema.contar_prestamos(desde, hasta, usuario="Usuario 1", equipo="Tab-3") == 1
+
+
+def test_acepta_datetime(sistema):
+    desde = datetime.fromtimestamp(INICIO + HORA, timezone.utc)
+    hasta = datetime.fromtimestamp(INICIO + 2 * HORA, timezone.utc)
+    assert list(sistema.consultar_prestamos(desde, hasta)) == [
+        ("Tab-1", "Usuario 1", INICIO + HORA), ("Tab-2", "Usuario 0", INICIO + 2 * HORA)]
+
+
+def test_fechas_fuera_de_orden_se_insertan_en_su_lugar(sistema):
+    sistema._historial.reloj = lambda: INICIO + 2 * HORA + 1
+    sistema.registrar_prestamo("Tab-3", "Usuario 9")
+
+    assert _fechas(sistema.consultar_prestamos(INICIO + 2 * HORA, INICIO + 3 * HORA)) == [2, 2, 3]
+    assert [usuario for _, usuario, _ in sistema.consultar_prestamos(INICIO + 2 * HORA + 1, INICIO + 3 * HORA - 1)] == [
+        "Usuario 9"]
+    assert sistema.contar_prestamos(INICIO + 2 * HORA, INICIO + 3 * HORA, equipo="Tab-3") == 2
@@ -0,0 +1,33 @@
+"""Pruebas del enrutador de fragmentos"""
+import pytest
+
+from fragmentos_prestamos import EnrutadorPrestamos, FragmentoCaidoError
+from ProyectoIntegrador import (
+    RESULTADO_EQUIPO_INEXISTENTE, RESULTADO_EQUIPO_PRESTADO, RESULTADO_OK, Tablet)
+
+
+def test_lote_repartido_conserva_los_codigos_en_orden():
+    with EnrutadorPrestamos(fragmentos=3) as enrutador:
+        enrutador.agregar_equipos_lote(Tablet(f"Tab-{i}") for i in range(30))
+        codigos = enrutador.registrar_prestamos_lote([("Tab-1", "Ana"), ("No-existe", "Ana"), ("Tab-1", "Luis")])
+        assert list(codigos) == [RESULTADO_OK, RESULTADO_EQUIPO_INEXISTENTE, RESULTADO_EQUIPO_PRESTADO]
+        assert enrutador.estadisticas()["equipos_prestados"] == 1
+
+
+def test_fragmento_caido_se_informa_y_cerrar_lo_tolera():
+    enrutador = EnrutadorPrestamos(fragmentos=2, datos_prueba=False)
+    nombre = "Tab-0"
+    caido = enrutador.fragmento(nombre)
+    enrutador._procesos[caido].kill()
+    enrutador._procesos[caido].join()
+
+    with pytest.raises(FragmentoCaidoError):
+        enrutador.agregar_equipo(Tablet(nombre))
+    with pytest.raises(FragmentoCaidoError):
+        enrutador.estadisticas()
+    # El otro fragmento sigue respondiendo
+    otro = next(f"Tab-{i}" for i in range(1, 100) if enrutador.fragmento(f"Tab-{i}") != caido)
+    assert enrutador.agregar_equipo(Tablet(otro))
+
+    enrutador.cerrar()
+    enrutador.cerrar()
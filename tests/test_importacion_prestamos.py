@@ -0,0 +1,36 @@
+"""Pruebas de la importación masiva"""
+import gc
+
+import pytest
+
+from ProyectoIntegrador import SistemaPrestamos
+
+
+@pytest.mark.parametrize("extension, filas", [
+    ("csv", [b"clase,nombre,email",
+             b"Usuario,Ana,ana@example.com",
+             b"Usuario,Lu\xffis,luis@example.com",
+             b"Tablet,Tab-9,"]),
+    ("jsonl", [b'{"clase": "Usuario", "nombre": "Ana", "email": "ana@example.com"}',
+               b'{"clase": "Usuario", "nombre": "Lu\xffis", "email": "luis@example.com"}',
+               b'{"clase": "Tablet", "nombre": "Tab-9"}']),
+])
+def test_byte_invalido_se_reporta_y_no_detiene_la_importacion(tmp_path, extension, filas):
+    ruta = tmp_path / f"datos.{extension}"
+    ruta.write_bytes(b"\n".join(filas) + b"\n")
+    sistema = SistemaPrestamos(datos_prueba=False)
+
+    resultado = sistema.importar(str(ruta))
+
+    assert (resultado.usuarios, resultado.equipos, resultado.total_errores) == (1, 1, 1)
+    linea, mensaje = resultado.errores[0]
+    assert linea == len(filas) - 1
+    assert "UTF-8" in mensaje
+
+
+def test_importar_no_desactiva_el_recolector_por_defecto(tmp_path, monkeypatch):
+    ruta = tmp_path / "datos.csv"
+    ruta.write_text("clase,nombre\nTablet,Tab-1\n", encoding="utf-8")
+    monkeypatch.setattr(gc, "disable", lambda: pytest.fail("gc.disable() sin pausar_recolector"))
+
+    assert SistemaPrestamos(datos_prueba=False).importar(str(ruta)).equipos == 1
@@ -0,0 +1,72 @@
+"""Pruebas de las instantáneas de solo lectura"""
+import pytest
+
+from instantanea_prestamos import _PrefijoFilas
+from ProyectoIntegrador import SistemaPrestamos, Tablet
+
+
+def _reportes(vista):
+    """Reportes de una instantánea que no deben cambiar después de tomarla"""
+    return (vista.estadisticas(), vista.prestamos_activos(),
+            vista.pagina_equipos(limite=1000)[0], vista.pagina_historial(limite=1000)[0],
+            [vista._equipos[nombre].cantidad_prestamos() for nombre in vista._equipos])
+
+
+@pytest.mark.parametrize("concurrente", [False, True])
+def test_prestar_y_devolver_despues_no_cambia_la_instantanea(concurrente):
+    ahora = [1_700_000_000]
+    sistema = SistemaPrestamos(reloj=lambda: ahora[0], concurrente=concurrente)
+    sistema.agregar_equipos_lote(Tablet(f"Tab-{i}") for i in range(5))
+    for nombre in ("Tab-0", "Tab-1", "Laptop-001"):
+        ahora[0] += 60
+        sistema.registrar_prestamo(nombre, "Ana Garcia")
+    sistema.devolver_equipo("Tab-1")
+
+    instantanea = sistema.instantanea()
+    antes = _reportes(instantanea)
+    ahora[0] += 60
+    sistema.devolver_equipo("Tab-0")
+    sistema.registrar_prestamo("Tab-1", "Juan Pérez")
+    sistema.registrar_prestamo("Tab-0", "Usuario Nuevo")
+    sistema.devolver_lote(["Laptop-001"])
+    sistema.agregar_equipo(Tablet("Tab-9"))
+
+    assert _reportes(instantanea) == antes
+    assert instantanea.estadisticas()["total_prestamos"] == 3
+    assert sistema.estadisticas()["total_prestamos"] == 5
+    assert "Tab-9" not in instantanea._equipos
+
+
+def test_filas_de_la_instantanea_no_se_copian_en_cada_acceso():
+    sistema = SistemaPrestamos()
+    sistema.registrar_prestamo("Laptop-001", "Ana Garcia")
+    instantanea = sistema.instantanea()
+    sistema.devolver_equipo("Laptop-001")
+    sistema.registrar_prestamo("Laptop-001", "Juan Pérez")
+
+    id_equipo = sistema._equipos["Laptop-001"]._id_historial
+    filas = instantanea._historial._filas(id_equipo)
+    assert isinstance(filas, _PrefijoFilas)
+    assert instantanea._historial._filas(id_equipo) is filas
+    assert len(filas) == 1 and list(filas) == [0] and filas[-1] == 0
+    assert len(sistema._historial._filas(id_equipo)) == 2
+
+
+def test_fecha_fuera_de_orden_despues_de_la_instantanea():
+    ahora = [1_700_000_000]
+    sistema = SistemaPrestamos(reloj=lambda: ahora[0])
+    sistema.registrar_prestamo("Laptop-001", "Ana Garcia")
+    sistema.devolver_equipo("Laptop-001")
+    ahora[0] += 3600
+    sistema.registrar_prestamo("Laptop-001", "Juan Pérez")
+    instantanea = sistema.instantanea()
+    antes = _reportes(instantanea)
+
+    # Un préstamo con fecha anterior se inserta entre las filas existentes
+    sistema.devolver_equipo("Laptop-001")
+    ahora[0] -= 1800
+    sistema.registrar_prestamo("Laptop-001", "Usuario Nuevo")
+
+    assert _reportes(instantanea) == antes
+    equipo = instantanea._equipos["Laptop-001"]
+    assert [usuario for usuario, _ in equipo.historial_prestamos] == ["Ana Garcia", "Juan Pérez"]
@@ -0,0 +1,37 @@
+"""Pruebas del inventario compacto"""
+from ProyectoIntegrador import SistemaPrestamos, Tablet
+
+
+def test_particiones_y_tipos_coinciden_con_el_inventario_normal():
+    sistemas = [SistemaPrestamos(), SistemaPrestamos(inventario_compacto=True, cache_equipos=2)]
+    for sistema in sistemas:
+        for i in range(20):
+            sistema.agregar_equipo(Tablet(f"Tab-{i}"))
+        for nombre in ("Laptop-002", "Tab-3", "Tab-7", "iPad-001"):
+            sistema.registrar_prestamo(nombre, "Ana Garcia")
+        sistema.devolver_equipo("Tab-3")
+
+    def nombres(equipos):
+        return [equipo.nombre for equipo in equipos]
+
+    normal, compacto = sistemas
+    assert nombres(compacto.equipos_disponibles()) == nombres(normal.equipos_disponibles())
+    assert nombres(compacto.equipos_prestados()) == nombres(normal.equipos_prestados()) == [
+        "Laptop-002", "Tab-7", "iPad-001"]
+    assert compacto.contar_equipos_disponibles() == normal.contar_equipos_disponibles() == 21
+    for tipo in ("Computadora", "Tablet"):
+        por_tipo = nombres(normal.equipos_por_tipo(tipo))
+        assert por_tipo
+        assert nombres(compacto.equipos_por_tipo(tipo)) == por_tipo
+    assert compacto.verificar_estadisticas() == {}
+
+
+def test_recorrer_una_particion_no_recorre_el_inventario():
+    sistema = SistemaPrestamos(inventario_compacto=True)
+    for i in range(1000):
+        sistema.agregar_equipo(Tablet(f"Tab-{i}"))
+    sistema.registrar_prestamo("Tab-500", "Ana Garcia")
+    inventario = sistema._equipos
+    inventario._filas = None  # Falla si la partición recorre todas las filas
+
+    assert list(sistema._equipos_prestados) == ["Tab-500"]
@@ -0,0 +1,71 @@
+"""Pruebas de las métricas de llamadas, errores y latencias"""
+from metricas_prestamos import LIMITES_LATENCIA, MetricasPrestamos
+from ProyectoIntegrador import RESULTADO_EQUIPO_PRESTADO, SistemaPrestamos
+
+
+def test_cubetas_del_histograma():
+    metricas = MetricasPrestamos()
+    for segundos in (0.0, LIMITES_LATENCIA[0], LIMITES_LATENCIA[0] * 1.5, 0.003, 10.0, 11.0):
+        metricas.registrar("prestar", segundos)
+
+    cubetas = dict(metricas.instantanea()["prestar"]["cubetas"])
+
+    assert len(cubetas) == len(LIMITES_LATENCIA) + 1
+    assert cubetas[LIMITES_LATENCIA[0]] == 2  # El límite es inclusivo (le)
+    assert cubetas[0.0000025] == 3
+    assert cubetas[0.0025] == 3 and cubetas[0.005] == 4
+    assert cubetas[10.0] == 5 and cubetas[float("inf")] == 6
+    assert metricas.percentil("prestar", 50) == 0.0000025
+    assert metricas.percentil("prestar", 100) == float("inf")
+    assert metricas.percentil("otra", 50) is None
+
+
+def test_motivos_de_error_por_operacion():
+    sistema = SistemaPrestamos(metricas=True)
+    sistema.registrar_prestamo("Laptop-001", "Ana Garcia")
+    sistema.registrar_prestamo("Laptop-001", "Juan Pérez")
+    sistema.registrar_prestamo("No-existe", "Juan Pérez")
+    sistema.devolver_equipo("Laptop-002")
+    sistema.registrar_prestamos_lote([("iPad-001", "Ana Garcia"), ("iPad-001", "Ana Garcia"), ("X", "Ana Garcia")])
+
+    datos = sistema.metricas.instantanea()
+
+    assert datos["registrar_prestamo"]["llamadas"] == 3
+    assert datos["registrar_prestamo"]["errores"] == {"equipo_inexistente": 1, "equipo_prestado": 1}
+    assert datos["devolver_equipo"]["errores"] == {"equipo_disponible": 1}
+    assert datos["registrar_prestamos_lote"]["llamadas"] == 1
+    assert datos["registrar_prestamos_lote"]["elementos"] == 3
+    assert datos["registrar_prestamos_lote"]["errores"] == {"equipo_inexistente": 1, "equipo_prestado": 1}
+    sistema.metricas.reiniciar()
+    assert sistema.metricas.instantanea() == {}
+
+
+def test_exposicion_en_formato_prometheus():
+    metricas = MetricasPrestamos()
+    metricas.registrar("prestar", 0.002)
+    metricas.registrar("prestar", 0.02, RESULTADO_EQUIPO_PRESTADO)
+    metricas.registrar_lote("prestar_lote", 0.5, [0, 0, 1])
+
+    lineas = metricas.exposicion("app").splitlines()
+
+    for nombre, tipo in (("llamadas_total", "counter"), ("elementos_total", "counter"),
+                         ("errores_total", "counter"), ("latencia_segundos", "histogram")):
+        assert f"# TYPE app_{nombre} {tipo}" in lineas
+        assert lineas.index(f"# TYPE app_{nombre} {tipo}") == lineas.index(next(
+            linea for linea in lineas if linea.startswith(f"# HELP app_{nombre} "))) + 1
+    assert 'app_llamadas_total{operacion="prestar"} 2' in lineas
+    assert 'app_elementos_total{operacion="prestar_lote"} 3' in lineas
+    assert 'app_errores_total{operacion="prestar",motivo="equipo_prestado"} 1' in lineas
+    assert 'app_errores_total{operacion="prestar_lote",motivo="equipo_inexistente"} 1' in lineas
+    assert 'app_latencia_segundos_bucket{operacion="prestar",le="0.001"} 0' in lineas
+    assert 'app_latencia_segundos_bucket{operacion="prestar",le="0.0025"} 1' in lineas
+    assert 'app_latencia_segundos_bucket{operacion="prestar",le="0.025"} 2' in lineas
+    assert 'app_latencia_segundos_bucket{operacion="prestar",le="+Inf"} 2' in lineas
+    assert 'app_latencia_segundos_count{operacion="prestar"} 2' in lineas
+    assert 'app_latencia_segundos_sum{operacion="prestar"} 0.022' in lineas
+    # Cada muestra es "nombre{etiquetas} valor"
+    for linea in lineas:
+        if not linea.startswith("#"):
+            nombre, valor = linea.rsplit(" ", 1)
+            assert nombre.startswith("app_") and nombre.endswith("}")
+            float(valor)
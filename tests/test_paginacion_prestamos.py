@@ -0,0 +1,71 @@
+"""Pruebas de la paginación por cursor de los reportes"""
+import pytest
+
+from ProyectoIntegrador import SistemaPrestamos, Tablet, paginar
+
+
+@pytest.fixture
+def sistema():
+    ahora = [1_700_000_000]
+    sistema = SistemaPrestamos(reloj=lambda: ahora[0])
+    sistema.agregar_equipos_lote(Tablet(f"Tab-{i}") for i in range(7))
+    for i in range(12):
+        ahora[0] += 60
+        nombre = f"Tab-{i % 3}"
+        sistema.registrar_prestamo(nombre, f"Usuario {i % 4}")
+        sistema.devolver_equipo(nombre)
+    sistema.registrar_prestamo("Tab-5", "Usuario 0")
+    return sistema
+
+
+def _todas_las_paginas(pagina, limite, inicial, **filtros):
+    """Recorre las páginas siguiendo el cursor y retorna (textos, cantidad de páginas)"""
+    textos, paginas, cursor = [], 0, inicial
+    while True:
+        filas, cursor = pagina(limite=limite, cursor=cursor, **filtros)
+        textos += filas
+        paginas += 1
+        assert len(filas) <= limite
+        if cursor is None:
+            return textos, paginas
+
+
+def _ultima_linea(texto):
+    return texto.rsplit("\n", 1)[-1]
+
+
+@pytest.mark.parametrize("limite", [1, 2, 3, 5, 11, 100])
+def test_paginas_de_equipos_cubren_el_inventario(sistema, limite):
+    completo = [texto for _, texto in sistema.filas_equipos()]
+    textos, paginas = _todas_las_paginas(sistema.pagina_equipos, limite, 0)
+
+    assert textos == completo
+    assert paginas == max(-(-len(completo) // limite), 1)
+
+
+@pytest.mark.parametrize("limite", [1, 2, 4, 5, 7, 100])
+def test_paginas_del_historial_cubren_todas_las_filas(sistema, limite):
+    completo = [texto for _, texto in sistema.filas_historial()]
+    textos, _ = _todas_las_paginas(sistema.pagina_historial, limite, (0, 0))
+
+    # Una página que empieza a mitad de un equipo repite su encabezado
+    assert [_ultima_linea(texto) for texto in textos] == [_ultima_linea(texto) for texto in completo]
+    assert sum(_ultima_linea(texto).lstrip()[:1].isdigit() for texto in textos) == 13
+    for texto, original in zip(textos, completo):
+        assert texto == original or texto.endswith(original) and texto.startswith("\n📱 Tab-")
+
+
+def test_paginas_con_filtros(sistema):
+    prestados, cursor = sistema.pagina_equipos(limite=10, disponibles=False)
+    assert cursor is None and len(prestados) == 1 and "Tab-5" in prestados[0]
+
+    textos, _ = _todas_las_paginas(sistema.pagina_historial, 2, (0, 0), usuario="Usuario 1")
+    assert [_ultima_linea(texto).split(" - ")[0] for texto in textos] == [
+        "   4. Usuario 1", "   1. Usuario 1", "   2. Usuario 1"]
+    assert not any("Usuario 0" in texto for texto in textos)
+
+
+def test_cursor_nulo_en_la_ultima_pagina_exacta():
+    assert paginar(iter([(1, "a"), (2, "b")]), 2) == (["a", "b"], None)
+    assert paginar(iter([(1, "a"), (2, "b"), (3, "c")]), 2) == (["a", "b"], 2)
+    assert paginar(iter([]), 5) == ([], None)
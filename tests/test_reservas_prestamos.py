@@ -0,0 +1,98 @@
+"""Pruebas de las colas de reservas"""
+from ProyectoIntegrador import SistemaPrestamos, Tablet, Usuario
+
+
+def _sistema_con_prestamo(nombre_equipo="iPad-001"):
+    """Sistema de prueba con el equipo indicado prestado"""
+    sistema = SistemaPrestamos()
+    sistema.registrar_prestamo(nombre_equipo, "Ana Garcia")
+    return sistema
+
+
+def test_profesor_se_atiende_antes_que_estudiante():
+    sistema = _sistema_con_prestamo()
+    assert sistema.reservar_equipo("iPad-001", "Juan Pérez")[0]
+    assert sistema.reservar_equipo("iPad-001", "María García")[0]
+
+    assert sistema.reservas_pendientes("iPad-001") == ["María García", "Juan Pérez"]
+    sistema.devolver_equipo("iPad-001")
+
+    assert dict(sistema._prestamos_activos)["iPad-001"] == "María García"
+    assert sistema.reservas_pendientes("iPad-001") == ["Juan Pérez"]
+
+
+def test_a_igual_prioridad_se_respeta_el_orden_de_llegada():
+    sistema = _sistema_con_prestamo()
+    for nombre in ("Estudiante 1", "Estudiante 2", "Estudiante 3"):
+        sistema.reservar_equipo("iPad-001", nombre)
+
+    entregados = []
+    for _ in range(3):
+        sistema.devolver_equipo("iPad-001")
+        entregados.append(dict(sistema._prestamos_activos)["iPad-001"])
+
+    assert entregados == ["Estudiante 1", "Estudiante 2", "Estudiante 3"]
+    assert sistema.verificar_estadisticas() == {}
+
+
+def test_cola_del_equipo_y_cola_del_tipo_comparten_el_orden():
+    sistema = SistemaPrestamos()
+    sistema.registrar_prestamos_lote([("iPad-001", "Ana Garcia"), ("Samsung-Tab-001", "Ana Garcia")])
+    sistema.reservar_tipo("Tablet", "Primero")
+    sistema.reservar_equipo("iPad-001", "Segundo")
+    sistema.agregar_usuario(Usuario("Profe", "profe@email.com", "Profesor"))
+
+    # La reserva del equipo no atiende otros equipos del tipo
+    sistema.devolver_equipo("Samsung-Tab-001")
+    assert dict(sistema._prestamos_activos)["Samsung-Tab-001"] == "Primero"
+    assert sistema.reservas_pendientes(tipo_equipo="Tablet") == []
+
+    sistema.reservar_tipo("Tablet", "Profe")
+    sistema.devolver_equipo("iPad-001")
+    assert dict(sistema._prestamos_activos)["iPad-001"] == "Profe"
+    sistema.devolver_equipo("iPad-001")
+    assert dict(sistema._prestamos_activos)["iPad-001"] == "Segundo"
+
+    # A igual prioridad, la reserva más antigua gana entre ambas colas
+    sistema.reservar_equipo("iPad-001", "Antiguo")
+    sistema.reservar_tipo("Tablet", "Reciente")
+    sistema.devolver_equipo("iPad-001")
+    assert dict(sistema._prestamos_activos)["iPad-001"] == "Antiguo"
+    assert sistema.reservas_pendientes(tipo_equipo="Tablet") == ["Reciente"]
+
+    # Un equipo nuevo del tipo atiende la cola del tipo
+    sistema.agregar_equipo(Tablet("Tab-Nueva"))
+    assert dict(sistema._prestamos_activos)["Tab-Nueva"] == "Reciente"
+
+
+def test_cancelar_reserva():
+    sistema = _sistema_con_prestamo()
+    sistema.reservar_equipo("iPad-001", "Estudiante 1")
+    sistema.reservar_equipo("iPad-001", "Estudiante 2")
+
+    assert sistema.cancelar_reserva("Estudiante 1", nombre_equipo="iPad-001")
+    assert not sistema.cancelar_reserva("Estudiante 1", nombre_equipo="iPad-001")
+    assert not sistema.cancelar_reserva("Estudiante 2", tipo_equipo="Tablet")
+    assert sistema.reservas_pendientes("iPad-001") == ["Estudiante 2"]
+
+    sistema.devolver_equipo("iPad-001")
+    assert dict(sistema._prestamos_activos)["iPad-001"] == "Estudiante 2"
+    assert "iPad-001" not in sistema._usuarios["Estudiante 1"].equipos_prestados
+
+
+def test_devolver_lote_entrega_a_las_reservas():
+    sistema = SistemaPrestamos()
+    sistema.registrar_prestamos_lote([("iPad-001", "Ana Garcia"), ("Laptop-001", "Ana Garcia"),
+                                      ("Laptop-002", "Juan Pérez")])
+    entregas = []
+    sistema.activar_reservas(al_entregar=lambda equipo, usuario: entregas.append((equipo, usuario)))
+    sistema.reservar_equipo("iPad-001", "Estudiante 1")
+    sistema.reservar_tipo("Computadora", "Estudiante 2")
+
+    codigos = sistema.devolver_lote(["iPad-001", "Laptop-001"])
+
+    assert list(codigos) == [0, 0]
+    assert entregas == [("iPad-001", "Estudiante 1"), ("Laptop-001", "Estudiante 2")]
+    assert dict(sistema._prestamos_activos) == {
+        "iPad-001": "Estudiante 1", "Laptop-001": "Estudiante 2", "Laptop-002": "Juan Pérez"}
+    assert sistema.verificar_estadisticas() == {}
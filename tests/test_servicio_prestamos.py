@@ -0,0 +1,87 @@
+"""Pruebas del servicio de red"""
+import asyncio
+import json
+
+from ProyectoIntegrador import SistemaPrestamos, Tablet
+from servicio_prestamos import ServicioPrestamos
+
+
+def _conversar(sistema, lineas, limite_linea=None):
+    """Inicia el servicio, envía las líneas en pipeline y retorna las respuestas"""
+    async def principal():
+        servicio = ServicioPrestamos(sistema)
+        if limite_linea is not None:
+            servicio.LIMITE_LINEA = limite_linea
+        servidor = await servicio.iniciar("127.0.0.1", 0)
+        puerto = servidor.sockets[0].getsockname()[1]
+        async with servidor:
+            lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+            escritor.write(b"".join(lineas))
+            await escritor.drain()
+            escritor.write_eof()
+            respuestas = [json.loads(linea) async for linea in lector]
+            escritor.close()
+            return respuestas
+    return asyncio.run(principal())
+
+
+def _linea(solicitud):
+    return json.dumps(solicitud).encode("utf-8") + b"\n"
+
+
+def test_pipeline_largo_responde_todo_en_orden():
+    sistema = SistemaPrestamos()
+    respuestas = _conversar(sistema, [_linea({"op": "estadisticas"})] * 500 + [_linea({"op": "x"})])
+    assert len(respuestas) == 501
+    assert all(respuesta["ok"] for respuesta in respuestas[:-1])
+    assert not respuestas[-1]["ok"]
+
+
+def test_listar_se_detiene_en_el_limite():
+    sistema = SistemaPrestamos(inventario_compacto=True, cache_equipos=16)
+    for i in range(1000):
+        sistema.agregar_equipo(Tablet(f"Tab-{i}"))
+    sistema.registrar_prestamo("Tab-1", "Ana Garcia")
+    respuestas = _conversar(sistema, [
+        _linea({"op": "listar", "limite": 3}),
+        _linea({"op": "listar", "filtro": "prestados", "tipo": "Tablet"}),
+    ])
+    assert [equipo["nombre"] for equipo in respuestas[0]["datos"]] == ["Laptop-001", "Laptop-002", "iPad-001"]
+    assert [equipo["nombre"] for equipo in respuestas[1]["datos"]] == ["Tab-1"]
+    assert sistema._equipos.en_cache() < 16
+
+
+def test_listar_continua_desde_el_cursor():
+    sistema = SistemaPrestamos()
+    respuestas = _conversar(sistema, [
+        _linea({"op": "listar", "limite": 3}),
+        _linea({"op": "listar", "limite": 3, "cursor": 3}),
+    ])
+    nombres = [equipo["nombre"] for respuesta in respuestas for equipo in respuesta["datos"]]
+    assert respuestas[0]["cursor"] == 3
+    assert respuestas[1]["cursor"] is None
+    assert nombres == [equipo.nombre for equipo in sistema.listar_equipos(limite=100)[0]]
+
+
+def test_historial_responde_por_paginas():
+    sistema = SistemaPrestamos()
+    for i in range(5):
+        sistema.registrar_prestamo("Laptop-001", f"Usuario {i}")
+        sistema.devolver_equipo("Laptop-001")
+    respuestas = _conversar(sistema, [
+        _linea({"op": "historial", "equipo": "Laptop-001", "limite": 2}),
+        _linea({"op": "historial", "equipo": "Laptop-001", "limite": 2, "cursor": 2}),
+        _linea({"op": "historial", "equipo": "Laptop-001", "limite": 2, "cursor": 4}),
+        _linea({"op": "historial", "equipo": "Laptop-999"}),
+    ])
+    assert [respuesta.get("cursor") for respuesta in respuestas] == [2, 4, None, None]
+    usuarios = [prestamo[0] for respuesta in respuestas[:3] for prestamo in respuesta["datos"]]
+    assert usuarios == [f"Usuario {i}" for i in range(5)]
+    assert not respuestas[3]["ok"]
+
+
+def test_linea_demasiado_larga_cierra_la_conexion_con_un_error():
+    respuestas = _conversar(SistemaPrestamos(), [_linea({"op": "estadisticas"}), b"x" * 5000 + b"\n"],
+                            limite_linea=1024)
+    assert respuestas[0]["ok"]
+    assert respuestas[-1] == {"ok": False, "mensaje": "Solicitud demasiado larga."}
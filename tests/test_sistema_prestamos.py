@@ -0,0 +1,82 @@
+"""Pruebas de SistemaPrestamos: lotes y modo concurrente"""
+import random
+import threading
+from collections import Counter
+
+from ProyectoIntegrador import (
+    RESULTADO_EQUIPO_DISPONIBLE, RESULTADO_EQUIPO_INEXISTENTE, RESULTADO_EQUIPO_PRESTADO, RESULTADO_OK,
+    EquipoComputo, SistemaPrestamos, Tablet)
+from verificaciones import verificar_consistencia_prestamos
+
+
+def test_lotes_retornan_un_codigo_por_fila():
+    sistema = SistemaPrestamos()
+
+    prestamos = sistema.registrar_prestamos_lote([
+        ("Laptop-001", "Ana Garcia"), ("No-existe", "Ana Garcia"), ("Laptop-001", "Carlos Lopez"),
+        ("iPad-001", "Usuario Nuevo")])
+    devoluciones = sistema.devolver_lote(["Laptop-001", "Laptop-002", "No-existe", "Laptop-001"])
+
+    assert list(prestamos) == [RESULTADO_OK, RESULTADO_EQUIPO_INEXISTENTE, RESULTADO_EQUIPO_PRESTADO, RESULTADO_OK]
+    assert list(devoluciones) == [RESULTADO_OK, RESULTADO_EQUIPO_DISPONIBLE, RESULTADO_EQUIPO_INEXISTENTE,
+                                  RESULTADO_EQUIPO_DISPONIBLE]
+    assert list(sistema.agregar_equipos_lote([Tablet("Tab-1"), Tablet("Tab-1"), Tablet("iPad-001")])) == [1, 0, 0]
+    assert sistema.verificar_estadisticas() == {}
+
+
+def test_estadisticas_consistentes_despues_de_carga_concurrente():
+    sistema = SistemaPrestamos(concurrente=True, franjas_candados=8)
+    nombres_equipos = [f"Laptop-{i:03d}" for i in range(16)]
+    sistema.agregar_equipos_lote(EquipoComputo(nombre) for nombre in nombres_equipos)
+    prestamos_ok, devoluciones_ok = Counter(), Counter()
+    candado = threading.Lock()
+    barrera = threading.Barrier(8)
+
+    def trabajar(semilla):
+        generador = random.Random(semilla)
+        locales_prestamo, locales_devolucion = Counter(), Counter()
+        barrera.wait()
+        for _ in range(2000):
+            nombre_equipo = generador.choice(nombres_equipos)
+            if generador.random() < 0.5:
+                if sistema._prestar(nombre_equipo, f"Usuario {generador.randrange(32)}") == RESULTADO_OK:
+                    locales_prestamo[nombre_equipo] += 1
+            elif sistema._devolver(nombre_equipo) == RESULTADO_OK:
+                locales_devolucion[nombre_equipo] += 1
+        with candado:
+            prestamos_ok.update(locales_prestamo)
+            devoluciones_ok.update(locales_devolucion)
+
+    hilos = [threading.Thread(target=trabajar, args=(i,)) for i in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    verificar_consistencia_prestamos(sistema, prestamos_ok, devoluciones_ok)
+    estadisticas = sistema.estadisticas()
+    assert estadisticas["equipos_prestados"] == len(sistema._prestamos_activos)
+    assert estadisticas["total_prestamos"] == sum(prestamos_ok.values())
+
+
+def test_contadores_incrementales_coinciden_con_un_recuento(tmp_path):
+    ahora = [1_700_000_000]
+    sistema = SistemaPrestamos(reloj=lambda: ahora[0])
+    sistema.agregar_equipos_lote([Tablet(f"Tab-{i}") for i in range(10)] + [EquipoComputo("Laptop-001")])
+    for i in range(10):
+        ahora[0] += 3600
+        sistema.registrar_prestamo(f"Tab-{i}", f"Usuario {i % 3}")
+        if i % 2:
+            sistema.devolver_equipo(f"Tab-{i}")
+    sistema.registrar_prestamos_lote([("Laptop-002", "Ana Garcia"), ("Tab-1", "Carlos Lopez")])
+    sistema.devolver_lote(["Tab-0", "Tab-2"])
+    sistema.reservar_equipo("Tab-4", "Usuario 9")
+    sistema.devolver_equipo("Tab-4")
+    sistema.configurar_retencion(max_prestamos=1, archivo=str(tmp_path / "h.csv.gz"))
+    assert sistema.verificar_estadisticas() == {}
+
+    ruta_snapshot = str(tmp_path / "prestamos.snapshot")
+    sistema.guardar_snapshot(ruta_snapshot)
+    reabierto = SistemaPrestamos(snapshot=ruta_snapshot)
+    reabierto.registrar_prestamo("Tab-3", "Usuario 1")
+    assert reabierto.verificar_estadisticas() == {}
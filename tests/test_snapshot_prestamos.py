@@ -0,0 +1,99 @@
+"""Pruebas del snapshot combinado con la bitácora"""
+import random
+import threading
+
+from bitacora_prestamos import BitacoraPrestamos
+from ProyectoIntegrador import SistemaPrestamos, Tablet
+
+
+def test_reabrir_snapshot_y_bitacora_no_duplica_prestamos(tmp_path, abrir_bitacora):
+    ruta_snapshot = str(tmp_path / "prestamos.snapshot")
+    bitacora = abrir_bitacora()
+    sistema = SistemaPrestamos(bitacora=bitacora)
+    assert sistema.registrar_prestamo("Laptop-001", "Ana Garcia")[0]
+    assert sistema.devolver_equipo("Laptop-001")[0]
+    sistema.guardar_snapshot(ruta_snapshot)
+    assert sistema.registrar_prestamo("Laptop-002", "Ana Garcia")[0]
+    bitacora.cerrar()
+
+    reabierto = SistemaPrestamos(snapshot=ruta_snapshot, bitacora=abrir_bitacora())
+
+    assert reabierto.estadisticas()["total_prestamos"] == 2
+    assert reabierto._equipos["Laptop-001"].cantidad_prestamos() == 1
+    assert not reabierto._equipos["Laptop-002"].disponible
+    assert reabierto.verificar_estadisticas() == {}
+
+
+def test_len_de_particiones_no_recorre_el_snapshot(tmp_path):
+    ruta_snapshot = str(tmp_path / "prestamos.snapshot")
+    sistema = SistemaPrestamos()
+    sistema.registrar_prestamo("iPad-001", "Ana Garcia")
+    sistema.guardar_snapshot(ruta_snapshot)
+
+    reabierto = SistemaPrestamos(snapshot=ruta_snapshot)
+    for mapa in (reabierto._equipos_disponibles, reabierto._equipos_prestados, reabierto._prestamos_activos):
+        mapa._recorrer = None  # Falla si len() intenta recorrer el snapshot
+
+    assert len(reabierto._equipos_disponibles) == 3
+    assert len(reabierto._equipos_prestados) == 1
+    assert len(reabierto._prestamos_activos) == 1
+    reabierto.devolver_equipo("iPad-001")
+    assert len(reabierto._equipos_disponibles) == 4
+    assert len(reabierto._prestamos_activos) == 0
+
+
+def test_snapshots_durante_carga_concurrente_coinciden_con_la_bitacora(tmp_path, ruta_bitacora, abrir_bitacora):
+    bitacora = BitacoraPrestamos(ruta_bitacora)
+    sistema = SistemaPrestamos(concurrente=True, franjas_candados=8, bitacora=bitacora)
+    nombres_equipos = [f"Tab-{i}" for i in range(16)]
+    sistema.agregar_equipos_lote(Tablet(nombre) for nombre in nombres_equipos)
+    barrera = threading.Barrier(5)
+
+    def trabajar(semilla):
+        generador = random.Random(semilla)
+        barrera.wait()
+        for _ in range(3000):
+            nombre_equipo = generador.choice(nombres_equipos)
+            if generador.random() < 0.5:
+                sistema._prestar(nombre_equipo, f"Usuario {generador.randrange(8)}")
+            else:
+                sistema._devolver(nombre_equipo)
+
+    hilos = [threading.Thread(target=trabajar, args=(i,)) for i in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    barrera.wait()
+    rutas_snapshot = []
+    while any(hilo.is_alive() for hilo in hilos) and len(rutas_snapshot) < 10:
+        rutas_snapshot.append(str(tmp_path / f"prestamos-{len(rutas_snapshot)}.snapshot"))
+        sistema.guardar_snapshot(rutas_snapshot[-1])
+    for hilo in hilos:
+        hilo.join()
+    bitacora.cerrar()
+
+    # Cada snapshot más la cola de la bitácora debe dar el estado final exacto
+    for ruta_snapshot in rutas_snapshot:
+        reabierto = SistemaPrestamos(snapshot=ruta_snapshot, bitacora=abrir_bitacora())
+        assert reabierto.estadisticas() == sistema.estadisticas()
+        assert reabierto.verificar_estadisticas() == {}
+        assert dict(reabierto._prestamos_activos.items()) == dict(sistema._prestamos_activos)
+        for nombre in nombres_equipos:
+            assert reabierto._equipos[nombre].cantidad_prestamos() == sistema._equipos[nombre].cantidad_prestamos()
+        reabierto._bitacora.cerrar()
+
+
+def test_estadisticas_tras_cargar_no_crean_equipos(tmp_path):
+    ruta_snapshot = str(tmp_path / "prestamos.snapshot")
+    sistema = SistemaPrestamos()
+    sistema.agregar_equipos_lote(Tablet(f"Tab-{i}") for i in range(50))
+    sistema.registrar_prestamos_lote([("Tab-1", "Ana Garcia"), ("Laptop-001", "Juan Pérez"), ("Tab-2", "Ana Garcia")])
+    sistema.devolver_equipo("Tab-2")
+    sistema.guardar_snapshot(ruta_snapshot)
+
+    reabierto = SistemaPrestamos(snapshot=ruta_snapshot)
+
+    assert reabierto.estadisticas() == sistema.estadisticas()
+    assert not reabierto._equipos._cargados and not reabierto._usuarios._cargados
+    reabierto.registrar_prestamo("Tab-3", "Usuario Nuevo")
+    assert reabierto.estadisticas()["por_tipo_equipo"]["Tablet"]["prestados"] == 2
+    assert reabierto.verificar_estadisticas() == {}
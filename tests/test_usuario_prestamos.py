@@ -0,0 +1,57 @@
+"""Pruebas del registro de equipos prestados de Usuario"""
+import pytest
+
+from ProyectoIntegrador import SistemaPrestamos, Usuario
+
+
+class _SinRecorrer(dict):
+    """Diccionario que falla si se recorre: agregar y remover no deben hacerlo"""
+
+    def __iter__(self):
+        raise AssertionError("se recorrió el registro de equipos prestados")
+
+    keys = values = items = __iter__
+
+
+def test_agregar_y_remover_conservan_el_orden():
+    usuario = Usuario("Ana", "ana@email.com")
+    for i in range(10):
+        usuario.agregar_equipo_prestado(f"Tab-{i}")
+
+    usuario.remover_equipo_prestado("Tab-3")
+    usuario.remover_equipo_prestado("Tab-0")
+    usuario.remover_equipo_prestado("Tab-9")
+    usuario.remover_equipo_prestado("No-existe")  # Remover uno que no tiene no falla
+    usuario.agregar_equipo_prestado("Tab-5")  # Ya lo tiene: conserva su posición
+    usuario.agregar_equipo_prestado("Tab-0")
+
+    assert usuario.equipos_prestados == ["Tab-1", "Tab-2", "Tab-4", "Tab-5", "Tab-6", "Tab-7", "Tab-8", "Tab-0"]
+
+
+def test_agregar_y_remover_no_recorren_los_equipos():
+    usuario = Usuario("Ana", "ana@email.com")
+    usuario._equipos_prestados = _SinRecorrer((f"Tab-{i}", None) for i in range(10_000))
+
+    usuario.agregar_equipo_prestado("Tab-nueva")
+    usuario.remover_equipo_prestado("Tab-5000")
+    usuario.remover_equipo_prestado("Tab-nueva")
+
+    assert "Tab-5000" not in usuario.equipos_prestados
+    assert "Tab-4999" in usuario.equipos_prestados
+    assert len(usuario.equipos_prestados) == 9_999
+
+
+@pytest.mark.parametrize("lote", [False, True])
+def test_devoluciones_del_sistema_mantienen_el_orden_de_prestamo(lote):
+    sistema = SistemaPrestamos()
+    nombres = ["Laptop-001", "Laptop-002", "iPad-001", "Samsung-Tab-001"]
+    sistema.registrar_prestamos_lote((nombre, "Ana Garcia") for nombre in nombres)
+
+    if lote:
+        sistema.devolver_lote(["Laptop-002", "Samsung-Tab-001"])
+    else:
+        sistema.devolver_equipo("Laptop-002")
+        sistema.devolver_equipo("Samsung-Tab-001")
+    sistema.registrar_prestamo("Laptop-002", "Ana Garcia")
+
+    assert sistema._usuarios["Ana Garcia"].equipos_prestados == ["Laptop-001", "iPad-001", "Laptop-002"]
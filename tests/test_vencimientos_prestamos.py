@@ -0,0 +1,35 @@
+"""Pruebas de los vencimientos y del revisor"""
+import time
+
+from ProyectoIntegrador import SistemaPrestamos
+
+DIA = 86400
+
+
+def test_revisor_sigue_emitiendo_si_el_callback_falla():
+    ahora = [1_700_000_000]
+    sistema = SistemaPrestamos(reloj=lambda: ahora[0])
+    sistema.configurar_vencimientos(dias_defecto=1)
+    sistema.registrar_prestamo("Laptop-001", "Ana Garcia")
+    sistema.registrar_prestamo("Laptop-002", "Ana Garcia")
+    recibidos = []
+
+    def al_vencer(nombre_equipo, nombre_usuario, vencimiento):
+        recibidos.append(nombre_equipo)
+        if nombre_equipo == "Laptop-001":
+            raise RuntimeError("falla del callback")
+
+    ahora[0] += 2 * DIA
+    with sistema.iniciar_revisor(intervalo=0.01, al_vencer=al_vencer) as revisor:
+        limite = time.monotonic() + 5
+        while len(recibidos) < 2 and time.monotonic() < limite:
+            time.sleep(0.01)
+        sistema.registrar_prestamo("iPad-001", "Ana Garcia")
+        ahora[0] += 2 * DIA
+        while len(recibidos) < 3 and time.monotonic() < limite:
+            time.sleep(0.01)
+
+    assert recibidos == ["Laptop-001", "Laptop-002", "iPad-001"]
+    evento, error = revisor.errores.get_nowait()
+    assert evento[0] == "Laptop-001" and isinstance(error, RuntimeError)
+    assert revisor.errores.empty()
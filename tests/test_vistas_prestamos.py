@@ -0,0 +1,71 @@
+"""Pruebas de las vistas de solo lectura de historiales y préstamos"""
+import pytest
+
+from ProyectoIntegrador import SistemaPrestamos, Tablet, Usuario
+
+
+def _mutaciones(vista):
+    """Intentos de modificar una vista como si fuera una lista"""
+    return [
+        lambda: vista.append("x"),
+        lambda: vista.extend(["x"]),
+        lambda: vista.pop(),
+        lambda: vista.clear(),
+        lambda: vista.__setitem__(0, "x"),
+        lambda: vista.__delitem__(0),
+        lambda: vista.__iadd__(["x"]),
+    ]
+
+
+@pytest.fixture
+def sistema():
+    ahora = [1_700_000_000]
+    sistema = SistemaPrestamos(reloj=lambda: ahora[0])
+    for usuario in ("Ana Garcia", "Juan Pérez"):
+        ahora[0] += 60
+        sistema.registrar_prestamo("Laptop-001", usuario)
+        sistema.devolver_equipo("Laptop-001")
+    sistema.registrar_prestamo("iPad-001", "Ana Garcia")
+    sistema.registrar_prestamo("Laptop-002", "Ana Garcia")
+    return sistema
+
+
+def test_historial_prestamos_rechaza_modificaciones(sistema):
+    vista = sistema._equipos["Laptop-001"].historial_prestamos
+    for mutar in _mutaciones(vista):
+        with pytest.raises((AttributeError, TypeError)):
+            mutar()
+    assert [usuario for usuario, _ in vista] == ["Ana Garcia", "Juan Pérez"]
+
+
+def test_equipos_prestados_rechaza_modificaciones(sistema):
+    vista = sistema._usuarios["Ana Garcia"].equipos_prestados
+    for mutar in _mutaciones(vista):
+        with pytest.raises((AttributeError, TypeError)):
+            mutar()
+    assert vista == ["iPad-001", "Laptop-002"]
+
+
+def test_vistas_reflejan_cambios_y_copia_es_independiente(sistema):
+    equipo = sistema._equipos["Laptop-001"]
+    vista_historial = equipo.historial_prestamos
+    vista_prestados = sistema._usuarios["Ana Garcia"].equipos_prestados
+    copia_historial = vista_historial.copia()
+    copia_prestados = vista_prestados.copia()
+
+    sistema.registrar_prestamo("Laptop-001", "Ana Garcia")
+    copia_prestados.append("Otro")
+
+    assert len(vista_historial) == 3 and len(copia_historial) == 2
+    assert vista_historial[-1][0] == "Ana Garcia"
+    assert [usuario for usuario, _ in vista_historial[:2]] == ["Ana Garcia", "Juan Pérez"]
+    assert vista_prestados == ["iPad-001", "Laptop-002", "Laptop-001"]
+    assert "Otro" not in vista_prestados and "Laptop-001" in vista_prestados
+    assert vista_prestados[1] == "Laptop-002" and vista_prestados[-1] == "Laptop-001"
+    with pytest.raises(IndexError):
+        vista_prestados[3]
+
+
+def test_vistas_vacias():
+    assert Tablet("Tab-1").historial_prestamos == []
+    assert len(Usuario("Ana", "ana@email.com").equipos_prestados) == 0
@@ -0,0 +1,29 @@
+"""Verificaciones compartidas por las pruebas y el benchmark de concurrencia"""
+from collections import Counter
+
+
+def verificar_consistencia_prestamos(sistema, prestamos_ok, devoluciones_ok):
+    """
+    Verifica que no hubo préstamos dobles ni devoluciones perdidas
+
+    Args:
+        sistema (SistemaPrestamos): Sistema después de la prueba
+        prestamos_ok (Counter): Préstamos exitosos por equipo
+        devoluciones_ok (Counter): Devoluciones exitosas por equipo
+
+    Raises:
+        AssertionError: Si el estado final no es consistente
+    """
+    tenedores = Counter()
+    for usuario in sistema._usuarios.values():
+        for nombre_equipo in usuario.equipos_prestados:
+            tenedores[nombre_equipo] += 1
+            assert sistema._prestamos_activos.get(nombre_equipo) == usuario.nombre, nombre_equipo
+    for nombre, equipo in sistema._equipos.items():
+        activos = prestamos_ok[nombre] - devoluciones_ok[nombre]
+        assert activos == (0 if equipo.disponible else 1), f"{nombre}: {activos} préstamos activos"
+        assert tenedores[nombre] == activos, f"{nombre}: {tenedores[nombre]} usuarios lo tienen"
+        assert equipo.cantidad_prestamos() == prestamos_ok[nombre], nombre
+    assert len(sistema._historial) == sum(prestamos_ok.values())
+    diferencias = sistema.verificar_estadisticas()
+    assert not diferencias, f"Estadísticas inconsistentes: {diferencias}"
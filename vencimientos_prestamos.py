@@ -0,0 +1,283 @@
+"""
+Vencimientos de los préstamos activos
+
+Con SistemaPrestamos.configurar_vencimientos cada préstamo recibe una fecha
+de vencimiento: la fecha del préstamo más el plazo que corresponde al tipo
+de equipo y al tipo de usuario. Las fechas se guardan en un montículo
+(AgendaVencimientos), así que las consultas no recorren el inventario:
+
+- revisar(ahora) saca del montículo los préstamos que vencieron desde la
+  última revisión: O(k log n) para k vencimientos nuevos.
+- vencidos() lista los préstamos vencidos que siguen activos: O(k log k).
+- por_vencer(ahora, segundos) recorre solo los nodos del montículo que
+  vencen antes del límite: O(k log k).
+
+Las devoluciones marcan la entrada del préstamo como anulada; las entradas
+anuladas se descartan al llegar al frente del montículo, o todas juntas
+cuando son más que las vigentes.
+
+RevisorVencimientos es un hilo que revisa la agenda periódicamente (o
+cuando vence el próximo préstamo, lo que ocurra antes) y emite un evento
+por cada préstamo que vence. Si el callback falla, la excepción se deja en
+la cola `errores` y el hilo sigue revisando.
+
+Uso:
+    sistema.configurar_vencimientos({"Tablet": 2, "Profesor": 14, ("Tablet", "Profesor"): 7}, dias_defecto=3)
+    sistema.prestamos_vencidos()            # [(equipo, usuario, vence), ...]
+    sistema.prestamos_por_vencer(3600)      # los que vencen en la próxima hora
+    revisor = sistema.iniciar_revisor(intervalo=60, al_vencer=avisar)
+    ...
+    revisor.detener()
+"""
+import queue
+import threading
+from heapq import heapify, heappop, heappush
+from itertools import count
+
+
+class AgendaVencimientos:
+    """Montículo de fechas de vencimiento de los préstamos activos"""
+
+    def __init__(self, plazos=None, dias_defecto=None, concurrente=False):
+        """
+        Constructor de la agenda
+
+        Args:
+            plazos (dict): Días de plazo por (tipo de equipo, tipo de
+                usuario), por tipo de usuario o por tipo de equipo; se usa la
+                clave más específica que exista, en ese orden
+            dias_defecto (float): Días de plazo cuando ninguna clave aplica
+                (None: esos préstamos no vencen)
+            concurrente (bool): Si es True, la agenda se modifica con un candado
+        """
+        self._plazos = {clave: int(dias * 86400) for clave, dias in (plazos or {}).items()}
+        self._plazo_defecto = int(dias_defecto * 86400) if dias_defecto is not None else None
+        self._monticulo = []  # Entradas [vence, secuencia, nombre equipo] (nombre None si se anuló)
+        self._vigentes = {}  # Diccionario: nombre equipo -> entrada en el montículo
+        self._vencidos = {}  # Diccionario: nombre equipo -> vencimiento (ya fuera del montículo)
+        self._anuladas = 0  # Entradas anuladas que siguen en el montículo
+        self._secuencia = count()
+        self._candado = threading.Lock() if concurrente else None
+
+    def _con_candado(self, funcion, *args):
+        """Ejecuta la función tomando el candado de la agenda, si tiene uno"""
+        if self._candado is None:
+            return funcion(*args)
+        with self._candado:
+            return funcion(*args)
+
+    def plazo(self, tipo_equipo, tipo_usuario):
+        """
+        Retorna el plazo en segundos de un préstamo, o None si no vence
+
+        Args:
+            tipo_equipo (str): Tipo del equipo prestado
+            tipo_usuario (str): Tipo del usuario que lo recibe
+        """
+        plazos = self._plazos
+        plazo = plazos.get((tipo_equipo, tipo_usuario))
+        if plazo is None:
+            plazo = plazos.get(tipo_usuario)
+        if plazo is None:
+            plazo = plazos.get(tipo_equipo, self._plazo_defecto)
+        return plazo
+
+    def prestado(self, nombre_equipo, tipo_equipo, tipo_usuario, fecha):
+        """
+        Agenda el vencimiento de un préstamo nuevo
+
+        Args:
+            nombre_equipo (str): Equipo prestado
+            tipo_equipo (str): Tipo del equipo
+            tipo_usuario (str): Tipo del usuario
+            fecha (int): Fecha del préstamo en segundos desde epoch
+
+        Returns:
+            int: Fecha de vencimiento, o None si el préstamo no vence
+        """
+        plazo = self.plazo(tipo_equipo, tipo_usuario)
+        if plazo is None:
+            return None
+        vence = fecha + plazo
+        self._con_candado(self._agregar, nombre_equipo, vence)
+        return vence
+
+    def _agregar(self, nombre_equipo, vence):
+        """Agrega la entrada del préstamo al montículo (ver prestado)"""
+        self._quitar(nombre_equipo)
+        entrada = [vence, next(self._secuencia), nombre_equipo]
+        self._vigentes[nombre_equipo] = entrada
+        heappush(self._monticulo, entrada)
+
+    def devuelto(self, nombre_equipo):
+        """Quita de la agenda el préstamo de un equipo devuelto"""
+        if nombre_equipo in self._vigentes or nombre_equipo in self._vencidos:
+            self._con_candado(self._quitar, nombre_equipo)
+
+    def _quitar(self, nombre_equipo):
+        """Anula la entrada del equipo, o lo quita de los vencidos (ver devuelto)"""
+        entrada = self._vigentes.pop(nombre_equipo, None)
+        if entrada is None:
+            self._vencidos.pop(nombre_equipo, None)
+            return
+        entrada[2] = None
+        self._anuladas += 1
+        if self._anuladas > 1024 and self._anuladas > len(self._vigentes):
+            # Más anuladas que vigentes: se reconstruye el montículo en O(n)
+            self._monticulo = list(self._vigentes.values())
+            heapify(self._monticulo)
+            self._anuladas = 0
+
+    def vencimiento(self, nombre_equipo):
+        """Retorna la fecha de vencimiento del préstamo de un equipo, o None"""
+        entrada = self._vigentes.get(nombre_equipo)
+        if entrada is not None:
+            return entrada[0]
+        return self._vencidos.get(nombre_equipo)
+
+    def proximo(self):
+        """Retorna el vencimiento más cercano entre los préstamos no vencidos, o None"""
+        return self._con_candado(self._proximo)
+
+    def _proximo(self):
+        """Descarta las anuladas del frente y retorna su vencimiento (ver proximo)"""
+        monticulo = self._monticulo
+        while monticulo and monticulo[0][2] is None:
+            heappop(monticulo)
+            self._anuladas -= 1
+        return monticulo[0][0] if monticulo else None
+
+    def revisar(self, ahora):
+        """
+        Pasa a vencidos los préstamos cuyo vencimiento ya llegó
+
+        Args:
+            ahora (int): Fecha actual en segundos desde epoch
+
+        Returns:
+            list: Pares (nombre equipo, vencimiento) que vencieron desde la
+                revisión anterior, en orden de vencimiento
+        """
+        return self._con_candado(self._revisar, ahora)
+
+    def _revisar(self, ahora):
+        """Saca del montículo las entradas vencidas (ver revisar)"""
+        monticulo = self._monticulo
+        nuevos = []
+        while monticulo and monticulo[0][0] <= ahora:
+            vence, _, nombre_equipo = heappop(monticulo)
+            if nombre_equipo is None:
+                self._anuladas -= 1
+                continue
+            del self._vigentes[nombre_equipo]
+            self._vencidos[nombre_equipo] = vence
+            nuevos.append((nombre_equipo, vence))
+        return nuevos
+
+    def vencidos(self, ahora):
+        """
+        Retorna los préstamos vencidos que siguen activos
+
+        Returns:
+            list: Pares (nombre equipo, vencimiento), del más atrasado al más reciente
+        """
+        self.revisar(ahora)
+        vencidos = self._con_candado(lambda: list(self._vencidos.items()))
+        vencidos.sort(key=lambda par: par[1])
+        return vencidos
+
+    def por_vencer(self, ahora, segundos):
+        """
+        Retorna los préstamos que vencen después de `ahora` y hasta
+        `ahora + segundos`, recorriendo solo esa parte del montículo
+
+        Returns:
+            list: Pares (nombre equipo, vencimiento) en orden de vencimiento
+        """
+        self.revisar(ahora)
+        return self._con_candado(self._por_vencer, ahora + segundos)
+
+    def _por_vencer(self, limite):
+        """Recorre el montículo en orden hasta el límite (ver por_vencer)"""
+        monticulo = self._monticulo
+        resultado = []
+        # Frontera del recorrido: los hijos de un nodo solo se visitan si el nodo entra en el rango
+        frontera = [(monticulo[0][0], 0)] if monticulo else []
+        while frontera:
+            vence, posicion = heappop(frontera)
+            if vence > limite:
+                break
+            nombre_equipo = monticulo[posicion][2]
+            if nombre_equipo is not None:
+                resultado.append((nombre_equipo, vence))
+            for hijo in (2 * posicion + 1, 2 * posicion + 2):
+                if hijo < len(monticulo):
+                    heappush(frontera, (monticulo[hijo][0], hijo))
+        return resultado
+
+    def __len__(self):
+        """Cantidad de préstamos con vencimiento (vigentes y vencidos)"""
+        return len(self._vigentes) + len(self._vencidos)
+
+
+class RevisorVencimientos:
+    """Hilo que revisa los vencimientos del sistema y emite un evento por cada préstamo vencido"""
+
+    def __init__(self, sistema, intervalo=60.0, al_vencer=None):
+        """
+        Constructor del revisor; el hilo empieza al crearlo
+
+        Args:
+            sistema (SistemaPrestamos): Sistema con vencimientos configurados
+            intervalo (float): Segundos máximos entre revisiones
+            al_vencer (callable): al_vencer(nombre_equipo, nombre_usuario,
+                vencimiento) por cada préstamo que vence; si no se indica,
+                los eventos se dejan en la cola `eventos`. Sus excepciones
+                se dejan en la cola `errores`
+        """
+        self._sistema = sistema
+        self._intervalo = intervalo
+        self.al_vencer = al_vencer
+        self.eventos = queue.SimpleQueue()  # Tuplas (equipo, usuario, vencimiento) si no hay al_vencer
+        # Tuplas (evento o None si falló la revisión, excepción); el hilo sigue revisando
+        self.errores = queue.SimpleQueue()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._ciclo, name="revisor-vencimientos", daemon=True)
+        self._hilo.start()
+
+    def _ciclo(self):
+        """Revisa la agenda hasta que se detenga el revisor"""
+        sistema = self._sistema
+        while not self._detener.is_set():
+            espera = self._intervalo
+            try:
+                for evento in sistema.revisar_vencimientos():
+                    self._emitir(evento)
+                # Se despierta al vencer el próximo préstamo si ocurre antes del intervalo
+                proximo = sistema.proximo_vencimiento()
+                if proximo is not None:
+                    espera = min(espera, max(proximo - sistema._historial.reloj(), 0) + 1)
+            except Exception as error:
+                self.errores.put((None, error))
+            self._detener.wait(espera)
+
+    def _emitir(self, evento):
+        """Entrega un evento al callback (o a la cola); un callback que falla no detiene el hilo"""
+        if self.al_vencer is None:
+            self.eventos.put(evento)
+            return
+        try:
+            self.al_vencer(*evento)
+        except Exception as error:
+            self.errores.put((evento, error))
+
+    def detener(self):
+        """Detiene el hilo y espera a que termine la revisión en curso"""
+        self._detener.set()
+        self._hilo.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.detener()